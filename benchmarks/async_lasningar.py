@@ -0,0 +1,141 @@
+# benchmarks/async_lasningar.py
+"""
+⏱️ BENCHMARK: Trådar med synkrona repositories mot en event-loop med async-repositories.
+
+En "sida" här är det bostadssidan läser: bostaden, tre liknande bostäder och bilderna
+(tre frågor). Sidan läses på två sätt:
+
+- tradar:     Som en WSGI-server (t.ex. gunicorn med trådar): TRADAR trådar, varje tråd
+              läser EN sida i taget med bostad_repo/bild_repo, frågorna efter varandra.
+- event-loop: Som en ASGI-server: EN tråd med en event-loop, 'samtidiga' sidor åt gången,
+              varje sida läser sina tre frågor samtidigt (asyncio.gather) via async-
+              repositoryna. Antalet öppna anslutningar begränsas av ASYNC_MAX_ANSLUTNINGAR.
+
+--fordrojning-ms lägger till en väntan före varje fråga (time.sleep respektive
+asyncio.sleep) för att efterlikna långsam I/O, t.ex. en databas på en nätverksdisk.
+OBS! Trådarna läser ORM-objekt (som de synkrona sidorna gjorde), event-loopen råa rader -
+utan fördröjning kommer en del av skillnaden därifrån.
+Körs från projektroten mot en egen testdatabas (BLGEE_DATABAS):
+
+    python benchmarks/async_lasningar.py
+    python benchmarks/async_lasningar.py --samtidiga 1 8 64 --fordrojning-ms 0 5 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ANTAL_BOSTADER = 2000
+TRADAR = 8          # Trådar i den synkrona "servern" (som gunicorn --threads 8)
+
+
+def seeda(app):
+    from database import db
+    from models.bostad import Bostad
+    with app.app_context():
+        db.session.execute(db.insert(Bostad), [
+            {'adress': f'Testgatan {i}', 'stad': ('Falun', 'Borlänge', 'Mora')[i % 3],
+             'pris': f'{1_000_000 + i * 1000:,} kr'.replace(',', ' '), 'rum': 1 + i % 6,
+             'yta': 30 + i % 120, 'beskrivning': 'En trevlig bostad. ' * 10}
+            for i in range(ANTAL_BOSTADER)
+        ])
+        db.session.commit()
+        return db.session.scalars(db.select(Bostad.id).order_by(Bostad.id)).all()
+
+
+def _sidor(idn, antal):
+    """(bostad_id, liknande id:n) för 'antal' sidor, spridda över tabellen."""
+    return [(idn[(i * 7919) % len(idn)], [idn[(i * 7919 + k) % len(idn)] for k in (1, 2, 3)])
+            for i in range(antal)]
+
+
+def mat_tradar(app, sidor, fordrojning):
+    """Returns: lista med millisekunder per sida."""
+    from dbrepositories.bild_repository import bild_repo
+    from dbrepositories.bostad_repository import bostad_repo
+
+    def las_sida(sida):
+        bostad_id, liknande = sida
+        start = time.perf_counter()
+        with app.app_context():
+            for fraga in (lambda: bostad_repo.hamta_flera([bostad_id]),
+                          lambda: bostad_repo.hamta_flera(liknande),
+                          lambda: bild_repo.hamta_for_bostad(bostad_id)):
+                time.sleep(fordrojning)
+                fraga()
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=TRADAR) as pool:
+        return list(pool.map(las_sida, sidor))
+
+
+async def mat_event_loop(sidor, samtidiga, fordrojning):
+    """Returns: lista med millisekunder per sida."""
+    from dbrepositories.async_bostad_repository import async_bostad_repo
+    from dbrepositories.bostad_repository import bostad_repo
+
+    # hamta_en() läser genom entitetscachen - börja tom, så att varje sida blir tre frågor som i trådarna
+    bostad_repo.cache.rensa()
+
+    async def fraga(coroutine):
+        await asyncio.sleep(fordrojning)
+        return await coroutine
+
+    async def las_sida(sida):
+        bostad_id, liknande = sida
+        start = time.perf_counter()
+        await asyncio.gather(fraga(async_bostad_repo.hamta_en(bostad_id)),
+                             fraga(async_bostad_repo.hamta_flera(liknande)),
+                             fraga(async_bostad_repo.hamta_bilder(bostad_id)))
+        return (time.perf_counter() - start) * 1000
+
+    # 'samtidiga' besökare som var och en läser sida efter sida
+    tider, ko = [], list(reversed(sidor))
+
+    async def besokare():
+        while ko:
+            tider.append(await las_sida(ko.pop()))
+
+    await asyncio.gather(*(besokare() for _ in range(samtidiga)))
+    return tider
+
+
+def main():
+    tolk = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    tolk.add_argument('--samtidiga', type=int, nargs='+', default=[1, 8, 64])
+    tolk.add_argument('--fordrojning-ms', type=float, nargs='+', default=[0, 5])
+    tolk.add_argument('--sidor', type=int, default=400)
+    argument = tolk.parse_args()
+
+    with tempfile.TemporaryDirectory() as katalog:
+        os.environ['BLGEE_DATABAS'] = 'sqlite:///' + os.path.join(katalog, 'bench.db')
+        sys.path.insert(0, ROT)
+        from dbrepositories.async_databas import async_databas
+        from flask_app import app
+
+        sidor = _sidor(seeda(app), argument.sidor)
+        print(f'{argument.sidor} sidor à 3 frågor, {TRADAR} trådar, '
+              f'max {async_databas.max_anslutningar} async-anslutningar\n')
+        print(f"{'fördröjning':>12} {'sätt':<11} {'samtidiga':>9} {'sidor/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        for fordrojning_ms in argument.fordrojning_ms:
+            fordrojning = fordrojning_ms / 1000
+            # Trådarna mäts en gång: fler samtidiga besökare än trådar får ändå vänta i kö
+            matningar = [('tradar', TRADAR, lambda: mat_tradar(app, sidor, fordrojning))]
+            matningar += [('event-loop', samtidiga,
+                           lambda samtidiga=samtidiga: asyncio.run(mat_event_loop(sidor, samtidiga, fordrojning)))
+                          for samtidiga in argument.samtidiga]
+            for satt, samtidiga, mat in matningar:
+                start = time.perf_counter()
+                tider = mat()
+                totalt = time.perf_counter() - start
+                print(f"{fordrojning_ms:>10.0f}ms {satt:<11} {samtidiga:>9} {len(tider) / totalt:>9.0f} "
+                      f"{statistics.median(tider):>8.2f} {statistics.quantiles(tider, n=20)[18]:>8.2f}")
+            print()
+
+if __name__ == '__main__':
+    main()
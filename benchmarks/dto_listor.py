@@ -0,0 +1,135 @@
+# benchmarks/dto_listor.py
+"""
+⏱️ BENCHMARK: ORM-objekt mot DTO:er (dbrepositories/dto.py) på listsidorna.
+
+Mäter kostnaden PER RAD för bostadslistan och nyhetslistan, på två sätt:
+- orm: Som sidorna läste innan (Bostad/Nyhet-objekt via sessionen, identity map osv.)
+- dto: Med som_dto=True (kolumnvärden direkt till frysta dataclasses med __slots__)
+
+För varje sätt mäts två steg:
+- Läsa:     bara repositoryts generator, rad för rad (µs per rad)
+- Rendera:  läsa + rendera listmallen (µs per rad)
+- Minne:    hur mycket Python-minnet som mest växte när ALLA rader hölls i en lista
+            (byte per rad, tracemalloc) - det en cache eller en ej strömmad sida betalar
+
+Körs från projektroten mot en egen testdatabas (BLGEE_DATABAS):
+
+    python benchmarks/dto_listor.py
+    python benchmarks/dto_listor.py --bostader 20000 --nyheter 2000 --rundor 7
+"""
+import argparse
+import gc
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from itertools import chain
+
+ROT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KOMMENTARER_PER_NYHET = 4
+
+
+def seeda(app, antal_bostader, antal_nyheter):
+    from database import db
+    from models.bostad import Bostad
+    from models.kommentar import Kommentar
+    from models.nyhet import Nyhet
+    with app.app_context():
+        db.session.execute(db.insert(Bostad), [
+            {'adress': f'Testgatan {i}', 'stad': ('Falun', 'Borlänge', 'Mora')[i % 3],
+             'pris': f'{1_000_000 + i * 1000:,} kr'.replace(',', ' '), 'rum': 1 + i % 6,
+             'yta': 30 + i % 120, 'beskrivning': 'En trevlig bostad. ' * 10}
+            for i in range(antal_bostader)
+        ])
+        forsta = (db.session.scalar(db.select(db.func.max(Nyhet.id))) or 0) + 1
+        db.session.execute(db.insert(Nyhet), [
+            {'titel': f'Nyhet {i}', 'innehall': 'Marknaden rör på sig. ' * 20,
+             'datum': datetime(2025, 1, 1 + i % 28), 'maklare_id': 1 + i % 2}
+            for i in range(antal_nyheter)
+        ])
+        db.session.execute(db.insert(Kommentar), [
+            {'namn': f'Läsare {k}', 'innehall': 'Intressant!', 'datum': datetime(2025, 2, 1), 'nyhet_id': forsta + i}
+            for i in range(antal_nyheter) for k in range(KOMMENTARER_PER_NYHET)
+        ])
+        db.session.commit()
+
+
+def listor(som_dto):
+    """(namn, mall, funktion som ger mallens argument av en radgenerator, radgenerator) per lista."""
+    from dbrepositories.bostad_repository import bostad_repo
+    from dbrepositories.nyhet_repository import nyhet_repo
+    return (
+        ('bostader', 'bostader_lista.html', lambda rader: {'bostader': ((bostad, None, False) for bostad in rader)},
+         lambda: chain.from_iterable(bostad_repo.strom_i_delar(som_dto=som_dto))),
+        ('nyheter', 'nyhets_lista.html', lambda rader: {'nyheter_lista': rader},
+         lambda: nyhet_repo.strom_alla_med_relationer(som_dto=som_dto)),
+    )
+
+
+def mat(app, rundor):
+    """Returns: dict (lista, sätt) -> {'las_us', 'rendera_us', 'byte'} per rad."""
+    from flask import render_template
+    from database import db
+
+    resultat = {}
+    for satt in ('orm', 'dto'):
+        for namn, mall, argument, rader in listor(satt == 'dto'):
+            las, rendera = [], []
+            for _ in range(rundor):
+                with app.test_request_context('/'):
+                    start = time.perf_counter()
+                    antal = sum(1 for _ in rader())
+                    las.append((time.perf_counter() - start) / antal)
+                    db.session.remove()
+
+                    start = time.perf_counter()
+                    render_template(mall, titel=namn, **argument(rader()))
+                    rendera.append((time.perf_counter() - start) / antal)
+                    db.session.remove()
+
+            with app.test_request_context('/'):
+                gc.collect()
+                tracemalloc.start()
+                alla = list(rader())
+                _, topp = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                del alla
+                db.session.remove()
+
+            resultat[namn, satt] = {'antal': antal, 'las_us': statistics.median(las) * 1e6,
+                                    'rendera_us': statistics.median(rendera) * 1e6, 'byte': topp / antal}
+    return resultat
+
+
+def main():
+    tolk = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    tolk.add_argument('--bostader', type=int, default=5000)
+    tolk.add_argument('--nyheter', type=int, default=500)
+    tolk.add_argument('--rundor', type=int, default=5)
+    argument = tolk.parse_args()
+
+    with tempfile.TemporaryDirectory() as katalog:
+        os.environ['BLGEE_DATABAS'] = 'sqlite:///' + os.path.join(katalog, 'bench.db')
+        sys.path.insert(0, ROT)
+        from flask_app import app
+
+        seeda(app, argument.bostader, argument.nyheter)
+        resultat = mat(app, argument.rundor)
+
+    print(f"{'lista':<9} {'sätt':<5} {'rader':>7} {'läsa µs/rad':>12} {'rendera µs/rad':>15} {'byte/rad':>9}")
+    for (namn, satt), rad in resultat.items():
+        print(f"{namn:<9} {satt:<5} {rad['antal']:>7} {rad['las_us']:>12.1f} {rad['rendera_us']:>15.1f} "
+              f"{rad['byte']:>9.0f}")
+    print()
+    for namn in ('bostader', 'nyheter'):
+        orm, dto = resultat[namn, 'orm'], resultat[namn, 'dto']
+        print(f"{namn}: läsa {orm['las_us'] / dto['las_us']:.1f}x snabbare, "
+              f"rendera {orm['rendera_us'] / dto['rendera_us']:.1f}x snabbare, "
+              f"{1 - dto['byte'] / orm['byte']:.0%} mindre minne per rad med DTO:er")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# benchmarks/strommade_listor.py
+"""
+⏱️ BENCHMARK: render_template() mot strömmad rendering av bostadslistan.
+
+Mäter för olika antal bostäder:
+- TTFB:   tid tills första byten av sidan finns (för render_template = hela sidan)
+- Totalt: tid tills hela sidan är renderad
+- Topp-RSS: hur mycket processens minne (RSS) som mest växte under renderingen
+
+Varje mätning körs i en EGEN process mot en egen testdatabas (BLGEE_DATABAS), så att
+minnet från en mätning inte påverkar nästa. Körs från projektroten:
+
+    python benchmarks/strommade_listor.py
+    python benchmarks/strommade_listor.py --antal 1000 20000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SATT = ('render_template', 'strommad')
+
+
+def _minne_kb(falt):
+    """Läser VmRSS eller VmHWM (topp-RSS) ur /proc/self/status (Linux)."""
+    with open('/proc/self/status') as fil:
+        for rad in fil:
+            if rad.startswith(falt + ':'):
+                return int(rad.split()[1])
+    return 0
+
+
+def _nollstall_topp_rss():
+    """Nollställer VmHWM så att toppen kan mätas för ett enskilt steg (Linux 4.0+)."""
+    with open('/proc/self/clear_refs', 'w') as fil:
+        fil.write('5')
+
+
+def seeda(antal):
+    """Fyller testdatabasen med 'antal' bostäder med EN sats (utan repositoryts lyssnare)."""
+    from database import db
+    from flask_app import app
+    from models.bostad import Bostad
+    with app.app_context():
+        db.session.execute(db.insert(Bostad), [
+            {'adress': f'Testgatan {i}', 'stad': ('Falun', 'Borlänge', 'Mora')[i % 3],
+             'pris': f'{1_000_000 + i * 1000:,} kr'.replace(',', ' '), 'rum': 1 + i % 6,
+             'yta': 30 + i % 120, 'beskrivning': 'En trevlig bostad. ' * 10}
+            for i in range(antal)
+        ])
+        db.session.commit()
+
+
+def mat(satt):
+    """Renderar /bostader/ på det angivna sättet och skriver resultatet som JSON."""
+    from flask import render_template
+    from dbrepositories.bild_repository import bild_repo
+    from dbrepositories.bostad_repository import bostad_repo
+    from flask_app import app
+
+    with app.test_request_context('/bostader/'):
+        rss_fore = _minne_kb('VmRSS')
+        _nollstall_topp_rss()
+        start = time.perf_counter()
+
+        if satt == 'render_template':
+            # Så som listan renderades innan: allt läses och renderas innan något skickas
+            bostader = bostad_repo.hamta_alla()
+            omslag = bild_repo.hamta_omslagsbilder([bostad.id for bostad in bostader])
+            html = render_template('bostader_lista.html', titel='Våra bostäder',
+                                   bostader=[(bostad, omslag.get(bostad.id), False) for bostad in bostader])
+            ttfb = time.perf_counter() - start
+            storlek = len(html.encode('utf-8'))
+        else:
+            svar = app.view_functions['bostader_bp.lista_bostader']()
+            bitar = svar.iter_encoded()
+            storlek = len(next(bitar))
+            ttfb = time.perf_counter() - start
+            for bit in bitar:
+                storlek += len(bit)
+
+        totalt = time.perf_counter() - start
+        topp = _minne_kb('VmHWM') - rss_fore
+
+    print(json.dumps({'ttfb_ms': ttfb * 1000, 'totalt_ms': totalt * 1000, 'topp_rss_mb': topp / 1024,
+                      'kb': storlek / 1024}))
+
+
+def main():
+    tolk = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    tolk.add_argument('--antal', type=int, nargs='+', default=[1000, 10000, 50000])
+    tolk.add_argument('--seeda', type=int, help=argparse.SUPPRESS)
+    tolk.add_argument('--mat', choices=SATT, help=argparse.SUPPRESS)
+    argument = tolk.parse_args()
+
+    if argument.seeda is not None:
+        return seeda(argument.seeda)
+    if argument.mat:
+        return mat(argument.mat)
+
+    print(f"{'bostäder':>9} {'sätt':<16} {'TTFB ms':>9} {'totalt ms':>10} {'topp-RSS MB':>12} {'sida kB':>9}")
+    for antal in argument.antal:
+        with tempfile.TemporaryDirectory() as katalog:
+            miljo = {**os.environ, 'BLGEE_DATABAS': 'sqlite:///' + os.path.join(katalog, 'bench.db'),
+                     'PYTHONPATH': ROT}
+            kor = lambda *flaggor: subprocess.run([sys.executable, __file__, *flaggor], env=miljo, cwd=ROT,
+                                                  check=True, capture_output=True, text=True).stdout
+            kor('--seeda', str(antal))
+            for satt in SATT:
+                resultat = json.loads(kor('--mat', satt).strip().splitlines()[-1])
+                print(f"{antal:>9} {satt:<16} {resultat['ttfb_ms']:>9.1f} {resultat['totalt_ms']:>10.1f} "
+                      f"{resultat['topp_rss_mb']:>12.1f} {resultat['kb']:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,397 @@
+# benchmarks/svit.py
+"""
+📊 BENCHMARKSVIT: Mäter de viktigaste sidorna och jämför med en sparad baslinje.
+
+Sviten skapar en egen testdatabas (BLGEE_DATABAS) med ett genererat, alltid likadant
+innehåll och kör sedan varje arbetslast ARBETSLASTER genom Flasks testklient - i samma
+process, utan nätverk. För varje arbetslast mäts:
+
+- Latens:        p50, p95 och p99 i millisekunder (hela svaret, även strömmade sidor)
+- SQL-frågor:    antal frågor per request (SQLAlchemys 'before_cursor_execute' och
+                 async-repositorynas lyssnare)
+- Allokeringar:  hur mycket Python-minnet som mest växte under en request (tracemalloc).
+                 Mäts i ett EGET varv, eftersom tracemalloc gör koden långsammare.
+
+Resultatet skrivs som JSON. 'jamfor' jämför två resultat och avslutar med felkod 1 om
+någon arbetslast blivit sämre än tröskeln - så kan sviten köras i CI. Körs från projektroten:
+
+    python benchmarks/svit.py kor                                   # Skriv ut resultatet
+    python benchmarks/svit.py kor --spara benchmarks/baslinje.json  # Ny baslinje
+    python benchmarks/svit.py kor --spara /tmp/nu.json
+    python benchmarks/svit.py jamfor /tmp/nu.json                   # Mot benchmarks/baslinje.json
+
+TRÖSKLAR: Latensen varierar mellan körningar (andra processer på datorn, CPU-frekvens),
+så den får växa med --troskel (standard 50 %) innan den räknas som försämring.
+Allokeringarna är nästan exakt lika varje gång och har en snävare tröskel (--troskel-minne,
+standard 10 %). Antalet SQL-frågor är exakt samma vid varje körning och flaggas vid VARJE
+ökning. Jämför bara resultat från samma dator - latensen beror på maskinen.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+ROT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASLINJE = os.path.join(ROT, 'benchmarks', 'baslinje.json')
+
+# Testdatabasens storlek. Under MAX_LADDADE_OBJEKT, så att listsidorna inte varnar.
+ANTAL_BOSTADER = 800
+ANTAL_NYHETER = 60
+KOMMENTARER_PER_NYHET = 8
+
+STANDARD_ITERATIONER = 60
+UPPVARMNING = 3
+RUNDOR = 5
+STANDARD_TROSKEL = 0.5          # Latens
+STANDARD_TROSKEL_MINNE = 0.1    # Allokeringar
+
+# Måtten som jämförs och vilken tröskel som gäller (None = varje ökning är en försämring)
+JAMFORDA_MATT = (('p50_ms', 'latens'), ('p95_ms', 'latens'), ('allokerat_kb', 'minne'), ('fragor', None))
+
+ADMIN = {'username': 'pei', 'password': '1234'}
+
+
+def seeda():
+    """Fyller testdatabasen med bostäder, nyheter och kommentarer (samma innehåll varje gång)."""
+    from database import db
+    from models.bostad import Bostad
+    from models.kommentar import Kommentar
+    from models.nyhet import Nyhet
+
+    stader = ('Falun', 'Borlänge', 'Mora', 'Leksand', 'Rättvik')
+    db.session.execute(db.insert(Bostad), [
+        {'adress': f'Testgatan {i}', 'stad': stader[i % len(stader)],
+         'pris': f'{1_000_000 + i * 1000:,} kr'.replace(',', ' '), 'rum': 1 + i % 6,
+         'yta': 30 + i % 120, 'beskrivning': 'En trevlig bostad nära centrum. ' * 8}
+        for i in range(ANTAL_BOSTADER)
+    ])
+    forsta_nyhet = (db.session.scalar(db.select(db.func.max(Nyhet.id))) or 0) + 1
+    db.session.execute(db.insert(Nyhet), [
+        {'titel': f'Nyhet nummer {i}', 'innehall': 'Marknaden i Dalarna rör på sig. ' * 20,
+         'datum': datetime(2025, 1, 1 + i % 28), 'maklare_id': 1}
+        for i in range(ANTAL_NYHETER)
+    ])
+    db.session.execute(db.insert(Kommentar), [
+        {'namn': f'Läsare {k}', 'innehall': 'Intressant läsning!', 'datum': datetime(2025, 2, 1),
+         'nyhet_id': forsta_nyhet + i}
+        for i in range(ANTAL_NYHETER) for k in range(KOMMENTARER_PER_NYHET)
+    ])
+    db.session.commit()
+    return db.session.scalars(db.select(Bostad.id).order_by(Bostad.id)).all()
+
+
+# ============================================================
+# ARBETSLASTER
+# ============================================================
+# Varje arbetslast är en funktion (klient, i, data) -> (metod, url, formulär, förväntad status).
+# 'data' är en dictionary som sviten delar mellan arbetslasterna (bostads-id:n m.m.).
+
+def _bostadsformular(i, prefix='Benchgatan'):
+    return {'adress': f'{prefix} {i}', 'stad': 'Falun', 'pris': '2 500 000 kr',
+            'rum': '3', 'yta': '75', 'beskrivning': 'Skapad av benchmarksviten.'}
+
+
+def bostader_lista(klient, i, data):
+    return 'GET', '/bostader/', None, 200
+
+
+def bostad_detalj(klient, i, data):
+    # Sprid besöken över hela tabellen (7919 är ett primtal) - inte samma bostad i cachen varje gång
+    idn = data['bostad_idn']
+    return 'GET', f"/bostader/bostad/{idn[(i * 7919) % len(idn)]}", None, 200
+
+
+def nyheter(klient, i, data):
+    return 'GET', '/nyheter/', None, 200
+
+
+def kontor_api(klient, i, data):
+    return 'GET', '/kontor/api/data', None, 200
+
+
+def autokomplettera(klient, i, data):
+    # Som en besökare som skriver 'testgatan 1' ett tecken i taget (och en stad emellanåt)
+    text = 'testgatan 1'
+    if i % 4 == 3:
+        return 'GET', f"/bostader/api/autokomplettera?falt=stad&q={'bor'[:1 + i % 3]}", None, 200
+    return 'GET', f'/bostader/api/autokomplettera?q={text[:1 + i % len(text)]}', None, 200
+
+
+def inloggning(klient, i, data):
+    return 'POST', '/auth/login', ADMIN, 302
+
+
+def admin_skapa(klient, i, data):
+    return 'POST', '/admin/add', _bostadsformular(i), 302
+
+
+def admin_uppdatera(klient, i, data):
+    idn = data['bostad_idn']
+    return 'POST', f"/admin/edit/{idn[i % len(idn)]}", _bostadsformular(i, 'Ändrade gatan'), 302
+
+
+def admin_radera(klient, i, data):
+    # Raderar de bostäder som admin_skapa lade till (körs före admin_radera i varje runda)
+    return 'POST', f"/admin/delete/{data['skapade'].pop()}", None, 302
+
+
+ARBETSLASTER = {
+    'bostader_lista': (bostader_lista, False),    # (funktion, kräver inloggad admin?)
+    'bostad_detalj': (bostad_detalj, False),
+    'nyheter': (nyheter, False),
+    'kontor_api': (kontor_api, False),
+    'autokomplettera': (autokomplettera, False),
+    'inloggning': (inloggning, False),
+    'admin_skapa': (admin_skapa, True),
+    'admin_uppdatera': (admin_uppdatera, True),
+    'admin_radera': (admin_radera, True),
+}
+
+
+# ============================================================
+# MÄTNING
+# ============================================================
+
+def _percentil(varden, procent):
+    if len(varden) < 2:
+        return varden[0]
+    return statistics.quantiles(varden, n=100, method='inclusive')[procent - 1]
+
+
+def _skicka(klient, metod, url, formular):
+    """Skickar requesten och läser HELA svaret (strömmade sidor renderas först då)."""
+    with klient.open(url, method=metod, data=formular) as svar:
+        svar.get_data()
+        return svar.status_code
+
+
+def _skapade_idn(app):
+    """Id:n på bostäderna som admin_skapa lagt till och som inte raderats än (för admin_radera)."""
+    from database import db
+    from models.bostad import Bostad
+    with app.app_context():
+        return db.session.scalars(db.select(Bostad.id).where(Bostad.adress.like('Benchgatan %'))
+                                  .order_by(Bostad.id)).all()
+
+
+def _kor_en(klient, namn, i, data):
+    """Kör EN request av arbetslasten. Returns: millisekunder."""
+    funktion, _ = ARBETSLASTER[namn]
+    metod, url, formular, forvantad = funktion(klient, i, data)
+    start = time.perf_counter()
+    status = _skicka(klient, metod, url, formular)
+    ms = (time.perf_counter() - start) * 1000
+    if status != forvantad:
+        raise RuntimeError(f'{namn}: {metod} {url} gav {status}, väntade {forvantad}')
+    return ms
+
+
+def mat(app, valda, iterationer, data, fragor):
+    """
+    Kör arbetslasterna i tre steg:
+
+    1. Uppvärmning: cacher, mallar och importer ska inte räknas.
+    2. Latens och SQL-frågor i RUNDOR rundor, där varje runda kör en del av varje
+       arbetslast. En stund då datorn är upptagen med annat drabbar då alla
+       arbetslaster lite, istället för en arbetslast mycket.
+    3. Allokeringar med tracemalloc påslaget (gör koden långsammare, därför ett eget steg).
+
+    Returns:
+        dict: Arbetslastens namn -> måtten.
+    """
+    klienter = {}
+    for namn in valda:
+        klienter[namn] = app.test_client()
+        if ARBETSLASTER[namn][1]:
+            _skicka(klienter[namn], 'POST', '/auth/login', ADMIN)
+
+    def kor_steg(iterationsnummer, per_request):
+        for namn in valda:
+            if namn == 'admin_radera':
+                data['skapade'] = _skapade_idn(app)
+            for i in iterationsnummer:
+                per_request(namn, i)
+
+    # 1. Uppvärmning
+    kor_steg(range(-UPPVARMNING, 0), lambda namn, i: _kor_en(klienter[namn], namn, i, data))
+
+    # 2. Latens och SQL-frågor
+    tider = {namn: [] for namn in valda}
+    antal_fragor = {namn: [] for namn in valda}
+
+    def tid_och_fragor(namn, i):
+        fragor[0] = 0
+        tider[namn].append(_kor_en(klienter[namn], namn, i, data))
+        antal_fragor[namn].append(fragor[0])
+
+    per_runda = -(-iterationer // RUNDOR)
+    for start in range(0, iterationer, per_runda):
+        gc.collect()   # Skräp från förra rundan ska inte städas mitt i den här
+        kor_steg(range(start, min(start + per_runda, iterationer)), tid_och_fragor)
+
+    # 3. Allokeringar
+    allokerat = {namn: [] for namn in valda}
+
+    def allokeringar(namn, i):
+        fore = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        _kor_en(klienter[namn], namn, i, data)
+        allokerat[namn].append((tracemalloc.get_traced_memory()[1] - fore) / 1024)
+
+    tracemalloc.start()
+    try:
+        kor_steg(range(iterationer), allokeringar)
+    finally:
+        tracemalloc.stop()
+
+    return {namn: {
+        'iterationer': iterationer,
+        'p50_ms': round(_percentil(tider[namn], 50), 3),
+        'p95_ms': round(_percentil(tider[namn], 95), 3),
+        'p99_ms': round(_percentil(tider[namn], 99), 3),
+        'medel_ms': round(statistics.fmean(tider[namn]), 3),
+        'fragor': round(statistics.fmean(antal_fragor[namn]), 2),
+        'allokerat_kb': round(statistics.median(allokerat[namn]), 1),
+    } for namn in valda}
+
+
+def kor(iterationer, valda):
+    """Skapar testdatabasen, kör arbetslasterna och returnerar resultatet som en dictionary."""
+    with tempfile.TemporaryDirectory() as katalog:
+        os.environ['BLGEE_DATABAS'] = 'sqlite:///' + os.path.join(katalog, 'svit.db')
+        sys.path.insert(0, ROT)
+        from sqlalchemy import event
+
+        from database import db
+        from dbrepositories.async_databas import async_databas
+        from flask_app import app
+        from tjanster.andringsflode import cachesynk
+        from tjanster.sidvisningar import visningsraknare
+
+        # Cachesynken frågar efter ändringar när det gått ANDRINGAR_SYNK_SEKUNDER, oavsett vilken
+        # request som råkar komma då - synka bara en gång (i uppvärmningen) så att antalet frågor
+        # per arbetslast blir detsamma i varje körning
+        cachesynk.intervall = float('inf')
+        fragor = [0]
+
+        def rakna_fraga(*_):
+            # Visningsräknarnas bakgrundstråd skriver när den vill - inte en del av någon request
+            if threading.current_thread().name != 'sidvisningar':
+                fragor[0] += 1
+
+        with app.app_context():
+            data = {'bostad_idn': seeda()}
+            event.listen(db.engine, 'before_cursor_execute', rakna_fraga)
+        async_databas.registrera_lyssnare(rakna_fraga)
+
+        arbetslaster = mat(app, valda, iterationer, data, fragor)
+        for namn, matt in arbetslaster.items():
+            print(f"  {namn:<16} p50 {matt['p50_ms']:>8.2f} ms  p95 {matt['p95_ms']:>8.2f} ms", file=sys.stderr)
+
+        async_databas.lyssnare.remove(rakna_fraga)
+        with app.app_context():
+            event.remove(db.engine, 'before_cursor_execute', rakna_fraga)
+            # Skriv visningsräknarna NU - annars gör atexit det när testdatabasen redan är borttagen
+            visningsraknare.spara()
+            db.engine.dispose()
+
+    return {
+        'meta': {
+            'tid': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plattform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'bostader': ANTAL_BOSTADER, 'nyheter': ANTAL_NYHETER,
+            'kommentarer_per_nyhet': KOMMENTARER_PER_NYHET,
+        },
+        'arbetslaster': arbetslaster,
+    }
+
+
+# ============================================================
+# JÄMFÖRELSE
+# ============================================================
+
+def jamfor(baslinje, resultat, trosklar):
+    """
+    Jämför två resultat.
+
+    Args:
+        trosklar (dict): Tillåten relativ ökning per sorts mått, t.ex. {'latens': 0.5, 'minne': 0.1}.
+
+    Returns:
+        tuple: (rader, forsamringar) - rader är (arbetslast, mått, före, efter, ändring, försämrad?).
+    """
+    rader, forsamringar = [], 0
+    for namn, nya in resultat['arbetslaster'].items():
+        gamla = baslinje['arbetslaster'].get(namn)
+        if gamla is None:
+            continue
+        for matt, sort in JAMFORDA_MATT:
+            fore, efter = gamla[matt], nya[matt]
+            andring = (efter - fore) / fore if fore else 0.0
+            forsamrad = andring > trosklar[sort] if sort else efter > fore
+            forsamringar += forsamrad
+            rader.append((namn, matt, fore, efter, andring, forsamrad))
+    return rader, forsamringar
+
+
+def skriv_jamforelse(rader):
+    print(f"{'arbetslast':<16} {'mått':<13} {'baslinje':>10} {'nu':>10} {'ändring':>9}")
+    for namn, matt, fore, efter, andring, forsamrad in rader:
+        print(f"{namn:<16} {matt:<13} {fore:>10.2f} {efter:>10.2f} {andring:>+8.0%}"
+              + ('  FÖRSÄMRAD' if forsamrad else ''))
+
+
+def main():
+    tolk = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    kommandon = tolk.add_subparsers(dest='kommando', required=True)
+
+    kor_tolk = kommandon.add_parser('kor', help='Kör sviten')
+    kor_tolk.add_argument('--iterationer', type=int, default=STANDARD_ITERATIONER)
+    kor_tolk.add_argument('--arbetslast', nargs='+', choices=ARBETSLASTER, default=list(ARBETSLASTER),
+                          help='Kör bara dessa arbetslaster (admin_radera kräver admin_skapa)')
+    kor_tolk.add_argument('--spara', metavar='FIL', help='Skriv resultatet till en JSON-fil')
+
+    jamfor_tolk = kommandon.add_parser('jamfor', help='Jämför ett resultat med baslinjen')
+    jamfor_tolk.add_argument('resultat', help='JSON-fil från "kor --spara"')
+    jamfor_tolk.add_argument('--baslinje', default=BASLINJE)
+    jamfor_tolk.add_argument('--troskel', type=float, default=STANDARD_TROSKEL,
+                             help='Tillåten ökning av latensen (0.5 = 50 %%)')
+    jamfor_tolk.add_argument('--troskel-minne', type=float, default=STANDARD_TROSKEL_MINNE,
+                             help='Tillåten ökning av allokeringarna (0.1 = 10 %%)')
+    argument = tolk.parse_args()
+
+    if argument.kommando == 'kor':
+        resultat = kor(argument.iterationer, argument.arbetslast)
+        text = json.dumps(resultat, indent=2, ensure_ascii=False)
+        if argument.spara:
+            with open(argument.spara, 'w', encoding='utf-8') as fil:
+                fil.write(text + '\n')
+        else:
+            print(text)
+        return 0
+
+    with open(argument.baslinje, encoding='utf-8') as fil:
+        baslinje = json.load(fil)
+    with open(argument.resultat, encoding='utf-8') as fil:
+        resultat = json.load(fil)
+    if baslinje['meta'].get('bostader') != resultat['meta'].get('bostader'):
+        print('Varning: resultaten är körda mot olika stora testdatabaser', file=sys.stderr)
+    rader, forsamringar = jamfor(baslinje, resultat, {'latens': argument.troskel, 'minne': argument.troskel_minne})
+    skriv_jamforelse(rader)
+    print(f'\n{forsamringar} försämring(ar) (trösklar: latens {argument.troskel:.0%}, '
+          f'allokeringar {argument.troskel_minne:.0%}, SQL-frågor 0)')
+    return 1 if forsamringar else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,154 @@
+# benchmarks/visningar.py
+"""
+⏱️ BENCHMARK: Lediga tider för en hel vecka - visningsschemat i minnet mot SQL.
+
+Frågan är den som /admin/visningar ställer: "vilka luckor har varje mäklare den här veckan?"
+- sql per dag:  En fråga per mäklare och dag (visning_repo.konflikter), som en enkel lösning skulle göra
+- sql en fråga: ALLA mäklares visningar för veckan i en fråga, luckorna räknas i Python
+- index:        visningsschema.ledighet() - binärsökning i ett Intervallindex per mäklare, ingen SQL
+
+Dessutom: en krockkontroll (en mäklare, en timme) med SQL mot indexet.
+Antalet bokade visningar växer för varje rad i resultatet - indexet ska inte bli långsammare.
+
+Körs från projektroten mot en egen testdatabas (BLGEE_DATABAS):
+
+    python benchmarks/visningar.py
+    python benchmarks/visningar.py --maklare 500 --visningar 20000 100000 --rundor 7
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DAGAR = 120          # Visningarna sprids ut över så här många dagar framåt
+
+
+def seeda_maklare(app, antal):
+    from database import db
+    from models.maklare import Maklare
+    with app.app_context():
+        db.session.execute(db.insert(Maklare), [
+            {'namn': f'Mäklare {i:04d}', 'epost': f'maklare{i}@example.se', 'kontor_id': 1 + i % 2}
+            for i in range(antal)
+        ])
+        db.session.commit()
+
+
+def seeda_visningar(app, antal, slump):
+    """Lägger till 'antal' visningar à 30-60 minuter (krockar spelar ingen roll för mätningen)."""
+    from database import db
+    from models.maklare import Maklare
+    from models.visning import Visning
+    with app.app_context():
+        maklare_idn = db.session.scalars(db.select(Maklare.id)).all()
+        idag = datetime.combine(datetime.now().date(), datetime.min.time())
+        rader = []
+        for _ in range(antal):
+            start = idag + timedelta(days=slump.randrange(DAGAR), hours=slump.randrange(9, 18),
+                                     minutes=slump.choice((0, 15, 30, 45)))
+            rader.append({'bostad_id': slump.randrange(1, 10_000), 'maklare_id': slump.choice(maklare_idn),
+                          'start': start, 'slut': start + timedelta(minutes=slump.choice((30, 45, 60)))})
+        db.session.execute(db.insert(Visning), rader)
+        db.session.commit()
+
+
+def ledighet_sql_per_dag(fran, till, maklare):
+    from dbrepositories.visning_repository import visning_repo
+    from tjanster.visningsschema import MINSTA_LUCKA_MINUTER, Intervallindex, arbetsdagar
+    minsta = timedelta(minutes=MINSTA_LUCKA_MINUTER)
+    resultat = []
+    for rad in maklare:
+        luckor = []
+        for dag_fran, dag_till in arbetsdagar(fran, till):
+            index = Intervallindex()
+            for visning in visning_repo.konflikter(rad.id, dag_fran, dag_till):
+                index.lagg_till(visning.start, visning.slut, visning.id)
+            luckor += index.luckor(dag_fran, dag_till, minsta)
+        resultat.append((rad, luckor))
+    return resultat
+
+
+def ledighet_sql_en_fraga(fran, till, maklare):
+    from dbrepositories.visning_repository import visning_repo
+    from tjanster.visningsschema import MINSTA_LUCKA_MINUTER, Intervallindex, arbetsdagar
+    minsta = timedelta(minutes=MINSTA_LUCKA_MINUTER)
+    index = {rad.id: Intervallindex() for rad in maklare}
+    for visning in visning_repo.hamta_for_maklare(list(index), fran, till):
+        index[visning.maklare_id].lagg_till(visning.start, visning.slut, visning.id)
+    return [(rad, [lucka for dag_fran, dag_till in arbetsdagar(fran, till)
+                   for lucka in index[rad.id].luckor(dag_fran, dag_till, minsta)])
+            for rad in maklare]
+
+
+def median_ms(funktion, rundor):
+    from database import db
+    tider = []
+    for _ in range(rundor):
+        start = time.perf_counter()
+        funktion()
+        tider.append(time.perf_counter() - start)
+        db.session.remove()
+    return statistics.median(tider) * 1000
+
+
+def mat(app, rundor, slump):
+    """Returns: dict sätt -> millisekunder (median) för veckans ledighet och för en krockkontroll."""
+    from dbrepositories.visning_repository import visning_repo
+    from tjanster.visningsschema import visningsschema
+
+    with app.app_context():
+        visningsschema.bygg_om()
+        maklare = visningsschema.maklare()
+        fran = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
+        till = fran + timedelta(days=7)
+
+        # Alla tre sätten ska ge samma luckor
+        forvantat = visningsschema.ledighet(fran, till)
+        assert ledighet_sql_per_dag(fran, till, maklare) == forvantat
+        assert ledighet_sql_en_fraga(fran, till, maklare) == forvantat
+
+        krock_start = fran + timedelta(hours=12)
+        krock_slut = krock_start + timedelta(hours=1)
+        maklare_id = slump.choice(maklare).id
+        return {
+            'vecka sql per dag': median_ms(lambda: ledighet_sql_per_dag(fran, till, maklare), rundor),
+            'vecka sql en fråga': median_ms(lambda: ledighet_sql_en_fraga(fran, till, maklare), rundor),
+            'vecka index': median_ms(lambda: visningsschema.ledighet(fran, till), rundor),
+            'krock sql': median_ms(lambda: visning_repo.konflikter(maklare_id, krock_start, krock_slut), rundor * 20),
+            'krock index': median_ms(lambda: visningsschema.konflikter(maklare_id, krock_start, krock_slut), rundor * 20),
+        }
+
+
+def main():
+    tolk = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    tolk.add_argument('--maklare', type=int, default=200)
+    tolk.add_argument('--visningar', type=int, nargs='+', default=[5000, 20000, 50000],
+                      help='Totalt antal bokade visningar för varje mätning (växande).')
+    tolk.add_argument('--rundor', type=int, default=5)
+    argument = tolk.parse_args()
+    slump = random.Random(49)
+
+    with tempfile.TemporaryDirectory() as katalog:
+        os.environ['BLGEE_DATABAS'] = 'sqlite:///' + os.path.join(katalog, 'bench.db')
+        sys.path.insert(0, ROT)
+        from flask_app import app
+
+        seeda_maklare(app, argument.maklare)
+        print(f"{argument.maklare} mäklare, en veckas lediga tider för alla (ms, median)\n")
+        kolumner = ('vecka sql per dag', 'vecka sql en fråga', 'vecka index', 'krock sql', 'krock index')
+        print(f"{'visningar':>10} " + ' '.join(f'{namn:>19}' for namn in kolumner))
+        bokade = 0
+        for antal in sorted(argument.visningar):
+            seeda_visningar(app, antal - bokade, slump)
+            bokade = antal
+            resultat = mat(app, argument.rundor, slump)
+            print(f'{antal:>10} ' + ' '.join(f'{resultat[namn]:>19.3f}' for namn in kolumner))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.schema import CreateTable
 
 # Skapa en SQLAlchemy-instans.
 # Detta objekt 'db' är gränssnittet mellan din kod och databasen.
@@ -30,16 +32,31 @@ def init_db(app):
         # Genom att importera modellklasserna, registreras de hos SQLAlchemy.
         from models.maklare import Maklare           # Mäklar-tabellen
         from models.bostad import Bostad             # Bostads-tabellen
+        from models.bostad_arkiv import BostadArkiv  # Sålda och borttagna bostäder
         from models.user import User                 # Användar-tabellen
         from models.nyhet import Nyhet               # Nyhets-tabellen
         from models.kommentar import Kommentar       # Kommentar-tabellen
         from models.kontor import Kontor             # Kontors-tabellen
+        from models.prisstatistik import Prisstatistik, SmutsigStad   # Aggregerad prisstatistik per stad
+        from models.prishistorik import Prisandring  # Deltakodade prisändringar per bostad
+        from models.bevakning import SparadSokning, Notifiering   # Sparade sökningar och deras träffar
+        from models.bild import Bild, BostadBild     # Bilder och deras koppling till bostäder
+        from models.sidvisning import Sidvisning     # Visningsräknare för bostäder och nyheter
+        from models.jobb import Jobb                 # Jobbkön för långsamma bakgrundsjobb
+        from models.andring import Andring, Andringsmarkor   # Ordnad ändringslogg och konsumenternas markörer
+        from models.visning import Visning           # Visningar av bostäder (mäklare och tid)
+        from models.favorit import Favorit           # Bostäder som användare har sparat
 
         # --- Tabellskapande ---
         # db.create_all(): Skapar tabeller i databasen utifrån de modeller som är importerade.
         # Om tabeller redan finns, händer inget (det är säkert att köra).
         db.create_all()
 
+        # db.create_all() lägger INTE till nya kolumner i tabeller som redan finns.
+        # Därför kompletterar vi befintliga tabeller med kolumner som tillkommit i modellerna.
+        sakerstall_autoincrement()
+        sakerstall_kolumner()
+
         # --- Startdata / Seeding ---
         # Här importeras funktioner som lägger till startdata i databasen, ex. några mäklare och bostäder.
         # OBS! Startdata är valfritt, men bra för att kunna börja testa appen med något innehåll.
@@ -56,4 +73,73 @@ def init_db(app):
         skapa_start_nyheter_och_kommentarer()
         skapa_start_kontor()
 
-        # Nu är databasen klar att användas med Flask och alla tabeller är upprättade & fyllda med startdata.
\ No newline at end of file
+        # Nu är databasen klar att användas med Flask och alla tabeller är upprättade & fyllda med startdata.
+
+
+def sakerstall_autoincrement():
+    """
+    Bygger om tabeller som ska ha AUTOINCREMENT (sqlite_autoincrement=True) men skapades utan.
+
+    Varför behövs detta?
+    - Utan AUTOINCREMENT ger SQLite nästa rad id = högsta id + 1. Raderas (eller arkiveras)
+      raden med det högsta id:t delas samma id ut igen till nästa nya rad.
+    - AUTOINCREMENT kan inte läggas till med ALTER TABLE. Istället skapas en ny tabell,
+      raderna kopieras över och den nya tabellen får det gamla namnet. Index som
+      försvann med den gamla tabellen skapas igen av sakerstall_kolumner().
+    """
+    inspektor = inspect(db.engine)
+    for tabell in db.metadata.sorted_tables:
+        if not tabell.dialect_options['sqlite'].get('autoincrement') or not inspektor.has_table(tabell.name):
+            continue
+        sql = db.session.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :namn"),
+                                 {'namn': tabell.name}).scalar()
+        if 'AUTOINCREMENT' in sql.upper():
+            continue
+
+        ny = tabell.to_metadata(MetaData(), name=f'{tabell.name}_ny')
+        befintliga = {kolumn['name'] for kolumn in inspektor.get_columns(tabell.name)}
+        kolumner = ', '.join(kolumn.name for kolumn in tabell.columns if kolumn.name in befintliga)
+        db.session.execute(CreateTable(ny))
+        db.session.execute(text(f'INSERT INTO {ny.name} ({kolumner}) SELECT {kolumner} FROM {tabell.name}'))
+        db.session.execute(text(f'DROP TABLE {tabell.name}'))
+        db.session.execute(text(f'ALTER TABLE {ny.name} RENAME TO {tabell.name}'))
+        db.session.commit()
+        print(f"✓ Byggde om tabellen '{tabell.name}' med AUTOINCREMENT")
+
+
+def sakerstall_kolumner():
+    """
+    Lägger till kolumner som finns i modellerna men saknas i en befintlig databas.
+
+    Varför behövs detta?
+    - db.create_all() skapar bara tabeller som SAKNAS. Om vi lägger till ett nytt fält
+      (t.ex. Bostad.lat) i en modell, får en gammal databasfil aldrig den kolumnen.
+    - Här jämför vi modellerna med databasen och kör 'ALTER TABLE ... ADD COLUMN' för
+      det som fattas. Nya kolumner måste därför vara valfria (nullable) eller ha ett
+      server_default, annars kan befintliga rader inte få ett värde.
+    - Index som tillkommit i modellerna skapas också.
+    """
+    inspektor = inspect(db.engine)
+    for tabell in db.metadata.sorted_tables:
+        if not inspektor.has_table(tabell.name):
+            continue
+        befintliga = {kolumn['name'] for kolumn in inspektor.get_columns(tabell.name)}
+        for kolumn in tabell.columns:
+            if kolumn.name in befintliga:
+                continue
+            sql = f'ALTER TABLE {tabell.name} ADD COLUMN {kolumn.name} {kolumn.type.compile(db.engine.dialect)}'
+            if kolumn.server_default is not None:
+                sql += f" DEFAULT '{kolumn.server_default.arg}'"
+            db.session.execute(text(sql))
+            print(f"✓ Lade till kolumnen '{kolumn.name}' i tabellen '{tabell.name}'")
+    db.session.commit()
+
+    # Samma sak för index: ett nytt index i en modell skapas inte av db.create_all()
+    for tabell in db.metadata.sorted_tables:
+        if not inspektor.has_table(tabell.name):
+            continue
+        befintliga = {index['name'] for index in inspektor.get_indexes(tabell.name)}
+        for index in tabell.indexes:
+            if index.name not in befintliga:
+                index.create(db.engine)
+                print(f"✓ Skapade indexet '{index.name}' på tabellen '{tabell.name}'")
@@ -0,0 +1,127 @@
+# dbrepositories/andring_repository.py
+"""
+📜 ÄNDRINGSLOGG REPOSITORY - Skriver och läser den ordnade ändringsloggen (change data capture).
+
+SKRIVA: Repositoryna anropar logga() INNAN de committar en ändring, så loggraden hamnar
+i samma transaktion som ändringen:
+
+    db.session.add(ny_bostad)
+    db.session.flush()                                  # Ger ny_bostad ett id
+    andring_repo.logga(Bostad, 'skapa', [ny_bostad.id])
+    db.session.commit()
+
+LÄSA (tail): En konsument frågar efter allt efter sin markör och sparar den nya markören
+när ändringarna är behandlade:
+
+    andringar = andring_repo.hamta_efter(markor, entiteter=['bostader'])
+    ... uppdatera sökindexet ...
+    markor = andringar[-1].id if andringar else markor
+
+SQLite har bara EN skrivare åt gången, så en ändring med ett lägre id är alltid committad
+innan en ändring med ett högre id syns. En konsument som läst fram till id 100 kan därför
+aldrig missa en ändring som senare dyker upp med id 99.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database import db
+from models.andring import OPERATIONER, Andring, Andringsmarkor
+
+STANDARD_ANTAL = 1000
+
+
+class AndringRepository:
+    """
+    Repository-klass för Andring och Andringsmarkor.
+    """
+
+    def logga(self, modell, operation, entitet_idn):
+        """
+        Lägger till en loggrad per id i den PÅGÅENDE transaktionen (committar inte).
+
+        Args:
+            modell: Modellklassen, t.ex. Bostad (tabellnamnet blir 'entitet').
+            operation (str): 'skapa', 'uppdatera', 'radera' eller 'arkivera'.
+            entitet_idn (list): Id:n för raderna som ändrades.
+        """
+        if operation not in OPERATIONER:
+            raise ValueError(f'Okänd operation: {operation}')
+        entitet_idn = list(entitet_idn)
+        if not entitet_idn:
+            return
+        # Versionen räknas fram i själva INSERT-satsen (senaste versionen + 1), så hela loggningen
+        # är EN sats även för många id:n. Transaktionen har redan skrivit (ändringen görs före
+        # logga), så ingen annan process kan logga samma rad samtidigt.
+        nasta_version = (db.select(func.coalesce(func.max(Andring.version), 0) + 1)
+                         .where(Andring.entitet == db.bindparam('p_entitet'),
+                                Andring.entitet_id == db.bindparam('p_id'))
+                         .scalar_subquery())
+        sats = db.insert(Andring).values(entitet=db.bindparam('p_entitet'), entitet_id=db.bindparam('p_id'),
+                                         operation=operation, version=nasta_version, tid=datetime.now())
+        entitet = modell.__tablename__
+        db.session.execute(sats, [{'p_entitet': entitet, 'p_id': entitet_id} for entitet_id in entitet_idn])
+
+    def hamta_efter(self, markor, entiteter=None, antal=STANDARD_ANTAL):
+        """
+        Ändringarna efter 'markor', äldst först.
+
+        Args:
+            markor (int): Senaste Andring.id som konsumenten redan har sett (0 = från början).
+            entiteter (list): Bara dessa tabeller, t.ex. ['bostader']. None = alla.
+            antal (int): Max antal ändringar. Är det fler får konsumenten fråga igen.
+
+        Returns:
+            list: Andring-objekt.
+        """
+        fraga = Andring.query.filter(Andring.id > markor)
+        if entiteter:
+            fraga = fraga.filter(Andring.entitet.in_(list(entiteter)))
+        return fraga.order_by(Andring.id).limit(antal).all()
+
+    def senaste_markor(self):
+        """Id:t för den senaste ändringen (0 om loggen är tom). En ny konsument kan börja här."""
+        return db.session.query(func.max(Andring.id)).scalar() or 0
+
+    # ------------------------------------------------------------
+    # NAMNGIVNA MARKÖRER (konsumenter som ska överleva en omstart)
+    # ------------------------------------------------------------
+
+    def hamta_markor(self, namn):
+        """Returns: int: Konsumentens sparade markör (0 om den inte har läst något än)."""
+        markor = db.session.get(Andringsmarkor, namn)
+        return markor.markor if markor else 0
+
+    def spara_markor(self, namn, markor):
+        """Sparar hur långt konsumenten har kommit (UPSERT)."""
+        sats = sqlite_insert(Andringsmarkor.__table__).values(namn=namn, markor=markor, uppdaterad=datetime.now())
+        db.session.execute(sats.on_conflict_do_update(
+            index_elements=['namn'], set_={'markor': sats.excluded.markor, 'uppdaterad': sats.excluded.uppdaterad}))
+        db.session.commit()
+
+    def hamta_markorer(self):
+        return Andringsmarkor.query.order_by(Andringsmarkor.namn).all()
+
+    def rensa(self, aldre_an_dagar):
+        """
+        Raderar ändringar som är äldre än 'aldre_an_dagar' OCH som alla namngivna konsumenter
+        redan har läst. Den SENASTE ändringen för varje rad behålls alltid - annars skulle
+        nästa version börja om från 1.
+
+        Returns:
+            int: Antal raderade ändringar.
+        """
+        senaste_per_rad = db.select(func.max(Andring.id)).group_by(Andring.entitet, Andring.entitet_id)
+        fraga = Andring.query.filter(Andring.tid < datetime.now() - timedelta(days=aldre_an_dagar),
+                                     Andring.id.not_in(senaste_per_rad))
+        lagsta = db.session.query(func.min(Andringsmarkor.markor)).scalar()
+        if lagsta is not None:
+            fraga = fraga.filter(Andring.id <= lagsta)
+        antal = fraga.delete(synchronize_session=False)
+        db.session.commit()
+        return antal
+
+
+# Skapa EN instans av repository
+andring_repo = AndringRepository()
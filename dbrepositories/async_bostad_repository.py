@@ -0,0 +1,57 @@
+# dbrepositories/async_bostad_repository.py
+"""
+⚡ ASYNC BOSTAD REPOSITORY - Läser bostäder (och deras bilder) utan att blockera event-loopen.
+
+Async-motsvarigheten till bostad_repository.py för sidor som bara LÄSER. Allt som
+ändrar bostäder går via bostad_repo (lyssnare, cacher). Se async_databas.py.
+
+hamta_en() delar entitetscachen med bostad_repo: en populär bostad läses inte från
+databasen vid varje visning, och bostad_repo.uppdatera() ogiltigförklarar den för båda.
+"""
+from dbrepositories.async_databas import async_databas
+from dbrepositories.bostad_repository import bostad_repo
+
+
+class AsyncBostadRepository:
+    """Läsmetoderna i BostadRepository, som coroutines. Returnerar objekt med punktnotation."""
+
+    async def hamta_en(self, bostad_id):
+        """
+        Returns:
+            Bostad: Ett fristående objekt från bostad_repo.cache (eller databasen vid miss), eller None.
+        """
+        return await bostad_repo.cache.hamta_async(
+            bostad_id, lambda: async_databas.hamta_en('SELECT * FROM bostader WHERE id = ?', (bostad_id,)))
+
+    async def hamta_flera(self, bostad_idn):
+        """
+        Hämtar flera bostäder med EN fråga (WHERE id IN (...)).
+
+        Returns:
+            list: Bostäderna i samma ordning som bostad_idn (id:n som saknas hoppas över).
+        """
+        if not bostad_idn:
+            return []
+        platshallare = ', '.join('?' * len(bostad_idn))
+        rader = await async_databas.hamta_alla(f'SELECT * FROM bostader WHERE id IN ({platshallare})',
+                                               tuple(bostad_idn))
+        per_id = {bostad.id: bostad for bostad in rader}
+        return [per_id[bostad_id] for bostad_id in bostad_idn if bostad_id in per_id]
+
+    async def ar_sparad(self, user_id, bostad_id):
+        """Om användaren har sparat bostaden (samma fråga som favorit_repo.sparade_av, för EN bostad)."""
+        return await async_databas.hamta_en('SELECT 1 AS sparad FROM favoriter WHERE user_id = ? AND bostad_id = ?',
+                                            (user_id, bostad_id)) is not None
+
+    async def hamta_bilder(self, bostad_id):
+        """En bostads bilder i visningsordning (samma fråga som bild_repo.hamta_for_bostad)."""
+        return await async_databas.hamta_alla("""
+            SELECT bilder.* FROM bilder
+            JOIN bostad_bilder ON bostad_bilder.bild_id = bilder.id
+            WHERE bostad_bilder.bostad_id = ?
+            ORDER BY bostad_bilder.ordning
+        """, (bostad_id,), datumfalt=('skapad',))
+
+
+# Skapa EN instans av repository
+async_bostad_repo = AsyncBostadRepository()
@@ -0,0 +1,165 @@
+# dbrepositories/async_databas.py
+"""
+⚡ ASYNC DATABAS - Läsanslutningar för async-routes, med ett tak för antalet.
+
+De vanliga repositoryna använder SQLAlchemys session, som är SYNKRON: medan en fråga
+körs väntar hela tråden. De async repositoryna (async_*_repository.py) lämnar istället
+över frågan till en liten pool av databastrådar och låter event-loopen göra annat
+under tiden. En route kan då starta flera frågor SAMTIDIGT:
+
+    bostad, bilder = await asyncio.gather(async_bostad_repo.hamta_en(1),
+                                          async_bostad_repo.hamta_bilder(1))
+
+HUR? sqlite3 har inget async-gränssnitt, så alla async-bibliotek för SQLite (t.ex.
+aiosqlite) kör frågorna i trådar. Här är trådarna en ThreadPoolExecutor med
+ASYNC_MAX_ANSLUTNINGAR trådar, och varje tråd har EN anslutning som återanvänds:
+
+- Taket: fler än ASYNC_MAX_ANSLUTNINGAR anslutningar öppnas aldrig (per worker-process).
+  Fler samtidiga frågor väntar i poolens kö, högst ASYNC_VANTETID sekunder.
+- Återanvändning: att öppna en anslutning per fråga kostar mer än en enkel fråga.
+  (aiosqlite startar en tråd per anslutning som inte är en daemon-tråd - lediga
+  anslutningar i en egen pool skulle hindra processen från att avslutas.)
+- Poolen fungerar med vilken event-loop som helst. Flask kör varje async-route i en egen loop.
+
+BARA LÄSNING: Anslutningarna öppnas skrivskyddat (mode=ro). Allt som ändrar data går
+fortfarande via de vanliga repositoryna, så att lyssnare och cacher (ogiltigförklaring,
+bevakningar, prisstatistik ...) bara behöver finnas på ett ställe.
+
+Raderna blir objekt med punktnotation (bostad.adress) precis som i sqlite_bostad_repository.py.
+"""
+import asyncio
+import contextvars
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from types import SimpleNamespace
+
+STANDARD_MAX_ANSLUTNINGAR = 10
+STANDARD_VANTETID = 5          # Sekunder en fråga får ta, inklusive tiden i kön
+
+
+def rad_till_objekt(rad, datumfalt=()):
+    """
+    Konverterar en sqlite3.Row till ett objekt med punktnotation.
+
+    Args:
+        datumfalt (tuple): Kolumner som lagras som text av SQLAlchemy och ska bli datetime.
+    """
+    if rad is None:
+        return None
+    varden = dict(rad)
+    for falt in datumfalt:
+        if isinstance(varden.get(falt), str):
+            varden[falt] = datetime.fromisoformat(varden[falt])
+    return SimpleNamespace(**varden)
+
+
+class AsyncDatabas:
+    """Kör skrivskyddade SQLite-frågor i en begränsad trådpool, som coroutines."""
+
+    def __init__(self):
+        self.sokvag = None
+        self.max_anslutningar = STANDARD_MAX_ANSLUTNINGAR
+        self.vantetid = STANDARD_VANTETID
+        self._las = threading.Lock()
+        self._pool = None
+        self._lokal = threading.local()     # Varje pooltråds egen anslutning
+        self.lyssnare = []                  # Funktioner som anropas med varje SQL-sats
+        # Context manager som omsluter varje fråga i poolens tråd (t.ex. profileringen,
+        # se tjanster/profilering.py). Frågan körs med contextvars från coroutinen.
+        self.runt_fraga = nullcontext
+
+    def registrera_lyssnare(self, lyssnare):
+        """
+        Registrerar en funktion lyssnare(sql, parametrar) som anropas före varje fråga,
+        t.ex. för att räkna frågor. OBS! Anropas i poolens tråd, inte i requestens.
+        """
+        self.lyssnare.append(lyssnare)
+
+    def konfigurera(self, sokvag, max_anslutningar=STANDARD_MAX_ANSLUTNINGAR, vantetid=STANDARD_VANTETID):
+        with self._las:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+            self.sokvag = sokvag
+            self.max_anslutningar = max_anslutningar
+            self.vantetid = vantetid
+            self._lokal = threading.local()
+
+    def _hamta_pool(self):
+        """Poolen skapas vid första frågan - terminalkommandon startar inga trådar."""
+        if self.sokvag is None:
+            raise RuntimeError('Async-databasen är inte konfigurerad (init_async_databas)')
+        with self._las:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_anslutningar,
+                                                thread_name_prefix='async-databas')
+            return self._pool
+
+    # ------------------------------------------------------------
+    # KÖRS I POOLENS TRÅDAR
+    # ------------------------------------------------------------
+
+    def _anslutning(self):
+        anslutning = getattr(self._lokal, 'anslutning', None)
+        if anslutning is None:
+            anslutning = sqlite3.connect(Path(self.sokvag).as_uri() + '?mode=ro', uri=True)
+            anslutning.row_factory = sqlite3.Row
+            self._lokal.anslutning = anslutning
+        return anslutning
+
+    def _kor(self, sql, parametrar, bara_en, datumfalt):
+        for lyssnare in self.lyssnare:
+            lyssnare(sql, parametrar)
+        with self.runt_fraga():
+            markor = self._anslutning().execute(sql, parametrar)
+            try:
+                if bara_en:
+                    return rad_till_objekt(markor.fetchone(), datumfalt)
+                return [rad_till_objekt(rad, datumfalt) for rad in markor.fetchall()]
+            finally:
+                markor.close()   # Släpp läslåset direkt, även om bara första raden lästes
+
+    # ------------------------------------------------------------
+    # COROUTINES (anropas från event-loopen)
+    # ------------------------------------------------------------
+
+    async def _i_pool(self, sql, parametrar, bara_en, datumfalt):
+        loop = asyncio.get_running_loop()
+        # copy_context: contextvars följer med till poolens tråd (som i asyncio.to_thread)
+        fraga = loop.run_in_executor(self._hamta_pool(), partial(
+            contextvars.copy_context().run, self._kor, sql, parametrar, bara_en, datumfalt))
+        try:
+            return await asyncio.wait_for(fraga, self.vantetid)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f'Frågan tog mer än {self.vantetid} s (max {self.max_anslutningar} '
+                               f'samtidiga anslutningar)') from None
+
+    async def hamta_alla(self, sql, parametrar=(), datumfalt=()):
+        """Kör en SELECT och returnerar alla rader som objekt."""
+        return await self._i_pool(sql, parametrar, False, datumfalt)
+
+    async def hamta_en(self, sql, parametrar=(), datumfalt=()):
+        """Kör en SELECT och returnerar första raden som objekt (eller None)."""
+        return await self._i_pool(sql, parametrar, True, datumfalt)
+
+
+# EN async-databas per worker-process
+async_databas = AsyncDatabas()
+
+
+def init_async_databas(app):
+    """Pekar async-databasen på samma SQLite-fil som SQLAlchemy använder."""
+    from database import db
+    with app.app_context():
+        url = db.engine.url
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        app.logger.warning('Async-repositoryna kräver en SQLite-fil, inte %s', url)
+        return
+    async_databas.konfigurera(url.database,
+                              app.config.get('ASYNC_MAX_ANSLUTNINGAR', STANDARD_MAX_ANSLUTNINGAR),
+                              app.config.get('ASYNC_VANTETID', STANDARD_VANTETID))
@@ -0,0 +1,19 @@
+# dbrepositories/async_kontor_repository.py
+"""
+⚡ ASYNC KONTOR REPOSITORY - Läser kontor utan att blockera event-loopen.
+
+Async-motsvarigheten till kontor_repository.py (bara läsning). Se async_databas.py.
+"""
+from dbrepositories.async_databas import async_databas
+
+
+class AsyncKontorRepository:
+
+    async def hamta_alla(self):
+        """Alla kontor, med samma fält som Kontor.to_dict()."""
+        return await async_databas.hamta_alla(
+            'SELECT id, namn, adress, lat, lon, kontorschef, bild_url FROM kontor ORDER BY id')
+
+
+# Skapa EN instans av repository
+async_kontor_repo = AsyncKontorRepository()
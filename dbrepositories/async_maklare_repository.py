@@ -0,0 +1,31 @@
+# dbrepositories/async_maklare_repository.py
+"""
+⚡ ASYNC MÄKLARE REPOSITORY - Läser mäklare utan att blockera event-loopen.
+
+Async-motsvarigheten till maklare_repository.py (bara läsning). Se async_databas.py.
+hamta_en() delar entitetscachen med maklare_repo.
+"""
+from flask import abort
+
+from dbrepositories.async_databas import async_databas
+from dbrepositories.maklare_repository import maklare_repo
+
+
+class AsyncMaklareRepository:
+
+    async def hamta_alla(self):
+        return await async_databas.hamta_alla('SELECT * FROM maklare ORDER BY id')
+
+    async def hamta_en(self, maklare_id):
+        return await maklare_repo.cache.hamta_async(
+            maklare_id, lambda: async_databas.hamta_en('SELECT * FROM maklare WHERE id = ?', (maklare_id,)))
+
+    async def hamta_eller_404(self, maklare_id):
+        maklare = await self.hamta_en(maklare_id)
+        if maklare is None:
+            abort(404)
+        return maklare
+
+
+# Skapa EN instans av repository
+async_maklare_repo = AsyncMaklareRepository()
@@ -0,0 +1,42 @@
+# dbrepositories/async_nyhet_repository.py
+"""
+⚡ ASYNC NYHET REPOSITORY - Läser en nyhet med mäklare och kommentarer utan att blockera event-loopen.
+
+Async-motsvarigheten till nyhet_repository.py (bara läsning). Se async_databas.py.
+"""
+import asyncio
+from types import SimpleNamespace
+
+from dbrepositories.async_databas import async_databas
+
+
+class AsyncNyhetRepository:
+
+    async def hamta_en_med_relationer(self, nyhet_id):
+        """
+        Hämtar EN nyhet med sin mäklare och sina kommentarer.
+        Nyheten (med mäklaren via JOIN) och kommentarerna läses SAMTIDIGT, med två anslutningar.
+
+        Returns:
+            Objekt med nyhetens fält samt .maklare (eller None) och .kommentarer (äldst först),
+            eller None om nyheten inte finns.
+        """
+        nyhet, kommentarer = await asyncio.gather(
+            async_databas.hamta_en("""
+                SELECT nyheter.*, maklare.namn AS maklare_namn
+                FROM nyheter LEFT JOIN maklare ON maklare.id = nyheter.maklare_id
+                WHERE nyheter.id = ?
+            """, (nyhet_id,), datumfalt=('datum',)),
+            async_databas.hamta_alla('SELECT * FROM kommentarer WHERE nyhet_id = ? ORDER BY datum',
+                                     (nyhet_id,), datumfalt=('datum',)),
+        )
+        if nyhet is None:
+            return None
+        maklare_namn = vars(nyhet).pop('maklare_namn')
+        nyhet.maklare = SimpleNamespace(id=nyhet.maklare_id, namn=maklare_namn) if maklare_namn else None
+        nyhet.kommentarer = kommentarer
+        return nyhet
+
+
+# Skapa EN instans av repository
+async_nyhet_repo = AsyncNyhetRepository()
@@ -0,0 +1,118 @@
+# dbrepositories/bevakning_repository.py
+"""
+🔔 BEVAKNING REPOSITORY - Hanterar ALL databasåtkomst för sparade sökningar och notifieringar.
+
+SYFTE: Att isolera hur sparade sökningar och utkorgen (notifieringar) sparas och hämtas.
+Matchningen av bostäder mot sökningarna görs INTE här, utan i tjanster/bevakningar.py.
+"""
+from datetime import datetime
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database import db
+from dbrepositories.andring_repository import andring_repo
+from models.bevakning import Notifiering, SparadSokning
+
+
+class BevakningRepository:
+    """
+    Repository-klass för SparadSokning och Notifiering.
+    """
+
+    # ------------------------------------------------------------
+    # SPARADE SÖKNINGAR
+    # ------------------------------------------------------------
+
+    def hamta_alla(self):
+        """Hämtar ALLA sparade sökningar (används för att bygga sökindexet)."""
+        return SparadSokning.query.all()
+
+    def hamta_for_user(self, user_id):
+        """Hämtar en användares sparade sökningar, nyaste först."""
+        return SparadSokning.query.filter_by(user_id=user_id).order_by(SparadSokning.skapad.desc()).all()
+
+    def skapa_ny(self, user_id, data):
+        """
+        Sparar en ny sökning för användaren.
+
+        Args:
+            user_id (int): Användaren som äger sökningen.
+            data (dict): namn, stad och min_/max_ för pris, rum och yta (None = ingen gräns).
+
+        Returns:
+            SparadSokning: Den nya sökningen.
+        """
+        sokning = SparadSokning(user_id=user_id, **data)
+        db.session.add(sokning)
+        db.session.flush()
+        andring_repo.logga(SparadSokning, 'skapa', [sokning.id])
+        db.session.commit()
+        return sokning
+
+    def radera(self, sokning_id, user_id):
+        """
+        Raderar en sökning (och dess notifieringar) om den tillhör användaren.
+
+        Returns:
+            SparadSokning | None: Den raderade sökningen, eller None om den inte fanns.
+        """
+        sokning = SparadSokning.query.filter_by(id=sokning_id, user_id=user_id).first()
+        if sokning is None:
+            return None
+        Notifiering.query.filter_by(sokning_id=sokning_id).delete(synchronize_session=False)
+        db.session.delete(sokning)
+        andring_repo.logga(SparadSokning, 'radera', [sokning_id])
+        db.session.commit()
+        return sokning
+
+    # ------------------------------------------------------------
+    # NOTIFIERINGAR (Utkorgen)
+    # ------------------------------------------------------------
+
+    def spara_notifieringar(self, traffar):
+        """
+        Lägger många träffar i utkorgen med EN sats (executemany). Committar INTE - anropas
+        av BostadRepository i samma transaktion som bostaden (se tjanster/bevakningar.py).
+        Träffar som redan finns (samma sökning + bostad) hoppas över.
+
+        Args:
+            traffar (list): Dictionaries med user_id, sokning_id och bostad_id.
+        """
+        if not traffar:
+            return
+        nu = datetime.now()
+        sats = sqlite_insert(Notifiering.__table__).on_conflict_do_nothing(
+            index_elements=['sokning_id', 'bostad_id'])
+        db.session.execute(sats, [{**traff, 'skapad': nu} for traff in traffar])
+
+    def hamta_notifieringar(self, user_id, bara_oskickade=False):
+        """Hämtar användarens notifieringar (med sökning och bostad), nyaste först."""
+        fraga = Notifiering.query.filter_by(user_id=user_id)
+        if bara_oskickade:
+            fraga = fraga.filter(Notifiering.skickad.is_(None))
+        return fraga.options(db.joinedload(Notifiering.sokning), db.joinedload(Notifiering.bostad)) \
+                    .order_by(Notifiering.skapad.desc()).all()
+
+    def hamta_utkorg(self, max_antal=500):
+        """Hämtar de äldsta oskickade notifieringarna (för utskick i klump)."""
+        return Notifiering.query.filter(Notifiering.skickad.is_(None)) \
+                                .options(db.joinedload(Notifiering.sokning).joinedload(SparadSokning.user),
+                                         db.joinedload(Notifiering.bostad)) \
+                                .order_by(Notifiering.id).limit(max_antal).all()
+
+    def markera_skickade(self, notifiering_idn):
+        """Markerar notifieringarna som skickade med EN UPDATE-sats."""
+        if not notifiering_idn:
+            return
+        Notifiering.query.filter(Notifiering.id.in_(notifiering_idn)) \
+                         .update({Notifiering.skickad: datetime.now()}, synchronize_session=False)
+        db.session.commit()
+
+    def radera_notifieringar_for(self, bostad_idn):
+        """Tar bort notifieringar om bostäder som raderas eller arkiveras (committar inte)."""
+        if bostad_idn:
+            Notifiering.query.filter(Notifiering.bostad_id.in_(list(bostad_idn))).delete(synchronize_session=False)
+
+
+# Skapa EN instans av repository som kan användas överallt
+bevakning_repo = BevakningRepository()
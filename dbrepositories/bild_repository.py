@@ -0,0 +1,116 @@
+# dbrepositories/bild_repository.py
+"""
+🖼️ BILD REPOSITORY - Hanterar ALL databasåtkomst för bilder och bostadsbilder.
+
+Filerna på disken sköts av tjanster/bilder.py - här hanteras bara metadata och kopplingar.
+Läsmetoderna är byggda för att undvika "N+1-frågor": omslagsbilderna till en hel
+bostadslista hämtas med EN fråga, inte en per bostad.
+"""
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database import db
+from models.bild import Bild, BostadBild
+from models.bostad import Bostad
+
+
+class BildRepository:
+    """
+    Repository-klass för Bild och BostadBild.
+    """
+
+    def hamta_befintliga(self, hashar):
+        """
+        Returns:
+            dict: hash -> bild_id för de hashar som redan finns i databasen.
+        """
+        if not hashar:
+            return {}
+        return dict(db.session.query(Bild.hash, Bild.id).filter(Bild.hash.in_(list(hashar))).all())
+
+    def spara_bilder(self, bilder):
+        """
+        Sparar nya bilder (metadata) med EN sats.
+
+        Args:
+            bilder (list): Dictionaries med hash, bredd, hojd och storlek_bytes.
+
+        Returns:
+            dict: hash -> bild_id för de sparade bilderna.
+        """
+        if not bilder:
+            return {}
+        sats = sqlite_insert(Bild.__table__).on_conflict_do_nothing(index_elements=['hash'])
+        db.session.execute(sats, bilder)
+        db.session.commit()
+        return self.hamta_befintliga([bild['hash'] for bild in bilder])
+
+    def koppla(self, kopplingar):
+        """
+        Kopplar bilder till bostäder med EN sats. Redan gjorda kopplingar hoppas över.
+        Nya bilder hamnar efter bostadens befintliga bilder.
+        Främmande nycklar kontrolleras inte av SQLite, så bostäder som inte finns i 'bostader'
+        (t.ex. arkiverade eller felskrivna id:n) hoppas också över här.
+
+        Args:
+            kopplingar (list): Tupler (bostad_id, bild_id) i önskad ordning.
+
+        Returns:
+            set: Bostad-id:n som inte finns och därför inte fick några bilder.
+        """
+        if not kopplingar:
+            return set()
+        bostad_idn = {bostad_id for bostad_id, _ in kopplingar}
+        finns = set(db.session.scalars(db.select(Bostad.id).where(Bostad.id.in_(bostad_idn))))
+        saknas = bostad_idn - finns
+        kopplingar = [(bostad_id, bild_id) for bostad_id, bild_id in kopplingar if bostad_id in finns]
+        if not kopplingar:
+            return saknas
+        nasta = dict(db.session.query(BostadBild.bostad_id, func.max(BostadBild.ordning) + 1)
+                               .filter(BostadBild.bostad_id.in_(finns))
+                               .group_by(BostadBild.bostad_id).all())
+        rader = []
+        for bostad_id, bild_id in kopplingar:
+            ordning = nasta.get(bostad_id, 0)
+            nasta[bostad_id] = ordning + 1
+            rader.append({'bostad_id': bostad_id, 'bild_id': bild_id, 'ordning': ordning})
+
+        sats = sqlite_insert(BostadBild.__table__).on_conflict_do_nothing(index_elements=['bostad_id', 'bild_id'])
+        db.session.execute(sats, rader)
+        db.session.commit()
+        return saknas
+
+    def hamta_for_bostad(self, bostad_id):
+        """Hämtar en bostads bilder i visningsordning."""
+        return Bild.query.join(BostadBild, BostadBild.bild_id == Bild.id) \
+                         .filter(BostadBild.bostad_id == bostad_id) \
+                         .order_by(BostadBild.ordning).all()
+
+    def hamta_omslagsbilder(self, bostad_idn):
+        """
+        Hämtar omslagsbilden (lägst ordning) för MÅNGA bostäder med EN fråga.
+
+        Returns:
+            dict: bostad_id -> hash. Bostäder utan bilder saknas i resultatet.
+        """
+        if not bostad_idn:
+            return {}
+        forsta = db.session.query(BostadBild.bostad_id, func.min(BostadBild.ordning).label('ordning')) \
+                           .filter(BostadBild.bostad_id.in_(list(bostad_idn))) \
+                           .group_by(BostadBild.bostad_id).subquery()
+        rader = db.session.query(BostadBild.bostad_id, Bild.hash) \
+                          .join(forsta, (BostadBild.bostad_id == forsta.c.bostad_id) & (BostadBild.ordning == forsta.c.ordning)) \
+                          .join(Bild, Bild.id == BostadBild.bild_id).all()
+        return dict(rader)
+
+    def radera_kopplingar_for_bostad(self, bostad_id):
+        """
+        Tar bort en raderad bostads kopplingar. Själva bilderna (och filerna) ligger kvar,
+        eftersom andra bostäder kan använda samma bild.
+        """
+        BostadBild.query.filter_by(bostad_id=bostad_id).delete(synchronize_session=False)
+        db.session.commit()
+
+
+# Skapa EN instans av repository som kan användas överallt
+bild_repo = BildRepository()
@@ -14,12 +14,32 @@ SINGLE RESPONSIBILITY (Enkelt ansvar): Denna fil har ENDAST ansvar för:
 
 Viktigt: Denna fil känner INTE till routing, HTML, eller JSON!
 Den är ENDAST fokuserad på att prata med databasen (CRUD-operationerna).
+
+VARM OCH KALL DATA: Alla läsmetoder läser bara tabellen 'bostader' - det aktuella utbudet.
+Sålda och borttagna bostäder flyttas till 'bostader_arkiv' av arkivera_inaktiva() och
+läses bara via de uttryckliga historikmetoderna (hamta_historik, sok_i_arkivet).
 """
+from datetime import datetime
 
 # Importera Bostad-modellen (klassen som representerar tabellen 'bostad' i databasen)
-from models.bostad import Bostad
+from models.bostad import INAKTIVA_STATUSAR, Bostad
+# Arkivet för sålda och borttagna bostäder
+from models.bostad_arkiv import BostadArkiv
+# Användarnas sparade bostäder (tas bort tillsammans med bostaden)
+from models.favorit import Favorit
 # Importera databasobjektet (ofta en instans av SQLAlchemy) för att hantera sessioner
 from database import db
+# abort(404) används när en bostad inte finns, current_app för att logga fel i lyssnare
+from flask import abort, current_app
+# Cache för enskilda bostäder (sparar SQL-frågor på populära detaljsidor)
+from dbrepositories.entitets_cache import EntitetsCache
+# Ordnad logg över alla ändringar, skrivs i samma transaktion som ändringen
+from dbrepositories.andring_repository import andring_repo
+# Prishistoriken skrivs också i samma transaktion (se prishistorik_repository.py)
+from dbrepositories.prishistorik_repository import prishistorik_repo
+
+# Oföränderliga kopior av raderna för listsidor (se dto.py)
+from dbrepositories.dto import BostadDTO, fran_rader, kolumner
 
 
 class BostadRepository:
@@ -30,17 +50,139 @@ class BostadRepository:
     åt resten av applikationen.
     """
 
-    def hamta_alla(self):
+    def __init__(self):
+        # Varje repository har sin egen cache för hamta_en() (se entitets_cache.py)
+        self.cache = EntitetsCache(Bostad)
+        # Funktioner som vill veta när en bostad skapas, ändras eller raderas (se registrera_lyssnare)
+        self.lyssnare = []
+        # Funktioner som skriver egna rader i SAMMA transaktion som ändringen (se registrera_i_transaktion)
+        self.i_transaktion = []
+
+    # ------------------------------------------------------------
+    # LYSSNARE (Observer Pattern)
+    # ------------------------------------------------------------
+
+    def registrera_lyssnare(self, lyssnare):
+        """
+        Registrerar en funktion som anropas EFTER varje sparad ändring av en bostad.
+        Så kan t.ex. prisstatistiken hållas uppdaterad utan att repositoryt känner till den.
+
+        Args:
+            lyssnare (callable): Anropas som lyssnare(operation, fore, efter) där
+                operation är 'skapa', 'uppdatera', 'radera' eller 'arkivera' och fore/efter är
+                bostadens kolumnvärden (dict) före och efter ändringen (None om de saknas).
+        """
+        self.lyssnare.append(lyssnare)
+
+    def registrera_i_transaktion(self, funktion):
+        """
+        Registrerar en funktion som anropas FÖRE commit, i samma transaktion som ändringen.
+        Det som funktionen skriver sparas alltså bara om ändringen sparas (och tvärtom):
+        ett fel i funktionen rullar tillbaka hela ändringen. Funktionen får inte committa.
+
+        Args:
+            funktion (callable): Anropas som funktion(operation, andringar) där andringar är
+                en lista med (fore, efter) - en per bostad, som för lyssnarna.
+        """
+        self.i_transaktion.append(funktion)
+
+    def _skriv_i_transaktion(self, operation, andringar):
+        """Anropar funktionerna från registrera_i_transaktion (utan att fånga fel)."""
+        for funktion in self.i_transaktion:
+            funktion(operation, andringar)
+
+    def _meddela(self, operation, fore, efter):
+        """Anropar alla lyssnare. Ett fel i en lyssnare loggas men stoppar inte sparandet."""
+        for lyssnare in self.lyssnare:
+            try:
+                lyssnare(operation, fore, efter)
+            except Exception:
+                current_app.logger.exception('Lyssnaren %r misslyckades (%s)', lyssnare, operation)
+
+    def hamta_alla(self, som_dto=False):
         """
         Hämtar ALLA bostäder från databasen.
         Använder SQLAlchemy:s query-system för att göra en 'SELECT * FROM bostad'.
 
+        Args:
+            som_dto (bool): True = BostadDTO:er istället för Bostad-objekt (se dto.py).
+
         Returns:
             list: En lista med alla Bostad-objekt. Varje objekt motsvarar en rad i tabellen.
         """
+        if som_dto:
+            return fran_rader(BostadDTO, db.session.execute(db.select(*kolumner(BostadDTO, Bostad))))
         # Bostad.query är basfrågan, .all() exekverar frågan och returnerar resultaten som en lista.
         return Bostad.query.all()
 
+    def strom_i_delar(self, per_del=500, som_dto=False):
+        """
+        Hämtar ALLA bostäder, men DEL FÖR DEL istället för allt på en gång (för strömmade listsidor).
+
+        Varje del är en egen kort fråga (keyset pagination, som las_i_delar i tjanster/export.py):
+
+            SELECT ... WHERE id > <sista id:t i förra delen> ORDER BY id LIMIT per_del
+
+        Minnet beror alltså på 'per_del' - inte på hur många bostäder som finns. Ingen
+        databasmarkör hålls öppen mellan delarna: en öppen markör håller SQLite-filens läslås
+        så länge sidan strömmas, och då får ingen annan skriva under tiden ("database is locked").
+
+        Args:
+            som_dto (bool): True = BostadDTO:er, byggda direkt av kolumnvärdena (se dto.py).
+
+        Yields:
+            list: Högst 'per_del' Bostad-objekt, sorterade på id.
+        """
+        senaste_id = 0
+        while True:
+            if som_dto:
+                del_ = fran_rader(BostadDTO, db.session.execute(
+                    db.select(*kolumner(BostadDTO, Bostad))
+                    .where(Bostad.id > senaste_id).order_by(Bostad.id).limit(per_del)))
+            else:
+                del_ = db.session.scalars(
+                    db.select(Bostad).where(Bostad.id > senaste_id).order_by(Bostad.id).limit(per_del)).all()
+            if not del_:
+                return
+            yield del_
+            if len(del_) < per_del:
+                return
+            senaste_id = del_[-1].id
+
+    def hamta_flera(self, bostad_idn, som_dto=False):
+        """
+        Hämtar flera bostäder med EN fråga (WHERE id IN (...)).
+
+        Args:
+            bostad_idn (list): Id:n i önskad ordning.
+            som_dto (bool): True = BostadDTO:er istället för Bostad-objekt.
+
+        Returns:
+            list: Bostad-objekten i samma ordning som bostad_idn (id:n som saknas hoppas över).
+        """
+        if not bostad_idn:
+            return []
+        if som_dto:
+            bostader = fran_rader(BostadDTO, db.session.execute(
+                db.select(*kolumner(BostadDTO, Bostad)).where(Bostad.id.in_(bostad_idn))))
+        else:
+            bostader = Bostad.query.filter(Bostad.id.in_(bostad_idn))
+        per_id = {bostad.id: bostad for bostad in bostader}
+        return [per_id[bostad_id] for bostad_id in bostad_idn if bostad_id in per_id]
+
+    def hamta_kolumnvarden(self, *kolumner):
+        """
+        Hämtar bara de angivna kolumnerna för ALLA bostäder, som tupler (inga Bostad-objekt).
+        Mycket snabbare än hamta_alla() när man bara behöver några värden, t.ex. i bulkberäkningar.
+
+        Args:
+            *kolumner (str): Kolumnnamn, t.ex. 'id', 'stad', 'pris'.
+
+        Returns:
+            list: En tupel per bostad, sorterat på id.
+        """
+        return db.session.query(*(getattr(Bostad, kolumn) for kolumn in kolumner)).order_by(Bostad.id).all()
+
     def hamta_en(self, bostad_id):
         """
         Hämtar EN specifik bostad baserat på dess primärnyckel (ID).
@@ -48,11 +190,15 @@ class BostadRepository:
         Args:
             bostad_id (int): ID för bostaden (Primärnyckel i databasen)
 
+        OBS! Svaret kommer från cachen om bostaden hämtats nyligen. Objektet är då
+        fristående (inte kopplat till databassessionen) - ändra det via uppdatera().
+
         Returns:
             Bostad: Bostad-objektet om det hittas, eller None om ID:t inte existerar.
         """
         # .get(id) är en snabb metod för att hämta en rad baserat på dess Primärnyckel.
-        return Bostad.query.get(bostad_id)
+        # Den körs bara om bostaden INTE redan finns i cachen.
+        return self.cache.hamta(bostad_id, lambda: Bostad.query.get(bostad_id))
 
     def hamta_eller_404(self, bostad_id):
         """
@@ -69,8 +215,11 @@ class BostadRepository:
         Raises:
             404: Om bostaden inte hittas, utlöses ett Flask/webb-fel.
         """
-        # .get_or_404(id) är en Flask-SQLAlchemy-funktion som automatiserar felhanteringen.
-        return Bostad.query.get_or_404(bostad_id)
+        # Samma som hamta_en (med cache), men utlöser 404 om bostaden saknas.
+        bostad = self.hamta_en(bostad_id)
+        if bostad is None:
+            abort(404)
+        return bostad
 
     def skapa_ny(self, data):
         """
@@ -91,15 +240,25 @@ class BostadRepository:
             rum=data['rum'],
             yta=data['yta'],
             # Använder .get() med standardvärde för att hantera frivilliga fält (för att undvika KeyError)
-            beskrivning=data.get('beskrivning', '')
+            beskrivning=data.get('beskrivning', ''),
+            # Koordinater är valfria (sätts av geokodaren om adressen gick att slå upp)
+            lat=data.get('lat'),
+            lon=data.get('lon'),
+            status=data.get('status') or 'aktiv'
         )
 
         # 1. Lägg till i session: Förbereder objektet för att sparas i databasen
         #    ('Staging' i en temporär buffert).
         db.session.add(ny_bostad)
-        # 2. Spara/Committa: Utför den faktiska INSERT-frågan till databasen
-        #    och gör ändringen permanent.
+        # flush() skickar INSERT-frågan (utan att committa) så att bostaden får sitt id för ändringsloggen
+        db.session.flush()
+        efter = _kolumnvarden(ny_bostad)
+        andring_repo.logga(Bostad, 'skapa', [ny_bostad.id])
+        prishistorik_repo.logga([(None, efter)])
+        self._skriv_i_transaktion('skapa', [(None, efter)])
+        # 2. Spara/Committa: Gör ändringen (och loggraderna) permanent.
         db.session.commit()
+        self._meddela('skapa', None, efter)
 
         return ny_bostad
 
@@ -118,6 +277,9 @@ class BostadRepository:
         bostad = Bostad.query.get(bostad_id)
 
         if bostad:
+            # Spara hur bostaden såg ut innan, så att lyssnarna ser vad som ändrades
+            fore = _kolumnvarden(bostad)
+
             # Objektet hittades: Uppdatera fälten på Python-objektet.
             bostad.adress = data['adress']
             bostad.stad = data['stad']
@@ -125,10 +287,21 @@ class BostadRepository:
             bostad.rum = data['rum']
             bostad.yta = data['yta']
             bostad.beskrivning = data.get('beskrivning', '')
-
+            # Behåll gamla koordinater om inga nya skickades med
+            bostad.lat = data.get('lat', bostad.lat)
+            bostad.lon = data.get('lon', bostad.lon)
+            bostad.status = data.get('status') or bostad.status
+            efter = _kolumnvarden(bostad)
+
+            andring_repo.logga(Bostad, 'uppdatera', [bostad_id])
+            prishistorik_repo.logga([(fore, efter)])
+            self._skriv_i_transaktion('uppdatera', [(fore, efter)])
             # Spara ändringarna: Berättar för databasen att ändringarna på objektet ska sparas (UPDATE-fråga).
             # I SQLAlchemy lägger man inte till igen (.add) vid uppdatering, utan committar direkt.
             db.session.commit()
+            # Den gamla versionen i cachen är nu inaktuell
+            self.cache.ogiltigforklara(bostad_id)
+            self._meddela('uppdatera', fore, efter)
 
         return bostad
 
@@ -146,29 +319,296 @@ class BostadRepository:
         bostad = Bostad.query.get(bostad_id)
 
         if bostad:
+            fore = _kolumnvarden(bostad)
             # Markera objektet för radering i databassessionen.
             db.session.delete(bostad)
+            _radera_favoriter([fore])
+            prishistorik_repo.radera_for([bostad_id])
+            andring_repo.logga(Bostad, 'radera', [bostad_id])
+            self._skriv_i_transaktion('radera', [(fore, None)])
             # Utför den faktiska DELETE-frågan till databasen.
             db.session.commit()
+            self.cache.ogiltigforklara(bostad_id)
+            self._meddela('radera', fore, None)
             return True
 
         return False
 
-    def sok_efter_stad(self, stad):
+    # ------------------------------------------------------------
+    # BULK-OPERATIONER (många bostäder per transaktion)
+    # ------------------------------------------------------------
+
+    def skapa_flera(self, rader):
+        """
+        Skapar många bostäder i EN transaktion med EN INSERT-sats:
+
+            INSERT INTO bostader (...) VALUES (...), (...), ... RETURNING id
+
+        Args:
+            rader (list): Dictionaries med samma fält som skapa_ny().
+
+        Returns:
+            list: Id:n för de nya bostäderna, i samma ordning som rader.
+        """
+        if not rader:
+            return []
+        kolumner = [attr.key for attr in Bostad.__mapper__.column_attrs if attr.key != 'id']
+        varden = [{kolumn: data.get(kolumn) for kolumn in kolumner} for data in rader]
+        for rad in varden:
+            rad['beskrivning'] = rad['beskrivning'] or ''
+            rad['status'] = rad['status'] or 'aktiv'
+
+        # sort_by_parameter_order: SQLAlchemy garanterar att id:n kommer i samma ordning som raderna
+        idn = db.session.execute(
+            db.insert(Bostad).returning(Bostad.id, sort_by_parameter_order=True), varden).scalars().all()
+        nya = [{'id': bostad_id, **rad} for bostad_id, rad in zip(idn, varden)]
+        andring_repo.logga(Bostad, 'skapa', idn)
+        prishistorik_repo.logga([(None, efter) for efter in nya])
+        self._skriv_i_transaktion('skapa', [(None, efter) for efter in nya])
+        db.session.commit()
+
+        for efter in nya:
+            self._meddela('skapa', None, efter)
+        return idn
+
+    def uppdatera_flera(self, rader):
+        """
+        Uppdaterar många befintliga bostäder i EN transaktion.
+        Bostäderna hämtas med EN fråga (WHERE id IN (...)).
+
+        Args:
+            rader (list): Dictionaries med 'id' och samma fält som uppdatera().
+
+        Returns:
+            list: Id:n som uppdaterades (id:n som inte finns hoppas över).
+        """
+        per_id = {bostad.id: bostad for bostad in Bostad.query.filter(Bostad.id.in_([data['id'] for data in rader]))}
+        andringar = []
+        for data in rader:
+            bostad = per_id.get(data['id'])
+            if bostad is None:
+                continue
+            fore = _kolumnvarden(bostad)
+            bostad.adress = data['adress']
+            bostad.stad = data['stad']
+            bostad.pris = data['pris']
+            bostad.rum = data['rum']
+            bostad.yta = data['yta']
+            bostad.beskrivning = data.get('beskrivning', '')
+            bostad.lat = data.get('lat', bostad.lat)
+            bostad.lon = data.get('lon', bostad.lon)
+            bostad.status = data.get('status') or bostad.status
+            andringar.append((fore, _kolumnvarden(bostad)))
+        andring_repo.logga(Bostad, 'uppdatera', [fore['id'] for fore, _ in andringar])
+        prishistorik_repo.logga(andringar)
+        self._skriv_i_transaktion('uppdatera', andringar)
+        db.session.commit()
+
+        for fore, efter in andringar:
+            self.cache.ogiltigforklara(fore['id'])
+            self._meddela('uppdatera', fore, efter)
+        return [fore['id'] for fore, _ in andringar]
+
+    def hamta_priser(self, bostad_idn):
+        """Hämtar (id, pris) för flera bostäder med EN fråga."""
+        return db.session.query(Bostad.id, Bostad.pris).filter(Bostad.id.in_(list(bostad_idn))).all()
+
+    def satt_priser(self, nya_priser):
+        """
+        Sätter nya priser på många bostäder med EN UPDATE-sats:
+
+            UPDATE bostader SET pris = CASE id WHEN 1 THEN '...' WHEN 7 THEN '...' END
+            WHERE id IN (1, 7)
+
+        Args:
+            nya_priser (dict): bostad_id -> nytt pris (text, t.ex. '1 950 000 kr').
+
+        Returns:
+            int: Antal uppdaterade bostäder.
+        """
+        if not nya_priser:
+            return 0
+        idn = list(nya_priser)
+        fore = self._kolumnvarden_for(idn)
+        Bostad.query.filter(Bostad.id.in_(idn)).update(
+            {Bostad.pris: db.case(nya_priser, value=Bostad.id)}, synchronize_session=False)
+        andringar = [(varden, {**varden, 'pris': nya_priser[varden['id']]}) for varden in fore]
+        andring_repo.logga(Bostad, 'uppdatera', [varden['id'] for varden in fore])
+        prishistorik_repo.logga(andringar)
+        self._skriv_i_transaktion('uppdatera', andringar)
+        db.session.commit()
+
+        for varden, efter in andringar:
+            self.cache.ogiltigforklara(varden['id'])
+            self._meddela('uppdatera', varden, efter)
+        return len(fore)
+
+    def satt_status(self, bostad_idn, status):
+        """
+        Sätter samma status på många bostäder med EN UPDATE-sats (t.ex. 'sald').
+        Sålda och borttagna bostäder ligger kvar tills arkivera_inaktiva() flyttar dem.
+
+        Returns:
+            int: Antal uppdaterade bostäder.
+        """
+        if not bostad_idn:
+            return 0
+        fore = self._kolumnvarden_for(bostad_idn)
+        Bostad.query.filter(Bostad.id.in_(list(bostad_idn))).update({Bostad.status: status}, synchronize_session=False)
+        andringar = [(varden, {**varden, 'status': status}) for varden in fore]
+        andring_repo.logga(Bostad, 'uppdatera', [varden['id'] for varden in fore])
+        self._skriv_i_transaktion('uppdatera', andringar)
+        db.session.commit()
+
+        for varden, efter in andringar:
+            self.cache.ogiltigforklara(varden['id'])
+            self._meddela('uppdatera', varden, efter)
+        return len(fore)
+
+    def radera_flera(self, bostad_idn):
+        """
+        Raderar många bostäder med EN DELETE-sats (WHERE id IN (...)).
+
+        Returns:
+            int: Antal raderade bostäder.
+        """
+        if not bostad_idn:
+            return 0
+        fore = self._kolumnvarden_for(bostad_idn)
+        Bostad.query.filter(Bostad.id.in_(bostad_idn)).delete(synchronize_session=False)
+        _radera_favoriter(fore)
+        prishistorik_repo.radera_for([varden['id'] for varden in fore])
+        andring_repo.logga(Bostad, 'radera', [varden['id'] for varden in fore])
+        self._skriv_i_transaktion('radera', [(varden, None) for varden in fore])
+        db.session.commit()
+
+        for varden in fore:
+            self.cache.ogiltigforklara(varden['id'])
+            self._meddela('radera', varden, None)
+        return len(fore)
+
+    def _kolumnvarden_for(self, bostad_idn):
+        """Kolumnvärdena (dict) för flera bostäder, hämtade med EN fråga."""
+        kolumner = [attr.key for attr in Bostad.__mapper__.column_attrs]
+        rader = db.session.query(*(getattr(Bostad, kolumn) for kolumn in kolumner)) \
+                          .filter(Bostad.id.in_(list(bostad_idn))).all()
+        return [dict(zip(kolumner, rad)) for rad in rader]
+
+    # ------------------------------------------------------------
+    # ARKIV (sålda och borttagna bostäder)
+    # ------------------------------------------------------------
+
+    def arkivera_inaktiva(self, per_del=500, framsteg=None):
+        """
+        Flyttar ALLA sålda och borttagna bostäder till arkivet, 'per_del' bostäder per transaktion:
+
+            INSERT INTO bostader_arkiv (...) SELECT ... FROM bostader WHERE id IN (...)
+            DELETE FROM bostader WHERE id IN (...)
+
+        Varje del är en egen kort transaktion, så appen kan skriva mellan delarna.
+        Lyssnarna får operationen 'arkivera' (bilderna behålls, se tjanster/bilder.py).
+
+        Args:
+            per_del (int): Max antal bostäder per transaktion.
+            framsteg (callable): Anropas som framsteg(antal_arkiverade) efter varje del.
+
+        Returns:
+            int: Antal arkiverade bostäder.
+        """
+        kolumner = [attr.key for attr in Bostad.__mapper__.column_attrs]
+        totalt = 0
+        while True:
+            idn = db.session.scalars(db.select(Bostad.id).where(Bostad.status.in_(INAKTIVA_STATUSAR))
+                                     .order_by(Bostad.id).limit(per_del)).all()
+            if not idn:
+                return totalt
+            fore = self._kolumnvarden_for(idn)
+            urval = db.select(*(getattr(Bostad, kolumn) for kolumn in kolumner), db.literal(datetime.now())) \
+                      .where(Bostad.id.in_(idn))
+            db.session.execute(db.insert(BostadArkiv).from_select(kolumner + ['arkiverad'], urval))
+            Bostad.query.filter(Bostad.id.in_(idn)).delete(synchronize_session=False)
+            _radera_favoriter(fore)     # Arkivet behåller antal_sparade
+            andring_repo.logga(Bostad, 'arkivera', idn)
+            self._skriv_i_transaktion('arkivera', [(varden, None) for varden in fore])
+            db.session.commit()
+
+            for varden in fore:
+                self.cache.ogiltigforklara(varden['id'])
+                self._meddela('arkivera', varden, None)
+            totalt += len(idn)
+            if framsteg:
+                framsteg(totalt)
+
+    def antal_inaktiva(self):
+        """Antal sålda och borttagna bostäder som väntar på att arkiveras."""
+        return Bostad.query.filter(Bostad.status.in_(INAKTIVA_STATUSAR)).count()
+
+    def hamta_historik(self, bostad_id):
+        """
+        Hämtar en bostad oavsett om den är aktuell eller arkiverad (t.ex. för en gammal länk).
+
+        Returns:
+            Bostad | BostadArkiv: Bostaden, eller None om id:t aldrig funnits (eller raderats).
+        """
+        return self.hamta_en(bostad_id) or db.session.get(BostadArkiv, bostad_id)
+
+    def sok_i_arkivet(self, stad=None, status=None, antal=100):
+        """
+        Söker bland de arkiverade bostäderna, senast arkiverade först.
+
+        Args:
+            stad (str): Bara bostäder i denna stad. None = alla.
+            status (str): 'sald' eller 'borttagen'. None = båda.
+            antal (int): Max antal bostäder.
+
+        Returns:
+            list: BostadArkiv-objekt.
+        """
+        fraga = BostadArkiv.query
+        if stad:
+            fraga = fraga.filter_by(stad=stad)
+        if status:
+            fraga = fraga.filter_by(status=status)
+        return fraga.order_by(BostadArkiv.arkiverad.desc(), BostadArkiv.id.desc()).limit(antal).all()
+
+    def arkivstatistik(self):
+        """Returns: dict: status -> antal bostäder i arkivet."""
+        return dict(db.session.query(BostadArkiv.status, db.func.count()).group_by(BostadArkiv.status).all())
+
+    def sok_efter_stad(self, stad, som_dto=False):
         """
         Söker bostäder i en specifik stad (En specialiserad READ-operation).
 
         Args:
             stad (str): Stadnamn att söka efter, t.ex. "Stockholm"
+            som_dto (bool): True = BostadDTO:er istället för Bostad-objekt.
 
         Returns:
             list: Lista med Bostad-objekt där fältet 'stad' matchar in-parametern.
         """
+        if som_dto:
+            return fran_rader(BostadDTO, db.session.execute(
+                db.select(*kolumner(BostadDTO, Bostad)).where(Bostad.stad == stad)))
         # .filter_by(stad=stad) lägger till en WHERE-klausul i SQL-frågan (t.ex. WHERE stad = 'Stockholm').
         # .all() exekverar frågan.
         return Bostad.query.filter_by(stad=stad).all()
 
 
+def _radera_favoriter(bostader):
+    """
+    Tar bort favoriterna för bostäder som raderas eller arkiveras, i samma transaktion.
+    antal_sparade säger vilka som har några - oftast blir det ingen fråga alls.
+    """
+    idn = [varden['id'] for varden in bostader if varden.get('antal_sparade')]
+    if idn:
+        Favorit.query.filter(Favorit.bostad_id.in_(idn)).delete(synchronize_session=False)
+
+
+def _kolumnvarden(bostad):
+    """Bostadens kolumnvärden som en vanlig dictionary (skickas till lyssnarna)."""
+    return {attr.key: getattr(bostad, attr.key) for attr in Bostad.__mapper__.column_attrs}
+
+
 # Skapa EN instans av repository som kan användas överallt
 # Detta objekt är nu redo att importeras och användas i andra delar av koden,
 # t.ex. i dina rutter (views).
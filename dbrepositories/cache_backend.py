@@ -0,0 +1,345 @@
+# dbrepositories/cache_backend.py
+"""
+🗄️ CACHE-BACKEND - Var appens cacher faktiskt sparar sina värden.
+
+PROBLEMET: I produktion körs appen ofta i flera processer samtidigt (t.ex. 'gunicorn -w 4').
+En cache i processens eget minne finns då i FYRA kopior. Om worker 1 uppdaterar en bostad
+och rensar SIN cache, visar worker 2-4 fortfarande den gamla versionen.
+
+LÖSNINGEN: Alla cacher (entitetsobjekt och färdiga sidor) pratar med ett
+gemensamt GRÄNSSNITT - CacheBackend. Bakom gränssnittet kan vi byta lagring:
+
+- MinnesBackend: Processens eget minne (snabbast, bra vid EN process / utveckling).
+- SqliteBackend: En delad SQLite-fil (t.ex. instance/cache.db) som ALLA processer på
+  servern läser och skriver. En ändring i en worker syns direkt i de andra.
+
+VERSIONERADE NYCKLAR:
+Varje namnrymd (t.ex. 'entitet:bostader' eller 'sida:kontor') har ett LÖPNUMMER som räknas
+upp vid varje ogiltigförklaring. Varje post sparas tillsammans med det löpnummer som gällde
+när värdet LÄSTES från databasen.
+- ogiltigforklara_allt() räknar upp löpnumret och gör alla äldre poster inaktuella i alla
+  processer på en gång, utan att vi behöver leta upp och radera dem.
+- radera() räknar också upp löpnumret och lämnar en GRAVSTEN med det nya numret på nyckelns
+  plats. spara() skriver aldrig över en post med ett högre nummer än sitt eget.
+
+Därför kan en långsam läsare inte återuppliva gammal data: A missar och läser bostaden,
+B uppdaterar den och anropar radera(), A försöker spara sin ögonblicksbild - men den har
+ett lägre löpnummer än gravstenen och kastas. När en post eller gravsten städas bort höjs
+namnrymdens SKRIVGRÄNS till dess nummer, så att skyddet finns kvar även efter städningen.
+
+Välj backend i flask_app.py:
+    app.config['CACHE_BACKEND'] = 'minne'   # eller 'sqlite'
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Returneras av hamta() när nyckeln saknas (None kan ju vara ett giltigt cachat värde)
+SAKNAS = object()
+
+# Värdet i en post som radera() har lämnat efter sig (se VERSIONERADE NYCKLAR ovan)
+GRAVSTEN = object()
+
+# Så länge en gravsten i SQLite-filen ligger kvar innan den städas bort (skrivgränsen tar över)
+GRAVSTEN_SEKUNDER = 600
+
+STANDARD_MAX_ANTAL = 1000
+
+
+class CacheBackend:
+    """
+    Gränssnittet som alla backends implementerar.
+    Värden måste gå att "picklea" (dict, list, str, datetime ... går bra).
+    """
+
+    def hamta(self, namnrymd, nyckel):
+        """
+        Returns:
+            tuple: (värde, version). Värdet är SAKNAS vid miss. Versionen är namnrymdens
+                   nuvarande löpnummer och ska skickas med till spara().
+        """
+        raise NotImplementedError
+
+    def spara(self, namnrymd, nyckel, varde, ttl_sekunder, version):
+        """
+        Sparar ett värde. 'version' är den version hamta() gav INNAN värdet lästes från
+        databasen - har namnrymden eller nyckeln hunnit ogiltigförklaras sedan dess sparas
+        värdet inte.
+        """
+        raise NotImplementedError
+
+    def radera(self, namnrymd, nyckel):
+        """
+        Tar bort en enskild post (t.ex. efter uppdatera/radera i ett repository) och lämnar
+        en gravsten, så att en läsning som startade före ändringen inte kan sparas efteråt.
+        """
+        raise NotImplementedError
+
+    def ogiltigforklara_allt(self, namnrymd):
+        """Räknar upp namnrymdens version så att alla befintliga poster blir inaktuella."""
+        raise NotImplementedError
+
+    def antal(self, namnrymd):
+        """Antal giltiga poster i namnrymden (för statistik)."""
+        raise NotImplementedError
+
+
+class _Raknare:
+    """Löpnummer och gränser för EN namnrymd i MinnesBackend."""
+    __slots__ = ('lopnummer', 'giltig_fran', 'skrivgrans')
+
+    def __init__(self):
+        self.lopnummer = 0      # Räknas upp av radera() och ogiltigforklara_allt()
+        self.giltig_fran = 0    # Poster med lägre nummer är inaktuella
+        self.skrivgrans = 0     # Högsta numret bland bortstädade poster och gravstenar
+
+
+class MinnesBackend(CacheBackend):
+    """
+    Cache i processens eget minne: en LRU-lista (OrderedDict) per namnrymd.
+    Snabbast, men varje process har sin egen kopia.
+    """
+    namn = 'minne'
+
+    def __init__(self, max_antal=STANDARD_MAX_ANTAL):
+        self.max_antal = max_antal
+        self._namnrymder = {}   # namnrymd -> OrderedDict(nyckel -> (utgångstid, version, värde eller GRAVSTEN))
+        self._raknare = {}      # namnrymd -> _Raknare
+        self._las = threading.Lock()
+
+    def hamta(self, namnrymd, nyckel):
+        nu = time.monotonic()
+        with self._las:
+            raknare = self._raknare.get(namnrymd)
+            version, giltig_fran = (raknare.lopnummer, raknare.giltig_fran) if raknare else (0, 0)
+            poster = self._namnrymder.get(namnrymd)
+            post = poster.get(nyckel) if poster else None
+            if post is None or post[2] is GRAVSTEN or post[0] <= nu or post[1] < giltig_fran:
+                return SAKNAS, version
+            # Träff: flytta sist i kön = "senast använd"
+            poster.move_to_end(nyckel)
+            return post[2], version
+
+    def spara(self, namnrymd, nyckel, varde, ttl_sekunder, version):
+        with self._las:
+            raknare = self._raknare.setdefault(namnrymd, _Raknare())
+            if version < raknare.giltig_fran or version < raknare.skrivgrans:
+                return
+            poster = self._namnrymder.setdefault(namnrymd, OrderedDict())
+            gammal = poster.get(nyckel)
+            if gammal is not None and gammal[1] > version:
+                return      # Gravsten (eller nyare post) från efter vår läsning
+            self._lagg_in(poster, raknare, nyckel, (time.monotonic() + ttl_sekunder, version, varde))
+
+    def radera(self, namnrymd, nyckel):
+        with self._las:
+            raknare = self._raknare.setdefault(namnrymd, _Raknare())
+            raknare.lopnummer += 1
+            poster = self._namnrymder.setdefault(namnrymd, OrderedDict())
+            self._lagg_in(poster, raknare, nyckel, (0.0, raknare.lopnummer, GRAVSTEN))
+
+    def _lagg_in(self, poster, raknare, nyckel, post):
+        """Sparar posten sist i kön och kastar de minst nyligen använda (LRU) om det blir för många."""
+        poster[nyckel] = post
+        poster.move_to_end(nyckel)
+        while len(poster) > self.max_antal:
+            _, (_, version, _) = poster.popitem(last=False)
+            raknare.skrivgrans = max(raknare.skrivgrans, version)
+
+    def ogiltigforklara_allt(self, namnrymd):
+        with self._las:
+            raknare = self._raknare.setdefault(namnrymd, _Raknare())
+            raknare.lopnummer += 1
+            raknare.giltig_fran = raknare.lopnummer
+            self._namnrymder.pop(namnrymd, None)
+
+    def antal(self, namnrymd):
+        with self._las:
+            return sum(post[2] is not GRAVSTEN for post in self._namnrymder.get(namnrymd, {}).values())
+
+
+class SqliteBackend(CacheBackend):
+    """
+    Delad cache i en SQLite-fil som alla processer på samma server använder.
+
+    - WAL-läge gör att läsare och skrivare inte blockerar varandra.
+    - Varje tråd (och varje process efter en fork) får sin egen anslutning.
+    - Utgångna poster, och poster över max_antal per namnrymd, städas bort då och då.
+    - En gravsten är en post utan värde (varde IS NULL).
+    """
+    namn = 'sqlite'
+
+    # Städa utgångna poster ungefär var STADA_VAR:e skrivning
+    STADA_VAR = 200
+
+    # Höjs när tabellerna ändras. Cachen går alltid att bygga upp igen, så en äldre fil töms.
+    SCHEMAVERSION = 2
+
+    def __init__(self, sokvag, max_antal=STANDARD_MAX_ANTAL):
+        self.sokvag = sokvag
+        self.max_antal = max_antal
+        self._lokal = threading.local()
+        self._skrivningar = 0
+        os.makedirs(os.path.dirname(os.path.abspath(sokvag)), exist_ok=True)
+
+        anslutning = self._anslutning()
+        anslutning.execute('BEGIN IMMEDIATE')
+        try:
+            if anslutning.execute('PRAGMA user_version').fetchone()[0] < self.SCHEMAVERSION:
+                anslutning.execute('DROP TABLE IF EXISTS cache_poster')
+                anslutning.execute('DROP TABLE IF EXISTS cache_versioner')
+            anslutning.execute("""
+                CREATE TABLE IF NOT EXISTS cache_poster (
+                    namnrymd TEXT NOT NULL,
+                    nyckel   TEXT NOT NULL,
+                    version  INTEGER NOT NULL,
+                    varde    BLOB,
+                    utgar    REAL NOT NULL,
+                    PRIMARY KEY (namnrymd, nyckel)
+                )""")
+            anslutning.execute("""
+                CREATE TABLE IF NOT EXISTS cache_namnrymder (
+                    namnrymd    TEXT PRIMARY KEY,
+                    lopnummer   INTEGER NOT NULL DEFAULT 0,
+                    giltig_fran INTEGER NOT NULL DEFAULT 0,
+                    skrivgrans  INTEGER NOT NULL DEFAULT 0
+                )""")
+            anslutning.execute(f'PRAGMA user_version = {self.SCHEMAVERSION}')
+            anslutning.execute('COMMIT')
+        except BaseException:
+            anslutning.execute('ROLLBACK')
+            raise
+
+    def _anslutning(self):
+        """En anslutning per tråd och process (SQLite-anslutningar får inte delas över en fork)."""
+        anslutning = getattr(self._lokal, 'anslutning', None)
+        if anslutning is None or self._lokal.pid != os.getpid():
+            # isolation_level=None = autocommit: varje sats är sin egen korta transaktion
+            anslutning = sqlite3.connect(self.sokvag, timeout=5, isolation_level=None)
+            anslutning.execute('PRAGMA journal_mode=WAL')
+            anslutning.execute('PRAGMA synchronous=NORMAL')
+            self._lokal.anslutning = anslutning
+            self._lokal.pid = os.getpid()
+        return anslutning
+
+    def hamta(self, namnrymd, nyckel):
+        anslutning = self._anslutning()
+        # Löpnummer och post hämtas i EN fråga; posten gäller bara om den inte är inaktuell
+        rad = anslutning.execute("""
+            SELECT COALESCE(r.lopnummer, 0), COALESCE(r.giltig_fran, 0), p.varde, p.version, p.utgar
+            FROM (SELECT ? AS namnrymd) AS n
+            LEFT JOIN cache_namnrymder AS r ON r.namnrymd = n.namnrymd
+            LEFT JOIN cache_poster AS p ON p.namnrymd = n.namnrymd AND p.nyckel = ?
+        """, (namnrymd, str(nyckel))).fetchone()
+        version, giltig_fran, varde, post_version, utgar = rad
+        if varde is None or post_version < giltig_fran or utgar <= time.time():
+            return SAKNAS, version
+        return pickle.loads(varde), version
+
+    def spara(self, namnrymd, nyckel, varde, ttl_sekunder, version):
+        anslutning = self._anslutning()
+        # Skrivs bara om versionen inte är äldre än namnrymdens gränser eller nyckelns gravsten
+        anslutning.execute("""
+            INSERT INTO cache_poster (namnrymd, nyckel, version, varde, utgar)
+            SELECT ?1, ?2, ?3, ?4, ?5
+            WHERE ?3 >= COALESCE((SELECT MAX(giltig_fran, skrivgrans) FROM cache_namnrymder
+                                  WHERE namnrymd = ?1), 0)
+            ON CONFLICT (namnrymd, nyckel) DO UPDATE
+                SET version = excluded.version, varde = excluded.varde, utgar = excluded.utgar
+                WHERE cache_poster.version <= excluded.version
+        """, (namnrymd, str(nyckel), version, pickle.dumps(varde, pickle.HIGHEST_PROTOCOL),
+              time.time() + ttl_sekunder))
+
+        self._skrivningar += 1
+        if self._skrivningar % self.STADA_VAR == 0:
+            self._stada(anslutning, namnrymd)
+
+    def _i_transaktion(self, anslutning, *satser):
+        """Kör satserna (sql, parametrar) i EN transaktion, så att ingen annan process ser ett mellanläge."""
+        anslutning.execute('BEGIN IMMEDIATE')
+        try:
+            for sql, parametrar in satser:
+                anslutning.execute(sql, parametrar)
+            anslutning.execute('COMMIT')
+        except BaseException:
+            anslutning.execute('ROLLBACK')
+            raise
+
+    def _stada(self, anslutning, namnrymd):
+        """
+        Tar bort utgångna poster och gravstenar, och de som skulle gå ut först om namnrymden
+        är över max_antal. Skrivgränsen höjs först till det högsta borttagna numret.
+        """
+        nu = time.time()
+        for_manga = """
+            SELECT nyckel FROM cache_poster WHERE namnrymd = ?
+            ORDER BY utgar DESC LIMIT -1 OFFSET ?"""
+        hoj_skrivgrans = """
+            INSERT INTO cache_namnrymder (namnrymd, skrivgrans)
+            SELECT namnrymd, MAX(version) FROM cache_poster WHERE {villkor} GROUP BY namnrymd
+            ON CONFLICT (namnrymd) DO UPDATE SET skrivgrans = MAX(skrivgrans, excluded.skrivgrans)"""
+        self._i_transaktion(
+            anslutning,
+            (hoj_skrivgrans.format(villkor='utgar <= ?'), (nu,)),
+            ('DELETE FROM cache_poster WHERE utgar <= ?', (nu,)),
+            (hoj_skrivgrans.format(villkor=f'namnrymd = ? AND nyckel IN ({for_manga})'),
+             (namnrymd, namnrymd, self.max_antal)),
+            (f'DELETE FROM cache_poster WHERE namnrymd = ? AND nyckel IN ({for_manga})',
+             (namnrymd, namnrymd, self.max_antal)),
+        )
+
+    def radera(self, namnrymd, nyckel):
+        self._i_transaktion(
+            self._anslutning(),
+            ("""INSERT INTO cache_namnrymder (namnrymd, lopnummer) VALUES (?, 1)
+                ON CONFLICT (namnrymd) DO UPDATE SET lopnummer = lopnummer + 1""", (namnrymd,)),
+            ("""INSERT OR REPLACE INTO cache_poster (namnrymd, nyckel, version, varde, utgar)
+                SELECT namnrymd, ?, lopnummer, NULL, ? FROM cache_namnrymder WHERE namnrymd = ?""",
+             (str(nyckel), time.time() + GRAVSTEN_SEKUNDER, namnrymd)),
+        )
+
+    def ogiltigforklara_allt(self, namnrymd):
+        # UPSERT: skapa raden eller räkna upp löpnumret - atomärt i SQLite
+        self._anslutning().execute("""
+            INSERT INTO cache_namnrymder (namnrymd, lopnummer, giltig_fran) VALUES (?, 1, 1)
+            ON CONFLICT (namnrymd) DO UPDATE SET lopnummer = lopnummer + 1, giltig_fran = lopnummer + 1
+        """, (namnrymd,))
+
+    def antal(self, namnrymd):
+        rad = self._anslutning().execute("""
+            SELECT COUNT(*) FROM cache_poster AS p
+            LEFT JOIN cache_namnrymder AS r ON r.namnrymd = p.namnrymd
+            WHERE p.namnrymd = ? AND p.varde IS NOT NULL AND p.utgar > ?
+              AND p.version >= COALESCE(r.giltig_fran, 0)
+        """, (namnrymd, time.time())).fetchone()
+        return rad[0]
+
+
+# Den backend som används just nu (byts ut av init_cache_backend)
+_aktiv_backend = MinnesBackend()
+
+
+def hamta_backend():
+    """Returnerar den aktiva cache-backenden."""
+    return _aktiv_backend
+
+
+def init_cache_backend(app):
+    """
+    Väljer backend utifrån Flask-konfigurationen.
+
+    app.config['CACHE_BACKEND']: 'minne' (standard) eller 'sqlite'.
+    app.config['CACHE_SQLITE_SOKVAG']: Sökväg till den delade cache-filen.
+    app.config['CACHE_MAX_ANTAL']: Max antal poster per namnrymd.
+    """
+    global _aktiv_backend
+    max_antal = app.config.get('CACHE_MAX_ANTAL', STANDARD_MAX_ANTAL)
+
+    if app.config.get('CACHE_BACKEND', 'minne') == 'sqlite':
+        sokvag = app.config.get('CACHE_SQLITE_SOKVAG', os.path.join(app.instance_path, 'cache.db'))
+        _aktiv_backend = SqliteBackend(sokvag, max_antal=max_antal)
+    else:
+        _aktiv_backend = MinnesBackend(max_antal=max_antal)
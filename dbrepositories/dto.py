@@ -0,0 +1,101 @@
+# dbrepositories/dto.py
+"""
+📦 DTO:er (Data Transfer Objects) - Oföränderliga, fristående kopior av raderna för listsidor.
+
+PROBLEMET: En listsida som får ORM-objekt (Bostad, Maklare, Nyhet) betalar för varje rad:
+- SQLAlchemy bygger ett objekt med instansstatus och lägger det i sessionens identity map.
+- Objektet hör till sessionen: ett attribut som inte är laddat blir en NY fråga när
+  mallen läser det (lazy load), mitt i renderingen.
+- Objektet kan inte delas mellan requests (cache) - det är kopplat till EN session.
+
+LÖSNINGEN: Repositoryna kan istället läsa bara kolumnerna (en tupel per rad) och göra om
+varje tupel till en DTO med som_dto=True, t.ex. bostad_repo.strom_i_delar(som_dto=True).
+- frozen=True: DTO:n kan inte ändras, så den kan delas och cachas utan risk.
+- slots=True:  inget __dict__ per objekt - mindre minne och snabbare att skapa.
+- Fälten har samma namn som modellens kolumner, så mallarna märker ingen skillnad.
+- Går att picklea (cache_backend) och jsonify() (Flask gör om dataclasses till JSON).
+
+OBS! Relationer finns bara där de är uttryckligen inlästa (NyhetDTO.maklare och .kommentarer).
+Ändringar görs fortfarande via repositoryna (uppdatera() osv.), inte på en DTO.
+Se benchmarks/dto_listor.py för vad det sparar per rad.
+"""
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from itertools import starmap
+
+
+@dataclass(frozen=True, slots=True)
+class BostadDTO:
+    id: int
+    adress: str
+    stad: str
+    pris: str
+    rum: int
+    yta: int
+    beskrivning: str | None
+    lat: float | None
+    lon: float | None
+    status: str
+    antal_sparade: int
+
+    def to_dict(self):
+        return asdict(self)
+
+
+@dataclass(frozen=True, slots=True)
+class MaklareDTO:
+    id: int
+    namn: str
+    epost: str
+    telefon: str | None
+    titel: str | None
+    beskrivning: str | None
+    kontor_id: int | None
+
+    def to_dict(self):
+        return asdict(self)
+
+
+@dataclass(frozen=True, slots=True)
+class KommentarDTO:
+    id: int
+    namn: str
+    innehall: str
+    datum: datetime
+    nyhet_id: int
+
+    def to_dict(self):
+        return asdict(self)
+
+
+@dataclass(frozen=True, slots=True)
+class NyhetDTO:
+    id: int
+    titel: str
+    innehall: str
+    datum: datetime
+    maklare_id: int | None
+    maklare: MaklareDTO | None = None      # Inläst av repositoryt (None om nyheten saknar mäklare)
+    kommentarer: tuple = ()                # KommentarDTO:er, äldst först
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def kolumner(dto_klass, modell):
+    """
+    Modellens kolumner i samma ordning som DTO:ns fält, för db.select(*kolumner(...)).
+    Fält som inte är kolumner i tabellen (t.ex. NyhetDTO.maklare) hoppas över.
+    """
+    tabell = modell.__table__.c
+    return [tabell[falt.name] for falt in fields(dto_klass) if falt.name in tabell]
+
+
+def fran_rader(dto_klass, rader):
+    """
+    Gör om rader från db.select(*kolumner(dto_klass, ...)) till DTO:er.
+
+    Returns:
+        list: En DTO per rad, i samma ordning.
+    """
+    return list(starmap(dto_klass, rader))
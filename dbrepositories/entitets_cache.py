@@ -0,0 +1,181 @@
+# dbrepositories/entitets_cache.py
+"""
+⚡ ENTITETS-CACHE - Återanvändbar "read-through"-cache för repositoriernas hamta_en().
+
+PROBLEMET: Varje detaljsida (t.ex. /bostader/bostad/5) gör en SQL-fråga, även om
+samma bostad visades för tusen besökare sekunden innan.
+
+LÖSNINGEN: Repositoryt frågar cachen först. Finns bostaden där (och är inte för gammal)
+svarar cachen direkt utan SQL. Annars hämtas den från databasen och sparas i cachen.
+
+VAD SPARAS?
+En frikopplad (detached) ÖGONBLICKSBILD av objektet: bara kolumnvärdena, inte själva
+ORM-objektet. Ögonblicksbilden hör inte till någon databassession, så den kan delas
+säkert mellan requests och trådar. Vid en träff byggs ett nytt, fristående modellobjekt
+(t.ex. Bostad) av värdena, så routes och templates märker ingen skillnad.
+OBS! Relationer (t.ex. Nyhet.kommentarer) laddas inte på ett sådant objekt.
+
+VAR SPARAS DET?
+Själva lagringen sköts av den aktiva CACHE-BACKENDEN (se cache_backend.py):
+- 'minne': LRU+TTL i processens eget minne.
+- 'sqlite': En delad fil som alla workers använder, så att en ändring syns överallt.
+
+UTRENSNING (eviction):
+- LRU (Least Recently Used): när cachen är full kastas den post som använts MINST nyligen.
+- TTL (Time To Live): en post som är äldre än ttl_sekunder räknas som saknad.
+
+Repositoryt ogiltigförklarar själv posten i uppdatera() och radera(), så en ändring
+syns direkt - TTL är bara ett skyddsnät för ändringar som görs utanför repositoryt.
+
+ASYNC: De async repositoryna (t.ex. async_bostad_repo.hamta_en) delar samma cache via
+hamta_async(). Vid en miss läses raden i async-databasens trådpool och sparas här, så
+en populär bostad ger ingen SQL alls, oavsett om sidan är synkron eller async.
+"""
+import threading
+from datetime import datetime
+
+from sqlalchemy import Boolean, DateTime
+
+from dbrepositories.cache_backend import SAKNAS, hamta_backend
+
+# Standardinställning (kan ändras via app.config, se konfigurera_cacher)
+STANDARD_TTL_SEKUNDER = 60
+
+# Alla cacher som skapats, så att admin kan visa statistik för dem
+alla_cacher = []
+
+
+class EntitetsCache:
+    """
+    En read-through-cache för EN modellklass, med primärnyckeln som nyckel.
+    Träff-/missräknarna gäller den här processen; själva posterna ligger i backenden.
+    """
+
+    def __init__(self, modell, ttl_sekunder=STANDARD_TTL_SEKUNDER):
+        self.modell = modell
+        self.namn = modell.__tablename__
+        self.namnrymd = f'entitet:{self.namn}'
+        self.ttl_sekunder = ttl_sekunder
+        self._las = threading.Lock()   # Skyddar räknarna (flera trådar kan räkna samtidigt)
+        self.traffar = 0
+        self.missar = 0
+        alla_cacher.append(self)
+
+    def hamta(self, nyckel, laddare):
+        """
+        Hämtar objektet med primärnyckeln 'nyckel' från cachen, eller via 'laddare' vid miss.
+
+        Args:
+            nyckel: Primärnyckeln (t.ex. bostad_id).
+            laddare (callable): Funktion utan argument som hämtar objektet från databasen.
+
+        Returns:
+            Ett fristående modellobjekt, eller None om objektet inte finns.
+        """
+        backend = hamta_backend()
+        varden, version = self._sla_upp(backend, nyckel)
+        if varden is not SAKNAS:
+            return self._till_objekt(varden)
+
+        # Miss: hämta från databasen och spara ögonblicksbilden med versionen från FÖRE läsningen
+        objekt = laddare()
+        if objekt is None:
+            return None
+        varden = self._ogonblicksbild(objekt)
+        backend.spara(self.namnrymd, nyckel, varden, self.ttl_sekunder, version)
+        return self._till_objekt(varden)
+
+    async def hamta_async(self, nyckel, laddare):
+        """
+        Som hamta(), men för de async repositoryna.
+
+        Args:
+            laddare (callable): Coroutine-funktion utan argument som hämtar raden via
+                                async_databas (ett objekt med punktnotation, eller None).
+
+        Returns:
+            Ett fristående modellobjekt, eller None om raden inte finns.
+        """
+        backend = hamta_backend()
+        varden, version = self._sla_upp(backend, nyckel)
+        if varden is not SAKNAS:
+            return self._till_objekt(varden)
+
+        rad = await laddare()
+        if rad is None:
+            return None
+        varden = self._fran_rad(rad)
+        backend.spara(self.namnrymd, nyckel, varden, self.ttl_sekunder, version)
+        return self._till_objekt(varden)
+
+    def _sla_upp(self, backend, nyckel):
+        """Frågar backenden och räknar träffen eller missen. Returns: (värden eller SAKNAS, version)."""
+        varden, version = backend.hamta(self.namnrymd, nyckel)
+        with self._las:
+            if varden is SAKNAS:
+                self.missar += 1
+            else:
+                self.traffar += 1
+        return varden, version
+
+    def ogiltigforklara(self, nyckel):
+        """Tar bort en post, t.ex. efter att objektet har uppdaterats eller raderats."""
+        hamta_backend().radera(self.namnrymd, nyckel)
+
+    def rensa(self):
+        """Gör alla poster för modellen inaktuella (i alla processer om backenden är delad)."""
+        hamta_backend().ogiltigforklara_allt(self.namnrymd)
+
+    def statistik(self):
+        """
+        Returns:
+            dict: Antal poster, träffar, missar och träffkvot (0.0 - 1.0).
+        """
+        backend = hamta_backend()
+        with self._las:
+            totalt = self.traffar + self.missar
+            return {
+                'namn': self.namn,
+                'backend': backend.namn,
+                'antal': backend.antal(self.namnrymd),
+                'ttl_sekunder': self.ttl_sekunder,
+                'traffar': self.traffar,
+                'missar': self.missar,
+                'traffkvot': self.traffar / totalt if totalt else 0.0,
+            }
+
+    def _ogonblicksbild(self, objekt):
+        """Plockar ut kolumnvärdena ur ett ORM-objekt (inga relationer)."""
+        return {attr.key: getattr(objekt, attr.key) for attr in self.modell.__mapper__.column_attrs}
+
+    def _fran_rad(self, rad):
+        """
+        Kolumnvärdena ur en rad från async_databas, med samma typer som ORM-objektet har
+        (SQLite lagrar datum som text och booleaner som 0/1).
+        """
+        varden = {}
+        for attr in self.modell.__mapper__.column_attrs:
+            kolumn = attr.columns[0]
+            varde = getattr(rad, kolumn.name)
+            if varde is not None:
+                if isinstance(kolumn.type, DateTime) and isinstance(varde, str):
+                    varde = datetime.fromisoformat(varde)
+                elif isinstance(kolumn.type, Boolean):
+                    varde = bool(varde)
+            varden[attr.key] = varde
+        return varden
+
+    def _till_objekt(self, varden):
+        """Bygger ett nytt, fristående modellobjekt (inte kopplat till någon session)."""
+        return self.modell(**varden)
+
+
+def konfigurera_cacher(app):
+    """
+    Läser cache-inställningar från Flask-konfigurationen och tillämpar dem på alla cacher.
+
+    app.config['ENTITETS_CACHE_TTL']: Hur många sekunder ett objekt får ligga i cachen.
+    (Max antal poster styrs av backenden, se CACHE_MAX_ANTAL i cache_backend.py.)
+    """
+    for cache in alla_cacher:
+        cache.ttl_sekunder = app.config.get('ENTITETS_CACHE_TTL', cache.ttl_sekunder)
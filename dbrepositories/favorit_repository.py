@@ -0,0 +1,158 @@
+# dbrepositories/favorit_repository.py
+"""
+❤️ FAVORIT REPOSITORY - Sparar och tar bort användarnas favoriter (sparade bostäder).
+
+RÄKNAREN: Bostad.antal_sparade ändras i SAMMA transaktion som favoriten. Sparas
+favoriten men inte räknaren (eller tvärtom) rullas båda tillbaka. Räknaren ändras
+bara om en rad verkligen lades till eller togs bort, så två klick på "Spara" räknas
+en gång. rakna_om() rättar räknarna om de ändå skulle ha glidit isär.
+
+"HAR JAG SPARAT DEN?": sparade_av() svarar för en hel sida bostäder med EN fråga,
+via primärnyckeln (user_id, bostad_id).
+"""
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database import db
+from models.bostad import Bostad
+from models.favorit import Favorit
+from dbrepositories.andring_repository import andring_repo
+# Räknaren står på bostaden: dess cachade version blir inaktuell
+from dbrepositories.bostad_repository import bostad_repo
+from dbrepositories.dto import BostadDTO, fran_rader, kolumner
+
+
+class FavoritRepository:
+    """
+    Repository-klass för Favorit (och räknaren Bostad.antal_sparade).
+    """
+
+    # ------------------------------------------------------------
+    # SKRIVA
+    # ------------------------------------------------------------
+
+    def spara(self, user_id, bostad_id):
+        """
+        Sparar bostaden som favorit och räknar upp bostadens antal_sparade.
+
+        Returns:
+            bool: True om favoriten sparades nu, False om den redan fanns eller bostaden saknas.
+        """
+        sats = sqlite_insert(Favorit.__table__).on_conflict_do_nothing(index_elements=['user_id', 'bostad_id'])
+        if db.session.execute(sats, {'user_id': user_id, 'bostad_id': bostad_id}).rowcount == 0:
+            db.session.rollback()
+            return False
+        return self._andra_raknare(bostad_id, 1)
+
+    def ta_bort(self, user_id, bostad_id):
+        """
+        Tar bort favoriten och räknar ner bostadens antal_sparade.
+
+        Returns:
+            bool: True om favoriten fanns och togs bort.
+        """
+        raderade = Favorit.query.filter_by(user_id=user_id, bostad_id=bostad_id).delete(synchronize_session=False)
+        if raderade == 0:
+            db.session.rollback()
+            return False
+        return self._andra_raknare(bostad_id, -1)
+
+    def vaxla(self, user_id, bostad_id):
+        """
+        Sparar bostaden om den inte är sparad, annars tas den bort (knappen på bostadskortet).
+
+        Returns:
+            bool: True om bostaden är sparad efteråt.
+        """
+        if self.spara(user_id, bostad_id):
+            return True
+        self.ta_bort(user_id, bostad_id)
+        return False
+
+    def _andra_raknare(self, bostad_id, steg):
+        """UPDATE bostader SET antal_sparade = antal_sparade + steg, och commit (anropas efter INSERT/DELETE)."""
+        andrade = db.session.execute(
+            db.update(Bostad).where(Bostad.id == bostad_id)
+            .values(antal_sparade=Bostad.antal_sparade + steg)
+        ).rowcount
+        if andrade == 0:
+            # Bostaden finns inte (raderad eller arkiverad) - favoriten får inte heller sparas
+            db.session.rollback()
+            return False
+        andring_repo.logga(Bostad, 'uppdatera', [bostad_id])
+        db.session.commit()
+        bostad_repo.cache.ogiltigforklara(bostad_id)
+        return True
+
+    def radera_for_user(self, user_id):
+        """
+        Tar bort alla favoriter för en användare som raderas och räknar ner bostädernas
+        antal_sparade. Committar INTE - anropas i samma transaktion som raderingen
+        (se user_repo.radera). Databasen tar inte bort favoriterna själv: SQLite följer
+        bara ondelete='CASCADE' med PRAGMA foreign_keys=ON, som appen inte slår på.
+
+        Returns:
+            list: Id:n för bostäderna vars räknare ändrades (deras cachade version blir inaktuell).
+        """
+        bostad_idn = db.session.scalars(db.select(Favorit.bostad_id).where(Favorit.user_id == user_id)).all()
+        if not bostad_idn:
+            return []
+        Favorit.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+        db.session.execute(
+            db.update(Bostad).where(Bostad.id.in_(bostad_idn))
+            .values(antal_sparade=Bostad.antal_sparade - 1)
+        )
+        andring_repo.logga(Bostad, 'uppdatera', bostad_idn)
+        return bostad_idn
+
+    def rakna_om(self):
+        """
+        Räknar om antal_sparade för de bostäder där räknaren inte stämmer med favoriterna.
+
+        Returns:
+            int: Antal rättade bostäder.
+        """
+        antal = db.select(db.func.count()).where(Favorit.bostad_id == Bostad.id).scalar_subquery()
+        fel = db.session.execute(db.select(Bostad.id, antal).where(Bostad.antal_sparade != antal)).all()
+        if not fel:
+            return 0
+        db.session.execute(db.update(Bostad), [{'id': bostad_id, 'antal_sparade': ratt} for bostad_id, ratt in fel])
+        andring_repo.logga(Bostad, 'uppdatera', [bostad_id for bostad_id, _ in fel])
+        db.session.commit()
+        for bostad_id, _ in fel:
+            bostad_repo.cache.ogiltigforklara(bostad_id)
+        return len(fel)
+
+    # ------------------------------------------------------------
+    # LÄSA
+    # ------------------------------------------------------------
+
+    def sparade_av(self, user_id, bostad_idn):
+        """
+        Vilka av bostäderna användaren har sparat, med EN fråga (t.ex. för en hel listsida).
+
+        Returns:
+            set: Id:n för de sparade bostäderna bland bostad_idn.
+        """
+        if not bostad_idn:
+            return set()
+        return set(db.session.scalars(
+            db.select(Favorit.bostad_id).where(Favorit.user_id == user_id, Favorit.bostad_id.in_(list(bostad_idn)))
+        ))
+
+    def hamta_for_user(self, user_id):
+        """
+        Användarens sparade bostäder, senast sparad först.
+
+        Returns:
+            list: BostadDTO:er (se dto.py).
+        """
+        return fran_rader(BostadDTO, db.session.execute(
+            db.select(*kolumner(BostadDTO, Bostad))
+            .join(Favorit, Favorit.bostad_id == Bostad.id)
+            .where(Favorit.user_id == user_id)
+            .order_by(Favorit.skapad.desc())
+        ))
+
+
+# Skapa EN instans av repository
+favorit_repo = FavoritRepository()
@@ -0,0 +1,171 @@
+# dbrepositories/jobb_repository.py
+"""
+🧰 JOBB REPOSITORY - Hanterar ALL databasåtkomst för jobbkön.
+
+Flera arbetare (trådar eller processer) kan dela samma kö. Att TA ett jobb är därför
+EN sats (UPDATE ... WHERE id = (SELECT ...) RETURNING ...): SQLite låser databasen under
+satsen, så två arbetare kan aldrig ta samma jobb.
+
+Alla metoder som ändrar ett pågående jobb kräver att det fortfarande körs av SAMMA
+arbetare. Har jobbet avbrutits, eller tagits över efter ett utgånget lån, returnerar
+de False - arbetaren ska då sluta.
+
+Själva körningen (arbetarloopen, försök och backoff) sköts av tjanster/jobbko.py.
+"""
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_
+
+from database import db
+from models.jobb import Jobb
+
+
+class JobbRepository:
+    """
+    Repository-klass för Jobb.
+    """
+
+    def lagg_till(self, typ, argument, prioritet=0, max_forsok=3):
+        """
+        Lägger ett nytt jobb i kön.
+
+        Args:
+            typ (str): Jobbtypen, t.ex. 'importera-fil'.
+            argument (dict): Jobbets argument (måste gå att spara som JSON).
+            prioritet (int): Högre körs först.
+
+        Returns:
+            Jobb: Det nya jobbet.
+        """
+        jobb = Jobb(typ=typ, argument=json.dumps(argument), prioritet=prioritet, max_forsok=max_forsok)
+        db.session.add(jobb)
+        db.session.commit()
+        return jobb
+
+    def hamta_en(self, jobb_id):
+        return db.session.get(Jobb, jobb_id)
+
+    def hamta_senaste(self, antal=50):
+        """De senast skapade jobben, nyaste först."""
+        return Jobb.query.order_by(Jobb.id.desc()).limit(antal).all()
+
+    def hamta_senaste_klara(self, typ):
+        """Det senast avslutade jobbet av en viss typ (t.ex. för att visa dess rapport), eller None."""
+        return Jobb.query.filter_by(typ=typ, status='klar').order_by(Jobb.klar.desc()).first()
+
+    def statistik(self):
+        """
+        Returns:
+            dict: Antal jobb per status, t.ex. {'vantar': 3, 'kor': 1, 'klar': 40}.
+        """
+        rader = db.session.query(Jobb.status, func.count(Jobb.id)).group_by(Jobb.status).all()
+        return dict(rader)
+
+    def hamta_aktiva_argument(self, typ):
+        """Argumenten (dict) för de jobb av en viss typ som väntar eller körs."""
+        rader = db.session.scalars(db.select(Jobb.argument).where(Jobb.typ == typ, Jobb.status.in_(('vantar', 'kor'))))
+        return [json.loads(argument or '{}') for argument in rader]
+
+    def aldsta_vantande(self):
+        """När det äldsta jobbet som kunde ha startats lades i kön (eller None)."""
+        return db.session.query(func.min(Jobb.kor_efter)).filter(
+            Jobb.status == 'vantar', Jobb.kor_efter <= datetime.now()).scalar()
+
+    # ------------------------------------------------------------
+    # ARBETARNA
+    # ------------------------------------------------------------
+
+    def hamta_nasta(self, arbetare, lasning_sekunder):
+        """
+        Tar nästa jobb i kön: högst prioritet först, sedan äldst. Ett jobb vars lån har gått ut
+        (arbetaren dog) tas också. Jobbets 'forsok' räknas upp.
+
+        Returns:
+            Jobb | None: Jobbet, nu med status 'kor', eller None om kön är tom.
+        """
+        nu = datetime.now()
+        nasta = (db.select(Jobb.id)
+                 .where(or_(and_(Jobb.status == 'vantar', Jobb.kor_efter <= nu),
+                            and_(Jobb.status == 'kor', Jobb.lasning_till < nu)))
+                 .order_by(Jobb.prioritet.desc(), Jobb.kor_efter, Jobb.id)
+                 .limit(1)
+                 .scalar_subquery())
+        sats = (db.update(Jobb)
+                .where(Jobb.id == nasta)
+                .values(status='kor', forsok=Jobb.forsok + 1, arbetare=arbetare, startad=nu,
+                        lasning_till=nu + timedelta(seconds=lasning_sekunder))
+                .returning(Jobb))
+        jobb = db.session.execute(sats).scalars().first()
+        db.session.commit()
+        return jobb
+
+    def _uppdatera_pagaende(self, jobb_id, arbetare, **varden):
+        """Ändrar ett jobb som körs av 'arbetare'. Returns: False om jobbet inte längre är arbetarens."""
+        antal = Jobb.query.filter_by(id=jobb_id, status='kor', arbetare=arbetare).update(
+            varden, synchronize_session=False)
+        db.session.commit()
+        return antal == 1
+
+    def forlang_lasning(self, jobb_id, arbetare, lasning_sekunder):
+        return self._uppdatera_pagaende(jobb_id, arbetare,
+                                        lasning_till=datetime.now() + timedelta(seconds=lasning_sekunder))
+
+    def rapportera_framsteg(self, jobb_id, arbetare, andel, meddelande=None):
+        varden = {'framsteg': max(0.0, min(1.0, andel))}
+        if meddelande is not None:
+            varden['meddelande'] = meddelande[:200]
+        return self._uppdatera_pagaende(jobb_id, arbetare, **varden)
+
+    def markera_klar(self, jobb_id, arbetare, resultat, meddelande=None):
+        return self._uppdatera_pagaende(jobb_id, arbetare, status='klar', framsteg=1.0, fel=None,
+                                        resultat=json.dumps(resultat), klar=datetime.now(),
+                                        lasning_till=None, meddelande=(meddelande or 'Klart')[:200])
+
+    def markera_misslyckad(self, jobb_id, arbetare, fel, nytt_forsok_om=None):
+        """
+        Sparar felet. Med nytt_forsok_om (sekunder) läggs jobbet tillbaka i kön, annars är det slutgiltigt.
+        """
+        if nytt_forsok_om is None:
+            return self._uppdatera_pagaende(jobb_id, arbetare, status='misslyckad', fel=fel,
+                                            klar=datetime.now(), lasning_till=None)
+        return self._uppdatera_pagaende(jobb_id, arbetare, status='vantar', fel=fel, lasning_till=None,
+                                        kor_efter=datetime.now() + timedelta(seconds=nytt_forsok_om))
+
+    # ------------------------------------------------------------
+    # ADMIN
+    # ------------------------------------------------------------
+
+    def forsok_igen(self, jobb_id):
+        """
+        Lägger ett misslyckat eller avbrutet jobb i kön igen, med nya försök.
+        Jobb med max_forsok=1 (t.ex. 'importera-fil') får inte köras igen - de tål inte det.
+
+        Returns:
+            bool: False om jobbet inte finns, fortfarande är aktivt eller bara får köras en gång.
+        """
+        antal = Jobb.query.filter(Jobb.id == jobb_id, Jobb.status.in_(('misslyckad', 'avbruten')),
+                                  Jobb.max_forsok > 1).update({
+            'status': 'vantar', 'forsok': 0, 'framsteg': 0.0, 'meddelande': None, 'arbetare': None,
+            'kor_efter': datetime.now(), 'klar': None,
+        }, synchronize_session=False)
+        db.session.commit()
+        return antal == 1
+
+    def avbryt(self, jobb_id):
+        """
+        Avbryter ett jobb som väntar eller körs. Ett jobb som körs avslutas nästa gång
+        det rapporterar framsteg (arbetaren märker att jobbet inte längre är dess).
+
+        Returns:
+            bool: False om jobbet inte finns eller redan är färdigt.
+        """
+        antal = Jobb.query.filter(Jobb.id == jobb_id, Jobb.status.in_(('vantar', 'kor'))).update({
+            'status': 'avbruten', 'klar': datetime.now(), 'lasning_till': None,
+        }, synchronize_session=False)
+        db.session.commit()
+        return antal == 1
+
+
+# Skapa EN instans av repository
+jobb_repo = JobbRepository()
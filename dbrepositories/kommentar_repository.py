@@ -13,6 +13,8 @@ med särskilt fokus på relationen till en Nyhet.
 from models.kommentar import Kommentar
 # Importera databasobjektet (SQLAlchemy-sessionen)
 from database import db
+# Ordnad logg över alla ändringar (se andring_repository.py)
+from dbrepositories.andring_repository import andring_repo
 
 
 class KommentarRepository:
@@ -63,7 +65,9 @@ class KommentarRepository:
 
         # 1. Lägg till i session: Förbereder objektet för att sparas.
         db.session.add(ny_kommentar)
-        # 2. Spara/Committa: Utför den faktiska INSERT-frågan till databasen.
+        db.session.flush()   # Ger kommentaren sitt id
+        andring_repo.logga(Kommentar, 'skapa', [ny_kommentar.id])
+        # 2. Spara/Committa: Gör INSERT-frågan permanent.
         db.session.commit()
 
         return ny_kommentar
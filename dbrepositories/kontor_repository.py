@@ -5,6 +5,8 @@
 
 from models.kontor import Kontor
 from database import db
+# Cache för enskilda kontor (se entitets_cache.py)
+from dbrepositories.entitets_cache import EntitetsCache
 
 
 class KontorRepository:
@@ -12,6 +14,9 @@ class KontorRepository:
     Repository-klass för Kontor. Innehåller databasoperationer (CRUD).
     """
 
+    def __init__(self):
+        self.cache = EntitetsCache(Kontor)
+
     def hamta_alla(self):
         """
         Hämtar ALLA kontor från databasen (SELECT * FROM kontor).
@@ -20,12 +25,14 @@ class KontorRepository:
 
     def hamta_en(self, kontor_id):
         """
-        Hämtar ETT specifikt kontor baserat på ID (Primärnyckel).
+        Hämtar ETT specifikt kontor baserat på ID (Primärnyckel), via cachen.
         """
-        return Kontor.query.get(kontor_id)
+        return self.cache.hamta(kontor_id, lambda: Kontor.query.get(kontor_id))
 
     # Lägg till andra CRUD-metoder (skapa_ny, uppdatera, radera) vid behov.
     # För detta exempel räcker det med hämta_alla och hamta_en.
+    # OBS! Glöm inte self.cache.ogiltigforklara(kontor_id) i uppdatera/radera, och
+    # hamta_backend().ogiltigforklara_allt('sida:kontor') för den cachade /kontor/api/data.
 
 
 # Skapa EN instans av repository
@@ -19,6 +19,13 @@ Denna fil ska ALDRIG hantera webb- eller användarinteraktionslogik.
 from models.maklare import Maklare
 # Importera databasobjektet (session-hanteraren)
 from database import db
+from flask import abort, current_app
+# Cache för enskilda mäklare (se entitets_cache.py)
+from dbrepositories.entitets_cache import EntitetsCache
+# Ordnad logg över alla ändringar (se andring_repository.py)
+from dbrepositories.andring_repository import andring_repo
+# Oföränderliga kopior av raderna för listsidor (se dto.py)
+from dbrepositories.dto import MaklareDTO, fran_rader, kolumner
 
 
 class MaklareRepository:
@@ -27,13 +34,46 @@ class MaklareRepository:
     Innehåller alla standardiserade databasoperationer (CRUD).
     """
 
-    def hamta_alla(self):
+    def __init__(self):
+        self.cache = EntitetsCache(Maklare)
+        # Funktioner som vill veta när en mäklare skapas, ändras eller raderas (se registrera_lyssnare)
+        self.lyssnare = []
+
+    # ------------------------------------------------------------
+    # LYSSNARE (Observer Pattern, som i BostadRepository)
+    # ------------------------------------------------------------
+
+    def registrera_lyssnare(self, lyssnare):
+        """
+        Registrerar en funktion som anropas EFTER varje sparad ändring av en mäklare.
+
+        Args:
+            lyssnare (callable): Anropas som lyssnare(operation, fore, efter) där
+                operation är 'skapa', 'uppdatera' eller 'radera' och fore/efter är
+                mäklarens kolumnvärden (dict) före och efter ändringen (None om de saknas).
+        """
+        self.lyssnare.append(lyssnare)
+
+    def _meddela(self, operation, fore, efter):
+        """Anropar alla lyssnare. Ett fel i en lyssnare loggas men stoppar inte sparandet."""
+        for lyssnare in self.lyssnare:
+            try:
+                lyssnare(operation, fore, efter)
+            except Exception:
+                current_app.logger.exception('Lyssnaren %r misslyckades (%s)', lyssnare, operation)
+
+    def hamta_alla(self, som_dto=False):
         """
         Hämtar ALLA mäklare från databasen (SELECT * FROM maklare).
 
+        Args:
+            som_dto (bool): True = MaklareDTO:er istället för Maklare-objekt (se dto.py).
+
         Returns:
             list: En lista med alla Maklare-objekt.
         """
+        if som_dto:
+            return fran_rader(MaklareDTO, db.session.execute(db.select(*kolumner(MaklareDTO, Maklare))))
         # Maklare.query är startpunkten för att bygga databasfrågan.
         # .all() exekverar frågan och returnerar en lista.
         return Maklare.query.all()
@@ -49,7 +89,8 @@ class MaklareRepository:
             Maklare: Mäklare-objektet om det hittas, annars Python-värdet None.
         """
         # .get(id) är det snabbaste sättet att slå upp en rad i databasen via Primärnyckeln.
-        return Maklare.query.get(maklare_id)
+        # Cachen svarar direkt om mäklaren hämtats nyligen.
+        return self.cache.hamta(maklare_id, lambda: Maklare.query.get(maklare_id))
 
     def hamta_eller_404(self, maklare_id):
         """
@@ -65,8 +106,11 @@ class MaklareRepository:
         Raises:
             404: Om ID:t inte finns i databasen.
         """
-        # Funktionen sköter både sökning och felhantering.
-        return Maklare.query.get_or_404(maklare_id)
+        # Samma som hamta_en (med cache), men utlöser 404 om mäklaren saknas.
+        maklare = self.hamta_en(maklare_id)
+        if maklare is None:
+            abort(404)
+        return maklare
 
     def skapa_ny(self, data):
         """
@@ -86,12 +130,16 @@ class MaklareRepository:
             telefon=data.telefon,#data.get('telefon', ''),
             titel=data.titel,#data.get('titel', ''),
             beskrivning=data.beskrivning,#data.get('beskrivning', '')
+            kontor_id=data.kontor_id,
         )
 
         # 1. Lägg till i session: Förbereder SQL INSERT-frågan.
         db.session.add(ny_maklare)
-        # 2. Commit: Exekverar frågan och sparar permanent i databasen.
+        db.session.flush()   # Skickar INSERT-frågan så att mäklaren får sitt id
+        andring_repo.logga(Maklare, 'skapa', [ny_maklare.id])
+        # 2. Commit: Sparar permanent i databasen.
         db.session.commit()
+        self._meddela('skapa', None, _kolumnvarden(ny_maklare))
 
         return ny_maklare
 
@@ -110,15 +158,20 @@ class MaklareRepository:
         maklare = Maklare.query.get(maklare_id)
 
         if maklare:
+            fore = _kolumnvarden(maklare)
             # Steg 2: Uppdatera fälten på Python-objektet.
             maklare.namn = data['namn']
             maklare.epost = data['epost']
             maklare.telefon = data.get('telefon', '')
             maklare.titel = data.get('titel', '')
             maklare.beskrivning = data.get('beskrivning', '')
+            maklare.kontor_id = data.get('kontor_id')
 
+            andring_repo.logga(Maklare, 'uppdatera', [maklare_id])
             # Steg 3: Commit: Skickar ändringarna (UPDATE-frågan) till databasen.
             db.session.commit()
+            self.cache.ogiltigforklara(maklare_id)
+            self._meddela('uppdatera', fore, _kolumnvarden(maklare))
 
         return maklare
 
@@ -136,15 +189,24 @@ class MaklareRepository:
         maklare = Maklare.query.get(maklare_id)
 
         if maklare:
+            fore = _kolumnvarden(maklare)
             # Steg 2: Markera objektet för radering.
             db.session.delete(maklare)
+            andring_repo.logga(Maklare, 'radera', [maklare_id])
             # Steg 3: Commit: Utför den faktiska DELETE-frågan.
             db.session.commit()
+            self.cache.ogiltigforklara(maklare_id)
+            self._meddela('radera', fore, None)
             return True
 
         return False
 
 
+def _kolumnvarden(maklare):
+    """Mäklarens kolumnvärden som en vanlig dictionary (skickas till lyssnarna)."""
+    return {attr.key: getattr(maklare, attr.key) for attr in Maklare.__mapper__.column_attrs}
+
+
 # Skapa EN instans av repository
 # Detta är den enda instansen som applikationen behöver för att prata med Maklare-databasen.
 maklare_repo = MaklareRepository()
\ No newline at end of file
@@ -11,10 +11,19 @@ ENDAST databasinteraktioner och är helt oberoende av webbrouting.
 
 # Importera Nyhet-modellen
 from models.nyhet import Nyhet
+from models.kommentar import Kommentar
+from models.maklare import Maklare
 # Importera databasobjektet (session-hanteraren)
 from database import db
 # VIKTIGT: Importera SQLAlchemy-verktyg för Eager Loading (laddning av relationer)
 from sqlalchemy.orm import joinedload, selectinload
+from flask import abort
+# Cache för enskilda nyheter (se entitets_cache.py)
+from dbrepositories.entitets_cache import EntitetsCache
+# Ordnad logg över alla ändringar (se andring_repository.py)
+from dbrepositories.andring_repository import andring_repo
+# Oföränderliga kopior av raderna för listsidor (se dto.py)
+from dbrepositories.dto import KommentarDTO, MaklareDTO, NyhetDTO, fran_rader, kolumner
 
 
 class NyhetRepository:
@@ -23,16 +32,25 @@ class NyhetRepository:
     Innehåller alla databasoperationer (CRUD).
     """
 
-    def hamta_alla(self):
+    def __init__(self):
+        self.cache = EntitetsCache(Nyhet)
+
+    def hamta_alla(self, som_dto=False):
         """
         Hämtar ALLA nyheter från databasen.
         Denna metod används när vi bara behöver nyhetsdatan självt (titel, innehåll).
 
         Sortering: Nyast först (.desc() = Descending, fallande).
 
+        Args:
+            som_dto (bool): True = NyhetDTO:er utan mäklare och kommentarer (se dto.py).
+
         Returns:
             list: Lista med alla Nyhet-objekt, sorterade efter datum.
         """
+        if som_dto:
+            return fran_rader(NyhetDTO, db.session.execute(
+                db.select(*kolumner(NyhetDTO, Nyhet)).order_by(Nyhet.datum.desc())))
         # Sorterar baserat på 'datum'-fältet i fallande ordning.
         return Nyhet.query.order_by(Nyhet.datum.desc()).all()
 
@@ -61,6 +79,45 @@ class NyhetRepository:
             ) \
             .order_by(Nyhet.datum.desc()).all()
 
+    def strom_alla_med_relationer(self, per_del=100, som_dto=False):
+        """
+        Som hamta_alla_med_relationer(), men nyheterna läses 'per_del' åt gången, med en
+        egen kort fråga per del (keyset pagination på (datum, id), se bostad_repo.strom_i_delar).
+        Ingen databasmarkör hålls öppen medan sidan strömmas. Kommentarerna hämtas med
+        selectinload för varje del.
+
+        Args:
+            som_dto (bool): True = NyhetDTO:er (se dto.py). Samma frågor som ORM-varianten:
+                nyheterna JOIN mäklarna, plus EN kommentarfråga per del.
+
+        Yields:
+            Nyhet: En nyhet i taget (nyaste först), med Mäklare och Kommentarer inlästa.
+        """
+        if som_dto:
+            yield from self._strom_dto(per_del)
+            return
+        fraga = db.select(Nyhet).options(joinedload(Nyhet.maklare), selectinload(Nyhet.kommentarer))
+        for del_ in _i_delar(fraga, per_del, lambda fraga: db.session.scalars(fraga).unique().all()):
+            yield from del_
+
+    def _strom_dto(self, per_del):
+        """NyhetDTO:er med MaklareDTO och KommentarDTO:er, byggda direkt av kolumnvärdena."""
+        nyhetskolumner = kolumner(NyhetDTO, Nyhet)
+        antal = len(nyhetskolumner)
+        fraga = db.select(*nyhetskolumner, *kolumner(MaklareDTO, Maklare)) \
+            .outerjoin(Maklare, Nyhet.maklare_id == Maklare.id)
+        for del_ in _i_delar(fraga, per_del, lambda fraga: db.session.execute(fraga).all()):
+            kommentarer = {}
+            for kommentar in fran_rader(KommentarDTO, db.session.execute(
+                    db.select(*kolumner(KommentarDTO, Kommentar))
+                    .where(Kommentar.nyhet_id.in_([rad[0] for rad in del_]))
+                    .order_by(Kommentar.id))):
+                kommentarer.setdefault(kommentar.nyhet_id, []).append(kommentar)
+            for rad in del_:
+                # Mäklarens kolumner kommer efter nyhetens; id:t är None om nyheten saknar mäklare
+                maklare = MaklareDTO(*rad[antal:]) if rad[antal] is not None else None
+                yield NyhetDTO(*rad[:antal], maklare=maklare, kommentarer=tuple(kommentarer.get(rad[0], ())))
+
     def hamta_en(self, nyhet_id):
         """
         Hämtar EN specifik nyhet baserat på ID (utan att ladda relationer).
@@ -69,9 +126,9 @@ class NyhetRepository:
             nyhet_id (int): ID för nyheten.
 
         Returns:
-            Nyhet: Nyhet-objektet, eller None.
+            Nyhet: Nyhet-objektet (från cachen om det hämtats nyligen), eller None.
         """
-        return Nyhet.query.get(nyhet_id)
+        return self.cache.hamta(nyhet_id, lambda: Nyhet.query.get(nyhet_id))
 
     def hamta_eller_404(self, nyhet_id):
         """
@@ -83,7 +140,10 @@ class NyhetRepository:
         Returns:
             Nyhet: Nyhet-objektet (garanterat att existera).
         """
-        return Nyhet.query.get_or_404(nyhet_id)
+        nyhet = self.hamta_en(nyhet_id)
+        if nyhet is None:
+            abort(404)
+        return nyhet
 
     def skapa_ny(self, data):
         """
@@ -104,6 +164,8 @@ class NyhetRepository:
 
         # 1. Lägg till i session.
         db.session.add(ny_nyhet)
+        db.session.flush()   # Ger nyheten sitt id
+        andring_repo.logga(Nyhet, 'skapa', [ny_nyhet.id])
         # 2. Commit: Spara permanent.
         db.session.commit()
         return ny_nyhet
@@ -121,9 +183,11 @@ class NyhetRepository:
         nyhet = Nyhet.query.get(nyhet_id)
         if nyhet:
             db.session.delete(nyhet)
+            andring_repo.logga(Nyhet, 'radera', [nyhet_id])
             # VIKTIGT: Detta kan också radera relaterade kommentarer
             # om din Nyhet-modell har 'cascade="all, delete-orphan"' inställt.
             db.session.commit()
+            self.cache.ogiltigforklara(nyhet_id)
             return True
         return False
 
@@ -137,10 +201,32 @@ class NyhetRepository:
             nyhet.titel = data['titel']
             nyhet.innehall = data['innehall']
             nyhet.maklare_id = data.get('maklare_id') # Uppdatera även mäklaren vid behov
+            andring_repo.logga(Nyhet, 'uppdatera', [nyhet_id])
             db.session.commit()
+            self.cache.ogiltigforklara(nyhet_id)
             return nyhet
         return None
 
 
+def _i_delar(fraga, per_del, las):
+    """
+    Kör fraga (nyaste först) en del i taget: WHERE (datum, id) < (sista i förra delen) LIMIT per_del.
+
+    Args:
+        las (callable): Läser en del, t.ex. lambda fraga: db.session.execute(fraga).all().
+
+    Yields:
+        list: Raderna i delen. Varje rad har attributen 'id' och 'datum'.
+    """
+    fraga = fraga.order_by(Nyhet.datum.desc(), Nyhet.id.desc()).limit(per_del)
+    del_ = las(fraga)
+    while del_:
+        yield del_
+        if len(del_) < per_del:
+            return
+        sista = del_[-1]
+        del_ = las(fraga.where(db.tuple_(Nyhet.datum, Nyhet.id) < (sista.datum, sista.id)))
+
+
 # Skapa EN instans av repository som kan användas överallt
 nyhet_repo = NyhetRepository()
\ No newline at end of file
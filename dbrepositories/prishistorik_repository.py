@@ -0,0 +1,132 @@
+# dbrepositories/prishistorik_repository.py
+"""
+📉 PRISHISTORIK REPOSITORY - Sparar och läser bostädernas prisändringar.
+
+SKRIVA: BostadRepository anropar logga() och radera_for() INNAN det committar, precis som
+andring_repo.logga() - prisändringen och historikraden sparas i SAMMA transaktion.
+
+Alla läsfrågor är skrivna så att de kan besvaras från ett av indexen i models/prishistorik.py
+utan att läsa hela tabellen:
+
+- hamta_for_bostad():  WHERE bostad_id = ? ORDER BY tid          -> ix_prishistorik_bostad_tid
+- sankta_priser():     WHERE andring_kr < 0 AND tid >= ?          -> ix_prishistorik_sankningar (partiellt)
+- pristrend():         WHERE stad = ? AND tid >= ? GROUP BY månad -> ix_prishistorik_stad_tid (täckande)
+"""
+from datetime import datetime
+
+from database import db
+from models.prishistorik import Prisandring
+# Priset är text på bostaden ('1 950 000 kr') - historiken sparar kronor
+from tjanster.pris import pris_till_kronor
+
+# Villkoret måste stå som en KONSTANT i SQL:en ('andring_kr < 0', inte 'andring_kr < ?'),
+# annars kan SQLite inte se att frågan bara gäller raderna i det partiella indexet
+SANKNING = Prisandring.andring_kr < db.literal_column('0')
+
+
+class PrishistorikRepository:
+    """
+    Repository-klass för Prisandring.
+    """
+
+    def logga(self, andringar):
+        """
+        Lägger till en rad per prisändring i den PÅGÅENDE transaktionen (committar inte),
+        med EN sats (executemany).
+
+        - Ny bostad: ny=True och hela priset.
+        - Ändrat pris: ny=False och skillnaden i kronor.
+        - Från ett pris som inte går att tolka (t.ex. 'Pris saknas') till ett riktigt:
+          en ÅTERSTÄLLNING, ny=True och hela priset. Skillnaden är okänd, men priset
+          därefter är känt igen (se tjanster/prishistorik.prisforlopp).
+        - Till ett pris som inte går att tolka: ingen rad.
+
+        Args:
+            andringar (list): Tupler (fore, efter) med bostadens kolumnvärden (fore=None för en ny bostad).
+        """
+        tid = datetime.now()
+        rader = []
+        for fore, efter in andringar:
+            if fore is not None and fore['pris'] == efter['pris']:
+                continue   # T.ex. bara beskrivningen ändrades
+            nytt = pris_till_kronor(efter['pris'])
+            if nytt is None:
+                continue
+            gammalt = None if fore is None else pris_till_kronor(fore['pris'])
+            if gammalt is None:
+                rader.append({'bostad_id': efter['id'], 'stad': efter['stad'], 'tid': tid,
+                              'andring_kr': nytt, 'ny': True})
+            elif nytt != gammalt:
+                rader.append({'bostad_id': efter['id'], 'stad': efter['stad'], 'tid': tid,
+                              'andring_kr': nytt - gammalt, 'ny': False})
+        if rader:
+            db.session.execute(Prisandring.__table__.insert(), rader)
+
+    def radera_for(self, bostad_idn):
+        """
+        Tar bort historiken för bostäder som raderas, i den PÅGÅENDE transaktionen
+        (en ARKIVERAD bostad behåller sin).
+        """
+        bostad_idn = list(bostad_idn)
+        if bostad_idn:
+            Prisandring.query.filter(Prisandring.bostad_id.in_(bostad_idn)).delete(synchronize_session=False)
+
+    def hamta_for_bostad(self, bostad_id):
+        """
+        Returns:
+            list: Tupler (tid, andring_kr, ny) för bostaden, äldst först.
+        """
+        return db.session.query(Prisandring.tid, Prisandring.andring_kr, Prisandring.ny) \
+                         .filter(Prisandring.bostad_id == bostad_id) \
+                         .order_by(Prisandring.tid, Prisandring.id).all()
+
+    def sankta_priser(self, sedan, antal=50):
+        """
+        Bostäderna vars pris har sänkts sedan 'sedan', störst sänkning först.
+
+        Returns:
+            list: Tupler (bostad_id, sankning_kr, senast) där sankning_kr är summan av
+                  sänkningarna (negativ) och senast tiden för den senaste sänkningen.
+        """
+        summa = db.func.sum(Prisandring.andring_kr)
+        # GROUP BY +bostad_id: med bara 'bostad_id' väljer SQLite bostad-indexet för att slippa
+        # sortera - och läser då ALLA rader. Plustecknet gör att indexet inte kan användas för
+        # grupperingen, så veckans sänkningar läses ur det partiella indexet och sorteras efteråt.
+        return db.session.query(Prisandring.bostad_id, summa, db.func.max(Prisandring.tid)) \
+                         .filter(SANKNING, Prisandring.tid >= sedan) \
+                         .group_by(db.literal_column('+prishistorik.bostad_id')) \
+                         .order_by(summa).limit(antal).all()
+
+    def pristrend(self, stad, sedan):
+        """
+        Prisrörelserna i en stad per månad.
+
+        Returns:
+            list: En dictionary per månad ('2026-10'), äldst först, med antal nya bostäder och
+                  deras medelpris (även bostäder som fått ett pris efter 'Pris saknas'),
+                  antal sänkningar och höjningar och summan av ändringarna.
+        """
+        manad = db.func.strftime('%Y-%m', Prisandring.tid)
+        andring = Prisandring.andring_kr
+        ny = Prisandring.ny
+        rader = db.session.query(
+            manad,
+            db.func.sum(db.case((ny, 1), else_=0)),
+            db.func.avg(db.case((ny, andring))),
+            db.func.sum(db.case((db.and_(~ny, andring < 0), 1), else_=0)),
+            db.func.sum(db.case((db.and_(~ny, andring > 0), 1), else_=0)),
+            db.func.sum(db.case((~ny, andring), else_=0)),
+        ).filter(Prisandring.stad == stad, Prisandring.tid >= sedan).group_by(manad).order_by(manad).all()
+        return [
+            {'manad': rad[0], 'nya': rad[1], 'medelpris_nya': rad[2], 'sankningar': rad[3],
+             'hojningar': rad[4], 'andring_kr': rad[5]}
+            for rad in rader
+        ]
+
+    def hamta_stader(self):
+        """Städerna som har någon prishistorik (läses ur stadsindexet)."""
+        return [stad for stad, in db.session.query(Prisandring.stad).distinct().order_by(Prisandring.stad)]
+
+
+# Skapa EN instans av repository
+prishistorik_repo = PrishistorikRepository()
@@ -0,0 +1,99 @@
+# dbrepositories/prisstatistik_repository.py
+"""
+📈 PRISSTATISTIK REPOSITORY - Ansvarar för ALL databasåtkomst för prisstatistiken.
+
+- Läser de färdiga aggregaten (en rad per stad och rumsantal) till marknadsöversikten.
+- Läser de få kolumner ur 'bostader' som behövs för att räkna om aggregaten.
+- Ersätter aggregaten för en eller flera städer i EN transaktion.
+- Håller listan över "smutsiga" städer, som ändrats men inte räknats om än.
+
+Själva beräkningen görs av tjanster/prisstatistik.py (med NumPy).
+"""
+from datetime import datetime
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database import db
+from models.bostad import Bostad
+from models.prisstatistik import Prisstatistik, SmutsigStad
+
+
+class PrisstatistikRepository:
+    """
+    Repository-klass för Prisstatistik.
+    """
+
+    def hamta_oversikt(self):
+        """
+        Hämtar alla aggregat sorterade på stad och rum (raden för hela staden först).
+        Antalet rader beror bara på antalet städer - inte på antalet bostäder.
+
+        Returns:
+            list: Prisstatistik-objekt.
+        """
+        return Prisstatistik.query.order_by(Prisstatistik.stad, Prisstatistik.rum).all()
+
+    def ar_tom(self):
+        """Har statistiken aldrig byggts?"""
+        return db.session.query(Prisstatistik.stad).first() is None
+
+    def hamta_bostadsvarden(self, stader=None):
+        """
+        Hämtar (stad, rum, pris, yta) för alla bostäder, eller bara för vissa städer.
+        Returnerar tupler istället för Bostad-objekt - det är mycket snabbare i bulk.
+
+        Args:
+            stader (iterable): Städer att hämta, eller None för alla.
+        """
+        fraga = db.session.query(Bostad.stad, Bostad.rum, Bostad.pris, Bostad.yta)
+        if stader is not None:
+            fraga = fraga.filter(Bostad.stad.in_(list(stader)))
+        return fraga.all()
+
+    def markera_smutsiga(self, stader):
+        """
+        Noterar att städerna behöver räknas om. Committar INTE - anropas i samma
+        transaktion som ändringen av bostäderna (se BostadRepository.registrera_i_transaktion).
+        """
+        sats = sqlite_insert(SmutsigStad.__table__).on_conflict_do_nothing(index_elements=['stad'])
+        db.session.execute(sats, [{'stad': stad} for stad in stader])
+
+    def hamta_smutsiga(self):
+        """Städerna som ändrats men inte räknats om (t.ex. för att omräkningen misslyckades)."""
+        return set(db.session.scalars(db.select(SmutsigStad.stad)))
+
+    def borja_omrakning(self, stader=None):
+        """
+        Tar bort städerna (eller ALLA om stader är None) ur listan över smutsiga städer.
+        Committar INTE: anropa före hamta_bostadsvarden() och avsluta med ersatt().
+        Raderingen startar skrivtransaktionen, så ingen annan kan ändra bostäderna mellan
+        läsningen och ersatt() och sedan få sin markering borttagen av oss.
+        """
+        radera = db.session.query(SmutsigStad)
+        if stader is not None:
+            radera = radera.filter(SmutsigStad.stad.in_(list(stader)))
+        radera.delete(synchronize_session=False)
+
+    def ersatt(self, aggregat, stader=None):
+        """
+        Ersätter aggregaten för de angivna städerna (eller ALLA om stader är None).
+
+        Args:
+            aggregat (list): Dictionaries med kolumnerna i Prisstatistik (utom 'uppdaterad').
+            stader (iterable): Städerna som räknats om. Deras gamla rader tas bort, även om
+                               staden inte längre har några bostäder.
+        """
+        radera = db.session.query(Prisstatistik)
+        if stader is not None:
+            radera = radera.filter(Prisstatistik.stad.in_(list(stader)))
+        radera.delete(synchronize_session=False)
+
+        if aggregat:
+            nu = datetime.now()
+            # executemany: alla rader skickas i en och samma INSERT-sats
+            db.session.execute(Prisstatistik.__table__.insert(), [{**rad, 'uppdaterad': nu} for rad in aggregat])
+        db.session.commit()
+
+
+# Skapa EN instans av repository som kan användas överallt
+prisstatistik_repo = PrisstatistikRepository()
@@ -0,0 +1,75 @@
+# dbrepositories/sidvisning_repository.py
+"""
+👁️ SIDVISNING REPOSITORY - Hanterar ALL databasåtkomst för visningsräknarna.
+
+- spara_deltan(): Lägger till MÅNGA räknares tillskott med EN UPSERT-sats.
+- hamta_populara(): Topplistan för "populärt just nu", med EN fråga.
+
+Räkningen i minnet och tidsstyrningen sköts av tjanster/sidvisningar.py.
+"""
+from sqlalchemy import case
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database import db
+from models.sidvisning import Sidvisning
+
+
+class SidvisningRepository:
+    """
+    Repository-klass för Sidvisning.
+    """
+
+    def spara_deltan(self, deltan, epok, skala):
+        """
+        Lägger till nya visningar på räknarna med EN sats (INSERT ... ON CONFLICT DO UPDATE).
+
+        Args:
+            deltan (list): Dictionaries med typ, entitet_id, antal, poang och senast.
+            epok (int): Epoken som poängen i deltan är räknade i.
+            skala (float): Faktorn som en poäng från förra epoken ska multipliceras med.
+        """
+        if not deltan:
+            return
+        sats = sqlite_insert(Sidvisning.__table__)
+        # Befintlig poäng räknas om till den aktuella epoken innan tillskottet läggs på.
+        # Poäng från äldre epoker än den förra är försumbara och nollas.
+        gammal_poang = case(
+            (Sidvisning.epok == epok, Sidvisning.poang),
+            (Sidvisning.epok == epok - 1, Sidvisning.poang * skala),
+            else_=0.0,
+        )
+        sats = sats.on_conflict_do_update(
+            index_elements=['typ', 'entitet_id'],
+            set_={
+                'antal': Sidvisning.antal + sats.excluded.antal,
+                'poang': gammal_poang + sats.excluded.poang,
+                'epok': epok,
+                'senast': sats.excluded.senast,
+            },
+        )
+        db.session.execute(sats, [{**delta, 'epok': epok} for delta in deltan])
+        db.session.commit()
+
+    def hamta_populara(self, modell, typ, epok, skala, antal=5):
+        """
+        Hämtar de mest populära objekten av en typ just nu, med EN fråga.
+        Objekt som inte längre finns (t.ex. raderade bostäder) följer inte med.
+
+        Args:
+            modell: Modellen som räknarna gäller, t.ex. Bostad eller Nyhet.
+            typ (str): 'bostad' eller 'nyhet'.
+            epok (int), skala (float): Som i spara_deltan().
+            antal (int): Hur många som ska hämtas.
+
+        Returns:
+            list: Tupler (objekt, antal visningar), populärast först.
+        """
+        poang = case((Sidvisning.epok == epok, Sidvisning.poang), else_=Sidvisning.poang * skala)
+        return db.session.query(modell, Sidvisning.antal) \
+                         .join(Sidvisning, Sidvisning.entitet_id == modell.id) \
+                         .filter(Sidvisning.typ == typ, Sidvisning.epok >= epok - 1) \
+                         .order_by(poang.desc()).limit(antal).all()
+
+
+# Skapa EN instans av repository som kan användas överallt
+sidvisning_repo = SidvisningRepository()
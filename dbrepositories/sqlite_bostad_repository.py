@@ -3,9 +3,13 @@
 
 Denna version konverterar alla rader från databasen till objekt med attributåtkomst (bostad.adress).
 Perfekt för nybörjare som vill ha renare kod i templates och rutter.
+
+Precis som i bostad_repository.py skrivs varje ändring också till ändringsloggen
+(tabellen 'andringar', se models/andring.py) INNAN commit - i samma transaktion.
 """
 
 import sqlite3
+from datetime import datetime
 from flask import g, abort
 from types import SimpleNamespace
 
@@ -34,6 +38,17 @@ def rows_to_objs(rows):
     """
     return [row_to_obj(r) for r in rows]
 
+def logga_andring(db, operation, bostad_id):
+    """
+    Lägger till en rad i ändringsloggen (committar inte - görs tillsammans med ändringen).
+    Versionen blir radens senaste version + 1, som i andring_repository.logga().
+    """
+    db.execute("""
+        INSERT INTO andringar (entitet, entitet_id, operation, version, tid)
+        SELECT 'bostader', ?, ?, COALESCE(MAX(version), 0) + 1, ?
+        FROM andringar WHERE entitet = 'bostader' AND entitet_id = ?
+    """, (bostad_id, operation, datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f'), bostad_id))
+
 class BostadRepository:
     """
     Repository-klass för Bostad.
@@ -69,12 +84,13 @@ class BostadRepository:
             data['yta'],
             data.get('beskrivning', '')
         ))
+        logga_andring(db, 'skapa', cursor.lastrowid)
         db.commit()
         return self.hamta_en(cursor.lastrowid)
 
     def uppdatera(self, bostad_id, data):
         db = get_db()
-        db.execute("""
+        cursor = db.execute("""
             UPDATE bostader
             SET adress = ?, stad = ?, pris = ?, rum = ?, yta = ?, beskrivning = ?
             WHERE id = ?
@@ -87,12 +103,16 @@ class BostadRepository:
             data.get('beskrivning', ''),
             bostad_id
         ))
+        if cursor.rowcount > 0:
+            logga_andring(db, 'uppdatera', bostad_id)
         db.commit()
         return self.hamta_en(bostad_id)
 
     def radera(self, bostad_id):
         db = get_db()
         cursor = db.execute("DELETE FROM bostader WHERE id = ?", (bostad_id,))
+        if cursor.rowcount > 0:
+            logga_andring(db, 'radera', bostad_id)
         db.commit()
         return cursor.rowcount > 0
 
@@ -15,6 +15,14 @@ SINGLE RESPONSIBILITY: ENDAST databasoperationer (CREATE, READ, UPDATE, DELETE).
 from models.user import User
 # Importera databasobjektet (session-hanteraren)
 from database import db
+from flask import abort
+# Cache för enskilda användare (se entitets_cache.py)
+from dbrepositories.entitets_cache import EntitetsCache
+# Ordnad logg över alla ändringar (se andring_repository.py)
+from dbrepositories.andring_repository import andring_repo
+# Användarens sparade bostäder tas bort tillsammans med användaren
+from dbrepositories.bostad_repository import bostad_repo
+from dbrepositories.favorit_repository import favorit_repo
 
 
 class UserRepository:
@@ -23,6 +31,9 @@ class UserRepository:
     Innehåller alla databasoperationer (CRUD).
     """
 
+    def __init__(self):
+        self.cache = EntitetsCache(User)
+
     def hamta_alla(self):
         """
         Hämtar ALLA användare från databasen.
@@ -40,9 +51,9 @@ class UserRepository:
             user_id (int): ID för användaren.
 
         Returns:
-            User: User-objektet, eller None om det inte finns.
+            User: User-objektet (från cachen om det hämtats nyligen), eller None om det inte finns.
         """
-        return User.query.get(user_id)
+        return self.cache.hamta(user_id, lambda: User.query.get(user_id))
 
     def hamta_eller_404(self, user_id):
         """
@@ -54,7 +65,10 @@ class UserRepository:
         Returns:
             User: User-objektet (garanterat att existera).
         """
-        return User.query.get_or_404(user_id)
+        user = self.hamta_en(user_id)
+        if user is None:
+            abort(404)
+        return user
 
     def hamta_user_username(self, username):
         """
@@ -98,6 +112,8 @@ class UserRepository:
 
         # 1. Lägg till i session.
         db.session.add(ny_user)
+        db.session.flush()   # Ger användaren sitt id
+        andring_repo.logga(User, 'skapa', [ny_user.id])
         # 2. Commit: Spara permanent.
         db.session.commit()
 
@@ -123,8 +139,10 @@ class UserRepository:
             user.password = data['password']
             user.role = data['role']
 
+            andring_repo.logga(User, 'uppdatera', [user_id])
             # Spara ändringarna
             db.session.commit()
+            self.cache.ogiltigforklara(user_id)
 
         return user
 
@@ -142,8 +160,14 @@ class UserRepository:
 
         if user:
             db.session.delete(user)
+            # Användarens favoriter (och bostädernas räknare) i samma transaktion
+            bostad_idn = favorit_repo.radera_for_user(user_id)
+            andring_repo.logga(User, 'radera', [user_id])
             # Commit: Utför DELETE.
             db.session.commit()
+            self.cache.ogiltigforklara(user_id)
+            for bostad_id in bostad_idn:
+                bostad_repo.cache.ogiltigforklara(bostad_id)
             return True
 
         return False
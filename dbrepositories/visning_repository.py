@@ -0,0 +1,199 @@
+# dbrepositories/visning_repository.py
+"""
+🗓️ VISNING REPOSITORY - Bokar, avbokar och läser visningar.
+
+DUBBELBOKNINGAR: En mäklare kan inte hålla två visningar samtidigt. boka() sparar först
+visningen och letar SEDAN efter en krock i samma transaktion (och rullar tillbaka om den
+hittar en). SQLite har bara EN skrivare åt gången: när vår INSERT är gjord kan ingen annan
+process spara en visning förrän vi har committat - och deras kontroll ser då vår visning.
+Två samtidiga bokningar av samma tid kan alltså aldrig båda lyckas.
+
+Krocksökningen använder indexet (maklare_id, start): en visning som överlappar [start, slut)
+måste börja efter start - MAX_LANGD_MINUTER och före slut, så bara det intervallet läses.
+"""
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from database import db
+from models.visning import MAX_LANGD_MINUTER, Visning
+# Ordnad logg över alla ändringar (se andring_repository.py)
+from dbrepositories.andring_repository import andring_repo
+
+
+class Visningskonflikt(Exception):
+    """Mäklaren har redan en visning som överlappar den nya. 'visning' är den som krockar."""
+
+    def __init__(self, visning):
+        super().__init__(f'Mäklaren har redan en visning {visning.start:%Y-%m-%d %H:%M}-{visning.slut:%H:%M} '
+                         f'(bostad {visning.bostad_id})')
+        self.visning = visning
+
+
+class VisningRepository:
+    """
+    Repository-klass för Visning.
+    """
+
+    def __init__(self):
+        # Funktioner som vill veta när en visning bokas eller avbokas (se registrera_lyssnare)
+        self.lyssnare = []
+
+    # ------------------------------------------------------------
+    # LYSSNARE (Observer Pattern, som i BostadRepository)
+    # ------------------------------------------------------------
+
+    def registrera_lyssnare(self, lyssnare):
+        """
+        Registrerar en funktion som anropas EFTER varje sparad bokning eller avbokning.
+
+        Args:
+            lyssnare (callable): Anropas som lyssnare(operation, fore, efter) där operation
+                är 'skapa' eller 'radera' och fore/efter är visningens kolumnvärden (dict).
+        """
+        self.lyssnare.append(lyssnare)
+
+    def _meddela(self, operation, fore, efter):
+        """Anropar alla lyssnare. Ett fel i en lyssnare loggas men stoppar inte sparandet."""
+        for lyssnare in self.lyssnare:
+            try:
+                lyssnare(operation, fore, efter)
+            except Exception:
+                current_app.logger.exception('Lyssnaren %r misslyckades (%s)', lyssnare, operation)
+
+    # ------------------------------------------------------------
+    # SKRIVA
+    # ------------------------------------------------------------
+
+    def konflikter(self, maklare_id, start, slut, utom_id=None):
+        """
+        Mäklarens visningar som överlappar [start, slut), sorterade på start.
+
+        Args:
+            utom_id (int): En visning som inte räknas (den som just sparats).
+        """
+        fraga = Visning.query.filter(
+            Visning.maklare_id == maklare_id,
+            Visning.start > start - timedelta(minutes=MAX_LANGD_MINUTER),
+            Visning.start < slut,
+            Visning.slut > start,
+        )
+        if utom_id is not None:
+            fraga = fraga.filter(Visning.id != utom_id)
+        return fraga.order_by(Visning.start).all()
+
+    def boka(self, bostad_id, maklare_id, start, slut, info=None):
+        """
+        Sparar en ny visning, om mäklaren är ledig.
+
+        Returns:
+            Visning: Den sparade visningen.
+
+        Raises:
+            ValueError: Om slut inte är efter start, eller visningen är längre än MAX_LANGD_MINUTER.
+            Visningskonflikt: Om mäklaren redan har en visning som överlappar.
+        """
+        if slut <= start:
+            raise ValueError('Visningen måste sluta efter att den börjar.')
+        if slut - start > timedelta(minutes=MAX_LANGD_MINUTER):
+            raise ValueError(f'En visning får vara högst {MAX_LANGD_MINUTER // 60} timmar.')
+
+        visning = Visning(bostad_id=bostad_id, maklare_id=maklare_id, start=start, slut=slut, info=info)
+        db.session.add(visning)
+        db.session.flush()   # INSERT först: transaktionen har nu skrivlåset (se modulens docstring)
+        krockar = self.konflikter(maklare_id, start, slut, utom_id=visning.id)
+        if krockar:
+            db.session.rollback()
+            raise Visningskonflikt(krockar[0])
+        andring_repo.logga(Visning, 'skapa', [visning.id])
+        db.session.commit()
+        self._meddela('skapa', None, _kolumnvarden(visning))
+        return visning
+
+    def avboka(self, visning_id):
+        """
+        Returns:
+            bool: True om visningen fanns och togs bort.
+        """
+        visning = db.session.get(Visning, visning_id)
+        if visning is None:
+            return False
+        fore = _kolumnvarden(visning)
+        db.session.delete(visning)
+        andring_repo.logga(Visning, 'radera', [visning_id])
+        db.session.commit()
+        self._meddela('radera', fore, None)
+        return True
+
+    def radera_for(self, bostad_id=None, maklare_id=None):
+        """
+        Tar bort alla visningar för en bostad (som raderats eller arkiverats) eller en mäklare.
+
+        Returns:
+            int: Antal borttagna visningar.
+        """
+        if bostad_id is None and maklare_id is None:
+            raise ValueError('Ange bostad_id eller maklare_id.')
+        fraga = Visning.query
+        if bostad_id is not None:
+            fraga = fraga.filter_by(bostad_id=bostad_id)
+        if maklare_id is not None:
+            fraga = fraga.filter_by(maklare_id=maklare_id)
+        visningar = [_kolumnvarden(visning) for visning in fraga]
+        if not visningar:
+            return 0
+        idn = [visning['id'] for visning in visningar]
+        Visning.query.filter(Visning.id.in_(idn)).delete(synchronize_session=False)
+        andring_repo.logga(Visning, 'radera', idn)
+        db.session.commit()
+        for visning in visningar:
+            self._meddela('radera', visning, None)
+        return len(visningar)
+
+    # ------------------------------------------------------------
+    # LÄSA
+    # ------------------------------------------------------------
+
+    def hamta_en(self, visning_id):
+        return db.session.get(Visning, visning_id)
+
+    def hamta_for_bostad(self, bostad_id, fran=None):
+        """Bostadens visningar som inte är slut än (eller som slutar efter 'fran'), i tidsordning."""
+        fran = fran or datetime.now()
+        return Visning.query.filter(Visning.bostad_id == bostad_id, Visning.slut > fran) \
+            .order_by(Visning.start).all()
+
+    def hamta_for_maklare(self, maklare_idn, fran, till):
+        """
+        Visningarna för en eller flera mäklare som överlappar [fran, till), i tidsordning.
+
+        Args:
+            maklare_idn (list): Mäklarnas id:n (t.ex. alla på ett kontor).
+        """
+        if not maklare_idn:
+            return []
+        return Visning.query.filter(
+            Visning.maklare_id.in_(list(maklare_idn)),
+            Visning.start > fran - timedelta(minutes=MAX_LANGD_MINUTER),
+            Visning.start < till,
+            Visning.slut > fran,
+        ).order_by(Visning.start).all()
+
+    def hamta_kolumnvarden(self, fran):
+        """
+        (id, bostad_id, maklare_id, start, slut) för alla visningar som slutar efter 'fran'
+        - det visningsschemat i minnet byggs av. En fråga, inga Visning-objekt.
+        """
+        return db.session.execute(
+            db.select(Visning.id, Visning.bostad_id, Visning.maklare_id, Visning.start, Visning.slut)
+            .where(Visning.slut > fran)
+        ).all()
+
+
+def _kolumnvarden(visning):
+    """Visningens kolumnvärden som en vanlig dictionary (skickas till lyssnarna)."""
+    return {attr.key: getattr(visning, attr.key) for attr in Visning.__mapper__.column_attrs}
+
+
+# Skapa EN instans av repository
+visning_repo = VisningRepository()
@@ -1,7 +1,9 @@
+import os
 from flask import Flask, render_template
 from database import init_db    # För att koppla ihop appen med databasen
 from flask_login import LoginManager   # Enkelt sätt att hantera inloggning
 from models.user import User           # Modellen för användare (behövs av Flask-Login)
+from kommandon import registrera_kommandon   # Egna terminalkommandon (flask --app flask_app ...)
 
 def skapa_app():
     """
@@ -17,12 +19,91 @@ def skapa_app():
 
     # SÄTT UPP APPENS INSTÄLLNINGAR
     app.config['SECRET_KEY'] = 'din_superhemliga_nyckel'   # Behöv för att sessions/inloggning ska vara säkert
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///blgeestates.db'  # Pekar ut vilken databas som ska användas
+    # Pekar ut vilken databas som ska användas (BLGEE_DATABAS byter t.ex. till en testdatabas för benchmarks)
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('BLGEE_DATABAS', 'sqlite:///blgeestates.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False   # Spara minne och processorkraft
+    app.config['CACHE_BACKEND'] = 'minne'                   # 'minne' (en process) eller 'sqlite' (delad mellan workers)
+    app.config['CACHE_MAX_ANTAL'] = 1000                    # Max antal poster per cache (t.ex. per modell)
+    app.config['ENTITETS_CACHE_TTL'] = 60                   # Sekunder ett cachat objekt får användas
+    app.config['REKOMMENDATION_MAX_ALDER'] = 300            # Sekunder innan "liknande bostäder" byggs om helt
+    app.config['BEVAKNING_MAX_ALDER'] = 300                 # Sekunder innan sökindexet för bevakningar byggs om helt
+    app.config['AUTOKOMPLETTERING_MAX_ALDER'] = 300         # Sekunder innan autokompletteringens index byggs om helt
+    app.config['VISNINGSSCHEMA_MAX_ALDER'] = 300            # Sekunder innan visningsschemat (vem är ledig när) byggs om helt
+    app.config['BILD_ARBETARE'] = None                      # Processer som skapar miniatyrer (None = en per kärna)
+    app.config['VISNING_FLUSH_SEKUNDER'] = 5                # Hur ofta visningsräknarna skrivs till databasen
+    app.config['POPULAR_HALVERINGSTID'] = 6 * 3600          # Sekunder tills en visning väger hälften i "populärt just nu"
+    app.config['PROFIL_ANDEL'] = 0.0                        # Andel requests som profileras (0.01 = 1 %, 0 = av)
+    app.config['PROFIL_INTERVALL_MS'] = 5                   # Millisekunder mellan proven i en profil
+    app.config['PROFIL_LANGSAM_MS'] = 500                   # Requests långsammare än så listas på /admin/profiler
+    app.config['PROFIL_MAX_ANTAL'] = 50                     # Antal profiler/långsamma requests som sparas (per worker)
+    app.config['MINNESSPARNING'] = False                    # tracemalloc per request (långsamt - bara vid felsökning)
+    app.config['MAX_LADDADE_OBJEKT'] = {'Bostad': 1000, 'Kommentar': 1000}   # Varna om en request laddar fler
+    app.config['ASYNC_MAX_ANSLUTNINGAR'] = 10               # Databastrådar/anslutningar för async-routes (per worker)
+    app.config['ASYNC_VANTETID'] = 5                        # Sekunder en async-fråga får ta (inklusive kö)
+    app.config['JOBB_MAX_FORSOK'] = 3                       # Försök innan ett jobb i jobbkön räknas som misslyckat
+    app.config['JOBB_BACKOFF_SEKUNDER'] = 10                # Väntan före andra försöket (fördubblas sedan)
+    app.config['JOBB_LASNING_SEKUNDER'] = 60                # Ett jobb vars arbetare slutat svara tas över efter så här länge
+    app.config['JOBB_ARBETARE_I_APPEN'] = False             # Kör en jobbarbetare som tråd i appen (utveckling)
+    app.config['ANDRINGAR_SYNK_SEKUNDER'] = 2               # Hur ofta en worker läser ändringsloggen för att rensa sin cache
+    app.config['IMPORT_HOPPA_OVER_DUBBLETTER'] = True       # Nya rader i en importfil som redan finns som bostad sparas inte
 
     # KOPPLA APPEN TILL DATABASEN & SKAPA TABELLER
     init_db(app)
 
+    # VÄLJ CACHE-BACKEND och tillämpa cache-inställningarna på repositoriernas cacher
+    from dbrepositories.cache_backend import init_cache_backend
+    from dbrepositories.entitets_cache import konfigurera_cacher
+    init_cache_backend(app)
+    konfigurera_cacher(app)
+
+    # FÖLJ ÄNDRINGSLOGGEN så att ändringar i andra worker-processer syns i den här processens cache
+    from tjanster.andringsflode import init_andringsflode
+    init_andringsflode(app)
+
+    # PEKA ASYNC-REPOSITORYNA PÅ SAMMA DATABASFIL, med ett tak för antalet anslutningar
+    from dbrepositories.async_databas import init_async_databas
+    init_async_databas(app)
+
+    # HÅLL PRISSTATISTIKEN UPPDATERAD när bostäder sparas (och bygg den om den saknas)
+    from tjanster.prisstatistik import init_prisstatistik
+    init_prisstatistik(app)
+
+    # HÅLL "LIKNANDE BOSTÄDER" UPPDATERAT när bostäder sparas
+    from tjanster.rekommendation import init_rekommendation
+    init_rekommendation(app)
+
+    # HÅLL AUTOKOMPLETTERINGEN (adresser, städer, mäklare) UPPDATERAD när bostäder och mäklare sparas
+    from tjanster.autokomplettering import init_autokomplettering
+    init_autokomplettering(app)
+
+    # HÅLL VISNINGSSCHEMAT (vem är ledig när) UPPDATERAT när visningar, bostäder och mäklare ändras
+    from tjanster.visningsschema import init_visningsschema
+    init_visningsschema(app)
+
+    # MATCHA NYA BOSTÄDER MOT KÖPARNAS SPARADE SÖKNINGAR
+    from tjanster.bevakningar import init_bevakningar
+    init_bevakningar(app)
+
+    # STÄDA BORT BILDKOPPLINGAR när bostäder raderas
+    from tjanster.bilder import init_bilder
+    init_bilder(app)
+
+    # RÄKNA SIDVISNINGAR i minnet och skriv dem i klump
+    from tjanster.sidvisningar import init_sidvisningar
+    init_sidvisningar(app)
+
+    # PROFILERA LÅNGSAMMA REQUESTS (slumpvis eller med headern X-Profilera)
+    from tjanster.profilering import init_profilering
+    init_profilering(app)
+
+    # MÄT MINNE OCH LADDADE ORM-OBJEKT per request (visas på /admin/diagnostik)
+    from tjanster.minnesdiagnostik import init_minnesdiagnostik
+    init_minnesdiagnostik(app)
+
+    # REGISTRERA JOBBTYPERNA för jobbkön (långsamma jobb körs av 'flask jobbarbetare')
+    from tjanster.jobbko import init_jobbko
+    init_jobbko(app)
+
     # REGISTRERA MODULES (BLUEPRINTS)
     # Varje blueprint är en del av appen, t.ex. "bostäder" eller "admin".
     registrera_blueprints(app)
@@ -30,6 +111,9 @@ def skapa_app():
     # SKAPA DE VIKTIGA APP-ROUTES (t.ex. startsidan)
     create_routes(app)
 
+    # REGISTRERA TERMINALKOMMANDON (t.ex. import av bostäder)
+    registrera_kommandon(app)
+
     # SÄTT UPP INLOGGNING (Flask-Login)
     login_manager = LoginManager()
     login_manager.init_app(app)                     # Koppla till appen
@@ -58,6 +142,7 @@ def registrera_blueprints(app):
     from myblueprints.auth import auth_bp
     from myblueprints.nyheter import nyheter_bp
     from myblueprints.kontor import kontor_bp
+    from myblueprints.bevakningar import bevakningar_bp
 
     # Registrera (koppla in) alla moduler till huvud-appen.
     app.register_blueprint(bostader_bp, url_prefix='/bostader')    # Alla URL:er som börjar på /bostader
@@ -66,6 +151,7 @@ def registrera_blueprints(app):
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(nyheter_bp, url_prefix='/nyheter')
     app.register_blueprint(kontor_bp, url_prefix='/kontor')
+    app.register_blueprint(bevakningar_bp, url_prefix='/bevakningar')
 
 def create_routes(app):
     """
@@ -81,8 +167,16 @@ def create_routes(app):
     @app.route('/')
     def index():
         """Den första sidan man ser (startsidan)."""
+        from models.bostad import Bostad
+        from models.nyhet import Nyhet
+        from tjanster.sidvisningar import visningsraknare
         # 'home.html' ska ligga i mappen 'templates' i projektroten.
-        return render_template('home.html', titel='Välkommen')
+        return render_template(
+            'home.html',
+            titel='Välkommen',
+            populara_bostader=visningsraknare.populara(Bostad, 'bostad', antal=3),
+            populara_nyheter=visningsraknare.populara(Nyhet, 'nyhet', antal=3),
+        )
 
 # HÄR STARTAS APPEN
 app = skapa_app()
@@ -0,0 +1,166 @@
+# kommandon.py
+"""
+⌨️ TERMINALKOMMANDON - Egna 'flask'-kommandon för underhåll och bulkjobb.
+
+Flask har ett inbyggt kommandoradsverktyg (byggt på biblioteket Click).
+Här registrerar vi egna kommandon på appen, som sedan körs i terminalen med:
+
+    flask --app flask_app <kommando> [argument]
+
+Kommandona körs automatiskt inuti ett app-context, så repositories och databasen
+fungerar precis som i en route.
+"""
+import click
+
+
+def registrera_kommandon(app):
+    """
+    Kopplar alla terminalkommandon till Flask-appen.
+    """
+
+    @app.cli.command('bygg-geoindex')
+    def bygg_geoindex_kommando():
+        """Bygger om det minnesmappade postnummerindexet från data/postnummer.csv."""
+        from tjanster.geokodning import bygg_index
+        antal_postnummer, antal_orter = bygg_index()
+        click.echo(f'✓ Indexet innehåller {antal_postnummer} postnummer och {antal_orter} orter')
+
+    @app.cli.command('importera-hemnet')
+    @click.argument('sokvag', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--bilder', 'bildkatalog', type=click.Path(exists=True, file_okay=False), default=None,
+                  help='Katalog med nedladdade Hemnet-bilder (samma struktur som images[].filename).')
+    def importera_hemnet_kommando(sokvag, bildkatalog):
+        """Importerar bostäder från en fil med Hemnet ListingCard-JSON."""
+        from tjanster.hemnet_import import importera_hemnet
+        resultat = importera_hemnet(sokvag, bildkatalog)
+        click.echo(f"✓ Importerade {resultat['importerade']} bostäder")
+        for hemnet_id, orsak in resultat['overhoppade']:
+            click.echo(f'  Hoppade över {hemnet_id}: {orsak}')
+        click.echo(f"✓ Bokade {resultat['visningar']} visningar")
+        for hemnet_id, text, orsak in resultat['overhoppade_visningar']:
+            click.echo(f'  Hoppade över visningen {text!r} för {hemnet_id}: {orsak}')
+        if resultat['bilder']:
+            _skriv_bildrapport(resultat['bilder'])
+
+    @app.cli.command('importera-bilder')
+    @click.argument('filer', nargs=-1, type=click.Path(exists=True, dir_okay=False))
+    @click.option('--bostad', 'bostad_id', type=int, default=None, help='Bostaden som filerna hör till.')
+    @click.option('--katalog', type=click.Path(exists=True, file_okay=False), default=None,
+                  help='Katalog med en underkatalog per bostad-id (t.ex. bilder/12/kok.jpg).')
+    @click.option('--arbetare', type=int, default=None, help='Antal processer för att skapa miniatyrer.')
+    def importera_bilder_kommando(filer, bostad_id, katalog, arbetare):
+        """Läser in bilder, tar bort dubbletter och skapar miniatyrer i alla storlekar."""
+        from tjanster.bilder import filer_i_katalog, importera_bilder
+        if katalog:
+            par = filer_i_katalog(katalog)
+        elif bostad_id is not None and filer:
+            par = [(bostad_id, fil) for fil in filer]
+        else:
+            raise click.UsageError('Ange --bostad ID med en eller flera filer, eller --katalog.')
+        _skriv_bildrapport(importera_bilder(par, arbetare))
+
+    @app.cli.command('geokoda-bostader')
+    def geokoda_bostader_kommando():
+        """Fyller i koordinater för befintliga bostäder som saknar lat/lon."""
+        from dbrepositories.bostad_repository import bostad_repo
+        from tjanster.geokodning import koordinater_for
+        antal = 0
+        for bostad in bostad_repo.hamta_alla():
+            if bostad.lat is not None:
+                continue
+            koordinater = koordinater_for(bostad.adress, bostad.stad)
+            if koordinater['lat'] is not None:
+                bostad_repo.uppdatera(bostad.id, {
+                    'adress': bostad.adress, 'stad': bostad.stad, 'pris': bostad.pris,
+                    'rum': bostad.rum, 'yta': bostad.yta, 'beskrivning': bostad.beskrivning,
+                    **koordinater
+                })
+                antal += 1
+        click.echo(f'✓ Geokodade {antal} bostäder')
+
+    @app.cli.command('bygg-prisstatistik')
+    def bygg_prisstatistik_kommando():
+        """Räknar om prisstatistiken per stad och rum från alla bostäder."""
+        from tjanster.prisstatistik import bygg_om_prisstatistik
+        antal = bygg_om_prisstatistik()
+        click.echo(f'✓ Prisstatistiken innehåller {antal} grupper')
+
+    @app.cli.command('skicka-notifieringar')
+    @click.option('--max-antal', default=500, show_default=True, help='Max antal notifieringar per körning.')
+    def skicka_notifieringar_kommando(max_antal):
+        """Tömmer utkorgen med träffar på sparade sökningar (en sammanfattning per användare)."""
+        from dbrepositories.bevakning_repository import bevakning_repo
+        utkorg = bevakning_repo.hamta_utkorg(max_antal)
+        per_user = {}
+        for notis in utkorg:
+            per_user.setdefault(notis.sokning.user.username, []).append(notis)
+        for username, notiser in per_user.items():
+            click.echo(f'→ {username}: {len(notiser)} nya träffar')
+            for notis in notiser:
+                click.echo(f'    [{notis.sokning.namn}] {notis.bostad.adress}, {notis.bostad.stad} - {notis.bostad.pris}')
+        bevakning_repo.markera_skickade([notis.id for notis in utkorg])
+        click.echo(f'✓ Skickade {len(utkorg)} notifieringar')
+
+    @app.cli.command('frys-sidor')
+    @click.option('--mal', 'mal_katalog', type=click.Path(file_okay=False), default=None,
+                  help='Katalog för de statiska filerna (standard: instance/statisk).')
+    @click.option('--allt', is_flag=True, help='Rendera alla sidor, även de som inte ändrats.')
+    @click.option('--tradar', default=4, show_default=True, help='Antal sidor som renderas samtidigt.')
+    def frys_sidor_kommando(mal_katalog, allt, tradar):
+        """Sparar de publika sidorna som statiska filer (för nginx eller ett CDN)."""
+        from tjanster.frysning import frys_sidor
+        rapport = frys_sidor(mal_katalog, allt, tradar)
+        click.echo(f"✓ Renderade {rapport['renderade']} sidor till {rapport['katalog']} "
+                   f"({rapport['oforandrade']} oförändrade, {rapport['borttagna']} borttagna)")
+        for url, status in rapport['fel']:
+            click.echo(f'  {url} gav status {status}')
+
+    @app.cli.command('exportera')
+    @click.option('--format', 'format', type=click.Choice(['parquet', 'arrow']), default='parquet',
+                  help='Filformat för exporten.')
+    @click.option('--inkrementell', is_flag=True, help='Exportera bara rader som ändrats sedan förra exporten.')
+    @click.option('--mal', 'mal_katalog', type=click.Path(file_okay=False), default=None,
+                  help='Katalog för exporterna (standard: instance/export).')
+    @click.option('--rader-per-del', default=5000, show_default=True, help='Antal rader som läses åt gången.')
+    def exportera_kommando(format, inkrementell, mal_katalog, rader_per_del):
+        """Exporterar alla tabeller till Parquet/Arrow-filer för analys."""
+        from tjanster.export import exportera
+        manifest = exportera(mal_katalog, format, inkrementell, rader_per_del)
+        click.echo(f"✓ {manifest['typ'].capitalize()} export sparad i {manifest['katalog']}")
+        for tabell, antal in manifest['tabeller'].items():
+            click.echo(f"  {tabell}: {antal['rader']} rader, {antal['raderade']} raderade")
+
+    @app.cli.command('jobbarbetare')
+    @click.option('--processer', default=1, show_default=True, help='Antal arbetarprocesser.')
+    @click.option('--en-gang', is_flag=True, help='Avsluta när kön är tom istället för att vänta på nya jobb.')
+    def jobbarbetare_kommando(processer, en_gang):
+        """Kör jobben i jobbkön (importer, exporter ...) tills processen stoppas."""
+        from tjanster.jobbko import kor_arbetare
+        click.echo(f'→ Startar {processer} jobbarbetare (Ctrl+C avslutar efter pågående jobb)')
+        kor_arbetare(app, processer, en_gang)
+        click.echo('✓ Jobbarbetarna har avslutats')
+
+    @app.cli.command('rensa-andringar')
+    @click.option('--dagar', default=30, show_default=True, help='Behåll ändringar som är yngre än så.')
+    def rensa_andringar_kommando(dagar):
+        """Tar bort gamla rader ur ändringsloggen (som alla namngivna konsumenter har läst)."""
+        from dbrepositories.andring_repository import andring_repo
+        antal = andring_repo.rensa(dagar)
+        click.echo(f'✓ Tog bort {antal} ändringar')
+        for markor in andring_repo.hamta_markorer():
+            click.echo(f'  {markor.namn}: har läst till {markor.markor} ({markor.uppdaterad:%Y-%m-%d %H:%M})')
+
+
+    @app.cli.command('arkivera-bostader')
+    @click.option('--per-del', default=500, show_default=True, help='Antal bostäder som flyttas per transaktion.')
+    def arkivera_bostader_kommando(per_del):
+        """Flyttar sålda och borttagna bostäder från 'bostader' till arkivet."""
+        from dbrepositories.bostad_repository import bostad_repo
+        antal = bostad_repo.arkivera_inaktiva(per_del)
+        click.echo(f'✓ Arkiverade {antal} bostäder')
+
+
+def _skriv_bildrapport(rapport):
+    click.echo(f"✓ Bilder: {rapport['nya']} nya, {rapport['dubbletter']} dubbletter")
+    for sokvag, meddelande in rapport['fel']:
+        click.echo(f'  Hoppade över {sokvag}: {meddelande}')
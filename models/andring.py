@@ -0,0 +1,65 @@
+# models/andring.py
+"""
+📜 ÄNDRINGSLOGG-MODELL - En rad för varje rad som skapats, ändrats eller raderats via ett repository.
+
+Loggen är ORDNAD: 'id' växer för varje ändring och används som MARKÖR (cursor). En
+konsument som kommer ihåg det senaste id:t den har sett kan fråga efter allt som hänt
+sedan dess (se dbrepositories/andring_repository.py), istället för att läsa om hela tabellen.
+
+Raden skrivs i SAMMA transaktion som ändringen, så loggen och tabellerna kan aldrig
+visa olika saker: rullas ändringen tillbaka försvinner också loggraden.
+
+SINGLE RESPONSIBILITY: Denna fil har ENDAST ansvar för tabellstrukturen.
+"""
+from datetime import datetime
+
+from database import db
+
+# 'arkivera': raden flyttades från sin tabell till arkivet (se models/bostad_arkiv.py)
+OPERATIONER = ('skapa', 'uppdatera', 'radera', 'arkivera')
+
+
+class Andring(db.Model):
+    """
+    EN ändring av EN rad, t.ex. ('bostader', 12, 'uppdatera', version 3).
+    """
+    __tablename__ = 'andringar'
+
+    id = db.Column(db.Integer, primary_key=True)                  # Markören - växer alltid
+    entitet = db.Column(db.String(50), nullable=False)            # Tabellens namn, t.ex. 'bostader'
+    entitet_id = db.Column(db.Integer, nullable=False)
+    operation = db.Column(db.String(10), nullable=False)          # 'skapa', 'uppdatera', 'radera' eller 'arkivera'
+    version = db.Column(db.Integer, nullable=False)               # Radens version: 1, 2, 3 ... per entitet och id
+    tid = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        # Nästa version för en rad slås upp på (entitet, entitet_id)
+        db.Index('ix_andringar_entitet_id_version', 'entitet', 'entitet_id', 'version'),
+        # AUTOINCREMENT: ett id delas aldrig ut två gånger, inte ens när gamla rader har rensats bort.
+        # Annars kunde en ny ändring få ett id som en konsument redan har passerat.
+        {'sqlite_autoincrement': True},
+    )
+
+    def to_dict(self):
+        return {'markor': self.id, 'entitet': self.entitet, 'id': self.entitet_id,
+                'operation': self.operation, 'version': self.version, 'tid': self.tid.isoformat()}
+
+    def __repr__(self):
+        """Hur objektet visas när vi printar det (för debugging)"""
+        return f'<Andring {self.id}: {self.operation} {self.entitet} {self.entitet_id} v{self.version}>'
+
+
+class Andringsmarkor(db.Model):
+    """
+    Hur långt en NAMNGIVEN konsument (t.ex. ett externt sökindex) har kommit i loggen.
+    Sparas i databasen så att konsumenten kan fortsätta där den slutade efter en omstart.
+    """
+    __tablename__ = 'andringsmarkorer'
+
+    namn = db.Column(db.String(100), primary_key=True)
+    markor = db.Column(db.Integer, nullable=False, default=0)     # Senaste Andring.id som behandlats
+    uppdaterad = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        """Hur objektet visas när vi printar det (för debugging)"""
+        return f'<Andringsmarkor {self.namn}: {self.markor}>'
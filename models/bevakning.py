@@ -0,0 +1,65 @@
+# models/bevakning.py
+"""
+🔔 BEVAKNING-MODELLER - Sparade sökningar och notifieringar om nya träffar.
+
+SINGLE RESPONSIBILITY: Denna fil har ENDAST ansvar för:
+1. SparadSokning: en köpares sökkriterier (stad + intervall för pris, rum och yta).
+2. Notifiering: en "utkorg" (outbox) med träffar som ska meddelas köparen.
+
+OBS! Matchningen av nya bostäder mot sökningarna sköts av tjanster/bevakningar.py,
+och databasåtkomsten av BevakningRepository.
+"""
+from datetime import datetime
+
+from database import db
+
+
+class SparadSokning(db.Model):
+    """
+    EN sparad sökning som tillhör en användare.
+    Ett kriterium som är None betyder "spelar ingen roll".
+    """
+    __tablename__ = 'sparade_sokningar'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    namn = db.Column(db.String(100), nullable=False)
+    stad = db.Column(db.String(100))       # None = alla städer
+    min_pris = db.Column(db.Integer)       # Hela kronor
+    max_pris = db.Column(db.Integer)
+    min_rum = db.Column(db.Integer)
+    max_rum = db.Column(db.Integer)
+    min_yta = db.Column(db.Integer)        # Kvadratmeter
+    max_yta = db.Column(db.Integer)
+    skapad = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    user = db.relationship('User', backref='sparade_sokningar')
+
+    def __repr__(self):
+        """Hur objektet visas när vi printar det (för debugging)"""
+        return f'<SparadSokning {self.id}: {self.namn}>'
+
+
+class Notifiering(db.Model):
+    """
+    EN träff: bostaden 'bostad_id' matchade sökningen 'sokning_id'.
+    Raderna skrivs i klump av tjanster/bevakningar.py och markeras som skickade
+    när de har meddelats användaren.
+    """
+    __tablename__ = 'notifieringar'
+    # Samma bostad ska bara ge EN notifiering per sökning, även om den uppdateras flera gånger
+    __table_args__ = (db.UniqueConstraint('sokning_id', 'bostad_id', name='uq_notifiering_sokning_bostad'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    sokning_id = db.Column(db.Integer, db.ForeignKey('sparade_sokningar.id', ondelete='CASCADE'), nullable=False)
+    bostad_id = db.Column(db.Integer, db.ForeignKey('bostader.id', ondelete='CASCADE'), nullable=False)
+    skapad = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    skickad = db.Column(db.DateTime)       # None = ligger kvar i utkorgen
+
+    sokning = db.relationship('SparadSokning')
+    bostad = db.relationship('Bostad')
+
+    def __repr__(self):
+        """Hur objektet visas när vi printar det (för debugging)"""
+        return f'<Notifiering sökning={self.sokning_id} bostad={self.bostad_id}>'
@@ -0,0 +1,52 @@
+# models/bild.py
+"""
+🖼️ BILD-MODELLER - Bilder och kopplingen mellan bilder och bostäder.
+
+INNEHÅLLSADRESSERAD LAGRING: En bild identifieras av SHA-256-hashen av filens innehåll.
+Samma bild som laddas upp två gånger (t.ex. samma planritning på två bostäder) sparas
+därför bara EN gång - båda bostäderna pekar på samma Bild-rad och samma filer.
+
+Själva filerna ligger i instance/bilder/<hash[:2]>/<hash>/ (se tjanster/bilder.py).
+Databasen innehåller bara metadata.
+
+SINGLE RESPONSIBILITY: Denna fil har ENDAST ansvar för tabellstrukturen.
+"""
+from datetime import datetime
+
+from database import db
+
+
+class Bild(db.Model):
+    """
+    EN unik bild (unik på innehåll, inte på filnamn).
+    """
+    __tablename__ = 'bilder'
+
+    id = db.Column(db.Integer, primary_key=True)
+    hash = db.Column(db.String(64), unique=True, nullable=False)   # SHA-256 (hex) av originalfilen
+    bredd = db.Column(db.Integer, nullable=False)                  # Originalets storlek i pixlar
+    hojd = db.Column(db.Integer, nullable=False)
+    storlek_bytes = db.Column(db.Integer, nullable=False)
+    skapad = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        """Hur objektet visas när vi printar det (för debugging)"""
+        return f'<Bild {self.hash[:12]} {self.bredd}x{self.hojd}>'
+
+
+class BostadBild(db.Model):
+    """
+    Kopplingstabell: vilka bilder som hör till vilken bostad, och i vilken ordning.
+    Bilden med lägst 'ordning' är bostadens omslagsbild.
+    """
+    __tablename__ = 'bostad_bilder'
+
+    bostad_id = db.Column(db.Integer, db.ForeignKey('bostader.id', ondelete='CASCADE'), primary_key=True)
+    bild_id = db.Column(db.Integer, db.ForeignKey('bilder.id'), primary_key=True)
+    ordning = db.Column(db.Integer, nullable=False, default=0)
+
+    bild = db.relationship('Bild')
+
+    def __repr__(self):
+        """Hur objektet visas när vi printar det (för debugging)"""
+        return f'<BostadBild bostad={self.bostad_id} bild={self.bild_id} #{self.ordning}>'
@@ -13,6 +13,12 @@ Den sköts av BostadRepository.
 from database import db
 # Importera nödvändiga funktioner (i detta fall, inga extra behövs)
 
+# En bostads livscykel. Bara AKTIVA_STATUSAR hör till det aktuella utbudet; sålda och
+# borttagna bostäder flyttas till arkivet (models/bostad_arkiv.py) av bostad_repo.arkivera_inaktiva().
+STATUSAR = ('aktiv', 'kommande', 'sald', 'borttagen')
+AKTIVA_STATUSAR = ('aktiv', 'kommande')
+INAKTIVA_STATUSAR = ('sald', 'borttagen')
+
 
 class Bostad(db.Model):
     """
@@ -33,8 +39,9 @@ class Bostad(db.Model):
     # adress: Sträng (max 200 tecken), MÅSTE fyllas i (nullable=False)
     adress = db.Column(db.String(200), nullable=False)
     
-    # stad: Sträng (max 100 tecken), MÅSTE fyllas i
-    stad = db.Column(db.String(100), nullable=False)
+    # stad: Sträng (max 100 tecken), MÅSTE fyllas i.
+    # index=True: prisstatistiken läser om en stads bostäder vid varje ändring
+    stad = db.Column(db.String(100), nullable=False, index=True)
     
     # pris: Sparas som sträng eftersom valutor ofta innehåller mellanslag/tecken
     pris = db.Column(db.String(50), nullable=False)
@@ -48,6 +55,24 @@ class Bostad(db.Model):
     # beskrivning: Lång textsträng (Text), valfri (nullable är True som standard)
     beskrivning = db.Column(db.Text)
 
+    # lat/lon: Koordinater (valfria). Fylls i av den offline-geokodaren (tjanster/geokodning.py)
+    # när en bostad sparas via admin eller importeras.
+    lat = db.Column(db.Float)    # Latitud
+    lon = db.Column(db.Float)    # Longitud
+
+    # status: 'aktiv', 'kommande' (visning har inte börjat), 'sald' eller 'borttagen'.
+    # index=True: arkiveringen letar efter sålda och borttagna bostäder
+    status = db.Column(db.String(20), nullable=False, default='aktiv', server_default='aktiv', index=True)
+
+    # antal_sparade: Hur många användare som sparat bostaden (models/favorit.py).
+    # Denormaliserat: ändras av favorit_repo i samma transaktion som favoriten, så listorna
+    # kan visa siffran utan en COUNT(*)-fråga per bostad.
+    antal_sparade = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # AUTOINCREMENT: ett id delas aldrig ut igen, inte ens när bostaden med det högsta id:t
+    # har flyttats till arkivet. Annars kunde en ny bostad få samma id som en arkiverad.
+    __table_args__ = {'sqlite_autoincrement': True}
+
     # -----------------------------------------------------------------
     # RELATIONER (Läggs till senare om Bostad har FK till t.ex. Mäklare)
     # -----------------------------------------------------------------
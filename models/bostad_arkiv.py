@@ -0,0 +1,41 @@
+# models/bostad_arkiv.py
+"""
+🗄️ BOSTADSARKIV-MODELL - Sålda och borttagna bostäder som inte längre hör till utbudet.
+
+PROBLEMET: Sålda bostäder blir aldrig färre. Ligger de kvar i 'bostader' blir varje
+listning, sortering och index långsammare, fast sidorna bara visar det aktuella utbudet.
+
+LÖSNINGEN: Tabellen 'bostader' innehåller bara "varma" rader. bostad_repo.arkivera_inaktiva()
+flyttar sålda och borttagna bostäder hit i delar. Raden behåller sitt id, så historik
+(bilder, sidvisningar, ändringsloggen) kan fortfarande kopplas till den.
+
+SINGLE RESPONSIBILITY: Denna fil har ENDAST ansvar för tabellstrukturen.
+"""
+from datetime import datetime
+
+from database import db
+
+
+class BostadArkiv(db.Model):
+    """
+    EN arkiverad bostad: samma kolumner som Bostad, plus när den arkiverades.
+    Läses via bostad_repo.hamta_historik() och bostad_repo.sok_i_arkivet().
+    """
+    __tablename__ = 'bostader_arkiv'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)   # Samma id som i 'bostader'
+    adress = db.Column(db.String(200), nullable=False)
+    stad = db.Column(db.String(100), nullable=False, index=True)
+    pris = db.Column(db.String(50), nullable=False)
+    rum = db.Column(db.Integer, nullable=False)
+    yta = db.Column(db.Integer, nullable=False)
+    beskrivning = db.Column(db.Text)
+    lat = db.Column(db.Float)
+    lon = db.Column(db.Float)
+    status = db.Column(db.String(20), nullable=False)                    # 'sald' eller 'borttagen'
+    antal_sparade = db.Column(db.Integer, nullable=False, default=0, server_default='0')   # När den arkiverades
+    arkiverad = db.Column(db.DateTime, nullable=False, default=datetime.now, index=True)
+
+    def __repr__(self):
+        """Hur objektet visas när vi printar det (för debugging)"""
+        return f'<BostadArkiv {self.adress}, {self.stad}, {self.status}>'
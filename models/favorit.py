@@ -0,0 +1,31 @@
+# models/favorit.py
+"""
+❤️ FAVORIT-MODELL - Bostäder som en inloggad användare har sparat (som Hemnets 'saved').
+
+Hur många som sparat en bostad räknas INTE med COUNT(*) vid varje visning - det står i
+Bostad.antal_sparade, som favorit_repo ändrar i samma transaktion som raden här.
+
+SINGLE RESPONSIBILITY: Denna fil har ENDAST ansvar för tabellstrukturen.
+"""
+from datetime import datetime
+
+from database import db
+
+
+class Favorit(db.Model):
+    """
+    EN sparad bostad: (användare, bostad). Samma bostad kan bara sparas en gång per användare.
+    """
+    __tablename__ = 'favoriter'
+    # Primärnyckeln (user_id, bostad_id) är också indexet för "vilka av de här bostäderna
+    # har jag sparat?" och "mina sparade bostäder". Indexet på bostad_id används när en
+    # bostad raderas och när antal_sparade räknas om.
+    __table_args__ = (db.Index('ix_favoriter_bostad', 'bostad_id'),)
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    bostad_id = db.Column(db.Integer, db.ForeignKey('bostader.id', ondelete='CASCADE'), primary_key=True)
+    skapad = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        """Hur objektet visas när vi printar det (för debugging)"""
+        return f'<Favorit user {self.user_id}, bostad {self.bostad_id}>'
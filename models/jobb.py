@@ -0,0 +1,70 @@
+# models/jobb.py
+"""
+🧰 JOBB-MODELL - Ett långsamt arbete (import, export, omräkning ...) som väntar på en jobbarbetare.
+
+Jobbkön ligger i databasen, så ett jobb som lagts i kön finns kvar även om appen
+eller arbetaren startas om. Se tjanster/jobbko.py för hur jobben körs.
+
+STATUS:
+    'vantar'     -> i kön (eller väntar på ett nytt försök efter ett fel, se kor_efter)
+    'kor'        -> en arbetare kör jobbet just nu (och förlänger lasning_till)
+    'klar'       -> jobbet lyckades, svaret ligger i 'resultat'
+    'misslyckad' -> alla försök är förbrukade, felet ligger i 'fel'
+    'avbruten'   -> en admin avbröt jobbet
+
+LÅSNING (lease): En arbetare som tar ett jobb "lånar" det till lasning_till. Dör arbetaren
+mitt i jobbet slutar lånet att förlängas, och när det gått ut får en annan arbetare ta jobbet.
+
+SINGLE RESPONSIBILITY: Denna fil har ENDAST ansvar för tabellstrukturen.
+"""
+import json
+from datetime import datetime
+
+from database import db
+
+STATUSAR = ('vantar', 'kor', 'klar', 'misslyckad', 'avbruten')
+
+
+class Jobb(db.Model):
+    """
+    Ett jobb i jobbkön.
+    """
+    __tablename__ = 'jobb'
+
+    id = db.Column(db.Integer, primary_key=True)
+    typ = db.Column(db.String(50), nullable=False)                  # T.ex. 'importera-fil' (se tjanster/jobbtyper.py)
+    argument = db.Column(db.Text, nullable=False, default='{}')     # JSON med jobbets argument
+    status = db.Column(db.String(20), nullable=False, default='vantar')
+    prioritet = db.Column(db.Integer, nullable=False, default=0)    # Högre körs först
+    forsok = db.Column(db.Integer, nullable=False, default=0)       # Antal gånger jobbet har startats
+    max_forsok = db.Column(db.Integer, nullable=False, default=3)
+    kor_efter = db.Column(db.DateTime, nullable=False, default=datetime.now)   # Tidigast tid för nästa försök
+    lasning_till = db.Column(db.DateTime)                           # Arbetarens lån på jobbet
+    arbetare = db.Column(db.String(100))                            # Vem som kör/körde jobbet
+    framsteg = db.Column(db.Float, nullable=False, default=0.0)     # 0.0 - 1.0
+    meddelande = db.Column(db.String(200))                          # Senaste framstegsmeddelandet
+    resultat = db.Column(db.Text)                                   # JSON med jobbets svar
+    fel = db.Column(db.Text)                                        # Senaste felet (traceback)
+    skapad = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    startad = db.Column(db.DateTime)
+    klar = db.Column(db.DateTime)
+
+    # Arbetarna letar efter nästa jobb på status, prioritet och tid
+    __table_args__ = (db.Index('ix_jobb_status_prioritet_kor_efter', 'status', 'prioritet', 'kor_efter'),)
+
+    @property
+    def argument_dict(self):
+        return json.loads(self.argument or '{}')
+
+    @property
+    def resultat_dict(self):
+        return json.loads(self.resultat) if self.resultat else None
+
+    @property
+    def aktivt(self):
+        """Sant om jobbet inte är färdigt än (väntar eller körs)."""
+        return self.status in ('vantar', 'kor')
+
+    def __repr__(self):
+        """Hur objektet visas när vi printar det (för debugging)"""
+        return f'<Jobb {self.id} {self.typ}: {self.status}>'
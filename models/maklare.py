@@ -28,6 +28,8 @@ class Maklare(db.Model):
     telefon = db.Column(db.String(20))
     titel = db.Column(db.String(100))
     beskrivning = db.Column(db.Text)
+    # Kontoret mäklaren jobbar på (valfritt). index=True: visningsschemat listar ett kontors mäklare
+    kontor_id = db.Column(db.Integer, db.ForeignKey('kontor.id'), index=True)
 
     def __repr__(self):
         """Hur objektet visas när vi printar det (för debugging)"""
@@ -44,14 +46,16 @@ STARTDATA_MAKLARE = [
         'epost': 'anna.stahl@maklare.se',
         'telefon': '070-123 45 67',
         'titel': 'Fastighetsmäklare',
-        'beskrivning': 'Specialist på villor och nyproduktion i Dalarna.'
+        'beskrivning': 'Specialist på villor och nyproduktion i Dalarna.',
+        'kontor_id': 1,   # Kontor Falun
     },
     {
         'namn': 'Bosse Andersson',
         'epost': 'bosse.a@maklare.se',
         'telefon': '073-987 65 43',
         'titel': 'Mäklarassistent',
-        'beskrivning': 'Är din kontaktperson för visningar och prospekt.'
+        'beskrivning': 'Är din kontaktperson för visningar och prospekt.',
+        'kontor_id': 2,   # Kontor Borlänge
     },
 ]
 
@@ -76,7 +80,8 @@ def skapa_start_maklare():
                 epost=data['epost'],
                 telefon=data['telefon'],
                 titel=data['titel'],
-                beskrivning=data['beskrivning']
+                beskrivning=data['beskrivning'],
+                kontor_id=data['kontor_id']
             )
             db.session.add(ny_maklare)
 
@@ -0,0 +1,43 @@
+# models/prishistorik.py
+"""
+📉 PRISHISTORIK-MODELL - En rad per prisändring för en bostad.
+
+Raderna är DELTAKODADE: en rad sparar bara hur mycket priset ändrades (i kronor), inte
+hela priset. Den första raden för en ny bostad har ny=True och hela priset som ändring
+(från 0) - liksom en ÅTERSTÄLLNING, när en bostad får ett pris efter 'Pris saknas'.
+Priset vid en viss tidpunkt räknas fram baklänges från det nuvarande priset
+(se tjanster/prishistorik.py), så historiken stämmer även för bostäder som fanns innan
+tabellen - de saknar bara sin första rad.
+
+SINGLE RESPONSIBILITY: Denna fil har ENDAST ansvar för tabellstrukturen.
+"""
+from datetime import datetime
+
+from database import db
+
+
+class Prisandring(db.Model):
+    """
+    EN prisändring, t.ex. (bostad 12, 'Falun', 2026-10-01, -100000).
+    """
+    __tablename__ = 'prishistorik'
+
+    id = db.Column(db.Integer, primary_key=True)
+    bostad_id = db.Column(db.Integer, nullable=False)
+    stad = db.Column(db.String(100), nullable=False)          # Kopierad från bostaden - trenderna grupperas per stad
+    tid = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    andring_kr = db.Column(db.Integer, nullable=False)         # Nytt pris - förra priset (ny bostad: hela priset)
+    ny = db.Column(db.Boolean, nullable=False, default=False, server_default='0')   # Hela priset (ny bostad eller återställning)
+
+    __table_args__ = (
+        # En bostads historik, i tidsordning
+        db.Index('ix_prishistorik_bostad_tid', 'bostad_id', 'tid'),
+        # Pristrender per stad och månad läses direkt ur indexet (alla kolumner som behövs finns i det)
+        db.Index('ix_prishistorik_stad_tid', 'stad', 'tid', 'ny', 'andring_kr'),
+        # PARTIELLT index med bara sänkningarna: "sänkt pris senaste veckan" läser bara dem
+        db.Index('ix_prishistorik_sankningar', 'tid', 'bostad_id', 'andring_kr', sqlite_where=andring_kr < 0),
+    )
+
+    def __repr__(self):
+        """Hur objektet visas när vi printar det (för debugging)"""
+        return f'<Prisandring bostad {self.bostad_id}: {self.andring_kr:+d} kr {self.tid:%Y-%m-%d}>'
@@ -0,0 +1,53 @@
+# models/prisstatistik.py
+"""
+📈 PRISSTATISTIK-MODELL - Färdigräknade nyckeltal per stad och antal rum.
+
+Tabellen är en AGGREGAT-TABELL: den innehåller inga egna uppgifter, bara sammanfattningar
+av tabellen 'bostader'. Den hålls uppdaterad av tjanster/prisstatistik.py varje gång en
+bostad sparas via BostadRepository, och kan alltid byggas om från grunden.
+Tabellen 'prisstatistik_smutsiga' håller reda på städer vars rader inte räknats om än.
+
+En rad per (stad, rum). Raden med rum = 0 gäller HELA staden (alla rumsantal).
+
+OBS! Ingen affärslogik här - den sköts av PrisstatistikRepository och tjänsten.
+"""
+from database import db
+
+# rum-värdet för raden som sammanfattar alla bostäder i en stad
+ALLA_RUM = 0
+
+
+class Prisstatistik(db.Model):
+    """
+    Nyckeltal för bostäderna i EN stad med ett visst antal rum.
+    Priser är i hela kronor; bostäder vars pris inte går att tolka räknas bara i 'antal'.
+    """
+    __tablename__ = 'prisstatistik'
+
+    stad = db.Column(db.String(100), primary_key=True)
+    rum = db.Column(db.Integer, primary_key=True)           # 0 = alla rum
+    antal = db.Column(db.Integer, nullable=False)           # Antal bostäder
+    antal_med_pris = db.Column(db.Integer, nullable=False)  # Antal med tolkningsbart pris
+    medelpris = db.Column(db.Float)
+    medianpris = db.Column(db.Float)
+    medel_kr_per_kvm = db.Column(db.Float)
+    median_kr_per_kvm = db.Column(db.Float)
+    uppdaterad = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        """Hur objektet visas när vi printar det (för debugging)"""
+        return f'<Prisstatistik {self.stad} rum={self.rum}: {self.antal} st>'
+
+
+class SmutsigStad(db.Model):
+    """
+    En stad vars bostäder ändrats sedan statistiken senast räknades om.
+    Raden skrivs i SAMMA transaktion som ändringen och tas bort när staden räknats om,
+    så en omräkning som misslyckas görs om senare istället för att glömmas bort.
+    """
+    __tablename__ = 'prisstatistik_smutsiga'
+
+    stad = db.Column(db.String(100), primary_key=True)
+
+    def __repr__(self):
+        return f'<SmutsigStad {self.stad}>'
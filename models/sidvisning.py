@@ -0,0 +1,38 @@
+# models/sidvisning.py
+"""
+👁️ SIDVISNING-MODELL - Hur många gånger en bostad eller nyhet har visats.
+
+En rad per (typ, entitet_id), t.ex. ('bostad', 12). Raden skrivs INTE vid varje
+sidvisning - visningarna räknas i minnet och skrivs i klump (se tjanster/sidvisningar.py).
+
+POPULARITET ("populärt just nu") med FRAMÅTRIKTAT AVKLINGANDE (forward decay):
+En visning vid tiden t ger poängen 2^((t - epokens start) / halveringstid). En NY visning
+väger alltså mer än en gammal, och eftersom alla rader räknas mot samma startpunkt räcker
+det att SUMMERA poängen - ingen rad behöver skrivas om när tiden går.
+För att talen inte ska växa obegränsat börjar en ny epok efter EPOK_HALVERINGAR
+halveringstider; poäng från förra epoken räknas då om med 2^-EPOK_HALVERINGAR.
+
+SINGLE RESPONSIBILITY: Denna fil har ENDAST ansvar för tabellstrukturen.
+"""
+from database import db
+
+
+class Sidvisning(db.Model):
+    """
+    Visningsräknare för EN bostad eller nyhet.
+    """
+    __tablename__ = 'sidvisningar'
+
+    typ = db.Column(db.String(20), primary_key=True)        # 'bostad' eller 'nyhet'
+    entitet_id = db.Column(db.Integer, primary_key=True)
+    antal = db.Column(db.Integer, nullable=False, default=0)      # Alla visningar någonsin
+    poang = db.Column(db.Float, nullable=False, default=0.0)      # Avklingande popularitet (se ovan)
+    epok = db.Column(db.Integer, nullable=False, default=0)       # Epoken som 'poang' är räknad i
+    senast = db.Column(db.DateTime)
+
+    # Topplistan sorteras på poäng inom en typ
+    __table_args__ = (db.Index('ix_sidvisningar_typ_epok_poang', 'typ', 'epok', 'poang'),)
+
+    def __repr__(self):
+        """Hur objektet visas när vi printar det (för debugging)"""
+        return f'<Sidvisning {self.typ} {self.entitet_id}: {self.antal}>'
@@ -0,0 +1,46 @@
+# models/visning.py
+"""
+🗓️ VISNING-MODELL - En visning av en bostad: vilken mäklare som håller den, och när.
+
+En mäklare kan inte vara på två visningar samtidigt. Det kontrolleras av
+visning_repo.boka() (i databasen, när visningen sparas) och av visningsschemat i
+minnet (tjanster/visningsschema.py), som svarar på "vem är ledig när?" utan SQL.
+
+SINGLE RESPONSIBILITY: Denna fil har ENDAST ansvar för tabellstrukturen.
+"""
+from datetime import datetime
+
+from database import db
+
+# Längsta tillåtna visning. Visningar som överlappar [start, slut) måste då ha start efter
+# start - MAX_LANGD_MINUTER, så konfliktsökningen blir en avgränsad sökning i indexet nedan.
+MAX_LANGD_MINUTER = 8 * 60
+
+
+class Visning(db.Model):
+    """
+    EN visning, t.ex. (bostad 12, mäklare 1, lör 15 nov 12:30 - 13:00).
+    """
+    __tablename__ = 'visningar'
+
+    id = db.Column(db.Integer, primary_key=True)
+    bostad_id = db.Column(db.Integer, nullable=False, index=True)   # Ingen FK: bostaden kan arkiveras
+    maklare_id = db.Column(db.Integer, db.ForeignKey('maklare.id'), nullable=False)
+    start = db.Column(db.DateTime, nullable=False)
+    slut = db.Column(db.DateTime, nullable=False)                   # Första minuten EFTER visningen
+    info = db.Column(db.String(200))                                # T.ex. 'Öppen visning' eller 'Anmälan krävs'
+    skapad = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        # En mäklares visningar i tidsordning (konflikter, kalender och kommande visningar)
+        db.Index('ix_visningar_maklare_start', 'maklare_id', 'start'),
+        db.Index('ix_visningar_start', 'start'),
+    )
+
+    def to_dict(self):
+        return {'id': self.id, 'bostad_id': self.bostad_id, 'maklare_id': self.maklare_id,
+                'start': self.start.isoformat(), 'slut': self.slut.isoformat(), 'info': self.info}
+
+    def __repr__(self):
+        """Hur objektet visas när vi printar det (för debugging)"""
+        return f'<Visning {self.id}: bostad {self.bostad_id}, mäklare {self.maklare_id} {self.start:%Y-%m-%d %H:%M}>'
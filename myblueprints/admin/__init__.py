@@ -33,6 +33,8 @@ admin_bp = Blueprint(
 # Importerar den enda instansen av repository-klassen. 
 # Detta ger admin-routerna tillgång till databasen utan att behöva importera databasobjektet direkt.
 from dbrepositories.bostad_repository import bostad_repo
+from dbrepositories.jobb_repository import jobb_repo   # Jobbkön för långsamma jobb (import, export ...)
+from dbrepositories.visning_repository import visning_repo   # Visningar som admin bokar och avbokar
 
 
 # ============================================================
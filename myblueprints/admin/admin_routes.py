@@ -10,12 +10,38 @@ Den använder ENBART den importerade instansen 'bostad_repo' för all databasåt
 
 CRUD = Create, Read, Update, Delete
 """
+import os
+import math                   # Procentsatsen i batch-ändringen måste vara ett ändligt tal
+import uuid                   # Unika namn på uppladdade filer som väntar i jobbkön
+from datetime import date, datetime, timedelta   # Veckan och tiderna i visningsschemat
+from itertools import chain   # Slår ihop repositoryts delar till en lång rad
 # Importera standard Flask-funktioner
-from flask import render_template, request, redirect, url_for, abort, flash
+from flask import render_template, request, redirect, url_for, abort, flash, jsonify
 # Importera blueprint-instansen och det nödvändiga repositoryt från __init__.py
-from . import admin_bp, bostad_repo
+from . import admin_bp, bostad_repo, jobb_repo, visning_repo
 # Importera autentiseringsfunktioner från Flask-Login
 from flask_login import login_required, current_user 
+# Offline-geokodare som översätter adress/ort till koordinater
+from tjanster.geokodning import koordinater_vid_andring
+# Affärsreglerna för en bostad (delas med bulkimporten)
+from tjanster.validering import validera_rad
+# Tolkning och formatering av pris-texten
+from tjanster.pris import pris_till_kronor, kronor_till_text
+# Skickar långa listor medan de renderas
+from tjanster.strommning import strommad_mall
+# Gör ett uppladdat filnamn säkert att spara på disk
+from werkzeug.utils import secure_filename
+# En bostads möjliga statusar (aktiv, kommande, såld, borttagen)
+from models.bostad import STATUSAR
+# Vem är ledig när? (intervallindex per mäklare i minnet)
+from tjanster.visningsschema import visningsschema
+# En krock med en annan visning för samma mäklare
+from dbrepositories.visning_repository import Visningskonflikt
+# Kontoren att filtrera visningsschemat på
+from dbrepositories.kontor_repository import kontor_repo
+
+# Största prishöjningen i procent som batch-ändringen godtar (större tal är troligen felskrivningar)
+MAX_PROCENT = 1000
 
 
 # ============================================================
@@ -29,14 +55,16 @@ from flask_login import login_required, current_user
 def admin_lista_bostader():
     """
     Visar ALLA bostäder i admin-läge, som en tabell med redigerings- och raderingslänkar.
+    Tabellen STRÖMMAS rad för rad medan bostäderna läses från databasen.
 
     URL: /admin/
     """
-    # 1. Anropa Repository (Service Layer) för att hämta data
-    alla_bostader = bostad_repo.hamta_alla()
+    # 1. Anropa Repository (Service Layer) - en generator, inget läses förrän mallen når tabellen
+    # Tabellen läser bara kolumnvärden - BostadDTO:er räcker (se dbrepositories/dto.py)
+    alla_bostader = chain.from_iterable(bostad_repo.strom_i_delar(som_dto=True))
 
     # 2. Returnera HTML (View Layer)
-    return render_template(
+    return strommad_mall(
         'admin_bostader_lista.html',
         bostader=alla_bostader,
         titel='Administration av Bostäder'
@@ -60,6 +88,7 @@ def admin_form(bostad_id=None):
     Hantera logiken för att antingen visa formuläret (GET) eller spara data (POST).
     """
     bostad = None
+    forlopp = []
     titel = "Lägg till ny bostad"
 
     # --------------------------------------------------------
@@ -74,6 +103,8 @@ def admin_form(bostad_id=None):
             abort(404) 
 
         titel = f"Redigera: {bostad.adress}"
+        from tjanster.prishistorik import prisforlopp
+        forlopp = prisforlopp(bostad_id, bostad.pris)
 
     # --------------------------------------------------------
     # B. Formulär inskickat (POST-metod)
@@ -86,7 +117,11 @@ def admin_form(bostad_id=None):
             # 2. Validering misslyckades: Visa felmeddelande
             flash('Ogiltiga formulärdata. Kontrollera dina värden.', 'warning')
         else:
-            # 3. Validering lyckades: Anropa Repository för att spara
+            # 3. Slå upp koordinater för adressen (lokalt, inget nätverksanrop) om den är ny eller
+            #    har ändrats - annars behålls bostadens sparade koordinater
+            form_data.update(koordinater_vid_andring(form_data, bostad))
+
+            # 4. Validering lyckades: Anropa Repository för att spara
             if bostad_id:
                 # UPPDATERA
                 bostad_repo.uppdatera(bostad_id, form_data)
@@ -96,7 +131,7 @@ def admin_form(bostad_id=None):
                 ny_bostad = bostad_repo.skapa_ny(form_data)
                 flash(f'Ny bostad "{ny_bostad.adress}" har lagts till!', 'success')
 
-            # 4. PRG-mönstret (Post/Redirect/Get): Omdirigera för att förhindra dubbel-submission
+            # 5. PRG-mönstret (Post/Redirect/Get): Omdirigera för att förhindra dubbel-submission
             return redirect(url_for('.admin_lista_bostader'))
 
     # --------------------------------------------------------
@@ -105,6 +140,7 @@ def admin_form(bostad_id=None):
     return render_template(
         'admin_bostader_form.html',
         bostad=bostad, # Skickar antingen det befintliga objektet eller None
+        forlopp=forlopp, # Prishistoriken (tom för en ny bostad)
         titel=titel
     )
 
@@ -140,6 +176,544 @@ def admin_delete(bostad_id):
     return redirect(url_for('.admin_lista_bostader'))
 
 
+# ============================================================
+# 4. CACHE-STATISTIK - Hur ofta slipper vi gå till databasen?
+# ============================================================
+
+@admin_bp.route('/cache')
+@login_required
+def admin_cache_statistik():
+    """
+    Visar träffkvot m.m. för repositoriernas cacher som JSON.
+
+    URL: /admin/cache
+    """
+    if current_user.role != 'admin':
+        flash('Du har inte behörighet att se cache-statistiken.', 'warning')
+        return redirect(url_for('auth_bp.login'))
+
+    from dbrepositories.entitets_cache import alla_cacher
+    return jsonify([cache.statistik() for cache in alla_cacher])
+
+
+# ============================================================
+# 5. MARKNADSÖVERSIKT - Prisstatistik per stad och antal rum
+# ============================================================
+
+@admin_bp.route('/marknad')
+@login_required
+def admin_marknad():
+    """
+    Visar median- och medelpris, kr/kvm och antal per stad och rumsantal.
+    Läser de färdiga aggregaten - en rad per stad och rumsantal, oavsett antal bostäder.
+    Med ?stad= visas också stadens pristrend per månad det senaste året (ur prishistoriken).
+
+    URL: /admin/marknad?stad=Falun
+    """
+    if current_user.role != 'admin':
+        flash('Du har inte behörighet att se marknadsöversikten.', 'warning')
+        return redirect(url_for('auth_bp.login'))
+
+    from datetime import datetime, timedelta
+    from dbrepositories.prisstatistik_repository import prisstatistik_repo
+    from dbrepositories.prishistorik_repository import prishistorik_repo
+    stad = request.args.get('stad') or None
+    return render_template(
+        'admin_marknad.html',
+        statistik=prisstatistik_repo.hamta_oversikt(),
+        stader=prishistorik_repo.hamta_stader(),
+        stad=stad,
+        trend=prishistorik_repo.pristrend(stad, datetime.now() - timedelta(days=365)) if stad else [],
+        titel='Marknadsöversikt'
+    )
+
+
+# ============================================================
+# 6. BULKIMPORT - Läs in många bostäder från en CSV- eller JSON-fil
+# ============================================================
+
+@admin_bp.route('/import', methods=['GET', 'POST'])
+@login_required
+def admin_import():
+    """
+    Visar uppladdningsformuläret (GET) eller lägger filen i jobbkön (POST).
+    Importen körs av en jobbarbetare (tjanster/jobbtyper.py); sidan visar jobbets
+    framsteg och, när det är klart, rapporten (/admin/import?jobb=<id>).
+
+    URL: /admin/import
+    """
+    if current_user.role != 'admin':
+        flash('Du har inte behörighet att importera bostäder.', 'warning')
+        return redirect(url_for('auth_bp.login'))
+
+    if request.method == 'POST':
+        fil = request.files.get('fil')
+        if not fil or not fil.filename:
+            flash('Välj en fil att importera.', 'warning')
+            return redirect(url_for('.admin_import'))
+        # Filen sparas där arbetaren hittar den; requesten är klar så fort den är uppladdad
+        from tjanster.jobbko import lagg_till_jobb
+        from tjanster.jobbtyper import jobbfilkatalog, rensa_jobbfiler
+        rensa_jobbfiler()
+        sokvag = os.path.join(jobbfilkatalog(), f'{uuid.uuid4().hex}_{secure_filename(fil.filename)}')
+        fil.save(sokvag)
+        jobb = lagg_till_jobb('importera-fil', prioritet=10, max_forsok=1, sokvag=sokvag, filnamn=fil.filename)
+        flash(f'Filen har lagts i jobbkön (jobb {jobb.id}).', 'info')
+        return redirect(url_for('.admin_import', jobb=jobb.id))
+
+    jobb = jobb_repo.hamta_en(request.args.get('jobb', type=int) or 0)
+    if jobb is not None and jobb.typ != 'importera-fil':
+        jobb = None
+    rapport = jobb.resultat_dict if jobb is not None and jobb.status == 'klar' else None
+    return render_template('admin_import.html', jobb=jobb, rapport=rapport, titel='Importera bostäder')
+
+
+# ============================================================
+# 7. BATCH-ÄNDRING - Nytt pris eller radering för markerade bostäder
+# ============================================================
+
+@admin_bp.route('/batch', methods=['POST'])
+@login_required
+def admin_batch():
+    """
+    Utför en åtgärd på alla markerade bostäder i listan, med EN SQL-sats:
+    - 'pris':    sätt samma pris på alla
+    - 'procent': höj/sänk alla priser med en procentsats
+    - 'radera':  radera alla
+    - en status ('sald', 'borttagen' ...): sätt statusen på alla (arkiveras senare)
+
+    URL: /admin/batch
+    """
+    if current_user.role != 'admin':
+        flash('Du har inte behörighet att ändra bostäder.', 'warning')
+        return redirect(url_for('auth_bp.login'))
+
+    idn = request.form.getlist('bostad_id', type=int)
+    atgard = request.form.get('atgard')
+    if not idn:
+        flash('Markera minst en bostad.', 'warning')
+        return redirect(url_for('.admin_lista_bostader'))
+
+    if atgard == 'radera':
+        antal = bostad_repo.radera_flera(idn)
+        flash(f'{antal} bostäder har tagits bort!', 'success')
+
+    elif atgard == 'pris':
+        pris = request.form.get('varde', '').strip()
+        if not pris:
+            flash('Ange det nya priset.', 'warning')
+        else:
+            antal = bostad_repo.satt_priser({bostad_id: pris for bostad_id in idn})
+            flash(f'Priset har satts till "{pris}" på {antal} bostäder!', 'success')
+
+    elif atgard == 'procent':
+        try:
+            procent = float(request.form.get('varde', '').replace(',', '.'))
+        except ValueError:
+            flash('Ange procentsatsen som ett tal, t.ex. -5 eller 3,5.', 'warning')
+            return redirect(url_for('.admin_lista_bostader'))
+        # float() godtar 'nan' och 'inf', och -100 % eller mindre ger ett pris på noll eller under
+        if not math.isfinite(procent) or not -100 < procent <= MAX_PROCENT:
+            flash(f'Procentsatsen måste vara större än -100 och högst {MAX_PROCENT}.', 'warning')
+            return redirect(url_for('.admin_lista_bostader'))
+        # Nya priser räknas fram här; själva uppdateringen är EN sats i repositoryt
+        nya_priser = {}
+        for bostad_id, pris in bostad_repo.hamta_priser(idn):
+            kronor = pris_till_kronor(pris)
+            if kronor is not None:
+                nya_priser[bostad_id] = kronor_till_text(round(kronor * (1 + procent / 100)))
+        antal = bostad_repo.satt_priser(nya_priser)
+        flash(f'Priset har ändrats med {procent:+g} % på {antal} bostäder'
+              f'{" (bostäder utan tolkningsbart pris hoppades över)" if antal < len(idn) else ""}!', 'success')
+
+    elif atgard in STATUSAR:
+        antal = bostad_repo.satt_status(idn, atgard)
+        flash(f'{antal} bostäder har fått statusen "{atgard}"!', 'success')
+
+    else:
+        flash('Okänd åtgärd.', 'warning')
+
+    return redirect(url_for('.admin_lista_bostader'))
+
+
+# ============================================================
+# 8. PROFILERING - Var går tiden i långsamma requests?
+# ============================================================
+
+@admin_bp.route('/profiler')
+@login_required
+def admin_profiler():
+    """
+    Listar de senaste profilerade och långsamma requesterna (i den här worker-processen).
+    Profilera en egen request genom att skicka headern 'X-Profilera: 1' som inloggad admin.
+
+    URL: /admin/profiler
+    """
+    if current_user.role != 'admin':
+        flash('Du har inte behörighet att se profileringen.', 'warning')
+        return redirect(url_for('auth_bp.login'))
+
+    from tjanster.profilering import profilerare
+    return render_template(
+        'admin_profiler.html',
+        profiler=list(reversed(profilerare.profiler)),
+        langsamma=list(reversed(profilerare.langsamma)),
+        profilerare=profilerare,
+        titel='Profilering'
+    )
+
+
+@admin_bp.route('/profiler/<int:profil_id>')
+@admin_bp.route('/profiler/<int:profil_id>/<format>')
+@login_required
+def admin_profil(profil_id, format='html'):
+    """
+    Visar EN profil som flamgraf, eller som kollapsade stackar i textformat
+    (/admin/profiler/<id>/kollapsad) för t.ex. speedscope.app eller flamegraph.pl.
+    """
+    if current_user.role != 'admin':
+        flash('Du har inte behörighet att se profileringen.', 'warning')
+        return redirect(url_for('auth_bp.login'))
+
+    from tjanster.profilering import flamgraf, kollapsade_stackar, profilerare
+    profil = profilerare.hamta(profil_id)
+    if profil is None:
+        abort(404)   # Profilen har trillat ur ringbufferten (eller finns i en annan worker)
+    if format == 'kollapsad':
+        return kollapsade_stackar(profil['stackar']), 200, {'Content-Type': 'text/plain; charset=utf-8'}
+
+    rutor, djup = flamgraf(profil['stackar'])
+    return render_template('admin_profil.html', profil=profil, rutor=rutor, djup=djup,
+                           titel=f"Profil {profil['id']}: {profil['metod']} {profil['url']}")
+
+
+# ============================================================
+# 9. MINNESDIAGNOSTIK - Minne, ORM-objekt och identitetskarta per request
+# ============================================================
+
+@admin_bp.route('/diagnostik')
+@login_required
+def admin_diagnostik():
+    """
+    Visar processens minne, levande ORM-objekt per modell och de senaste requesternas
+    toppminne, laddade objekt och identitetskarta (i den här worker-processen).
+
+    URL: /admin/diagnostik
+    """
+    if current_user.role != 'admin':
+        flash('Du har inte behörighet att se diagnostiken.', 'warning')
+        return redirect(url_for('auth_bp.login'))
+
+    from tjanster.minnesdiagnostik import (levande_orm_objekt, minnesdiagnostik, processminne,
+                                           storsta_allokeringar)
+    return render_template(
+        'admin_diagnostik.html',
+        minne=processminne(),
+        levande=levande_orm_objekt().most_common(),
+        allokeringar=storsta_allokeringar(),
+        # Tyngst först: flest laddade objekt, sedan senast
+        matningar=sorted(reversed(minnesdiagnostik.matningar), key=lambda m: -m['laddade_totalt']),
+        max_laddade=minnesdiagnostik.max_laddade,
+        titel='Minnesdiagnostik'
+    )
+
+
+# ============================================================
+# 10. JOBBKÖ - Långsamma jobb som körs av jobbarbetarna
+# ============================================================
+
+@admin_bp.route('/jobb')
+@login_required
+def admin_jobb():
+    """
+    Visar de senaste jobben i jobbkön med status och framsteg, och låter admin
+    starta underhållsjobb. Sidan laddas om av sig själv medan jobb väntar eller körs.
+
+    URL: /admin/jobb
+    """
+    if current_user.role != 'admin':
+        flash('Du har inte behörighet att se jobbkön.', 'warning')
+        return redirect(url_for('auth_bp.login'))
+
+    from datetime import datetime
+    from tjanster.jobbko import jobbtyper
+    statistik = jobb_repo.statistik()
+    aldsta = jobb_repo.aldsta_vantande()
+    return render_template(
+        'admin_jobb.html',
+        jobb_lista=jobb_repo.hamta_senaste(),
+        statistik=statistik,
+        aktiva=statistik.get('vantar', 0) + statistik.get('kor', 0),
+        # Ett jobb som kunnat starta för länge sedan tyder på att ingen arbetare körs
+        vantetid=(datetime.now() - aldsta).total_seconds() if aldsta else 0,
+        underhallsjobb=[typ for typ in jobbtyper() if typ.underhall],
+        titel='Jobbkö'
+    )
+
+
+@admin_bp.route('/jobb/ny', methods=['POST'])
+@login_required
+def admin_jobb_ny():
+    """Lägger ett underhållsjobb (utan argument) i kön."""
+    if current_user.role != 'admin':
+        flash('Du har inte behörighet att starta jobb.', 'warning')
+        return redirect(url_for('auth_bp.login'))
+
+    from tjanster.jobbko import jobbtyper, lagg_till_jobb
+    typ = request.form.get('typ')
+    if typ not in {jobbtyp.namn for jobbtyp in jobbtyper() if jobbtyp.underhall}:
+        flash('Okänd jobbtyp.', 'warning')
+    else:
+        jobb = lagg_till_jobb(typ, prioritet=request.form.get('prioritet', 0, type=int))
+        flash(f'Jobb {jobb.id} ({typ}) har lagts i kön.', 'success')
+    return redirect(url_for('.admin_jobb'))
+
+
+@admin_bp.route('/jobb/<int:jobb_id>/igen', methods=['POST'])
+@login_required
+def admin_jobb_igen(jobb_id):
+    """Lägger ett misslyckat eller avbrutet jobb i kön igen."""
+    if current_user.role != 'admin':
+        flash('Du har inte behörighet att starta jobb.', 'warning')
+        return redirect(url_for('auth_bp.login'))
+
+    if jobb_repo.forsok_igen(jobb_id):
+        flash(f'Jobb {jobb_id} har lagts i kön igen.', 'success')
+    else:
+        flash(f'Jobb {jobb_id} kan inte startas om (det är aktivt, klart, får bara köras en gång eller finns inte).', 'warning')
+    return redirect(url_for('.admin_jobb'))
+
+
+@admin_bp.route('/jobb/<int:jobb_id>/avbryt', methods=['POST'])
+@login_required
+def admin_jobb_avbryt(jobb_id):
+    """Avbryter ett jobb som väntar eller körs."""
+    if current_user.role != 'admin':
+        flash('Du har inte behörighet att avbryta jobb.', 'warning')
+        return redirect(url_for('auth_bp.login'))
+
+    if jobb_repo.avbryt(jobb_id):
+        flash(f'Jobb {jobb_id} har avbrutits.', 'success')
+    else:
+        flash(f'Jobb {jobb_id} är redan färdigt.', 'warning')
+    return redirect(request.referrer or url_for('.admin_jobb'))
+
+
+# ============================================================
+# 11. ÄNDRINGSLOGG - Följ alla ändringar från en markör (JSON)
+# ============================================================
+
+@admin_bp.route('/andringar')
+@login_required
+def admin_andringar():
+    """
+    Ändringarna efter en markör, för konsumenter utanför appen (t.ex. ett sökindex eller
+    en statisk export). Spara 'markor' i svaret och skicka den som ?efter= nästa gång.
+
+    URL: /admin/andringar?efter=0&entitet=bostader&antal=500
+    """
+    if current_user.role != 'admin':
+        flash('Du har inte behörighet att läsa ändringsloggen.', 'warning')
+        return redirect(url_for('auth_bp.login'))
+
+    from dbrepositories.andring_repository import STANDARD_ANTAL, andring_repo
+    efter = request.args.get('efter', 0, type=int)
+    antal = min(request.args.get('antal', STANDARD_ANTAL, type=int), STANDARD_ANTAL)
+    andringar = andring_repo.hamta_efter(efter, request.args.getlist('entitet') or None, antal)
+    return jsonify({
+        'andringar': [andring.to_dict() for andring in andringar],
+        'markor': andringar[-1].id if andringar else efter,
+        'fler': len(andringar) == antal,
+    })
+
+
+# ============================================================
+# 12. ARKIV - Sålda och borttagna bostäder
+# ============================================================
+
+@admin_bp.route('/arkiv')
+@login_required
+def admin_arkiv():
+    """
+    Visar de senast arkiverade bostäderna (sålda och borttagna), som inte längre
+    ligger i 'bostader'. Själva flytten görs av jobbet 'arkivera-bostader'.
+
+    URL: /admin/arkiv?stad=Falun&status=sald
+    """
+    if current_user.role != 'admin':
+        flash('Du har inte behörighet att se arkivet.', 'warning')
+        return redirect(url_for('auth_bp.login'))
+
+    stad = request.args.get('stad', '').strip() or None
+    status = request.args.get('status') or None
+    return render_template(
+        'admin_arkiv.html',
+        bostader=bostad_repo.sok_i_arkivet(stad, status),
+        statistik=bostad_repo.arkivstatistik(),
+        vantar=bostad_repo.antal_inaktiva(),
+        stad=stad,
+        status=status,
+        titel='Arkiverade bostäder'
+    )
+
+
+@admin_bp.route('/arkiv/arkivera', methods=['POST'])
+@login_required
+def admin_arkivera():
+    """Lägger arkiveringen i jobbkön (flyttar alla sålda och borttagna bostäder)."""
+    if current_user.role != 'admin':
+        flash('Du har inte behörighet att arkivera bostäder.', 'warning')
+        return redirect(url_for('auth_bp.login'))
+
+    from tjanster.jobbko import lagg_till_jobb
+    jobb = lagg_till_jobb('arkivera-bostader')
+    flash(f'Jobb {jobb.id} (arkivera-bostader) har lagts i kön.', 'success')
+    return redirect(url_for('.admin_arkiv'))
+
+
+# ============================================================
+# 13. DUBBLETTER - Bostäder som finns två gånger
+# ============================================================
+
+@admin_bp.route('/dubbletter')
+@login_required
+def admin_dubbletter():
+    """
+    Visar rapporten från det senaste jobbet 'hitta-dubbletter': par av bostäder som
+    troligen är samma bostad (omlistad eller via en annan byrå).
+
+    URL: /admin/dubbletter
+    """
+    if current_user.role != 'admin':
+        flash('Du har inte behörighet att se dubblettrapporten.', 'warning')
+        return redirect(url_for('auth_bp.login'))
+
+    jobb = jobb_repo.hamta_senaste_klara('hitta-dubbletter')
+    rapport = jobb.resultat_dict if jobb else None
+    par = []
+    if rapport:
+        # Bostäder som raderats eller arkiverats sedan rapporten togs fram hoppas över
+        idn = {bostad_id for rad in rapport['par'] for bostad_id in (rad['id'], rad['annan_id'])}
+        per_id = {bostad.id: bostad for bostad in bostad_repo.hamta_flera(list(idn))}
+        par = [(per_id[rad['id']], per_id[rad['annan_id']], rad) for rad in rapport['par']
+               if rad['id'] in per_id and rad['annan_id'] in per_id]
+    return render_template('admin_dubbletter.html', jobb=jobb, rapport=rapport, par=par, titel='Dubbletter')
+
+
+@admin_bp.route('/dubbletter/sok', methods=['POST'])
+@login_required
+def admin_dubbletter_sok():
+    """Lägger en ny dubblettsökning i jobbkön."""
+    if current_user.role != 'admin':
+        flash('Du har inte behörighet att starta jobb.', 'warning')
+        return redirect(url_for('auth_bp.login'))
+
+    from tjanster.jobbko import lagg_till_jobb
+    jobb = lagg_till_jobb('hitta-dubbletter')
+    flash(f'Jobb {jobb.id} (hitta-dubbletter) har lagts i kön. Rapporten visas här när det är klart.', 'success')
+    return redirect(url_for('.admin_dubbletter'))
+
+
+# ============================================================
+# 14. VISNINGAR - Boka visningar och se vilka mäklare som är lediga
+# ============================================================
+
+@admin_bp.route('/visningar')
+@login_required
+def admin_visningar():
+    """
+    Visar en veckas lediga tider för alla mäklare (eller ett kontors), veckans visningar
+    och ett formulär för att boka en ny visning. Ledigheten kommer från visningsschemat
+    i minnet - sidan gör inte en fråga per mäklare och dag.
+
+    URL: /admin/visningar?kontor_id=1&fran=2025-11-10
+    """
+    if current_user.role != 'admin':
+        flash('Du har inte behörighet att se visningsschemat.', 'warning')
+        return redirect(url_for('auth_bp.login'))
+
+    kontor_id = request.args.get('kontor_id', type=int) or None
+    try:
+        fran = date.fromisoformat(request.args.get('fran', ''))
+    except ValueError:
+        fran = date.today()
+    start = datetime.combine(fran, datetime.min.time())
+    slut = start + timedelta(days=7)
+
+    # Lediga luckor per mäklare, uppdelade per dag för tabellen
+    dagar = [fran + timedelta(days=i) for i in range(7)]
+    ledighet = []
+    for maklare, luckor in visningsschema.ledighet(start, slut, kontor_id):
+        per_dag = {dag: [] for dag in dagar}
+        for lucka_start, lucka_slut in luckor:
+            per_dag[lucka_start.date()].append((lucka_start, lucka_slut))
+        ledighet.append((maklare, per_dag))
+
+    maklare_namn = {maklare.id: maklare.namn for maklare, _ in ledighet}
+    visningar = visning_repo.hamta_for_maklare(list(maklare_namn), start, slut)
+    bostader = bostad_repo.hamta_flera(sorted({visning.bostad_id for visning in visningar}), som_dto=True)
+    return render_template(
+        'admin_visningar.html',
+        dagar=dagar,
+        ledighet=ledighet,
+        visningar=visningar,
+        bostader={bostad.id: bostad for bostad in bostader},
+        maklare_namn=maklare_namn,
+        kontor=kontor_repo.hamta_alla(),
+        kontor_id=kontor_id,
+        fran=fran,
+        titel='Visningar'
+    )
+
+
+@admin_bp.route('/visningar/boka', methods=['POST'])
+@login_required
+def admin_boka_visning():
+    """Bokar en visning. Krockar med mäklarens andra visningar kontrolleras i databasen (visning_repo.boka)."""
+    if current_user.role != 'admin':
+        flash('Du har inte behörighet att boka visningar.', 'warning')
+        return redirect(url_for('auth_bp.login'))
+
+    tillbaka = redirect(url_for('.admin_visningar', kontor_id=request.form.get('kontor_id') or None,
+                                fran=request.form.get('datum') or None))
+    try:
+        bostad_id = int(request.form.get('bostad_id', ''))
+        maklare_id = int(request.form.get('maklare_id', ''))
+        dag = date.fromisoformat(request.form.get('datum', ''))
+        start = datetime.combine(dag, datetime.strptime(request.form.get('start', ''), '%H:%M').time())
+        slut = datetime.combine(dag, datetime.strptime(request.form.get('slut', ''), '%H:%M').time())
+    except ValueError:
+        flash('Ange bostad, mäklare, datum och tider (HH:MM).', 'danger')
+        return tillbaka
+    if bostad_repo.hamta_en(bostad_id) is None:
+        flash(f'Bostad {bostad_id} finns inte.', 'danger')
+        return tillbaka
+
+    try:
+        visning = visning_repo.boka(bostad_id, maklare_id, start, slut, request.form.get('info', '').strip() or None)
+    except (Visningskonflikt, ValueError) as fel:
+        flash(f'Visningen bokades inte: {fel}', 'danger')
+        return tillbaka
+    flash(f'Visningen {visning.start:%Y-%m-%d %H:%M}-{visning.slut:%H:%M} är bokad.', 'success')
+    return tillbaka
+
+
+@admin_bp.route('/visningar/<int:visning_id>/avboka', methods=['POST'])
+@login_required
+def admin_avboka_visning(visning_id):
+    """Avbokar (tar bort) en visning."""
+    if current_user.role != 'admin':
+        flash('Du har inte behörighet att avboka visningar.', 'warning')
+        return redirect(url_for('auth_bp.login'))
+
+    if visning_repo.avboka(visning_id):
+        flash('Visningen är avbokad.', 'success')
+    else:
+        flash('Visningen fanns inte.', 'warning')
+    return redirect(url_for('.admin_visningar', kontor_id=request.form.get('kontor_id') or None,
+                            fran=request.form.get('fran') or None))
+
+
 # ============================================================
 # HJÄLPFUNKTIONER (Validering)
 # ============================================================
@@ -148,33 +722,14 @@ def validera_formular(form_data):
     """
     Validerar, konverterar datatyper och rensar formulärdata.
 
-    SINGLE RESPONSIBILITY: Detta är en isolerad funktion som hanterar
-    all komplexitet kring formulärdata och felhantering.
+    SINGLE RESPONSIBILITY: Själva reglerna finns i tjanster/validering.py (validera_rad),
+    så att bulkimporten godkänner exakt samma bostäder som formuläret.
 
     Returns:
         dict: Validerad data (med korrekta Python-typer), eller None om valideringen misslyckades.
     """
-    try:
-        # Hämta, rensa (strip) och konvertera till korrekta typer
-        data = {
-            'adress': form_data['adress'].strip(),
-            'stad': form_data['stad'].strip(),
-            'pris': form_data['pris'].strip(),
-            # Försök konvertera till heltal: detta utlöser ValueError om det misslyckas
-            'rum': int(form_data['rum']), 
-            'yta': int(form_data['yta']),
-            'beskrivning': form_data['beskrivning'].strip()
-        }
-
-        # Affärsvalidering (t.ex. säkerställa att värden är rimliga)
-        if not data['adress'] or not data['stad']:
-            return None # Saknar adress/stad
-        
-        if data['rum'] < 1 or data['yta'] < 1:
-            return None # Rum eller yta måste vara minst 1
-
-        return data
-
-    except (KeyError, ValueError):
-        # Fångar fel om ett fält saknas (KeyError) eller om konvertering till int misslyckas (ValueError)
-        return None
\ No newline at end of file
+    data, fel = validera_rad(form_data)
+    if data is not None:
+        # Formuläret bestämmer själv vilken bostad som ändras (via URL:en), aldrig via ett fält
+        data.pop('id', None)
+    return data
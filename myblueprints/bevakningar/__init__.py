@@ -0,0 +1,34 @@
+# myblueprints/bevakningar/__init__.py
+"""
+🔔 BEVAKNINGAR BLUEPRINT - Initialiseringsfil för köparnas sparade sökningar.
+
+SINGLE RESPONSIBILITY: Denna fil har ENDAST ansvar för:
+1. Definiera bevakningar-blueprintet.
+2. Importera repositoryt för sparade sökningar och notifieringar.
+3. Importera routes (URL-hanterarna).
+
+url_prefix='/bevakningar' betyder att alla URL:er här börjar med /bevakningar.
+"""
+from flask import Blueprint
+
+# ============================================================
+# 1. SKAPA BLUEPRINTET
+# ============================================================
+bevakningar_bp = Blueprint(
+    'bevakningar_bp',                 # Internt namn/identifierare. Används för url_for().
+    __name__,
+    template_folder='templates'
+)
+
+
+# ============================================================
+# 2. IMPORTERA REPOSITORY (Databaslagret)
+# ============================================================
+from dbrepositories.bevakning_repository import bevakning_repo
+
+
+# ============================================================
+# 3. IMPORTERA ROUTES (URL:er och logik)
+# ============================================================
+# Denna import MÅSTE vara sist (routes använder bevakningar_bp och bevakning_repo)
+from . import bevakningar_routes
@@ -0,0 +1,58 @@
+# myblueprints/bevakningar/bevakningar_routes.py
+"""
+🔔 BEVAKNINGAR ROUTES - Köparens sparade sökningar och träffar.
+
+SINGLE RESPONSIBILITY: Fungerar som "Controller"-lagret för bevakningar.
+- Visar användarens sparade sökningar och nya träffar.
+- Sparar och raderar sökningar via bevakning_repo.
+- Håller sökindexet (tjanster/bevakningar.py) i synk med ändringarna.
+"""
+from flask import render_template, redirect, url_for, flash
+from flask_login import login_required, current_user
+
+from . import bevakningar_bp, bevakning_repo
+from .form_bevakning import BevakningForm
+# Det inverterade indexet som nya bostäder matchas mot
+from tjanster.bevakningar import sokindex
+
+
+@bevakningar_bp.route('/', methods=['GET', 'POST'])
+@login_required
+def mina_bevakningar():
+    """
+    Visar användarens sparade sökningar och träffar, och formuläret för en ny sökning.
+
+    URL: /bevakningar/
+    """
+    form = BevakningForm()
+    if form.validate_on_submit():
+        sokning = bevakning_repo.skapa_ny(current_user.id, form.som_dict())
+        sokindex.lagg_till(sokning)
+        flash(f'Bevakningen "{sokning.namn}" har sparats! Du får en notis när en ny bostad matchar.', 'success')
+        # PRG-mönstret (Post/Redirect/Get)
+        return redirect(url_for('.mina_bevakningar'))
+
+    return render_template(
+        'mina_bevakningar.html',
+        form=form,
+        sokningar=bevakning_repo.hamta_for_user(current_user.id),
+        notifieringar=bevakning_repo.hamta_notifieringar(current_user.id),
+        titel='Mina bevakningar'
+    )
+
+
+@bevakningar_bp.route('/radera/<int:sokning_id>', methods=['POST'])
+@login_required
+def radera_bevakning(sokning_id):
+    """
+    Raderar en av användarens sparade sökningar.
+
+    URL: /bevakningar/radera/<id>
+    """
+    sokning = bevakning_repo.radera(sokning_id, current_user.id)
+    if sokning:
+        sokindex.ta_bort(sokning_id)
+        flash(f'Bevakningen "{sokning.namn}" har tagits bort.', 'success')
+    else:
+        flash('Bevakningen kunde inte hittas.', 'warning')
+    return redirect(url_for('.mina_bevakningar'))
@@ -0,0 +1,53 @@
+"""
+BEVAKNING-FORMULÄR – Flask-WTF-formulär för att spara en sökning.
+
+SINGLE RESPONSIBILITY: Denna fil har ENDAST ansvar för att definiera fälten
+och valideringen. Alla gränser är valfria - ett tomt fält betyder "ingen gräns".
+"""
+from flask_wtf import FlaskForm
+from wtforms import IntegerField, StringField, SubmitField
+from wtforms.validators import DataRequired, Length, NumberRange, Optional, ValidationError
+
+
+class BevakningForm(FlaskForm):
+    """
+    Formulär för en sparad sökning (stad + intervall för pris, rum och yta).
+    """
+    namn = StringField('Namn på bevakningen', validators=[
+        DataRequired(message="Ge bevakningen ett namn."),
+        Length(max=100, message="Namnet får max vara 100 tecken.")
+    ])
+    stad = StringField('Stad (tomt = alla)', validators=[Optional(), Length(max=100)])
+
+    # Optional() gör att ett tomt fält blir None istället för ett valideringsfel
+    min_pris = IntegerField('Lägsta pris (kr)', validators=[Optional(), NumberRange(min=0)])
+    max_pris = IntegerField('Högsta pris (kr)', validators=[Optional(), NumberRange(min=0)])
+    min_rum = IntegerField('Minst antal rum', validators=[Optional(), NumberRange(min=1, max=50)])
+    max_rum = IntegerField('Högst antal rum', validators=[Optional(), NumberRange(min=1, max=50)])
+    min_yta = IntegerField('Minsta boarea (kvm)', validators=[Optional(), NumberRange(min=1)])
+    max_yta = IntegerField('Största boarea (kvm)', validators=[Optional(), NumberRange(min=1)])
+
+    submit = SubmitField('Spara bevakning')
+
+    def _kontrollera_intervall(self, minsta, storsta):
+        if minsta.data is not None and storsta.data is not None and storsta.data < minsta.data:
+            raise ValidationError('Högsta värdet måste vara större än eller lika med lägsta.')
+
+    def validate_max_pris(self, falt):
+        self._kontrollera_intervall(self.min_pris, falt)
+
+    def validate_max_rum(self, falt):
+        self._kontrollera_intervall(self.min_rum, falt)
+
+    def validate_max_yta(self, falt):
+        self._kontrollera_intervall(self.min_yta, falt)
+
+    def som_dict(self):
+        """Formulärets värden som den dictionary bevakning_repo.skapa_ny förväntar sig."""
+        return {
+            'namn': self.namn.data.strip(),
+            'stad': (self.stad.data or '').strip() or None,
+            'min_pris': self.min_pris.data, 'max_pris': self.max_pris.data,
+            'min_rum': self.min_rum.data, 'max_rum': self.max_rum.data,
+            'min_yta': self.min_yta.data, 'max_yta': self.max_yta.data,
+        }
@@ -40,6 +40,9 @@ from dbrepositories.bostad_repository import bostad_repo
 # ----sqlite basert repository----
 #from dbrepositories.sqlite_bostad_repository import bostad_repo
 
+# ----async repository för async-routes som bara läser----
+from dbrepositories.async_bostad_repository import async_bostad_repo
+
 
 # ============================================================
 # 3. IMPORTERA ROUTES (URL:er och logik)
@@ -7,10 +7,33 @@ SINGLE RESPONSIBILITY: Fungerar som "Controller"-lagret för publika vyer.
 - Anropar bostad_repo för att hämta data från databasen.
 - Renderar HTML-mallar för slutanvändaren.
 """
-from flask import render_template
+import asyncio
+
+from flask import abort, jsonify, redirect, render_template, request, send_from_directory, url_for
+from flask_login import current_user, login_required
 # Importera Blueprint-objektet och bostad_repo som definierades i __init__.py
 from . import bostader_bp # Blueprint-instansen används som decorator
 from . import bostad_repo # Repository-instansen används för dataåtkomst
+from . import async_bostad_repo # Async-versionen för sidor som bara läser
+# Hittar liknande bostäder i minnet (ingen SQL per sökning)
+from tjanster.rekommendation import ANTAL_LIKNANDE, rekommenderare
+# Bilderna: metadata från bild_repo, filerna från den innehållsadresserade lagringen
+from dbrepositories.bild_repository import bild_repo
+from tjanster import bilder
+# Räknar visningar i minnet (skrivs till databasen i klump)
+from tjanster.sidvisningar import visningsraknare
+# Skickar långa listor medan de renderas
+from tjanster.strommning import strommad_mall
+# Prisändringarna (deltakodade, se tjanster/prishistorik.py)
+from tjanster.prishistorik import sankta_priser
+# Förslag medan besökaren skriver (sorterat index i minnet, ingen SQL)
+from tjanster.autokomplettering import FALT, STANDARD_ANTAL, autokomplettering
+# Inloggade användares sparade bostäder (räknaren står på bostaden: antal_sparade)
+from dbrepositories.favorit_repository import favorit_repo
+
+# En bild på en viss URL ändras aldrig (URL:en innehåller hashen av innehållet),
+# så webbläsaren får cacha den i ett år utan att fråga servern igen.
+BILD_CACHE_SEKUNDER = 365 * 24 * 3600
 
 # Notera: Den simulerade databasdatan (BOSTADER-listan) har behållits som referens, 
 # men den faktiska koden använder bostad_repo.
@@ -22,41 +45,152 @@ from . import bostad_repo # Repository-instansen används för dataåtkomst
 def lista_bostader():
     """
     Visar en lista över alla tillgängliga bostäder.
+    Sidan STRÖMMAS: första bostäderna skickas innan de sista har lästs från databasen.
+    Bostäderna är BostadDTO:er (bara kolumnvärden, se dbrepositories/dto.py), inte ORM-objekt.
 
-    Anropar: bostad_repo.hamta_alla()
+    Anropar: bostad_repo.strom_i_delar()
     """
-    # 1. Anropa Repository för att hämta alla Bostad-objekt
-    alla_bostader = bostad_repo.hamta_alla()
-    
-    # 2. Returnera HTML (View Layer) med data
-    return render_template(
+    user_id = current_user.id if current_user.is_authenticated else None
+
+    def bostader_med_omslag():
+        # 1. Läs bostäderna en del i taget, och omslagsbilderna (och vilka den inloggade
+        #    har sparat) för varje del med EN fråga var
+        for del_ in bostad_repo.strom_i_delar(som_dto=True):
+            idn = [bostad.id for bostad in del_]
+            omslag = bild_repo.hamta_omslagsbilder(idn)
+            sparade = favorit_repo.sparade_av(user_id, idn) if user_id else set()
+            for bostad in del_:
+                yield bostad, omslag.get(bostad.id), bostad.id in sparade
+
+    # 2. Returnera HTML (View Layer) - generatorn konsumeras medan mallen renderas
+    return strommad_mall(
         'bostader_lista.html',
-        bostader=alla_bostader, # Skickar ORM-objekten till mallen
+        bostader=bostader_med_omslag(), # Tupler (BostadDTO, omslagsbildens hash eller None, sparad av mig)
         titel='Våra bostäder'
     )
 
 # Route 2: Visar detaljer för en specifik bostad
 # <int:bostad_id> skapar en dynamisk URL-parameter och säkerställer att den är ett heltal
 @bostader_bp.route('bostad/<int:bostad_id>')
-def bostad_detalj(bostad_id):
+async def bostad_detalj(bostad_id):
     """
     Visar en enskild bostadsdetaljsida baserat på ID.
+    ASYNC: bostaden, de liknande bostäderna och bilderna läses SAMTIDIGT (asyncio.gather),
+    så sidan väntar på den långsammaste frågan istället för på alla tre efter varandra.
 
     Args:
         bostad_id (int): Primärnyckeln för den bostad som ska visas.
     """
-    # 1. Anropa Repository för att hämta ETT Bostad-objekt
-    bostad = bostad_repo.hamta_en(bostad_id)
+    # 1. Id:n på liknande bostäder kommer från rekommenderaren (i minnet, ingen SQL)
+    liknande_idn = rekommenderare.liknande(bostad_id, k=ANTAL_LIKNANDE)
+
+    # 2. Starta frågorna samtidigt och vänta tills alla är klara
+    user_id = current_user.id if current_user.is_authenticated else None
+    bostad, liknande, bostadens_bilder, sparad = await asyncio.gather(
+        async_bostad_repo.hamta_en(bostad_id),
+        async_bostad_repo.hamta_flera(liknande_idn),
+        async_bostad_repo.hamta_bilder(bostad_id),
+        async_bostad_repo.ar_sparad(user_id, bostad_id) if user_id else asyncio.sleep(0, result=False),   # Utloggad: inget att fråga om
+    )
 
-    # 2. Kontrollera om bostaden hittades
+    # 3. Kontrollera om bostaden hittades
     if bostad is None:
         # Returnera en 404 Not Found-sida
         # I en riktig app skulle man använda flask.abort(404)
         return "Bostaden hittades inte (404)", 404
         
-    # 3. Returnera HTML (View Layer) med det enskilda objektet
+    visningsraknare.registrera('bostad', bostad_id)
+
+    # 4. Returnera HTML (View Layer) med det enskilda objektet
     return render_template(
         'bostad_detalj.html',
         bostad=bostad,
+        liknande=liknande,
+        bilder=bostadens_bilder,
+        sparad=sparad,
         titel=bostad.adress # Använd objektets adress som sidtitel
-    )
\ No newline at end of file
+    )
+
+# Route 3: Bostäder vars pris har sänkts nyligen
+@bostader_bp.route('sankt-pris')
+def sankt_pris():
+    """
+    Visar aktuella bostäder med sänkt pris de senaste 7 dagarna, störst sänkning först.
+    Sänkningarna läses ur prishistorikens partiella index - inte ur hela bostadstabellen.
+    """
+    return render_template(
+        'sankt_pris.html',
+        bostader=sankta_priser(dagar=7),
+        titel='Sänkt pris senaste veckan'
+    )
+
+# Route 4: Serverar en färdigskalad bild från den innehållsadresserade lagringen
+@bostader_bp.route('bild/<bild_hash>/<storlek>.jpg')
+def visa_bild(bild_hash, storlek):
+    """
+    Skickar en bildfil som skapats i förväg av tjanster/bilder.py - här skalas ALDRIG något.
+
+    Args:
+        bild_hash (str): Bildens SHA-256-hash.
+        storlek (str): 'original' eller en nyckel i bilder.STORLEKAR (t.ex. 'liten').
+    """
+    # Validera INNAN filsystemet rörs, så URL:en inte kan peka ut andra filer
+    if not bilder.ar_giltig_hash(bild_hash) or (storlek != 'original' and storlek not in bilder.STORLEKAR):
+        abort(404)
+
+    svar = send_from_directory(bilder.katalog_for(bilder.bildkatalog(), bild_hash), f'{storlek}.jpg',
+                               max_age=BILD_CACHE_SEKUNDER)
+    svar.cache_control.public = True
+    svar.cache_control.immutable = True
+    return svar
+
+# Route 5: Autokomplettering för sökrutor (JSON)
+@bostader_bp.route('api/autokomplettera')
+def autokomplettera():
+    """
+    Returnerar förslag medan besökaren skriver, t.ex. /bostader/api/autokomplettera?falt=stad&q=bo
+    Svaret kommer från ett sorterat index i minnet (tjanster/autokomplettering.py) - ingen SQL.
+
+    Query-parametrar:
+        falt: 'adress' (standard), 'stad' eller 'maklare'.
+        q: Det som skrivits hittills. Matchar början av valfritt ord, skiftlägesokänsligt.
+        antal: Max antal förslag (standard 10).
+
+    Returns:
+        JSON: En lista med texter, t.ex. ["Borlänge"].
+    """
+    falt = request.args.get('falt', 'adress')
+    if falt not in FALT:
+        return jsonify({'error': f'Okänt fält: {falt}'}), 400
+    antal = request.args.get('antal', STANDARD_ANTAL, type=int)
+    return jsonify(autokomplettering.forslag(falt, request.args.get('q', ''), antal))
+
+# Route 6: Spara en bostad som favorit (eller ta bort den)
+@bostader_bp.route('bostad/<int:bostad_id>/spara', methods=['POST'])
+@login_required
+def vaxla_favorit(bostad_id):
+    """
+    Sparar bostaden om den inloggade inte har sparat den, annars tas den bort.
+    Räknaren på bostaden (antal_sparade) ändras i samma transaktion.
+
+    Returns:
+        JSON {'sparad': bool} om klienten ber om JSON, annars tillbaka till sidan man kom från.
+    """
+    bostad_repo.hamta_eller_404(bostad_id)
+    sparad = favorit_repo.vaxla(current_user.id, bostad_id)
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({'sparad': sparad})
+    return redirect(request.referrer or url_for('bostader_bp.bostad_detalj', bostad_id=bostad_id))
+
+# Route 7: Den inloggades sparade bostäder
+@bostader_bp.route('sparade')
+@login_required
+def sparade_bostader():
+    """Visar bostäderna som den inloggade har sparat, senast sparad först."""
+    bostader = favorit_repo.hamta_for_user(current_user.id)
+    omslag = bild_repo.hamta_omslagsbilder([bostad.id for bostad in bostader])
+    return render_template(
+        'sparade_bostader.html',
+        bostader=[(bostad, omslag.get(bostad.id), True) for bostad in bostader],
+        titel='Sparade bostäder'
+    )
@@ -19,6 +19,7 @@ kontor_bp = Blueprint(
 # 2. IMPORTERA REPOSITORY (Databaslagret)
 # ============================================================
 from dbrepositories.kontor_repository import kontor_repo
+from dbrepositories.async_kontor_repository import async_kontor_repo
 
 
 # ============================================================
@@ -2,8 +2,12 @@
 """
 🏢 KONTOR ROUTES - Hanterar URL:er för att VISA kontor (Karta och API).
 """
-from flask import render_template, jsonify
-from . import kontor_bp, kontor_repo
+from flask import Response, abort, render_template, jsonify
+from . import kontor_bp, kontor_repo, async_kontor_repo
+# Sparar färdiga svar i den gemensamma cachen (delas mellan alla workers)
+from tjanster.sidcache import cachad_sida
+# Kontorets mäklare och deras visningar som kalenderfil (.ics)
+from tjanster.visningsschema import kalender_for_maklare, visningsschema
 
 # ============================================================
 # 1. WEBBVY: KARTA
@@ -29,14 +33,37 @@ def visa_karta():
 # ============================================================
 
 @kontor_bp.route('/api/data')
-def api_kontor_data():
+@cachad_sida('kontor', ttl_sekunder=300)
+async def api_kontor_data():
     """
     Returnerar ALL kontorsdata i JSON-format. Används av Leaflet-kartan.
+    Svaret är samma för alla besökare och cachas därför i 5 minuter.
+    Async: läser via async_kontor_repo när svaret inte finns i cachen.
     
     URL: /kontor/api/data
     """
-    alla_kontor = kontor_repo.hamta_alla()
-    # Använder Kontor.to_dict() för att konvertera objekt till dictionary
-    kontor_data = [kontor.to_dict() for kontor in alla_kontor]
+    alla_kontor = await async_kontor_repo.hamta_alla()
+    # Async-repositoryt väljer samma fält som Kontor.to_dict()
+    kontor_data = [vars(kontor) for kontor in alla_kontor]
     
-    return jsonify(kontor_data)
\ No newline at end of file
+    return jsonify(kontor_data)
+
+
+# ============================================================
+# 3. KALENDER: KONTORETS VISNINGAR (.ics)
+# ============================================================
+
+@kontor_bp.route('/<int:kontor_id>/visningar.ics')
+def kontor_kalender(kontor_id):
+    """
+    Visningarna för alla mäklare på kontoret, som EN iCalendar-fil.
+    Mäklarna på kontoret kommer från visningsschemat (ingen extra fråga).
+
+    URL: /kontor/1/visningar.ics
+    """
+    kontor = kontor_repo.hamta_en(kontor_id)
+    if kontor is None:
+        abort(404)
+    maklare_idn = [maklare.id for maklare in visningsschema.maklare(kontor_id)]
+    return Response(kalender_for_maklare(maklare_idn, f'Visningar - {kontor.namn}'),
+                    mimetype='text/calendar; charset=utf-8')
@@ -34,6 +34,8 @@ maklare_bp = Blueprint(
 # Importerar den enda instansen av maklare_repository. 
 # Detta ger routarna tillgång till mäklardata i databasen.
 from dbrepositories.maklare_repository import maklare_repo
+# Async-versionen används av routes som bara läser
+from dbrepositories.async_maklare_repository import async_maklare_repo
 
 
 # ============================================================
@@ -13,7 +13,7 @@ Ingen affärslogik eller databasoperationer här!
 # För e-postvalidering behövs också: pip install email_validator
 
 from flask_wtf import FlaskForm  # Basformulärklass från Flask-WTF
-from wtforms import StringField, TextAreaField, SubmitField  # Fälttyper vi använder
+from wtforms import SelectField, StringField, TextAreaField, SubmitField  # Fälttyper vi använder
 from wtforms.validators import DataRequired, Email, Length  # Valideringsregler
 
 # Vi skapar en klass som ärver från FlaskForm
@@ -61,5 +61,8 @@ class MaklareForm(FlaskForm):
     # Beskrivning: fritextfält utan validering (valfritt)
     beskrivning = TextAreaField('Beskrivning')
 
+    # Kontor: valen (kontorens id och namn) fylls i av routen. 0 = inget kontor
+    kontor_id = SelectField('Kontor', coerce=int, default=0)
+
     # Skicka-knapp: visas som "Lägg till mäklare"
     submit = SubmitField('Lägg till mäklare')
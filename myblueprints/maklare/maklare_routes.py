@@ -4,17 +4,21 @@ MÄKLARE ROUTES - Hanterar URL:er för att VISA mäklare (både HTML och JSON AP
 
 SINGLE RESPONSIBILITY: Fungerar som "Controller"-lagret för mäklardata.
 - Hanterar URL:er för listor, detaljer och API-svar.
-- Använder maklare_repo för all dataåtkomst.
+- Läser via async_maklare_repo och skriver via maklare_repo.
 """
 # Importera jsonify för att returnera JSON-svar i API-rutten
-from flask import jsonify, render_template, redirect, url_for, flash
+from flask import Response, jsonify, render_template, redirect, url_for, flash
 # login för att lägg till mäklare
 from flask_login import login_required
 # Importera blueprint-objektet och maklare_repo från __init__.py
-from . import maklare_bp, maklare_repo
+from . import maklare_bp, maklare_repo, async_maklare_repo
 #för formulärshanteringen
 from models.maklare import Maklare
 from .form_maklare import MaklareForm
+# Kontoren att välja bland i formuläret
+from dbrepositories.kontor_repository import kontor_repo
+# Mäklarens visningar som kalenderfil (.ics)
+from tjanster.visningsschema import kalender_for_maklare
 # Importera autentiseringsfunktioner från Flask-Login
 from flask_login import login_required, current_user 
 
@@ -25,14 +29,14 @@ from flask_login import login_required, current_user
 # ============================================================
 
 @maklare_bp.route('/')
-def lista_maklare():
+async def lista_maklare():
     """
-    Visar ALLA mäklare på en HTML-sida.
+    Visar ALLA mäklare på en HTML-sida (async - läser via async_maklare_repo).
     
     URL: /maklare/ (om prefixet är satt till /maklare i app.py)
     """
-    # 1. Hämta alla Mäklare-objekt från databasen (via repository)
-    alla_maklare = maklare_repo.hamta_alla()
+    # 1. Hämta alla mäklare från databasen (via async-repository)
+    alla_maklare = await async_maklare_repo.hamta_alla()
 
     # 2. Skicka datan till HTML-mallen (Webbvy)
     return render_template(
@@ -47,7 +51,7 @@ def lista_maklare():
 # ============================================================
 
 @maklare_bp.route('/<int:maklare_id>')
-def maklare_detalj(maklare_id):
+async def maklare_detalj(maklare_id):
     """
     Visar DETALJER för EN specifik mäklare på en HTML-sida.
 
@@ -58,7 +62,7 @@ def maklare_detalj(maklare_id):
     """
     # 1. Hämta den specifika mäklaren via Repository.
     # hamta_eller_404: Om objektet inte hittas, skickar den automatiskt 404.
-    maklare = maklare_repo.hamta_eller_404(maklare_id)
+    maklare = await async_maklare_repo.hamta_eller_404(maklare_id)
 
     # 2. Skicka mäklaren till HTML-mallen (Webbvy)
     return render_template(
@@ -73,14 +77,14 @@ def maklare_detalj(maklare_id):
 
 # Denna rutt returnerar JSON-data istället för HTML
 @maklare_bp.route('/api/v1/maklare/<int:maklare_id>')
-def api_maklare(maklare_id):
+async def api_maklare(maklare_id):
     """
     Returnerar mäklardata i JSON-format för externa system.
     
     URL: /maklare/api/v1/maklare/1
     """
     # 1. Hämta den specifika mäklaren (hamta_en returnerar None om den inte hittas)
-    maklare = maklare_repo.hamta_en(maklare_id)
+    maklare = await async_maklare_repo.hamta_en(maklare_id)
 
     if maklare:
         # 2. jsonify: Konverterar Python-dictionaryn till ett JSON-svar
@@ -95,6 +99,23 @@ def api_maklare(maklare_id):
         # 3. Om den inte hittas, returnera ett felmeddelande och HTTP-status 404
         return jsonify({'error': 'Mäklare hittades inte'}), 404
     
+# ============================================================
+# 4. KALENDER: MÄKLARENS VISNINGAR (.ics)
+# ============================================================
+
+@maklare_bp.route('/<int:maklare_id>/visningar.ics')
+def maklare_kalender(maklare_id):
+    """
+    Mäklarens visningar som iCalendar-fil. Adressen kan läggas in som en prenumeration
+    i t.ex. Outlook eller Google Kalender, som sedan hämtar den med jämna mellanrum.
+
+    URL: /maklare/1/visningar.ics
+    """
+    maklare = maklare_repo.hamta_eller_404(maklare_id)
+    return Response(kalender_for_maklare([maklare.id], f'Visningar - {maklare.namn}'),
+                    mimetype='text/calendar; charset=utf-8')
+
+
 # ==================CRUD===============
 @maklare_bp.route('/skapa', methods=['GET', 'POST'])
 @login_required
@@ -109,6 +130,7 @@ def skapa_maklare():
         return redirect(url_for('auth_bp.login')) 
     # Skapa en instans av formuläret
     form = MaklareForm()
+    form.kontor_id.choices = [(0, 'Inget kontor')] + [(kontor.id, kontor.namn) for kontor in kontor_repo.hamta_alla()]
     if form.validate_on_submit():
         # Skapa ett nytt Maklare-objekt med data från formuläret
         ny_maklare = Maklare(
@@ -116,7 +138,8 @@ def skapa_maklare():
             epost=form.epost.data,
             telefon=form.telefon.data,
             titel=form.titel.data,
-            beskrivning=form.beskrivning.data
+            beskrivning=form.beskrivning.data,
+            kontor_id=form.kontor_id.data or None
         )
         maklare_repo.skapa_ny(ny_maklare)
         # redirect till sidan som visar alla mäklare.
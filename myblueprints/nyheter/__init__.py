@@ -31,6 +31,8 @@ nyheter_bp = Blueprint(
 # Nyheter-routen kommer att använda båda för att visa nyheter OCH hantera kommentarer.
 from dbrepositories.nyhet_repository import nyhet_repo
 from dbrepositories.kommentar_repository import kommentar_repo
+# Async-versionen läser en nyhet med mäklare och kommentarer samtidigt
+from dbrepositories.async_nyhet_repository import async_nyhet_repo
 
 
 # ============================================================
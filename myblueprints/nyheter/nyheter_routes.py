@@ -3,30 +3,61 @@
 📰 NYHETER ROUTES - Hanterar URL:er för att VISA nyheter.
 
 SINGLE RESPONSIBILITY: Fungerar som "Controller"-lagret för nyhetslistan.
-- Hanterar URL:er för listvisning.
+- Hanterar URL:er för listvisning och detaljvisning (async).
 - Anropar nyhet_repo för att hämta data från databasen.
 - Skickar data till HTML-mallar för visning.
 """
-from flask import render_template
+from flask import abort, render_template
 # Importera blueprint-objektet och repositories från __init__.py
 from . import nyheter_bp, nyhet_repo # Vi importerar endast vad som behövs för denna rutt
+from . import async_nyhet_repo # Async-versionen för detaljsidan
+# Räknar visningar i minnet (skrivs till databasen i klump)
+from tjanster.sidvisningar import visningsraknare
+# Skickar långa listor medan de renderas
+from tjanster.strommning import strommad_mall
 
 
 @nyheter_bp.route('/') # url_prefix /nyheter ger den fullständiga URL:en /nyheter/
 def lista_nyheter():
     """
     Visar ALLA nyheter på en sida, optimerat för att visa relaterade objekt (Mäklare och Kommentarer).
+    Sidan STRÖMMAS: nyheterna skickas medan de läses från databasen.
 
     URL: /nyheter/
     """
     # 1. Hämta data från Repository.
-    # hamta_alla_med_relationer() är en optimerad metod som hämtar nyheterna 
-    # TILLSAMMANS med deras relaterade Mäklare och Kommentarer (eager loading).
-    alla_nyheter = nyhet_repo.hamta_alla_med_relationer() # <--- Hämta med relationer!
+    # strom_alla_med_relationer() hämtar nyheterna del för del,
+    # TILLSAMMANS med deras relaterade Mäklare och Kommentarer, som NyhetDTO:er (se dbrepositories/dto.py).
+    def raknade_nyheter():
+        for nyhet in nyhet_repo.strom_alla_med_relationer(som_dto=True):
+            # Alla nyheter visas i sin helhet på sidan - varje nyhet räknas som visad
+            visningsraknare.registrera('nyhet', nyhet.id)
+            yield nyhet
 
     # 2. Skicka datan till HTML-mallen (View Layer)
-    return render_template(
+    return strommad_mall(
         'nyhets_lista.html',
-        nyheter_lista=alla_nyheter,
+        nyheter_lista=raknade_nyheter(),
         titel='Nyheter & Kommentarer'
-    )
\ No newline at end of file
+    )
+
+
+@nyheter_bp.route('/<int:nyhet_id>')
+async def nyhet_detalj(nyhet_id):
+    """
+    Visar EN nyhet i sin helhet med mäklare och kommentarer.
+    Async: nyheten och kommentarerna läses samtidigt (se async_nyhet_repository.py).
+
+    URL: /nyheter/1
+    """
+    nyhet = await async_nyhet_repo.hamta_en_med_relationer(nyhet_id)
+    if nyhet is None:
+        abort(404)
+
+    visningsraknare.registrera('nyhet', nyhet_id)
+
+    return render_template(
+        'nyhet_detalj.html',
+        nyhet=nyhet,
+        titel=nyhet.titel
+    )
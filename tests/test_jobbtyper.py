@@ -0,0 +1,38 @@
+# tests/test_jobbtyper.py
+"""
+🧪 Jobbtyperna körda av en riktig jobbarbetare mot en tillfällig databas.
+
+Körs med: python -m pytest -q tests
+"""
+import json
+import os
+import tempfile
+
+# Databasen måste pekas ut INNAN appen skapas (flask_app skapar appen vid import)
+KATALOG = tempfile.mkdtemp(prefix='blgee-test-')
+os.environ['BLGEE_DATABAS'] = 'sqlite:///' + os.path.join(KATALOG, 'test.db')
+
+from flask_app import app                                   # noqa: E402
+from dbrepositories.bostad_repository import bostad_repo    # noqa: E402
+from dbrepositories.jobb_repository import jobb_repo        # noqa: E402
+from tjanster import jobbko                                  # noqa: E402
+from tjanster.jobbko import Arbetare, lagg_till_jobb        # noqa: E402
+
+
+def test_hitta_dubbletter_over_flera_delar(monkeypatch):
+    """Jobbet läser bostäderna i flera delar och skriver framsteg efter varje del - utan 'database is locked'."""
+    monkeypatch.setattr(jobbko, 'FRAMSTEG_INTERVALL', 0)   # Spara varje framsteg, inte högst ett per sekund
+    with app.app_context():
+        bostad_repo.skapa_flera([
+            {'adress': f'Testgatan {i}', 'stad': 'Falun', 'pris': '1 000 000 kr', 'rum': 1 + i % 5,
+             'yta': 30 + i, 'beskrivning': f'Bostad nummer {i} med egen beskrivning {i * 7}'}
+            for i in range(1200)])
+        antal = len(bostad_repo.hamta_kolumnvarden('id'))
+        jobb_id = lagg_till_jobb('hitta-dubbletter', max_forsok=1).id
+
+    Arbetare(app).kor(en_gang=True)
+
+    with app.app_context():
+        jobb = jobb_repo.hamta_en(jobb_id)
+        assert jobb.status == 'klar', jobb.fel
+        assert json.loads(jobb.resultat)['bostader'] == antal > 500   # Mer än en del (per_del=500)
@@ -0,0 +1,110 @@
+# tjanster/andringsflode.py
+"""
+📜 ÄNDRINGSFLÖDE - Håller härledd data uppdaterad genom att följa ändringsloggen.
+
+Ändringsloggen (models/andring.py) får en rad för varje skapad, ändrad eller raderad rad.
+Istället för att läsa om en hel tabell kan en konsument (cache, sökindex, aggregat,
+statisk export ...) fråga "vad har hänt sedan markör N?" och bara behandla det.
+
+1. folj(): För konsumenter med ett NAMN. Markören sparas i databasen efter varje omgång,
+   så konsumenten fortsätter där den slutade efter en omstart. Kraschar den mitt i en
+   omgång behandlas omgången igen - hanteraren måste tåla att se samma ändring två gånger.
+
+2. Cachesynk: Med CACHE_BACKEND = 'minne' har varje worker-process sin egen entitetscache.
+   En ändring i EN process ogiltigförklarar bara den processens cache; de andra visade
+   tidigare gammal data tills TTL gick ut. Nu följer varje process loggen (högst en fråga
+   per ANDRINGAR_SYNK_SEKUNDER) och kastar poster som ändrats någon annanstans.
+"""
+import threading
+import time
+
+from dbrepositories.andring_repository import STANDARD_ANTAL, andring_repo
+from dbrepositories.cache_backend import MinnesBackend, hamta_backend
+from dbrepositories.entitets_cache import alla_cacher
+
+STANDARD_SYNK_SEKUNDER = 2
+
+
+def folj(namn, hanterare, entiteter=None, antal=STANDARD_ANTAL):
+    """
+    Behandlar alla ändringar som konsumenten 'namn' inte har sett än. Kräver ett app-context.
+
+    Args:
+        namn (str): Konsumentens namn, t.ex. 'sokindex'.
+        hanterare (callable): Anropas med en lista Andring-objekt (äldst först) per omgång.
+        entiteter (list): Bara ändringar i dessa tabeller. None = alla.
+        antal (int): Max antal ändringar per omgång.
+
+    Returns:
+        int: Antal behandlade ändringar.
+    """
+    markor = andring_repo.hamta_markor(namn)
+    totalt = 0
+    while True:
+        andringar = andring_repo.hamta_efter(markor, entiteter, antal)
+        if not andringar:
+            return totalt
+        hanterare(andringar)
+        markor = andringar[-1].id
+        andring_repo.spara_markor(namn, markor)
+        totalt += len(andringar)
+
+
+class Cachesynk:
+    """
+    Följer ändringsloggen och ogiltigförklarar entitetscachen i den HÄR processen.
+    Markören ligger i minnet: en ny process har en tom cache och börjar vid loggens slut.
+    """
+
+    def __init__(self, intervall=STANDARD_SYNK_SEKUNDER):
+        self.intervall = intervall
+        self.markor = None
+        self._nasta = 0.0
+        self._las = threading.Lock()
+
+    def synka_om_dags(self):
+        """Anropas före varje request; frågar databasen högst en gång per intervall."""
+        if time.monotonic() < self._nasta or not self._las.acquire(blocking=False):
+            return   # Inte dags än, eller en annan tråd synkar redan
+        try:
+            self._nasta = time.monotonic() + self.intervall
+            self.synka()
+        finally:
+            self._las.release()
+
+    def synka(self):
+        """
+        Returns:
+            int: Antal ogiltigförklarade poster.
+        """
+        if self.markor is None:
+            self.markor = andring_repo.senaste_markor()
+            return 0
+        cacher = {cache.namn: cache for cache in alla_cacher}
+        antal = 0
+        while True:
+            andringar = andring_repo.hamta_efter(self.markor, list(cacher))
+            if not andringar:
+                return antal
+            for andring in andringar:
+                cacher[andring.entitet].ogiltigforklara(andring.entitet_id)
+            self.markor = andringar[-1].id
+            antal += len(andringar)
+
+
+# EN synk per worker-process
+cachesynk = Cachesynk()
+
+
+def init_andringsflode(app):
+    """
+    Startar cachesynken om entitetscachen ligger i processens minne.
+    (Den delade SQLite-backenden ogiltigförklaras redan i alla processer på en gång.)
+    """
+    cachesynk.intervall = app.config.get('ANDRINGAR_SYNK_SEKUNDER', STANDARD_SYNK_SEKUNDER)
+    if not isinstance(hamta_backend(), MinnesBackend):
+        return
+
+    @app.before_request
+    def synka_entitetscacher():
+        cachesynk.synka_om_dags()
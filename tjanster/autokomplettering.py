@@ -0,0 +1,226 @@
+# tjanster/autokomplettering.py
+"""
+🔤 AUTOKOMPLETTERING - Förslag medan användaren skriver (adress, stad, mäklarens namn).
+
+PROBLEMET: En sökruta frågar servern vid VARJE tangenttryckning. Med
+"WHERE adress LIKE 'sto%'" blir det en SQL-fråga per tecken och besökare - och LIKE
+skiftlägesokänsligt kan SQLite inte slå upp i ett index (och 'Å' och 'å' är olika för LIKE).
+
+LÖSNINGEN: Alla texter ligger i minnet som en SORTERAD lista med nycklar. Alla nycklar som
+börjar på 'sto' ligger då efter varandra, och den första hittas med binärsökning (bisect):
+O(log n) + antalet förslag, långt under en millisekund även med 100 000 bostäder.
+
+NYCKLARNA:
+- vik() gör texten jämförbar: gemener ('Å' -> 'å'), och accenter som inte hör till svenskan
+  tas bort ('é' -> 'e', 'ü' -> 'u'). Å, Ä och Ö är egna bokstäver och behålls - 'ar' ger
+  alltså inte 'Århus'.
+- Varje ORD i texten blir början på en nyckel: 'Lilla Torget 2' får nycklarna
+  'lilla torget 2', 'torget 2' och '2', så 'tor' hittar den. Mäklare hittas på efternamnet.
+- Samma text (t.ex. staden 'Falun' för tusen bostäder) finns bara EN gång per nyckel,
+  med en referensräknare - den försvinner först när den sista bostaden i Falun är borta.
+
+UPPDATERING (som tjanster/rekommendation.py):
+- Inkrementellt: lyssnare på bostad_repo och maklare_repo lägger till och tar bort texter.
+- I bulk: bygg_om() läser alla texter med två frågor, vid första förslaget och sedan när
+  indexet är äldre än max_alder_sekunder (andra workers kan ha ändrat data).
+  Frågorna körs UTAN låset, så att förslagen inte väntar på dem. Ändringar som lyssnarna får
+  under tiden sparas i en buffert och spelas upp på de nya indexen innan de byts in - annars
+  kunde en ändring som committades efter läsningen saknas tills nästa bygge.
+"""
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+
+from dbrepositories.bostad_repository import bostad_repo
+from dbrepositories.maklare_repository import maklare_repo
+
+# Fälten som kan autokompletteras
+FALT = ('adress', 'stad', 'maklare')
+
+STANDARD_MAX_ALDER_SEKUNDER = 300
+STANDARD_ANTAL = 10
+MAX_ANTAL = 50
+
+# Bokstäver som svenskan inte skiljer från grundbokstaven vid sökning.
+# Å, Ä och Ö är INTE med - de är egna bokstäver. (Dansk/norsk æ och ø räknas som ä och ö.)
+VIKNING = str.maketrans({
+    'á': 'a', 'à': 'a', 'â': 'a', 'ã': 'a', 'é': 'e', 'è': 'e', 'ê': 'e', 'ë': 'e',
+    'í': 'i', 'ì': 'i', 'î': 'i', 'ï': 'i', 'ó': 'o', 'ò': 'o', 'ô': 'o', 'õ': 'o',
+    'ú': 'u', 'ù': 'u', 'û': 'u', 'ü': 'u', 'ý': 'y', 'ÿ': 'y', 'ç': 'c', 'ñ': 'n',
+    'æ': 'ä', 'ø': 'ö',
+})
+
+
+def vik(text):
+    """Gör en text jämförbar: 'Åsgatan  2' -> 'åsgatan 2', 'Café' -> 'cafe'."""
+    return ' '.join(unicodedata.normalize('NFC', text or '').casefold().translate(VIKNING).split())
+
+
+def _nycklar(text):
+    """En nyckel per ord i texten: från ordet och till slutet ('lilla torget', 'torget')."""
+    ord_ = vik(text).split(' ')
+    return [' '.join(ord_[i:]) for i in range(len(ord_)) if ord_[i]]
+
+
+class Prefixindex:
+    """
+    Texter för ETT fält, sorterade på nyckel. Inte trådsäkert - Autokomplettering har låset.
+    """
+
+    def __init__(self, texter=()):
+        """
+        Args:
+            texter: (id, text)-par att bygga indexet av (sorteras EN gång, inte en i taget).
+        """
+        self._text_for_id = {}
+        self._antal = Counter()         # (nyckel, text) -> antal id:n som har texten
+        for post_id, text in texter:
+            if text:
+                self._text_for_id[post_id] = text
+                self._antal.update((nyckel, text) for nyckel in _nycklar(text))
+        self._poster = sorted(self._antal)  # (nyckel, text), sorterat på nyckel
+
+    def __len__(self):
+        return len(self._poster)
+
+    def lagg_till(self, post_id, text):
+        """Sätter id:ts text (en gammal text för samma id tas bort först)."""
+        self.ta_bort(post_id)
+        if not text:
+            return
+        self._text_for_id[post_id] = text
+        for nyckel in _nycklar(text):
+            post = (nyckel, text)
+            if self._antal[post] == 0:
+                self._poster.insert(bisect_left(self._poster, post), post)
+            self._antal[post] += 1
+
+    def ta_bort(self, post_id):
+        text = self._text_for_id.pop(post_id, None)
+        if text is None:
+            return
+        for nyckel in _nycklar(text):
+            post = (nyckel, text)
+            self._antal[post] -= 1
+            if self._antal[post] <= 0:
+                del self._antal[post]
+                del self._poster[bisect_left(self._poster, post)]
+
+    def sok(self, prefix, antal=STANDARD_ANTAL):
+        """
+        Returns:
+            list: Högst 'antal' olika texter med ett ord som börjar på 'prefix', i nyckelordning.
+        """
+        prefix = vik(prefix)
+        if not prefix:
+            return []
+        forslag = {}                     # dict som ordnad mängd (en text kan matcha på flera ord)
+        for i in range(bisect_left(self._poster, (prefix,)), len(self._poster)):
+            nyckel, text = self._poster[i]
+            if not nyckel.startswith(prefix) or len(forslag) >= antal:
+                break
+            forslag[text] = None
+        return list(forslag)
+
+
+def _andra(index, post_id, text):
+    """Sätter id:ts text i ett Prefixindex, eller tar bort den om text är None."""
+    if text is None:
+        index.ta_bort(post_id)
+    else:
+        index.lagg_till(post_id, text)
+
+
+class Autokomplettering:
+    """
+    Ett Prefixindex per fält i FALT. Trådsäker: alla ändringar och sökningar sker under ett lås.
+    """
+
+    def __init__(self, max_alder_sekunder=STANDARD_MAX_ALDER_SEKUNDER):
+        self.max_alder_sekunder = max_alder_sekunder
+        self._las = threading.Lock()
+        self._byggd = None              # time.monotonic() när indexen byggdes, None = aldrig
+        self._index = {falt: Prefixindex() for falt in FALT}
+        self._buffertar = []            # En lista med ändringar per bygge som pågår
+
+    def bygg_om(self):
+        """Läser alla adresser, städer och mäklarnamn (två frågor) och bygger indexen från grunden."""
+        buffert = []
+        with self._las:
+            self._buffertar.append(buffert)
+        try:
+            bostader = bostad_repo.hamta_kolumnvarden('id', 'adress', 'stad')
+            maklare = maklare_repo.hamta_alla(som_dto=True)
+            index = {
+                'adress': Prefixindex((rad.id, rad.adress) for rad in bostader),
+                'stad': Prefixindex((rad.id, rad.stad) for rad in bostader),
+                'maklare': Prefixindex((rad.id, rad.namn) for rad in maklare),
+            }
+            with self._las:
+                # Ändringarna sedan bygget började (en del kan redan finnas i läsningen - de
+                # spelas upp ändå, lagg_till och ta_bort ger samma resultat två gånger)
+                for falt, post_id, text in buffert:
+                    _andra(index[falt], post_id, text)
+                self._index = index
+                self._byggd = time.monotonic()
+        finally:
+            with self._las:
+                self._buffertar.remove(buffert)
+
+    def bostad_andrad(self, operation, fore, efter):
+        """Lyssnare på BostadRepository. Före första bygget görs inget (bygg_om läser ändå allt)."""
+        if operation in ('radera', 'arkivera'):
+            self._andra([('adress', fore['id'], None), ('stad', fore['id'], None)])
+        else:
+            self._andra([('adress', efter['id'], efter['adress']), ('stad', efter['id'], efter['stad'])])
+
+    def maklare_andrad(self, operation, fore, efter):
+        """Lyssnare på MaklareRepository."""
+        if operation == 'radera':
+            self._andra([('maklare', fore['id'], None)])
+        else:
+            self._andra([('maklare', efter['id'], efter['namn'])])
+
+    def _andra(self, andringar):
+        """Tillämpar (falt, id, text eller None = ta bort) på indexen och sparar dem åt pågående byggen."""
+        with self._las:
+            for buffert in self._buffertar:
+                buffert.extend(andringar)
+            if self._byggd is None:
+                return
+            for falt, post_id, text in andringar:
+                _andra(self._index[falt], post_id, text)
+
+    def forslag(self, falt, prefix, antal=STANDARD_ANTAL):
+        """
+        Förslag på texter i 'falt' som har ett ord som börjar på 'prefix'.
+
+        Args:
+            falt (str): 'adress', 'stad' eller 'maklare'.
+            prefix (str): Det användaren har skrivit hittills.
+            antal (int): Max antal förslag.
+
+        Returns:
+            list: Texterna, sorterade på det ord som matchade.
+        """
+        if falt not in FALT:
+            raise ValueError(f'Okänt fält: {falt}')
+        if self._byggd is None or time.monotonic() - self._byggd > self.max_alder_sekunder:
+            self.bygg_om()
+        with self._las:
+            return self._index[falt].sok(prefix, min(antal, MAX_ANTAL))
+
+
+# EN gemensam autokomplettering för hela appen
+autokomplettering = Autokomplettering()
+
+
+def init_autokomplettering(app):
+    """Kopplar autokompletteringen till repositoryna och läser inställningar från config."""
+    autokomplettering.max_alder_sekunder = app.config.get('AUTOKOMPLETTERING_MAX_ALDER', STANDARD_MAX_ALDER_SEKUNDER)
+    if autokomplettering.bostad_andrad not in bostad_repo.lyssnare:
+        bostad_repo.registrera_lyssnare(autokomplettering.bostad_andrad)
+    if autokomplettering.maklare_andrad not in maklare_repo.lyssnare:
+        maklare_repo.registrera_lyssnare(autokomplettering.maklare_andrad)
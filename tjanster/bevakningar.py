@@ -0,0 +1,195 @@
+# tjanster/bevakningar.py
+"""
+🔔 BEVAKNINGAR - Matchar nya och ändrade bostäder mot köparnas sparade sökningar.
+
+PROBLEMET: Att köra ALLA sparade sökningar mot hela bostadstabellen vid varje ny
+bostad blir långsammare för varje ny sökning OCH varje ny bostad.
+
+LÖSNINGEN: Vi vänder på frågan. Istället för "vilka bostäder matchar sökningen?"
+frågar vi "vilka sökningar matchar DEN HÄR bostaden?" med ett INVERTERAT INDEX:
+
+    per_stad['falun'] = {3, 8, 12}     # sökningar som kräver Falun
+    per_stad[None]    = {5}            # sökningar utan krav på stad
+    per_rum[3]        = {3, 5}         # sökningar där 3 rum ligger inom intervallet
+    rum_oppna         = {8, 12}        # sökningar utan övre rumsgräns (kontrolleras i steg 2)
+
+1. Kandidater = (per_stad[bostadens stad] ∪ per_stad[None]) ∩ (per_rum[bostadens rum] ∪ rum_oppna)
+2. Bara kandidaterna kontrolleras mot sina pris-, rum- och ytintervall.
+
+Bostäder kommer in via BostadRepository (skapa_ny/uppdatera - även från importerna),
+eftersom bostad_andrad() är registrerad där med registrera_i_transaktion.
+
+UTKORG (outbox): Träffarna skrivs till tabellen 'notifieringar' FÖRE commit, i samma
+transaktion som bostaden: sparas bostaden så sparas notifieringarna, och misslyckas de
+sparas inte bostaden heller. Varje anrop till repositoryt ger EN sats för alla dess
+bostäder - en import av 1000 bostäder (skapa_flera) ger alltså inte 1000 INSERT-satser.
+"""
+import threading
+import time
+
+from dbrepositories.bevakning_repository import bevakning_repo
+from dbrepositories.bostad_repository import bostad_repo
+from models.bostad import INAKTIVA_STATUSAR
+from tjanster.pris import pris_till_kronor
+
+STANDARD_MAX_ALDER_SEKUNDER = 300
+
+# Intervallen som kontrolleras i steg 2: (kriterium, bostadsvärde)
+INTERVALL = ('pris', 'rum', 'yta')
+
+
+def _nyckel(stad):
+    """Städer jämförs utan hänsyn till stora/små bokstäver och mellanslag runt om."""
+    return stad.strip().casefold() if stad else None
+
+
+def _inom(varde, minsta, storsta):
+    if minsta is None and storsta is None:
+        return True
+    if varde is None:
+        return False
+    return (minsta is None or varde >= minsta) and (storsta is None or varde <= storsta)
+
+
+def _kriterier(sokning):
+    """Sökningens kriterier som en vanlig dictionary (kan användas utanför databassessionen)."""
+    return {
+        'id': sokning.id, 'user_id': sokning.user_id, 'stad': _nyckel(sokning.stad),
+        'min_pris': sokning.min_pris, 'max_pris': sokning.max_pris,
+        'min_rum': sokning.min_rum, 'max_rum': sokning.max_rum,
+        'min_yta': sokning.min_yta, 'max_yta': sokning.max_yta,
+    }
+
+
+class Sokindex:
+    """
+    Inverterat index över alla sparade sökningar. Trådsäkert.
+    Sökningarna sparas som vanliga dictionaries (inte ORM-objekt), så indexet kan
+    användas utanför databassessionen.
+    """
+
+    def __init__(self, max_alder_sekunder=STANDARD_MAX_ALDER_SEKUNDER):
+        self.max_alder_sekunder = max_alder_sekunder
+        self._las = threading.Lock()
+        self._byggd = None
+        self._sokningar = {}     # sokning_id -> dict med kriterierna
+        self._per_stad = {}      # stad (casefold) eller None -> set(sokning_id)
+        self._per_rum = {}       # antal rum -> set(sokning_id)
+        self._rum_oppna = set()  # sökningar utan övre rumsgräns
+        self._buffertar = []     # En lista med ändringar per bygge som pågår
+
+    def bygg_om(self):
+        """
+        Läser alla sparade sökningar och bygger indexet från grunden. Frågan körs UTAN låset;
+        sökningar som sparas eller tas bort under tiden spelas upp innan indexet används
+        (som i tjanster/autokomplettering.py).
+        """
+        buffert = []
+        with self._las:
+            self._buffertar.append(buffert)
+        try:
+            sokningar = [_kriterier(sokning) for sokning in bevakning_repo.hamta_alla()]
+            with self._las:
+                self._sokningar, self._per_stad, self._per_rum, self._rum_oppna = {}, {}, {}, set()
+                for kriterier in sokningar:
+                    self._lagg_till(kriterier)
+                for sokning_id, kriterier in buffert:
+                    self._andra(sokning_id, kriterier)
+                self._byggd = time.monotonic()
+        finally:
+            with self._las:
+                self._buffertar.remove(buffert)
+
+    def lagg_till(self, sokning):
+        """Lägger till (eller ersätter) en sökning i indexet."""
+        self._lyssna(sokning.id, _kriterier(sokning))
+
+    def ta_bort(self, sokning_id):
+        self._lyssna(sokning_id, None)
+
+    def _lyssna(self, sokning_id, kriterier):
+        """Tillämpar ändringen (kriterier None = ta bort) och sparar den åt pågående byggen."""
+        with self._las:
+            for buffert in self._buffertar:
+                buffert.append((sokning_id, kriterier))
+            self._andra(sokning_id, kriterier)
+
+    def _andra(self, sokning_id, kriterier):
+        self._ta_bort(sokning_id)
+        if kriterier is not None:
+            self._lagg_till(kriterier)
+
+    def _lagg_till(self, kriterier):
+        sokning_id = kriterier['id']
+        self._sokningar[sokning_id] = kriterier
+        self._per_stad.setdefault(kriterier['stad'], set()).add(sokning_id)
+        if kriterier['max_rum'] is None:
+            self._rum_oppna.add(sokning_id)
+        else:
+            for rum in range(kriterier['min_rum'] or 1, kriterier['max_rum'] + 1):
+                self._per_rum.setdefault(rum, set()).add(sokning_id)
+
+    def _ta_bort(self, sokning_id):
+        kriterier = self._sokningar.pop(sokning_id, None)
+        if kriterier is None:
+            return
+        self._per_stad.get(kriterier['stad'], set()).discard(sokning_id)
+        self._rum_oppna.discard(sokning_id)
+        if kriterier['max_rum'] is not None:
+            for rum in range(kriterier['min_rum'] or 1, kriterier['max_rum'] + 1):
+                self._per_rum.get(rum, set()).discard(sokning_id)
+
+    def matcha(self, bostad):
+        """
+        Returnerar de sökningar (dictionaries) som bostaden matchar.
+
+        Args:
+            bostad (dict): Bostadens kolumnvärden (som lyssnarna får från BostadRepository).
+        """
+        if self._byggd is None or time.monotonic() - self._byggd > self.max_alder_sekunder:
+            self.bygg_om()
+
+        varden = {'pris': pris_till_kronor(bostad['pris']), 'rum': bostad['rum'], 'yta': bostad['yta']}
+        with self._las:
+            # Steg 1: kandidater från det inverterade indexet (mängdoperationer, ingen loop över alla)
+            stad = self._per_stad.get(_nyckel(bostad['stad']), set()) | self._per_stad.get(None, set())
+            rum = self._per_rum.get(bostad['rum'], set()) | self._rum_oppna
+            kandidater = stad & rum
+            # Steg 2: kontrollera intervallen för de få kandidaterna
+            return [
+                self._sokningar[sokning_id] for sokning_id in kandidater
+                if all(_inom(varden[falt], self._sokningar[sokning_id][f'min_{falt}'],
+                             self._sokningar[sokning_id][f'max_{falt}']) for falt in INTERVALL)
+            ]
+
+
+# ETT gemensamt index för hela appen
+sokindex = Sokindex()
+
+
+def bostad_andrad(operation, andringar):
+    """
+    Anropas av BostadRepository före commit (se registrera_i_transaktion). Nya träffar läggs i
+    utkorgen med EN sats; en uppdaterad bostad ger bara notifieringar för sökningar som den
+    INTE matchade innan (t.ex. efter en prissänkning).
+    """
+    if operation in ('radera', 'arkivera'):
+        bevakning_repo.radera_notifieringar_for([fore['id'] for fore, _ in andringar])
+        return
+
+    traffar = []
+    for fore, efter in andringar:
+        if efter.get('status') in INAKTIVA_STATUSAR:
+            continue   # En såld eller borttagen bostad ger inga nya träffar
+        redan = {sokning['id'] for sokning in sokindex.matcha(fore)} if fore else set()
+        for sokning in sokindex.matcha(efter):
+            if sokning['id'] not in redan:
+                traffar.append({'user_id': sokning['user_id'], 'sokning_id': sokning['id'], 'bostad_id': efter['id']})
+    bevakning_repo.spara_notifieringar(traffar)
+
+
+def init_bevakningar(app):
+    """Kopplar bevakningarna till BostadRepository (i samma transaktion som bostäderna sparas)."""
+    sokindex.max_alder_sekunder = app.config.get('BEVAKNING_MAX_ALDER', STANDARD_MAX_ALDER_SEKUNDER)
+    if bostad_andrad not in bostad_repo.i_transaktion:
+        bostad_repo.registrera_i_transaktion(bostad_andrad)
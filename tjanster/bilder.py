@@ -0,0 +1,193 @@
+# tjanster/bilder.py
+"""
+🖼️ BILDER - Läser in bildfiler, tar bort dubbletter och skapar miniatyrer i förväg.
+
+FLÖDE (importera_bilder):
+1. HASHA: Varje fil får en SHA-256-hash av sitt innehåll. Filer vars hash redan finns
+   (i databasen eller tidigare i samma körning) är dubbletter - de kopplas bara till
+   bostaden, utan att sparas eller bearbetas igen.
+2. SKALA: Nya bilder skalas till alla storlekar i STORLEKAR i en PROCESSPOOL.
+   Bildbehandling är CPU-tung och Pythons GIL gör att trådar inte hjälper - med
+   processer används alla kärnor.
+3. SPARA: Metadata och kopplingar sparas med en sats vardera (BildRepository).
+
+LAGRING (innehållsadresserad):
+    instance/bilder/20/208d88.../original.jpg
+    instance/bilder/20/208d88.../liten.jpg
+    instance/bilder/20/208d88.../mellan.jpg
+Eftersom sökvägen bestäms av innehållet ändras en fil ALDRIG. Därför kan webbläsare och
+CDN:er cacha bilderna för alltid ('Cache-Control: immutable'), och ingen bild skalas
+någonsin om medan en besökare väntar.
+"""
+import hashlib
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import current_app
+
+from dbrepositories.bild_repository import bild_repo
+from dbrepositories.bostad_repository import bostad_repo
+
+# Storlekar som skapas: namn -> största bredd/höjd i pixlar
+STORLEKAR = {
+    'liten': 400,    # Bostadskort i listan
+    'mellan': 1200,  # Detaljsidan
+}
+
+# Giltig hash (64 hex-tecken) - används för att validera URL:er innan filsystemet rörs
+HASH_TECKEN = frozenset('0123456789abcdef')
+
+JPEG_KVALITET = 82
+
+# Filer som räknas som bilder när en hel katalog läses in
+BILDANDELSER = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
+
+
+def bildkatalog():
+    """Roten för bildlagringen (instance/bilder)."""
+    return os.path.join(current_app.instance_path, 'bilder')
+
+
+def katalog_for(rot, bild_hash):
+    """Katalogen där en bilds alla storlekar ligger: <rot>/<hash[:2]>/<hash>."""
+    return os.path.join(rot, bild_hash[:2], bild_hash)
+
+
+def ar_giltig_hash(text):
+    """True om texten ser ut som en SHA-256-hash ('..' och liknande släpps aldrig igenom)."""
+    return len(text) == 64 and set(text) <= HASH_TECKEN
+
+
+def hasha_fil(sokvag):
+    """SHA-256 av filens innehåll, läst i bitar (stora filer läses aldrig in helt)."""
+    summa = hashlib.sha256()
+    with open(sokvag, 'rb') as fil:
+        for bit in iter(lambda: fil.read(1024 * 1024), b''):
+            summa.update(bit)
+    return summa.hexdigest()
+
+
+def _spara_atomiskt(bild, sokvag, **installningar):
+    """Sparar via en temporär fil och byter namn - ingen kan läsa en halvskriven bild."""
+    tillfallig = sokvag + '.tmp'
+    bild.save(tillfallig, format='JPEG', **installningar)
+    os.replace(tillfallig, sokvag)
+
+
+def skapa_storlekar(kalla, katalog):
+    """
+    Skapar original.jpg och alla STORLEKAR från en bildfil.
+    Körs i en ARBETSPROCESS - funktionen får därför bara använda sina argument.
+
+    Returns:
+        tuple: (bredd, höjd) för originalet.
+    """
+    from PIL import Image, ImageOps
+
+    os.makedirs(katalog, exist_ok=True)
+    with Image.open(kalla) as bild:
+        # Vrid enligt kamerans EXIF-information och gör om till RGB (JPEG har ingen genomskinlighet)
+        bild = ImageOps.exif_transpose(bild).convert('RGB')
+        bredd, hojd = bild.size
+        _spara_atomiskt(bild, os.path.join(katalog, 'original.jpg'), quality=90, optimize=True)
+        for namn, max_storlek in STORLEKAR.items():
+            kopia = bild.copy()
+            kopia.thumbnail((max_storlek, max_storlek), Image.LANCZOS)
+            _spara_atomiskt(kopia, os.path.join(katalog, f'{namn}.jpg'),
+                            quality=JPEG_KVALITET, optimize=True, progressive=True)
+    return bredd, hojd
+
+
+def importera_bilder(filer, arbetare=None, framsteg=None):
+    """
+    Läser in bildfiler och kopplar dem till bostäder.
+
+    Args:
+        filer (list): Tupler (bostad_id, sökväg) i den ordning bilderna ska visas.
+        arbetare (int): Antal processer för skalningen. Standard: app.config['BILD_ARBETARE'].
+        framsteg (callable): Anropas med (klara, totalt) medan bilderna skalas.
+
+    Returns:
+        dict: {'nya': antal, 'dubbletter': antal, 'fel': [(sökväg, meddelande), ...]}
+    """
+    rapport = {'nya': 0, 'dubbletter': 0, 'fel': []}
+    rot = bildkatalog()
+
+    # 1. Hasha alla filer och ta reda på vilka som redan finns
+    hashade = []
+    for bostad_id, sokvag in filer:
+        try:
+            hashade.append((bostad_id, sokvag, hasha_fil(sokvag)))
+        except OSError as fel:
+            rapport['fel'].append((sokvag, str(fel)))
+    befintliga = bild_repo.hamta_befintliga({bild_hash for _, _, bild_hash in hashade})
+
+    # En fil per NY hash (samma bild två gånger i samma körning bearbetas bara en gång)
+    nya = {}
+    for _, sokvag, bild_hash in hashade:
+        if bild_hash not in befintliga and bild_hash not in nya:
+            nya[bild_hash] = sokvag
+    rapport['dubbletter'] = len(hashade) - len(nya)
+
+    # 2. Skala alla nya bilder parallellt i en processpool
+    metadata = []
+    if nya:
+        arbetare = arbetare or current_app.config.get('BILD_ARBETARE') or os.cpu_count()
+        with ProcessPoolExecutor(max_workers=min(arbetare, len(nya))) as pool:
+            jobb = {bild_hash: pool.submit(skapa_storlekar, sokvag, katalog_for(rot, bild_hash))
+                    for bild_hash, sokvag in nya.items()}
+            for klara, (bild_hash, framtid) in enumerate(jobb.items(), start=1):
+                if framsteg:
+                    framsteg(klara, len(jobb))
+                try:
+                    bredd, hojd = framtid.result()
+                except Exception as fel:   # T.ex. en trasig fil eller något som inte är en bild
+                    rapport['fel'].append((nya[bild_hash], f'Kunde inte läsa bilden: {fel}'))
+                    shutil.rmtree(katalog_for(rot, bild_hash), ignore_errors=True)
+                    continue
+                metadata.append({'hash': bild_hash, 'bredd': bredd, 'hojd': hojd,
+                                 'storlek_bytes': os.path.getsize(nya[bild_hash])})
+        rapport['nya'] = len(metadata)
+
+    # 3. Spara metadata och koppla bilderna till bostäderna
+    befintliga.update(bild_repo.spara_bilder(metadata))
+    saknas = bild_repo.koppla([(bostad_id, befintliga[bild_hash]) for bostad_id, _, bild_hash in hashade
+                               if bild_hash in befintliga])
+    rapport['fel'].extend((sokvag, f'Bostad {bostad_id} finns inte - bilden kopplades inte')
+                          for bostad_id, sokvag, _ in hashade if bostad_id in saknas)
+    return rapport
+
+
+def filer_i_katalog(katalog):
+    """
+    Hittar bildfiler i en katalog med en underkatalog per bostad:
+        katalog/12/framsida.jpg, katalog/12/kok.jpg, katalog/15/...
+
+    Returns:
+        list: Tupler (bostad_id, sökväg), sorterade på filnamn inom varje bostad.
+    """
+    filer = []
+    for namn in sorted(os.listdir(katalog)):
+        underkatalog = os.path.join(katalog, namn)
+        if not (namn.isdigit() and os.path.isdir(underkatalog)):
+            continue
+        for filnamn in sorted(os.listdir(underkatalog)):
+            if filnamn.lower().endswith(BILDANDELSER):
+                filer.append((int(namn), os.path.join(underkatalog, filnamn)))
+    return filer
+
+
+def bostad_andrad(operation, fore, efter):
+    """
+    Lyssnare på BostadRepository: en raderad bostad ska inte lämna kvar kopplingar.
+    En ARKIVERAD bostad behåller sina bilder - den finns kvar i historiken.
+    """
+    if operation == 'radera':
+        bild_repo.radera_kopplingar_for_bostad(fore['id'])
+
+
+def init_bilder(app):
+    """Kopplar bildernas lyssnare till BostadRepository."""
+    if bostad_andrad not in bostad_repo.lyssnare:
+        bostad_repo.registrera_lyssnare(bostad_andrad)
@@ -0,0 +1,201 @@
+# tjanster/bulkimport.py
+"""
+📦 BULKIMPORT - Läser in tusentals bostäder från en CSV- eller JSON-fil på en gång.
+
+Används av admin-sidan /admin/import när en byrås hela bestånd ska flyttas in.
+
+STRÖMMANDE LÄSNING: Filen läses rad för rad (CSV, JSON Lines) eller objekt för objekt
+(JSON-array), så hela filen behöver aldrig ligga i minnet som Python-objekt.
+
+Stödda format:
+- CSV med rubrikrad: adress;stad;pris;rum;yta;beskrivning[;id]   (semikolon eller komma)
+- JSON-array:        [{"adress": ..., "stad": ..., ...}, ...]
+- JSON Lines:        ett JSON-objekt per rad (.jsonl)
+
+Varje rad valideras med samma regler som admin-formuläret (tjanster/validering.py).
+Felaktiga rader hoppar vi över och rapporterar med radnummer; de giltiga sparas i
+DELAR om RADER_PER_TRANSAKTION i egna transaktioner. Rader MED id uppdaterar en
+befintlig bostad, rader UTAN id skapar en ny.
+
+DUBBLETTER: En ny rad som är samma bostad som en befintlig (eller som en tidigare rad i
+filen) hoppas över och rapporteras, se tjanster/dubbletter.py. Med
+IMPORT_HOPPA_OVER_DUBBLETTER = False sparas den ändå, men rapporteras fortfarande.
+"""
+import csv
+import io
+import json
+
+from flask import current_app
+
+from dbrepositories.bostad_repository import bostad_repo
+from tjanster.dubbletter import bygg_dubblettindex, skapa_post
+from tjanster.geokodning import koordinater_for, koordinater_vid_andring
+from tjanster.validering import validera_rad
+
+RADER_PER_TRANSAKTION = 500
+
+# Hur mycket av filen som läses åt gången vid JSON-tolkning
+LASSTORLEK = 64 * 1024
+
+# Max antal felrader som sparas i rapporten (resten räknas bara)
+MAX_RAPPORTERADE_FEL = 200
+
+
+def _las_csv(text):
+    """Generator: (radnummer, dict) för varje rad i en CSV-fil. Avgränsaren gissas från rubrikraden."""
+    rubrik = text.readline()
+    avgransare = ';' if rubrik.count(';') >= rubrik.count(',') else ','
+    falt = [namn.strip().lower() for namn in next(csv.reader([rubrik], delimiter=avgransare))]
+    for radnummer, rad in enumerate(csv.reader(text, delimiter=avgransare), start=2):
+        if any(varde.strip() for varde in rad):
+            yield radnummer, dict(zip(falt, rad))
+
+
+def _las_json(text):
+    """
+    Generator: (objektnummer, objekt) för varje objekt i en JSON-array ELLER en JSON Lines-fil,
+    utan att läsa hela filen.
+
+    json.JSONDecoder.raw_decode() tolkar ETT värde i början av en sträng och berättar var det
+    slutade. Vi läser filen i bitar och avkodar ett objekt i taget ur bufferten. Mellan
+    objekten hoppar vi över blanktecken och kommatecken, så samma kod klarar både
+    [{...}, {...}] och ett objekt per rad.
+    """
+    avkodare = json.JSONDecoder()
+    buffert = text.read(LASSTORLEK).lstrip()
+    if buffert.startswith('['):
+        buffert = buffert[1:]
+    nummer = 0
+    filslut = False
+
+    while True:
+        buffert = buffert.lstrip().lstrip(',').lstrip()
+        if buffert.startswith(']'):
+            return
+        if not buffert:
+            if filslut:
+                return
+            buffert = text.read(LASSTORLEK)
+            filslut = not buffert
+            continue
+        try:
+            objekt, slut = avkodare.raw_decode(buffert)
+        except json.JSONDecodeError:
+            # Objektet är inte komplett i bufferten än - läs mer (eller ge upp vid filslut)
+            if filslut:
+                raise ValueError(f'Ogiltig JSON efter objekt nummer {nummer}')
+            mer = text.read(LASSTORLEK)
+            filslut = not mer
+            buffert += mer
+            continue
+        nummer += 1
+        yield nummer, objekt
+        buffert = buffert[slut:]
+
+
+def las_rader(strom, filnamn):
+    """
+    Väljer tolk utifrån filändelsen och returnerar en generator med (radnummer, rad).
+
+    Args:
+        strom: En binär filström, t.ex. request.files['fil'].stream.
+        filnamn (str): Filens namn, t.ex. 'bestand.csv', 'bestand.json' eller 'bestand.jsonl'.
+    """
+    # utf-8-sig tar bort en eventuell BOM som Excel lägger i början av CSV-filer
+    text = io.TextIOWrapper(strom, encoding='utf-8-sig', newline='')
+    if (filnamn or '').lower().endswith(('.json', '.jsonl', '.ndjson')):
+        return _las_json(text)
+    return _las_csv(text)
+
+
+def importera_fil(strom, filnamn, framsteg=None):
+    """
+    Läser, validerar och sparar alla rader i en fil.
+
+    Args:
+        framsteg (callable): Anropas med rapporten hittills efter varje sparad del (t.ex. av jobbkön).
+
+    Returns:
+        dict: {'rader': antal lästa, 'skapade': antal, 'uppdaterade': antal,
+               'antal_fel': antal, 'fel': [(radnummer, meddelande), ...],
+               'antal_dubbletter': antal, 'dubbletter': [(radnummer, bostad_id, likhet), ...]}
+               Ett negativt bostad_id i 'dubbletter' är en tidigare rad i filen (-radnummer).
+    """
+    rapport = {'rader': 0, 'skapade': 0, 'uppdaterade': 0, 'antal_fel': 0, 'fel': [],
+               'antal_dubbletter': 0, 'dubbletter': []}
+    nya, andrade = [], []
+    # Byggs först när filen innehåller en ny bostad (en fil med bara uppdateringar behöver det inte)
+    dubblettindex = None
+    hoppa_over_dubbletter = current_app.config.get('IMPORT_HOPPA_OVER_DUBBLETTER', True)
+
+    def rapportera_fel(radnummer, meddelande):
+        rapport['antal_fel'] += 1
+        if len(rapport['fel']) < MAX_RAPPORTERADE_FEL:
+            rapport['fel'].append((radnummer, meddelande))
+
+    def spara_del():
+        if nya:
+            rapport['skapade'] += len(bostad_repo.skapa_flera(nya))
+            nya.clear()
+        if andrade:
+            # Koordinater slås bara upp för ändrade adresser (se koordinater_vid_andring)
+            befintliga = {bostad.id: bostad for bostad in
+                          bostad_repo.hamta_flera([data['id'] for data in andrade], som_dto=True)}
+            for data in andrade:
+                if 'lat' not in data:
+                    data.update(koordinater_vid_andring(data, befintliga.get(data['id'])))
+            uppdaterade = bostad_repo.uppdatera_flera(andrade)
+            for data in andrade:
+                if data['id'] not in uppdaterade:
+                    rapportera_fel(data['_radnummer'], f"Bostad med id {data['id']} finns inte")
+            rapport['uppdaterade'] += len(uppdaterade)
+            andrade.clear()
+        if framsteg:
+            framsteg(rapport)
+
+    try:
+        for radnummer, rad in las_rader(strom, filnamn):
+            rapport['rader'] += 1
+            if not isinstance(rad, dict):
+                rapportera_fel(radnummer, 'Raden är inte ett objekt')
+                continue
+            data, fel = validera_rad(rad)
+            if fel:
+                rapportera_fel(radnummer, fel)
+                continue
+
+            # Samma som admin-formuläret: koordinater slås upp lokalt om de saknas
+            # (för en ändrad bostad först i spara_del, när de sparade värdena är lästa)
+            if rad.get('lat') not in (None, '') and rad.get('lon') not in (None, ''):
+                try:
+                    data['lat'], data['lon'] = float(rad['lat']), float(rad['lon'])
+                except (TypeError, ValueError):
+                    rapportera_fel(radnummer, 'Lat och lon måste vara tal')
+                    continue
+            elif 'id' not in data:
+                data.update(koordinater_for(data['adress'], data['stad']))
+
+            if 'id' in data:
+                data['_radnummer'] = radnummer
+                andrade.append(data)
+            else:
+                if dubblettindex is None:
+                    dubblettindex = bygg_dubblettindex()
+                post = skapa_post(-radnummer, data)
+                traffar = dubblettindex.hitta(post)
+                if traffar:
+                    rapport['antal_dubbletter'] += 1
+                    if len(rapport['dubbletter']) < MAX_RAPPORTERADE_FEL:
+                        rapport['dubbletter'].append((radnummer, traffar[0]['annan_id'], traffar[0]['likhet']))
+                    if hoppa_over_dubbletter:
+                        continue
+                dubblettindex.lagg_till(post)
+                nya.append(data)
+            if len(nya) + len(andrade) >= RADER_PER_TRANSAKTION:
+                spara_del()
+    except (ValueError, UnicodeDecodeError, csv.Error) as fel:
+        # Filen går inte att tolka vidare - det som redan sparats ligger kvar
+        rapportera_fel(rapport['rader'] + 1, f'Filen kunde inte läsas vidare: {fel}')
+
+    spara_del()
+    return rapport
@@ -0,0 +1,261 @@
+# tjanster/dubbletter.py
+"""
+👯 DUBBLETTER - Hittar bostäder som finns två gånger (omlistade, eller via en annan byrå).
+
+PROBLEMET: Samma bostad kommer ofta in igen med en lite annan adress ('Storg. 15 A, lgh 1102'
+istället för 'Storgatan 15A') och en omskriven beskrivning. Att jämföra varje bostad med
+alla andra är O(n²) - 100 000 bostäder blir 5 miljarder jämförelser.
+
+LÖSNINGEN: Bara KANDIDATER jämförs. En bostad blir kandidat till en annan om de
+1. har samma NORMALISERADE adress i samma stad,
+2. ligger i samma eller en angränsande ruta (ca 200 m) och har lika många rum, eller
+3. hamnar i samma LSH-hink för beskrivningen:
+   - Beskrivningen delas i SHINGLAR (alla följder av tre ord).
+   - MINHASH: för var och en av ANTAL_HASHAR hashfunktioner sparas den minsta hashen
+     bland shinglarna. Andelen lika värden i två signaturer är en skattning av
+     Jaccard-likheten mellan texterna (andelen gemensamma shinglar).
+   - LSH: signaturen delas i BAND om RADER_PER_BAND värden. Texter som är lika i minst
+     ETT band hamnar i samma hink. Lika texter krockar nästan alltid, olika nästan aldrig.
+Varje bostad jämförs alltså bara med de få i sina hinkar - totalt nära O(n).
+
+Kandidaterna kontrolleras sedan med jamfor(): likhet, avstånd, rum och yta. Lika text räcker
+aldrig ensam - en byrås standardbeskrivning kan stå på många olika bostäder.
+
+Används av importerna (nya rader som redan finns hoppas över) och av jobbet
+'hitta-dubbletter', vars rapport visas på /admin/dubbletter. Exemplen i jamfor() körs med:
+
+    python -c "import doctest, tjanster.dubbletter as d; doctest.testmod(d, verbose=False)"
+"""
+import math
+import re
+import unicodedata
+import zlib
+from collections import defaultdict, namedtuple
+from itertools import combinations
+
+import numpy as np
+
+from dbrepositories.bostad_repository import bostad_repo
+from tjanster.geokodning import normalisera_ort
+
+# 21 band à 3 värden: texter med likhet 0.5 blir kandidater med 94 % sannolikhet, 0.2 med 15 %
+BAND = 21
+RADER_PER_BAND = 3
+ANTAL_HASHAR = BAND * RADER_PER_BAND
+
+ORD_PER_SHINGEL = 3
+
+# Gränser i jamfor()
+MIN_LIKHET = 0.5            # Beskrivningarna är lika nog, om inte rum/yta eller adressen talar emot
+MIN_LIKHET_MED_FAKTA = 0.2  # ... om både rum och yta stämmer
+MAX_AVSTAND_M = 150         # Längre isär än så kan det inte vara samma bostad
+MAX_YTSKILLNAD = 2          # Kvadratmeter (boarea anges olika av olika byråer)
+
+# Rutnätet för "ligger nära": ca 220 m i nord-sydlig led
+RUTSTORLEK_GRADER = 0.002
+
+# En hink med fler bostäder än så (t.ex. en byrås standardtext, eller alla bostäder som fått
+# ortens mittpunkt som koordinat) jämförs inte par för par - det skulle bli kvadratiskt igen
+MAX_HINK = 100
+
+# Max antal par i jobbet 'hitta-dubbletter':s rapport
+MAX_PAR = 500
+
+# Primtal för de universella hashfunktionerna h(x) = (a*x + b) mod P. a*x < 2^62 ryms i uint64.
+PRIMTAL = (1 << 31) - 1
+_slump = np.random.default_rng(20240601)   # Fast frö: samma signaturer i alla processer
+_A = _slump.integers(1, PRIMTAL, ANTAL_HASHAR, dtype=np.uint64)
+_B = _slump.integers(0, PRIMTAL, ANTAL_HASHAR, dtype=np.uint64)
+
+# Förkortade gatunamn: 'storg.' -> 'storgatan', 'sjöv.' -> 'sjövägen'
+FORKORTNINGAR = {'g': 'gatan', 'v': 'vägen', 'vg': 'vägen', 'gr': 'gränd', 'pl': 'platsen'}
+FORKORTNING_MONSTER = re.compile(r'\b(\w+?)(vg|gr|pl|g|v)\.(?=\s|\d|$)')
+# Sådant som skiljer lägenheter åt i samma hus men inte hör till gatuadressen
+LAGENHET_MONSTER = re.compile(r'\b(lgh|lägenhet|lägenhetsnr|nr)\.?\s*\d+\b|\bvån(ing)?\.?\s*\d+(/\d+)?\b'
+                              r'|\b\d+\s*(tr|trappor)\b|\bnb\b|\bbv\b')
+
+# Det som sparas per bostad i indexet
+Post = namedtuple('Post', ['id', 'adress', 'stad', 'rum', 'yta', 'lat', 'lon', 'signatur'])
+
+
+def normalisera_adress(adress):
+    """
+    Gör en svensk gatuadress jämförbar:
+    'Storg. 15 A, lgh 1102' -> 'storgatan 15a', 'STORGATAN 15A' -> 'storgatan 15a'.
+    """
+    adress = unicodedata.normalize('NFC', adress or '').casefold()
+    adress = LAGENHET_MONSTER.sub(' ', adress)
+    adress = FORKORTNING_MONSTER.sub(lambda traff: traff.group(1) + FORKORTNINGAR[traff.group(2)] + ' ', adress)
+    adress = re.sub(r'[^\w\s]', ' ', adress)
+    adress = re.sub(r'\b(\w+)(gata|väg)\b', lambda traff: traff.group(1) + traff.group(2) + 'n', adress)
+    adress = re.sub(r'(\d+)\s+([a-zåäö])\b', r'\1\2', adress)     # '15 a' -> '15a'
+    return ' '.join(adress.split())
+
+
+def shinglar(text):
+    """Alla följder av ORD_PER_SHINGEL ord i texten, som 32-bitars hashar."""
+    ord_ = re.findall(r'\w+', unicodedata.normalize('NFC', text or '').casefold())
+    return {zlib.crc32(' '.join(ord_[i:i + ORD_PER_SHINGEL]).encode())
+            for i in range(len(ord_) - ORD_PER_SHINGEL + 1)}
+
+
+def minhash(hashar):
+    """
+    MinHash-signaturen: den minsta hashen per hashfunktion, beräknad för alla shinglar
+    och alla funktioner på en gång (en matris shinglar x ANTAL_HASHAR).
+
+    Returns:
+        np.ndarray: ANTAL_HASHAR värden, eller None om texten är för kort.
+    """
+    if not hashar:
+        return None
+    x = np.fromiter(hashar, dtype=np.uint64, count=len(hashar))[:, None] % PRIMTAL
+    return ((_A * x + _B) % PRIMTAL).min(axis=0)
+
+
+def avstand_m(lat1, lon1, lat2, lon2):
+    """Avståndet i meter mellan två koordinater (haversine)."""
+    fi1, fi2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((fi2 - fi1) / 2) ** 2 + math.cos(fi1) * math.cos(fi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * 6371000 * math.asin(math.sqrt(a))
+
+
+def skapa_post(bostad_id, data):
+    """En Post av en bostad (dict med adress, stad, rum, yta, beskrivning, lat, lon)."""
+    return Post(bostad_id, normalisera_adress(data['adress']), normalisera_ort(data['stad']),
+                data['rum'], data['yta'], data.get('lat'), data.get('lon'),
+                minhash(shinglar(data.get('beskrivning'))))
+
+
+def jamfor(a, b):
+    """
+    Är a och b samma bostad?
+
+    Fakta som motsäger varandra gör dem ALDRIG till dubbletter, hur lika beskrivningarna
+    än är: olika adress och olika rum eller yta, eller samma adress (t.ex. två lägenheter
+    i samma hus) men både olika rum och olika yta.
+
+    >>> mall = 'Välkommen till en ljus och trivsam bostad med närhet till både natur och centrum.'
+    >>> etta = skapa_post(1, {'adress': 'Åsgatan 3', 'stad': 'Falun', 'rum': 1, 'yta': 40, 'beskrivning': mall})
+    >>> fyra = skapa_post(2, {'adress': 'Ringvägen 8', 'stad': 'Falun', 'rum': 4, 'yta': 95, 'beskrivning': mall})
+    >>> jamfor(etta, fyra) is None
+    True
+    >>> omlistad = skapa_post(3, {'adress': 'Åsg. 3', 'stad': 'Falun', 'rum': 1, 'yta': 41, 'beskrivning': mall})
+    >>> jamfor(etta, omlistad)['samma_adress']
+    True
+
+    Returns:
+        dict: {'id', 'annan_id', 'likhet', 'avstand_m', 'samma_adress'} om de är dubbletter, annars None.
+    """
+    avstand = None
+    if None not in (a.lat, a.lon, b.lat, b.lon):
+        avstand = avstand_m(a.lat, a.lon, b.lat, b.lon)
+        if avstand > MAX_AVSTAND_M:
+            return None
+    samma_adress = a.stad == b.stad and a.adress == b.adress
+    samma_rum = a.rum == b.rum
+    samma_yta = abs(a.yta - b.yta) <= MAX_YTSKILLNAD
+    lika_fakta = samma_rum and samma_yta
+    if not lika_fakta and not (samma_adress and (samma_rum or samma_yta)):
+        return None
+
+    likhet = float(np.mean(a.signatur == b.signatur)) if a.signatur is not None and b.signatur is not None else 0.0
+    if likhet >= MIN_LIKHET or (lika_fakta and (samma_adress or likhet >= MIN_LIKHET_MED_FAKTA)):
+        return {'id': a.id, 'annan_id': b.id, 'likhet': round(likhet, 2),
+                'avstand_m': None if avstand is None else round(avstand), 'samma_adress': samma_adress}
+    return None
+
+
+class Dubblettindex:
+    """
+    Hinkar för de tre sorternas kandidater (adress, ruta + rum, LSH-band), i minnet.
+    Inte trådsäkert - byggs av den som behöver det (en import, ett jobb).
+    """
+
+    def __init__(self):
+        self.poster = {}
+        self._hinkar = defaultdict(list)
+
+    def __len__(self):
+        return len(self.poster)
+
+    def _nycklar(self, post):
+        yield ('adress', post.stad, post.adress)
+        if post.lat is not None and post.lon is not None:
+            yield ('ruta', int(post.lat // RUTSTORLEK_GRADER), int(post.lon // RUTSTORLEK_GRADER), post.rum)
+        if post.signatur is not None:
+            for band in range(BAND):
+                yield ('band', band, post.signatur[band * RADER_PER_BAND:(band + 1) * RADER_PER_BAND].tobytes())
+
+    def _grannycklar(self, post):
+        """Som _nycklar(), men med alla nio rutor runt bostaden (den kan ligga nära en rutkant)."""
+        for nyckel in self._nycklar(post):
+            if nyckel[0] != 'ruta':
+                yield nyckel
+                continue
+            _, rad, kolumn, rum = nyckel
+            for drad in (-1, 0, 1):
+                for dkolumn in (-1, 0, 1):
+                    yield ('ruta', rad + drad, kolumn + dkolumn, rum)
+
+    def lagg_till(self, post):
+        self.poster[post.id] = post
+        for nyckel in self._nycklar(post):
+            self._hinkar[nyckel].append(post.id)
+
+    def hitta(self, post):
+        """
+        Bostäderna i indexet som är dubbletter av 'post', mest lika först.
+
+        Returns:
+            list: Dictionaries från jamfor().
+        """
+        kandidater = set()
+        for nyckel in self._grannycklar(post):
+            hink = self._hinkar.get(nyckel, ())
+            if len(hink) <= MAX_HINK:
+                kandidater.update(hink)
+        kandidater.discard(post.id)
+        traffar = filter(None, (jamfor(post, self.poster[kandidat]) for kandidat in kandidater))
+        return sorted(traffar, key=lambda traff: (traff['samma_adress'], traff['likhet']), reverse=True)
+
+    def alla_par(self):
+        """
+        Alla dubblettpar i indexet. Bara bostäder som delar en hink jämförs.
+
+        Returns:
+            list: Dictionaries från jamfor() med id < annan_id, mest lika först.
+        """
+        par = set()
+        for nyckel, hink in self._hinkar.items():
+            if len(hink) > MAX_HINK:
+                continue
+            if nyckel[0] == 'ruta':
+                # Grannrutorna räknas från den ena sidan; den andra ligger i hinken (rad+1, ...) osv.
+                _, rad, kolumn, rum = nyckel
+                for drad, dkolumn in ((0, 1), (1, -1), (1, 0), (1, 1)):
+                    granne = self._hinkar.get(('ruta', rad + drad, kolumn + dkolumn, rum), ())
+                    if len(granne) <= MAX_HINK:
+                        par.update((min(a, b), max(a, b)) for a in hink for b in granne if a != b)
+            par.update(combinations(sorted(hink), 2))
+        traffar = filter(None, (jamfor(self.poster[a], self.poster[b]) for a, b in par))
+        return sorted(traffar, key=lambda traff: (traff['samma_adress'], traff['likhet']), reverse=True)
+
+
+def bygg_dubblettindex(framsteg=None):
+    """
+    Lägger ALLA aktuella bostäder i ett nytt Dubblettindex (del för del, se strom_i_delar).
+    Varje del är en egen kort fråga, så framsteg() kan skriva till databasen mellan delarna.
+
+    Args:
+        framsteg (callable): Anropas med antalet bostäder hittills efter varje del.
+    """
+    index = Dubblettindex()
+    for del_ in bostad_repo.strom_i_delar(som_dto=True):
+        for bostad in del_:
+            index.lagg_till(skapa_post(bostad.id, {
+                'adress': bostad.adress, 'stad': bostad.stad, 'rum': bostad.rum, 'yta': bostad.yta,
+                'beskrivning': bostad.beskrivning, 'lat': bostad.lat, 'lon': bostad.lon}))
+        if framsteg:
+            framsteg(len(index))
+    return index
@@ -0,0 +1,266 @@
+# tjanster/export.py
+"""
+📊 EXPORT - Ögonblicksbilder av databasen i kolumnformat (Parquet eller Arrow) för analys.
+
+PROBLEMET: Analytikerna kopierar blgeestates.db och kör egna frågor mot kopian. Medan
+kopian tas (och om någon frågar direkt mot filen) låses produktionsdatabasen för skrivning.
+
+LÖSNINGEN: Ett terminalkommando som läser tabellerna i små DELAR och skriver dem till
+kolumnfiler som kan öppnas direkt i pandas, polars, DuckDB, Power BI ...
+
+    flask --app flask_app exportera                  # full ögonblicksbild
+    flask --app flask_app exportera --inkrementell   # bara ändrat sedan förra exporten
+
+DELVIS LÄSNING (konstant minne, inga långa lås):
+Varje del hämtas i en EGEN kort transaktion med "keyset pagination":
+    SELECT ... WHERE id > <senaste id> ORDER BY id LIMIT 5000
+Mellan delarna släpps läslåset, så appen kan skriva som vanligt under exporten.
+Varje del skrivs direkt till filen (en "row group" i Parquet) och glöms sedan bort.
+
+TYPADE KOLUMNER:
+Kolumntyperna tas från modellerna (Integer -> int64, DateTime -> timestamp ...).
+Bostäder får dessutom härledda kolumner: pris_kr (priset som heltal) och kr_per_kvm.
+
+INKREMENTELL EXPORT:
+Tabellerna har ingen "ändrad"-kolumn. Istället sparas ett FINGERAVTRYCK (hash av alla
+kolumnvärden) per rad i instance/export/tillstand.db vid varje export. Nästa gång
+jämförs varje del mot fingeravtrycken: nya och ändrade rader exporteras, och id:n som
+inte längre finns skrivs till <tabell>.raderade.parquet.
+Fingeravtrycken läses också i delar (per id-intervall), så minnet förblir konstant.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import uuid
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from flask import current_app
+from sqlalchemy import Boolean, DateTime, Float, Integer, select
+
+from database import db
+from models.bostad import Bostad
+from models.bostad_arkiv import BostadArkiv
+from models.kommentar import Kommentar
+from models.kontor import Kontor
+from models.maklare import Maklare
+from models.nyhet import Nyhet
+from tjanster.pris import pris_till_kronor
+
+# Modellerna som exporteras, i den ordning de skrivs
+EXPORTERADE_MODELLER = [Bostad, BostadArkiv, Maklare, Nyhet, Kommentar, Kontor]
+
+STANDARD_RADER_PER_DEL = 5000
+
+FORMAT = {
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+}
+
+
+def _kr_per_kvm(rad):
+    pris = pris_till_kronor(rad.pris)
+    return round(pris / rad.yta, 1) if pris is not None and rad.yta else None
+
+
+# Extra kolumner som räknas fram per rad: tabell -> [(kolumnnamn, arrow-typ, funktion(rad))]
+_BOSTADSKOLUMNER = [
+    ('pris_kr', pa.int64(), lambda rad: pris_till_kronor(rad.pris)),
+    ('kr_per_kvm', pa.float64(), _kr_per_kvm),
+]
+HARLEDDA_KOLUMNER = {
+    'bostader': _BOSTADSKOLUMNER,
+    'bostader_arkiv': _BOSTADSKOLUMNER,   # Arkiverade bostäder har samma kolumner
+}
+
+
+def _arrow_typ(kolumn):
+    """Översätter en SQLAlchemy-kolumntyp till motsvarande Arrow-typ."""
+    if isinstance(kolumn.type, Boolean):
+        return pa.bool_()
+    if isinstance(kolumn.type, Integer):
+        return pa.int64()
+    if isinstance(kolumn.type, Float):
+        return pa.float64()
+    if isinstance(kolumn.type, DateTime):
+        return pa.timestamp('us')
+    return pa.string()
+
+
+def _schema(tabell):
+    """Arrow-schemat för en tabell: databasens kolumner + de härledda kolumnerna."""
+    falt = [pa.field(kolumn.name, _arrow_typ(kolumn), nullable=kolumn.nullable) for kolumn in tabell.columns]
+    falt += [pa.field(namn, typ) for namn, typ, _ in HARLEDDA_KOLUMNER.get(tabell.name, [])]
+    return pa.schema(falt)
+
+
+def las_i_delar(tabell, rader_per_del=STANDARD_RADER_PER_DEL):
+    """
+    Generator som läser en tabell i delar om högst rader_per_del rader, sorterat på id.
+    Varje del läses i en egen kort transaktion (keyset pagination, inget OFFSET).
+    """
+    senaste_id = None
+    while True:
+        fraga = select(tabell).order_by(tabell.c.id).limit(rader_per_del)
+        if senaste_id is not None:
+            fraga = fraga.where(tabell.c.id > senaste_id)
+        with db.engine.connect() as anslutning:
+            rader = anslutning.execute(fraga).all()
+        if not rader:
+            return
+        yield rader
+        senaste_id = rader[-1].id
+
+
+def _till_arrow(tabell, schema, rader):
+    """Bygger en Arrow-tabell (kolumnvis) av en del rader."""
+    kolumner = {kolumn.name: [getattr(rad, kolumn.name) for rad in rader] for kolumn in tabell.columns}
+    for namn, _, funktion in HARLEDDA_KOLUMNER.get(tabell.name, []):
+        kolumner[namn] = [funktion(rad) for rad in rader]
+    return pa.Table.from_pydict(kolumner, schema=schema)
+
+
+def _fingeravtryck(rad):
+    """64-bitars hash av alla kolumnvärden i raden (får plats i en SQLite INTEGER)."""
+    summa = hashlib.blake2b(repr(tuple(rad)).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(summa, 'big', signed=True)
+
+
+class _Skrivare:
+    """Skriver Arrow-tabeller del för del till en Parquet- eller Arrow-fil."""
+
+    def __init__(self, sokvag, schema, format):
+        if format == 'parquet':
+            self._skrivare = pq.ParquetWriter(sokvag, schema, compression='zstd')
+        else:
+            self._skrivare = pa.ipc.new_file(sokvag, schema)
+
+    def skriv(self, arrow_tabell):
+        if arrow_tabell.num_rows:
+            self._skrivare.write_table(arrow_tabell)
+
+    def stang(self):
+        self._skrivare.close()
+
+
+class _Tillstand:
+    """
+    Fingeravtrycken från förra exporten, i en egen liten SQLite-fil (inte i produktions-DB:n).
+    Ändringarna committas först när hela exporten har lyckats.
+    """
+
+    def __init__(self, sokvag):
+        self.anslutning = sqlite3.connect(sokvag)
+        self.anslutning.execute("""
+            CREATE TABLE IF NOT EXISTS fingeravtryck (
+                tabell  TEXT NOT NULL,
+                id      INTEGER NOT NULL,
+                avtryck INTEGER NOT NULL,
+                korning TEXT NOT NULL,
+                PRIMARY KEY (tabell, id)
+            ) WITHOUT ROWID""")
+
+    def finns(self):
+        """Har någon export gjorts tidigare?"""
+        return self.anslutning.execute('SELECT 1 FROM fingeravtryck LIMIT 1').fetchone() is not None
+
+    def andrade(self, tabell, rader):
+        """Returnerar de rader i delen som är nya eller ändrade sedan förra exporten."""
+        tidigare = dict(self.anslutning.execute(
+            'SELECT id, avtryck FROM fingeravtryck WHERE tabell = ? AND id BETWEEN ? AND ?',
+            (tabell, rader[0].id, rader[-1].id)))
+        return [rad for rad in rader if tidigare.get(rad.id) != _fingeravtryck(rad)]
+
+    def spara(self, tabell, rader, korning):
+        """Sparar fingeravtrycken för en del och markerar raderna som sedda i denna körning."""
+        self.anslutning.executemany(
+            'INSERT OR REPLACE INTO fingeravtryck (tabell, id, avtryck, korning) VALUES (?, ?, ?, ?)',
+            [(tabell, rad.id, _fingeravtryck(rad), korning) for rad in rader])
+
+    def raderade(self, tabell, korning):
+        """Id:n som fanns vid förra exporten men inte sågs nu. Tas bort ur tillståndet."""
+        idn = [rad[0] for rad in self.anslutning.execute(
+            'SELECT id FROM fingeravtryck WHERE tabell = ? AND korning != ? ORDER BY id', (tabell, korning))]
+        self.anslutning.execute('DELETE FROM fingeravtryck WHERE tabell = ? AND korning != ?', (tabell, korning))
+        return idn
+
+    def spara_permanent(self):
+        self.anslutning.commit()
+        self.anslutning.close()
+
+    def avbryt(self):
+        self.anslutning.rollback()
+        self.anslutning.close()
+
+
+def exportera(mal_katalog=None, format='parquet', inkrementell=False, rader_per_del=STANDARD_RADER_PER_DEL,
+              framsteg=None):
+    """
+    Exporterar alla tabeller i EXPORTERADE_MODELLER till en ny katalog.
+
+    Args:
+        mal_katalog (str): Var exporterna sparas. Standard: instance/export.
+        format (str): 'parquet' eller 'arrow' (Arrow IPC / Feather v2).
+        inkrementell (bool): Exportera bara rader som ändrats sedan förra exporten.
+        rader_per_del (int): Hur många rader som läses (och hålls i minnet) åt gången.
+        framsteg (callable): Anropas med (klara, totalt) innan varje tabell exporteras.
+
+    Returns:
+        dict: Manifestet, som också sparas som manifest.json i exportkatalogen.
+    """
+    if format not in FORMAT:
+        raise ValueError(f'Okänt format: {format}')
+
+    mal_katalog = mal_katalog or os.path.join(current_app.instance_path, 'export')
+    os.makedirs(mal_katalog, exist_ok=True)
+    tillstand = _Tillstand(os.path.join(mal_katalog, 'tillstand.db'))
+
+    # Finns ingen tidigare export blir även en "inkrementell" export en full ögonblicksbild
+    inkrementell = inkrementell and tillstand.finns()
+    # Tiden sorterar katalogerna; suffixet skiljer på exporter som startar samma sekund
+    # (det används även som körningens id i tillstandet, så de får inte dela det heller)
+    korning = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    katalog = os.path.join(mal_katalog, korning + ('-inkrementell' if inkrementell else ''))
+    os.makedirs(katalog)
+
+    manifest = {
+        'skapad': datetime.now().isoformat(timespec='seconds'),
+        'typ': 'inkrementell' if inkrementell else 'full',
+        'format': format,
+        'tabeller': {},
+    }
+
+    try:
+        for klara, modell in enumerate(EXPORTERADE_MODELLER):
+            if framsteg:
+                framsteg(klara, len(EXPORTERADE_MODELLER))
+            tabell = modell.__table__
+            schema = _schema(tabell)
+            skrivare = _Skrivare(os.path.join(katalog, tabell.name + FORMAT[format]), schema, format)
+            antal = 0
+            try:
+                for rader in las_i_delar(tabell, rader_per_del):
+                    att_skriva = tillstand.andrade(tabell.name, rader) if inkrementell else rader
+                    skrivare.skriv(_till_arrow(tabell, schema, att_skriva))
+                    tillstand.spara(tabell.name, rader, korning)
+                    antal += len(att_skriva)
+            finally:
+                skrivare.stang()
+
+            raderade = tillstand.raderade(tabell.name, korning)
+            if inkrementell and raderade:
+                pq.write_table(pa.table({'id': pa.array(raderade, pa.int64())}),
+                               os.path.join(katalog, tabell.name + '.raderade.parquet'))
+            manifest['tabeller'][tabell.name] = {'rader': antal, 'raderade': len(raderade) if inkrementell else 0}
+    except Exception:
+        tillstand.avbryt()
+        raise
+
+    with open(os.path.join(katalog, 'manifest.json'), 'w', encoding='utf-8') as fil:
+        json.dump(manifest, fil, ensure_ascii=False, indent=2)
+    tillstand.spara_permanent()
+
+    manifest['katalog'] = katalog
+    return manifest
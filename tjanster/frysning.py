@@ -0,0 +1,193 @@
+# tjanster/frysning.py
+"""
+🧊 FRYSNING - Sparar alla publika sidor som statiska filer, så att en webbserver (nginx)
+eller ett CDN kan skicka dem utan att Flask körs.
+
+    flask --app flask_app frys-sidor            # bara sidor vars data ändrats
+    flask --app flask_app frys-sidor --allt     # alla sidor
+
+HUR: Varje sida hämtas genom Flasks testklient (precis som en besökare, men utan nätverk)
+i flera trådar samtidigt och sparas som <url>/index.html (eller index.json för API:er):
+
+    instance/statisk/index.html
+    instance/statisk/bostader/index.html
+    instance/statisk/bostader/bostad/12/index.html
+    instance/statisk/kontor/api/data/index.json
+
+INKREMENTELLT: Varje sida har en lista med BEROENDEN - de rader den visar, t.ex.
+detaljsidan för bostad 12 beror på bostad 12, dess bilder och de liknande bostäderna.
+Av beroendenas fingeravtryck (hash av kolumnvärdena) och mallarnas innehåll räknas en
+NYCKEL per sida. Bara sidor vars nyckel ändrats sedan förra körningen renderas om, och
+sidor som inte längre finns (t.ex. en raderad bostad) tas bort.
+Startsidan ("populärt just nu") ändras hela tiden och renderas därför alltid.
+
+Sidorna renderas som en utloggad besökare. Inloggning, admin och bevakningar körs
+fortfarande av Flask (se README för ett nginx-exempel).
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from sqlalchemy import select
+
+from database import db
+from models.bild import BostadBild
+from models.bostad import Bostad
+from models.kommentar import Kommentar
+from models.kontor import Kontor
+from models.maklare import Maklare
+from models.nyhet import Nyhet
+from tjanster.rekommendation import ANTAL_LIKNANDE, rekommenderare
+
+# Sätts i WSGI-miljön för frysningens egna anrop, så att t.ex. sidvisningar inte räknas
+FRYSNING_NYCKEL = 'blgee.frysning'
+
+# Tillståndet (nyckel per sida) sparas bredvid sidorna
+TILLSTANDSFIL = '.frysning.json'
+
+STANDARD_TRADAR = 4
+
+
+def _fingeravtryck(varden):
+    return hashlib.blake2b(repr(varden).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _rader_per_id(modell):
+    """id -> fingeravtryck för varje rad i modellens tabell (EN fråga)."""
+    return {rad.id: _fingeravtryck(tuple(rad)) for rad in db.session.execute(select(modell.__table__))}
+
+
+def _tabell(rader):
+    """Ett fingeravtryck för en hel tabell (ändras om någon rad ändras, tillkommer eller tas bort)."""
+    return _fingeravtryck(sorted(rader.items()))
+
+
+def _mallversion():
+    """Fingeravtryck av alla mallar - en ändrad mall (t.ex. base.html) ska synas på alla sidor."""
+    summa = hashlib.blake2b(digest_size=8)
+    for namn in sorted(current_app.jinja_env.list_templates()):
+        kalla = current_app.jinja_env.loader.get_source(current_app.jinja_env, namn)[0]
+        summa.update(namn.encode('utf-8') + kalla.encode('utf-8'))
+    return summa.hexdigest()
+
+
+def planera_sidor():
+    """
+    Listar alla publika sidor och deras beroenden.
+
+    Returns:
+        dict: url -> lista med beroenden (strängar), eller None för sidor som alltid renderas.
+    """
+    bostader = _rader_per_id(Bostad)
+    maklare = _rader_per_id(Maklare)
+    nyheter = _rader_per_id(Nyhet)
+    kommentarer = _rader_per_id(Kommentar)
+    kontor = _rader_per_id(Kontor)
+
+    # Bilderna per bostad (i visningsordning)
+    bilder = {}
+    for koppling in db.session.execute(select(BostadBild.__table__).order_by(BostadBild.bostad_id, BostadBild.ordning)):
+        bilder.setdefault(koppling.bostad_id, []).append(koppling.bild_id)
+
+    sidor = {
+        '/': None,
+        '/bostader/': [_tabell(bostader), _fingeravtryck(sorted(bilder.items()))],
+        '/maklare/': [_tabell(maklare)],
+        '/nyheter/': [_tabell(nyheter), _tabell(kommentarer), _tabell(maklare)],
+        '/kontor/': [],
+        '/kontor/api/data': [_tabell(kontor)],
+    }
+    for bostad_id, avtryck in bostader.items():
+        liknande = rekommenderare.liknande(bostad_id, k=ANTAL_LIKNANDE)
+        sidor[f'/bostader/bostad/{bostad_id}'] = [avtryck, _fingeravtryck(bilder.get(bostad_id))] + \
+                                                 [f'{annan}:{bostader.get(annan)}' for annan in liknande]
+    for maklare_id, avtryck in maklare.items():
+        sidor[f'/maklare/{maklare_id}'] = [avtryck]
+        sidor[f'/maklare/api/v1/maklare/{maklare_id}'] = [avtryck]
+    return sidor
+
+
+def _filnamn(mal_katalog, url, mimetype):
+    """'/bostader/bostad/12' -> <mal>/bostader/bostad/12/index.html"""
+    delar = [del_ for del_ in url.split('/') if del_]
+    namn = 'index.json' if mimetype == 'application/json' else 'index.html'
+    return os.path.join(mal_katalog, *delar, namn)
+
+
+def _las_tillstand(mal_katalog):
+    try:
+        with open(os.path.join(mal_katalog, TILLSTANDSFIL), encoding='utf-8') as fil:
+            return json.load(fil)
+    except (OSError, ValueError):
+        return {}
+
+
+def _spara_atomiskt(sokvag, data):
+    os.makedirs(os.path.dirname(sokvag), exist_ok=True)
+    tillfallig = sokvag + '.tmp'
+    with open(tillfallig, 'wb') as fil:
+        fil.write(data)
+    os.replace(tillfallig, sokvag)
+
+
+def frys_sidor(mal_katalog=None, allt=False, tradar=STANDARD_TRADAR, framsteg=None):
+    """
+    Renderar de publika sidorna till statiska filer.
+
+    Args:
+        mal_katalog (str): Var filerna sparas. Standard: instance/statisk.
+        allt (bool): Rendera alla sidor, även de som inte ändrats.
+        tradar (int): Antal sidor som renderas samtidigt.
+        framsteg (callable): Anropas med (klara, totalt) efter varje renderad sida.
+
+    Returns:
+        dict: {'katalog': ..., 'renderade': antal, 'oforandrade': antal, 'borttagna': antal,
+               'fel': [(url, statuskod), ...]}
+    """
+    app = current_app._get_current_object()
+    mal_katalog = mal_katalog or os.path.join(app.instance_path, 'statisk')
+    tidigare = _las_tillstand(mal_katalog)
+
+    mallar = _mallversion()
+    nycklar = {}
+    for url, beroenden in planera_sidor().items():
+        nycklar[url] = None if beroenden is None else _fingeravtryck([mallar] + beroenden)
+    att_rendera = [url for url, nyckel in nycklar.items()
+                   if allt or nyckel is None or tidigare.get(url, {}).get('nyckel') != nyckel]
+
+    def rendera(url):
+        # En egen testklient per anrop - varje anrop får sitt eget app-context och databassession
+        svar = app.test_client().get(url, environ_base={FRYSNING_NYCKEL: True})
+        return url, svar.status_code, svar.mimetype, svar.get_data()
+
+    rapport = {'katalog': mal_katalog, 'renderade': 0, 'oforandrade': len(nycklar) - len(att_rendera),
+               'borttagna': 0, 'fel': []}
+    tillstand = {url: tidigare[url] for url in nycklar if url in tidigare and url not in att_rendera}
+    with ThreadPoolExecutor(max_workers=tradar) as pool:
+        for klara, (url, status, mimetype, data) in enumerate(pool.map(rendera, att_rendera), start=1):
+            if framsteg:
+                framsteg(klara, len(att_rendera))
+            if status != 200:
+                rapport['fel'].append((url, status))
+                continue
+            sokvag = _filnamn(mal_katalog, url, mimetype)
+            _spara_atomiskt(sokvag, data)
+            tillstand[url] = {'nyckel': nycklar[url], 'fil': os.path.relpath(sokvag, mal_katalog)}
+            rapport['renderade'] += 1
+
+    # Sidor som fanns förra gången men inte längre (t.ex. raderade bostäder)
+    for url in set(tidigare) - set(nycklar):
+        sokvag = os.path.join(mal_katalog, tidigare[url]['fil'])
+        if os.path.exists(sokvag):
+            os.remove(sokvag)
+            try:
+                os.rmdir(os.path.dirname(sokvag))   # Katalogen tas bara bort om den är tom
+            except OSError:
+                pass
+        rapport['borttagna'] += 1
+
+    _spara_atomiskt(os.path.join(mal_katalog, TILLSTANDSFIL),
+                    json.dumps(tillstand, indent=1, sort_keys=True).encode('utf-8'))
+    return rapport
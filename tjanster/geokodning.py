@@ -0,0 +1,285 @@
+# tjanster/geokodning.py
+"""
+🗺️ GEOKODNING - Översätter svenska adresser till koordinater (lat/lon) helt OFFLINE.
+
+SYFTE: Vi får inte anropa externa geokodningstjänster (Google, Nominatim ...).
+Istället läser vi en LOKAL ortsförteckning (gazetteer) över postnummer och orter
+från 'data/postnummer.csv' och slår upp koordinater i den.
+
+HUR DET FUNKAR:
+1. CSV-filen (postnummer;ort;lat;lon) byggs EN gång om till en kompakt binärfil
+   ('instance/postnummer.idx') med sorterade heltalsarrayer.
+2. Binärfilen minnesmappas (mmap). Operativsystemet läser bara in de sidor som
+   faktiskt behövs och alla processer (workers) delar på samma minne.
+3. En uppslagning är en binärsökning (bisect) direkt i den mappade filen,
+   vilket tar några mikrosekunder. Ingen databas och inget nätverk behövs.
+
+UPPSLAGNINGSORDNING för en adress som 'Stora Gatan 1, 791 71 Falun':
+1. Exakt postnummer (79171).
+2. Närmaste postnummer inom samma postnummerområde (de tre första siffrorna).
+3. Ortens mittpunkt (medelvärdet av ortens postnummer), t.ex. 'Falun'.
+
+Vill du ha hela Sverige? Byt ut CSV-filen mot en fullständig förteckning i samma
+format (t.ex. konverterad från GeoNames postnummerdump) så byggs indexet om automatiskt.
+"""
+import bisect
+import csv
+import mmap
+import os
+import re
+import struct
+import threading
+import unicodedata
+from collections import namedtuple
+
+# Sökvägar utgår från projektroten så att det fungerar oavsett varifrån appen startas
+PROJEKTROT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STANDARD_CSV = os.path.join(PROJEKTROT, 'data', 'postnummer.csv')
+STANDARD_INDEX = os.path.join(PROJEKTROT, 'instance', 'postnummer.idx')
+
+# Binärfilens huvud: magiskt värde, antal postnummer, antal orter, storlek på ortnamnsblobben
+MAGI = b'PNR1'
+HUVUD = struct.Struct('<4sIII')
+
+# Svenska postnummer skrivs '791 71' eller '79171'
+POSTNUMMER_MONSTER = re.compile(r'\b(\d{3})\s?(\d{2})\b')
+
+# Resultatet av en uppslagning
+Koordinat = namedtuple('Koordinat', ['lat', 'lon'])
+
+
+def normalisera_ort(ort):
+    """
+    Gör ett ortnamn jämförbart: 'FALUN ' -> 'falun', 'Borlänge kommun' -> 'borlänge'.
+    OBS! å, ä och ö behålls som egna bokstäver (de är inte 'a' och 'o' på svenska).
+    """
+    ort = unicodedata.normalize('NFC', ort or '').strip().casefold()
+    if ort.endswith(' kommun'):
+        ort = ort[:-len(' kommun')]
+    return ort
+
+
+def bygg_index(csv_sokvag=STANDARD_CSV, index_sokvag=STANDARD_INDEX):
+    """
+    Läser CSV-förteckningen och skriver den kompakta binärfilen.
+
+    Filens layout (allt little-endian, 4-byte-justerat):
+        huvud | postnummer int32[n] | lat float32[n] | lon float32[n]
+              | ort-offsets uint32[m+1] | ort-lat float32[m] | ort-lon float32[m] | ortnamn (utf-8)
+
+    Returns:
+        tuple: (antal postnummer, antal orter)
+    """
+    postnummer = {}
+    orter = {}  # normaliserat ortnamn -> [summa lat, summa lon, antal]
+
+    with open(csv_sokvag, encoding='utf-8', newline='') as fil:
+        for rad in csv.DictReader(fil, delimiter=';'):
+            traff = POSTNUMMER_MONSTER.search(rad['postnummer'])
+            if not traff:
+                continue
+            lat, lon = float(rad['lat']), float(rad['lon'])
+            postnummer[int(traff.group(1) + traff.group(2))] = (lat, lon)
+
+            summa = orter.setdefault(normalisera_ort(rad['ort']), [0.0, 0.0, 0])
+            summa[0] += lat
+            summa[1] += lon
+            summa[2] += 1
+
+    nycklar = sorted(postnummer)
+    # Ortnamnen sorteras som UTF-8-bytes, samma ordning som binärsökningen jämför i
+    ortnamn = sorted((namn.encode('utf-8') for namn in orter))
+    blob = b''.join(ortnamn)
+    offsets = [0]
+    for namn in ortnamn:
+        offsets.append(offsets[-1] + len(namn))
+
+    os.makedirs(os.path.dirname(index_sokvag), exist_ok=True)
+    # Skriv till en temporär fil och byt namn sist, så att en läsare aldrig ser en halvfärdig fil
+    temp_sokvag = index_sokvag + '.tmp'
+    with open(temp_sokvag, 'wb') as fil:
+        fil.write(HUVUD.pack(MAGI, len(nycklar), len(ortnamn), len(blob)))
+        fil.write(struct.pack(f'<{len(nycklar)}i', *nycklar))
+        fil.write(struct.pack(f'<{len(nycklar)}f', *(postnummer[n][0] for n in nycklar)))
+        fil.write(struct.pack(f'<{len(nycklar)}f', *(postnummer[n][1] for n in nycklar)))
+        fil.write(struct.pack(f'<{len(offsets)}I', *offsets))
+        medel = [orter[namn.decode('utf-8')] for namn in ortnamn]
+        fil.write(struct.pack(f'<{len(medel)}f', *(s[0] / s[2] for s in medel)))
+        fil.write(struct.pack(f'<{len(medel)}f', *(s[1] / s[2] for s in medel)))
+        fil.write(blob)
+    os.replace(temp_sokvag, index_sokvag)
+
+    return len(nycklar), len(ortnamn)
+
+
+def _array(vy, pos, antal, typ):
+    """Tolkar antal 4-byte-värden från position pos som en array. Returnerar (array, ny position)."""
+    slut = pos + 4 * antal
+    return vy[pos:slut].cast(typ), slut
+
+
+class Geokodare:
+    """
+    Slår upp koordinater i den minnesmappade postnummerfilen.
+    Filen öppnas (och byggs vid behov) först vid den första uppslagningen.
+    """
+
+    def __init__(self, csv_sokvag=STANDARD_CSV, index_sokvag=STANDARD_INDEX):
+        self.csv_sokvag = csv_sokvag
+        self.index_sokvag = index_sokvag
+        self._las = threading.Lock()
+        self._mm = None
+
+    def _oppna(self):
+        """Minnesmappar indexfilen, och bygger om den om CSV-filen är nyare."""
+        if self._mm is not None:
+            return
+        with self._las:
+            if self._mm is not None:
+                return
+            if (not os.path.exists(self.index_sokvag)
+                    or os.path.getmtime(self.index_sokvag) < os.path.getmtime(self.csv_sokvag)):
+                bygg_index(self.csv_sokvag, self.index_sokvag)
+
+            with open(self.index_sokvag, 'rb') as fil:
+                mm = mmap.mmap(fil.fileno(), 0, access=mmap.ACCESS_READ)
+
+            magi, antal, antal_orter, _ = HUVUD.unpack_from(mm, 0)
+            if magi != MAGI:
+                raise ValueError(f'{self.index_sokvag} är ingen postnummerfil')
+
+            # memoryview.cast ger oss "arrayer" direkt ovanpå filen utan att kopiera något
+            vy = memoryview(mm)
+            pos = HUVUD.size
+            self._postnummer, pos = _array(vy, pos, antal, 'i')
+            self._lat, pos = _array(vy, pos, antal, 'f')
+            self._lon, pos = _array(vy, pos, antal, 'f')
+            self._ort_offsets, pos = _array(vy, pos, antal_orter + 1, 'I')
+            self._ort_lat, pos = _array(vy, pos, antal_orter, 'f')
+            self._ort_lon, pos = _array(vy, pos, antal_orter, 'f')
+            self._ort_blob = vy[pos:]
+            self._antal_orter = antal_orter
+            self._mm = mm
+
+    def sla_upp_postnummer(self, postnummer, narmaste=True):
+        """
+        Hämtar koordinaten för ett postnummer (t.ex. 79171).
+
+        Args:
+            postnummer (int): Postnumret som heltal.
+            narmaste (bool): Om postnumret saknas, använd närmaste postnummer
+                             inom samma postnummerområde (samma tre första siffror).
+
+        Returns:
+            Koordinat: (lat, lon), eller None om inget hittades.
+        """
+        self._oppna()
+        nycklar = self._postnummer
+        i = bisect.bisect_left(nycklar, postnummer)
+        if i < len(nycklar) and nycklar[i] == postnummer:
+            return Koordinat(self._lat[i], self._lon[i])
+        if not narmaste:
+            return None
+
+        # Grannarna på båda sidor i den sorterade arrayen, om de ligger i samma område
+        omrade = postnummer // 100
+        kandidater = [j for j in (i - 1, i) if 0 <= j < len(nycklar) and nycklar[j] // 100 == omrade]
+        if not kandidater:
+            return None
+        j = min(kandidater, key=lambda j: abs(nycklar[j] - postnummer))
+        return Koordinat(self._lat[j], self._lon[j])
+
+    def _ortnamn(self, i):
+        """Ortnamn nummer i (som bytes) ur blobben."""
+        return self._ort_blob[self._ort_offsets[i]:self._ort_offsets[i + 1]].tobytes()
+
+    def sla_upp_ort(self, ort):
+        """
+        Hämtar mittpunkten för en ort, t.ex. 'Falun' eller 'Borlänge kommun'.
+
+        Returns:
+            Koordinat: (lat, lon), eller None om orten inte finns i förteckningen.
+        """
+        self._oppna()
+        sokt = normalisera_ort(ort).encode('utf-8')
+        lo, hi = 0, self._antal_orter
+        while lo < hi:
+            mitt = (lo + hi) // 2
+            if self._ortnamn(mitt) < sokt:
+                lo = mitt + 1
+            else:
+                hi = mitt
+        if lo < self._antal_orter and self._ortnamn(lo) == sokt:
+            return Koordinat(self._ort_lat[lo], self._ort_lon[lo])
+        return None
+
+    def geokoda(self, adress, stad=None):
+        """
+        Geokodar en adress: 'Stora Gatan 1, 791 71 Falun' eller ('Storgatan 15A', 'Borlänge').
+
+        Args:
+            adress (str): Gatuadress, gärna med postnummer och ort.
+            stad (str): Valfri ort, används om adressen saknar postnummer.
+
+        Returns:
+            Koordinat: (lat, lon), eller None om varken postnummer eller ort gick att hitta.
+        """
+        adress = adress or ''
+        traff = POSTNUMMER_MONSTER.search(adress)
+        if traff:
+            koordinat = self.sla_upp_postnummer(int(traff.group(1) + traff.group(2)))
+            if koordinat:
+                return koordinat
+            # Orten står oftast direkt efter postnumret: '791 71 Falun'
+            efter = adress[traff.end():].strip(' ,')
+            koordinat = self.sla_upp_ort(efter) if efter else None
+            if koordinat:
+                return koordinat
+
+        if stad:
+            koordinat = self.sla_upp_ort(stad)
+            if koordinat:
+                return koordinat
+
+        # Sista försöket: sista kommaseparerade delen av adressen ('Vasagatan 5, Ludvika')
+        if ',' in adress:
+            return self.sla_upp_ort(adress.rsplit(',', 1)[1])
+        return None
+
+
+def koordinater_for(adress, stad=None):
+    """
+    Bekvämlighetsfunktion för formulär och importer.
+
+    Returns:
+        dict: {'lat': ..., 'lon': ...} - värdena är None om adressen inte kunde geokodas.
+    """
+    koordinat = geokodare.geokoda(adress, stad)
+    if koordinat is None:
+        return {'lat': None, 'lon': None}
+    return {'lat': round(koordinat.lat, 6), 'lon': round(koordinat.lon, 6)}
+
+
+def koordinater_vid_andring(data, bostad=None):
+    """
+    Koordinater för en ny eller ändrad bostad (formulär och importer).
+    En befintlig bostads koordinater (t.ex. exakta från Hemnet) behålls om adressen och staden
+    är oförändrade, och skrivs aldrig över med None om den nya adressen inte kan geokodas.
+
+    Args:
+        data (dict): Bostadens nya värden ('adress' och 'stad').
+        bostad: Den sparade bostaden (Bostad eller BostadDTO), None för en ny bostad.
+
+    Returns:
+        dict: {'lat': ..., 'lon': ...} att uppdatera data med, eller {} om de sparade ska behållas.
+    """
+    if bostad is None:
+        return koordinater_for(data['adress'], data['stad'])
+    if bostad.lat is not None and (data['adress'], data['stad']) == (bostad.adress, bostad.stad):
+        return {}
+    koordinater = koordinater_for(data['adress'], data['stad'])
+    return koordinater if koordinater['lat'] is not None else {}
+
+
+# Skapa EN instans som kan användas överallt (filen mappas bara in en gång per process)
+geokodare = Geokodare()
@@ -0,0 +1,255 @@
+# tjanster/hemnet_import.py
+"""
+📥 HEMNET-IMPORT - Läser in bostäder i bulk från Hemnets 'ListingCard'-JSON (se test.json).
+
+SINGLE RESPONSIBILITY: Denna fil har ENDAST ansvar för att:
+1. Läsa en fil med ett eller flera ListingCard-objekt.
+2. Översätta varje kort till samma dictionary som admin-formuläret ger (adress, stad, pris ...).
+3. Spara bostaden via bostad_repo (vi pratar ALDRIG direkt med databasen här).
+
+Kort som saknar koordinater geokodas offline via tjanster/geokodning.py.
+
+Körs från terminalen:
+    flask --app flask_app importera-hemnet test.json [--bilder <katalog>]
+
+BILDER: Korten pekar ut bilder på Hemnets server (images[].filename, t.ex. '20/8d/208d88....jpg').
+Vi hämtar INGET från nätet - om bilderna redan laddats ner till en lokal katalog med samma
+struktur anger man katalogen, och de filer som finns läses in via tjanster/bilder.py.
+
+VISNINGAR: Kortens 'showings' (t.ex. 'Lör 15 nov kl 12:30') bokas på mäklaren med samma
+namn som 'brokerName' (se tjanster/visningsschema.py). Finns inte mäklaren hos oss, eller
+är mäklaren redan bokad på en annan visning, hoppas visningen över (bostaden sparas ändå).
+"""
+import json
+import os
+import re
+from datetime import date, datetime, timedelta
+
+from dbrepositories.bostad_repository import bostad_repo
+from dbrepositories.maklare_repository import maklare_repo
+from dbrepositories.visning_repository import Visningskonflikt, visning_repo
+from tjanster.autokomplettering import vik
+from tjanster.dubbletter import bygg_dubblettindex, skapa_post
+from tjanster.geokodning import koordinater_for
+from tjanster.visningsschema import STANDARD_LANGD_MINUTER
+
+# Hittar första talet i t.ex. '2 rum', '2,5 rum' eller '59 + 12 m²'
+TAL_MONSTER = re.compile(r'\d+(?:[.,]\d+)?')
+
+# 'Lör 15 nov kl 12:30', 'Idag kl 17:00-17:45', 'Imorgon kl 12.00'
+VISNING_MONSTER = re.compile(
+    r'\b(?:(?P<relativ>idag|imorgon)|(?P<dag>\d{1,2})\s+(?P<manad>[a-zåäö]{3})[a-zåäö]*\.?)'
+    r'\s+kl\.?\s+(?P<start>\d{1,2}[:.]\d{2})(?:\s*[-–]\s*(?P<slut>\d{1,2}[:.]\d{2}))?'
+)
+MANADER = ('jan', 'feb', 'mar', 'apr', 'maj', 'jun', 'jul', 'aug', 'sep', 'okt', 'nov', 'dec')
+
+
+def las_hemnet_kort(sokvag):
+    """
+    Läser en fil med ListingCard-objekt och returnerar dem som en lista med dictionaries.
+
+    Filen får vara:
+    - ett enskilt kort: {"__typename": "ListingCard", ...}
+    - en lista med kort: [{...}, {...}]
+    - en samling nycklade kort: {"ListingCard123": {...}, ...}
+    - ett klipp ur en sådan samling utan omslutande {} (som test.json)
+    """
+    with open(sokvag, encoding='utf-8') as fil:
+        text = fil.read().strip()
+
+    # Ett klipp ur en samling börjar med en nyckel ("ListingCard123": {...}) - lägg till {}
+    if text.startswith('"'):
+        text = '{' + text + '}'
+    data = json.loads(text)
+
+    if isinstance(data, list):
+        return data
+    if data.get('__typename') == 'ListingCard':
+        return [data]
+    return [kort for kort in data.values() if isinstance(kort, dict)]
+
+
+def _forsta_tal(text):
+    """'2,5 rum' -> 2, '59 m²' -> 59, None -> None"""
+    traff = TAL_MONSTER.search(text or '')
+    if not traff:
+        return None
+    return int(float(traff.group().replace(',', '.')))
+
+
+def kort_status(kort):
+    """Kortets flaggor -> bostadens status ('borttagen', 'kommande' eller 'aktiv')."""
+    if kort.get('removedBeforeShowing'):
+        return 'borttagen'
+    if kort.get('upcoming'):
+        return 'kommande'
+    return 'aktiv'
+
+
+def _klockslag(text):
+    """'12:30' eller '12.30' -> timedelta(hours=12, minutes=30). ValueError för t.ex. '25:00'."""
+    tid = datetime.strptime(text.replace('.', ':'), '%H:%M')
+    return timedelta(hours=tid.hour, minutes=tid.minute)
+
+
+def tolka_visning(text, referens):
+    """
+    Tolkar en visningstext från Hemnet.
+
+    Args:
+        text (str): T.ex. 'Lör 15 nov kl 12:30' eller 'Idag kl 17:00-17:45'.
+        referens (datetime): När kortet publicerades. Texten har inget år: en dag som
+            ligger före referensen räknas som nästa år ('3 jan' i ett kort från december).
+
+    Returns:
+        tuple: (start, slut) som datetime, eller None om texten inte går att tolka.
+            Utan sluttid blir visningen STANDARD_LANGD_MINUTER lång.
+    """
+    traff = VISNING_MONSTER.search(vik(text))
+    if not traff:
+        return None
+    try:
+        if traff['relativ']:
+            dag = referens.date() + timedelta(days=1 if traff['relativ'] == 'imorgon' else 0)
+        else:
+            manad = MANADER.index(traff['manad']) + 1
+            dag = date(referens.year, manad, int(traff['dag']))
+            if dag < referens.date():
+                dag = dag.replace(year=dag.year + 1)
+        midnatt = datetime.combine(dag, datetime.min.time())
+        start = midnatt + _klockslag(traff['start'])
+        slut = midnatt + _klockslag(traff['slut']) if traff['slut'] else start + timedelta(minutes=STANDARD_LANGD_MINUTER)
+    except ValueError:          # Okänd månad, 31 feb, 25:00 ...
+        return None
+    return start, slut
+
+
+def _publicerad(kort):
+    """Kortets publishedAt ('1762182471.0', sekunder sedan 1970) som lokal tid, eller nu."""
+    try:
+        return datetime.fromtimestamp(float(kort['publishedAt']))
+    except (KeyError, TypeError, ValueError):
+        return datetime.now()
+
+
+def boka_visningar(kort, bostad_id, maklare_for_namn):
+    """
+    Bokar kortets visningar på bostaden och mäklaren med namnet i 'brokerName'.
+
+    Args:
+        maklare_for_namn (dict): vik(namn) -> mäklarens id.
+
+    Returns:
+        tuple: (antal bokade, [(text, orsak), ...] för visningar som hoppades över)
+    """
+    texter = kort.get('showings') or []
+    if not texter:
+        return 0, []
+    maklare_id = maklare_for_namn.get(vik(kort.get('brokerName')))
+    if maklare_id is None:
+        return 0, [(text, f"okänd mäklare '{kort.get('brokerName')}'") for text in texter]
+
+    bokade, overhoppade = 0, []
+    referens = _publicerad(kort)
+    for text in texter:
+        tider = tolka_visning(text, referens)
+        if tider is None:
+            overhoppade.append((text, 'okänt datumformat'))
+            continue
+        try:
+            visning_repo.boka(bostad_id, maklare_id, *tider, info=text)
+            bokade += 1
+        except (Visningskonflikt, ValueError) as fel:
+            overhoppade.append((text, str(fel)))
+    return bokade, overhoppade
+
+
+def kort_till_bostad(kort):
+    """
+    Översätter ETT ListingCard till den dictionary som bostad_repo.skapa_ny förväntar sig.
+
+    Returns:
+        dict: Bostadsdata, eller None om kortet saknar obligatoriska fält.
+    """
+    # 'Dagny, Borlänge kommun' -> 'Borlänge'
+    omrade = (kort.get('locationDescription') or '').rsplit(',', 1)[-1].strip()
+    stad = re.sub(r'\s+kommun$', '', omrade)
+
+    data = {
+        'adress': (kort.get('streetAddress') or '').strip(),
+        'stad': stad,
+        'pris': kort.get('askingPrice') or 'Pris saknas',
+        'rum': _forsta_tal(kort.get('rooms')),
+        'yta': _forsta_tal(kort.get('livingAndSupplementalAreas')),
+        'beskrivning': (kort.get('description') or '').strip(),
+        'status': kort_status(kort),
+    }
+
+    # Samma affärsregler som admin-formuläret (se validera_formular i admin_routes.py)
+    if not data['adress'] or not data['stad'] or not data['rum'] or not data['yta']:
+        return None
+
+    # Hemnet skickar oftast med koordinater - annars slår vi upp dem lokalt
+    koordinater = kort.get('coordinates') or {}
+    if koordinater.get('lat') is not None and koordinater.get('long') is not None:
+        data['lat'] = koordinater['lat']
+        data['lon'] = koordinater['long']
+    else:
+        data.update(koordinater_for(data['adress'], data['stad']))
+
+    return data
+
+
+def bildfiler_for_kort(kort, bildkatalog):
+    """Sökvägarna till kortets bilder som finns i bildkatalogen, i Hemnets ordning."""
+    sokvagar = []
+    for bild in kort.get('images') or []:
+        filnamn = (bild or {}).get('filename')
+        if filnamn:
+            sokvag = os.path.join(bildkatalog, *filnamn.split('/'))
+            if os.path.isfile(sokvag):
+                sokvagar.append(sokvag)
+    return sokvagar
+
+
+def importera_hemnet(sokvag, bildkatalog=None):
+    """
+    Importerar alla kort i en fil som nya bostäder.
+    Kort som redan finns som bostad (se tjanster/dubbletter.py) hoppas över.
+
+    Args:
+        sokvag (str): Filen med ListingCard-JSON.
+        bildkatalog (str): Valfri katalog med nedladdade Hemnet-bilder (se ovan).
+
+    Returns:
+        dict: {'importerade': antal, 'overhoppade': [(hemnet-id, orsak), ...], 'bilder': rapport | None,
+               'visningar': antal bokade, 'overhoppade_visningar': [(hemnet-id, text, orsak), ...]}
+    """
+    resultat = {'importerade': 0, 'overhoppade': [], 'bilder': None, 'visningar': 0, 'overhoppade_visningar': []}
+    bildfiler = []
+    dubblettindex = bygg_dubblettindex()
+    maklare_for_namn = {vik(maklare.namn): maklare.id for maklare in maklare_repo.hamta_alla(som_dto=True)}
+
+    for kort in las_hemnet_kort(sokvag):
+        data = kort_till_bostad(kort)
+        if data is None:
+            resultat['overhoppade'].append((kort.get('id'), 'saknar adress, ort, rum eller yta'))
+            continue
+        traffar = dubblettindex.hitta(skapa_post(None, data))
+        if traffar:
+            resultat['overhoppade'].append((kort.get('id'), f"dubblett av bostad {traffar[0]['annan_id']}"))
+            continue
+        bostad = bostad_repo.skapa_ny(data)
+        dubblettindex.lagg_till(skapa_post(bostad.id, data))
+        resultat['importerade'] += 1
+        bokade, overhoppade = boka_visningar(kort, bostad.id, maklare_for_namn)
+        resultat['visningar'] += bokade
+        resultat['overhoppade_visningar'].extend((kort.get('id'), text, orsak) for text, orsak in overhoppade)
+        if bildkatalog:
+            bildfiler.extend((bostad.id, fil) for fil in bildfiler_for_kort(kort, bildkatalog))
+
+    if bildfiler:
+        from tjanster.bilder import importera_bilder
+        resultat['bilder'] = importera_bilder(bildfiler)
+
+    return resultat
@@ -0,0 +1,306 @@
+# tjanster/jobbko.py
+"""
+🧰 JOBBKÖ - Kör långsamma jobb (import, export, omräkningar ...) utanför requesterna.
+
+PROBLEMET: En bulkimport eller en export kan ta minuter. Körs den i admin-routen väntar
+webbläsaren (och en av serverns trådar) hela tiden, och avbryts requesten avbryts jobbet.
+
+LÖSNINGEN:
+1. Routen lägger ett jobb i kön (lagg_till_jobb) och svarar direkt med jobbets id.
+2. Kön är en tabell i databasen (models/jobb.py) - den överlever omstarter.
+3. En eller flera JOBBARBETARE (flask --app flask_app jobbarbetare --processer 2) tar
+   jobben ett i taget, högst prioritet först, och sparar framsteg, resultat och fel.
+   Admin-sidan /admin/jobb visar hur det går.
+
+FEL OCH NYA FÖRSÖK: Ett jobb som kastar ett undantag läggs tillbaka i kön med exponentiell
+backoff (BACKOFF_SEKUNDER * 2^(försök - 1), med slumpvis spridning), tills max_forsok är
+förbrukade. Dör arbetaren mitt i ett jobb slutar dess lån att förlängas och en annan arbetare
+tar jobbet när lånet gått ut.
+
+JOBBTYPER registreras med @jobbtyp (se tjanster/jobbtyper.py). En jobbtyp är en funktion
+som tar en framstegsfunktion och jobbets argument, och returnerar något som går att spara
+som JSON:
+
+    @jobbtyp('bygg-prisstatistik', 'Räkna om prisstatistiken')
+    def bygg_prisstatistik_jobb(framsteg):
+        framsteg(0.5, 'Halvvägs')   # Kastar JobbAvbrutet om en admin har avbrutit jobbet
+        return {'grupper': 12}
+
+Under utveckling kan arbetaren köras som en tråd i appen (JOBB_ARBETARE_I_APPEN = True).
+"""
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+
+from flask import current_app
+
+from database import db
+from dbrepositories.jobb_repository import jobb_repo
+
+STANDARD_MAX_FORSOK = 3
+STANDARD_BACKOFF_SEKUNDER = 10
+MAX_BACKOFF_SEKUNDER = 3600
+STANDARD_LASNING_SEKUNDER = 60     # Lånet förlängs var tredjedel av den här tiden
+STANDARD_VILA_SEKUNDER = 1         # Hur ofta en ledig arbetare tittar i kön
+FRAMSTEG_INTERVALL = 1.0           # Framsteg skrivs till databasen högst så här ofta (sekunder)
+
+
+class JobbAvbrutet(Exception):
+    """Jobbet är inte längre arbetarens (avbrutet av en admin, eller övertaget efter ett utgånget lån)."""
+
+
+@dataclass
+class Jobbtyp:
+    namn: str
+    funktion: object
+    beskrivning: str
+    underhall: bool     # Kan startas utan argument från /admin/jobb
+
+
+_jobbtyper = {}
+
+
+def jobbtyp(namn, beskrivning, underhall=False):
+    """Dekorator som registrerar en funktion som jobbtyp."""
+    def registrera(funktion):
+        _jobbtyper[namn] = Jobbtyp(namn, funktion, beskrivning, underhall)
+        return funktion
+    return registrera
+
+
+def jobbtyper():
+    """Returns: list: Alla registrerade jobbtyper, sorterade på namn."""
+    return sorted(_jobbtyper.values(), key=lambda typ: typ.namn)
+
+
+def lagg_till_jobb(typ, prioritet=0, max_forsok=None, **argument):
+    """
+    Lägger ett jobb i kön och returnerar direkt. Kräver ett app-context.
+
+    Args:
+        max_forsok (int): Standard: app.config['JOBB_MAX_FORSOK']. 1 för jobb som inte tål att köras om.
+
+    Returns:
+        Jobb: Det nya jobbet (status 'vantar').
+    """
+    if typ not in _jobbtyper:
+        raise ValueError(f'Okänd jobbtyp: {typ}')
+    return jobb_repo.lagg_till(typ, argument, prioritet,
+                               max_forsok or current_app.config.get('JOBB_MAX_FORSOK', STANDARD_MAX_FORSOK))
+
+
+def backoff(forsok, bas=STANDARD_BACKOFF_SEKUNDER):
+    """
+    Sekunder till nästa försök efter 'forsok' misslyckade försök. Fördubblas för varje försök;
+    slumpen sprider ut jobb som misslyckades samtidigt (t.ex. när databasen var låst).
+    """
+    return min(bas * 2 ** (forsok - 1), MAX_BACKOFF_SEKUNDER) * random.uniform(0.5, 1.0)
+
+
+# ------------------------------------------------------------
+# ARBETAREN
+# ------------------------------------------------------------
+
+class Arbetare:
+    """
+    Tar jobb ur kön och kör dem, ett i taget, tills stopp sätts.
+    En arbetare per tråd - flera arbetare kan dela kön (även i olika processer).
+    """
+
+    def __init__(self, app, namn=None):
+        self.app = app
+        self.namn = namn or f'{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}'
+        self.stopp = threading.Event()
+        self.lasning_sekunder = app.config.get('JOBB_LASNING_SEKUNDER', STANDARD_LASNING_SEKUNDER)
+        self.backoff_sekunder = app.config.get('JOBB_BACKOFF_SEKUNDER', STANDARD_BACKOFF_SEKUNDER)
+        self.vila_sekunder = app.config.get('JOBB_VILA_SEKUNDER', STANDARD_VILA_SEKUNDER)
+
+    def kor(self, en_gang=False):
+        """
+        Kör jobb tills stopp sätts. Ett jobb som har startats körs alltid klart först.
+
+        Args:
+            en_gang (bool): Sluta när kön är tom istället för att vänta på nya jobb.
+        """
+        while not self.stopp.is_set():
+            try:
+                with self.app.app_context():
+                    kordes = self.kor_nasta()
+            except Exception:
+                # T.ex. en låst databas - arbetaren ska inte dö av det
+                self.app.logger.exception('Jobbarbetaren %s kunde inte hämta nästa jobb', self.namn)
+                kordes = False
+            if not kordes:
+                if en_gang:
+                    return
+                self.stopp.wait(self.vila_sekunder)
+
+    def kor_nasta(self):
+        """
+        Tar och kör NÄSTA jobb i kön. Kräver ett app-context.
+
+        Returns:
+            bool: False om kön var tom.
+        """
+        jobb = jobb_repo.hamta_nasta(self.namn, self.lasning_sekunder)
+        if jobb is None:
+            return False
+        jobb_id, forsok, max_forsok = jobb.id, jobb.forsok, jobb.max_forsok
+        typ = _jobbtyper.get(jobb.typ)
+
+        if typ is None:
+            jobb_repo.markera_misslyckad(jobb_id, self.namn, f'Okänd jobbtyp: {jobb.typ}')
+            return True
+        if forsok > max_forsok:
+            # Lånet har gått ut max_forsok gånger - jobbet får förmodligen arbetaren att krascha
+            jobb_repo.markera_misslyckad(jobb_id, self.namn, (jobb.fel or '') +
+                                         '\nArbetaren slutade svara under alla försök (lånet gick ut).')
+            return True
+
+        self.app.logger.info('Jobb %d (%s) startar, försök %d av %d', jobb_id, typ.namn, forsok, max_forsok)
+        framsteg = Framsteg(jobb_id, self.namn)
+        hjartslag = threading.Thread(target=self._forlang_lasning, args=(jobb_id, framsteg),
+                                     name=f'jobb-{jobb_id}-lan', daemon=True)
+        hjartslag.start()
+        try:
+            resultat = typ.funktion(framsteg, **jobb.argument_dict)
+        except JobbAvbrutet:
+            db.session.rollback()
+            self.app.logger.info('Jobb %d avbröts', jobb_id)
+        except Exception:
+            db.session.rollback()
+            fel = traceback.format_exc()
+            self.app.logger.warning('Jobb %d misslyckades (försök %d av %d):\n%s', jobb_id, forsok, max_forsok, fel)
+            nytt_forsok_om = backoff(forsok, self.backoff_sekunder) if forsok < max_forsok else None
+            jobb_repo.markera_misslyckad(jobb_id, self.namn, fel, nytt_forsok_om)
+        else:
+            if jobb_repo.markera_klar(jobb_id, self.namn, resultat, framsteg.meddelande):
+                self.app.logger.info('Jobb %d (%s) är klart', jobb_id, typ.namn)
+            else:
+                self.app.logger.info('Jobb %d avbröts innan det hann bli klart', jobb_id)
+        finally:
+            framsteg.klart.set()
+            hjartslag.join()
+        return True
+
+    def _forlang_lasning(self, jobb_id, framsteg):
+        """Körs i en egen tråd medan jobbet körs: förlänger lånet var tredjedel av lånetiden."""
+        while not framsteg.klart.wait(self.lasning_sekunder / 3):
+            try:
+                with self.app.app_context():
+                    if not jobb_repo.forlang_lasning(jobb_id, self.namn, self.lasning_sekunder):
+                        framsteg.avbrutet = True
+                        return
+            except Exception:
+                self.app.logger.exception('Kunde inte förlänga lånet på jobb %d', jobb_id)
+
+
+class Framsteg:
+    """
+    Framstegsfunktionen som en jobbtyp anropar: framsteg(andel, meddelande).
+    Skrivningarna glesas ut till högst en per FRAMSTEG_INTERVALL sekunder.
+    Kastar JobbAvbrutet om jobbet inte längre är arbetarens.
+    """
+
+    def __init__(self, jobb_id, arbetare):
+        self.jobb_id = jobb_id
+        self.arbetare = arbetare
+        self.andel = 0.0
+        self.meddelande = None
+        self.avbrutet = False
+        self.klart = threading.Event()
+        self._senast = 0.0
+
+    def __call__(self, andel, meddelande=None):
+        self.andel = andel
+        if meddelande is not None:
+            self.meddelande = meddelande
+        if self.avbrutet:
+            raise JobbAvbrutet()
+        if time.monotonic() - self._senast >= FRAMSTEG_INTERVALL:
+            self.spara(andel)
+
+    def spara(self, andel):
+        self._senast = time.monotonic()
+        if not jobb_repo.rapportera_framsteg(self.jobb_id, self.arbetare, andel, self.meddelande):
+            self.avbrutet = True
+            raise JobbAvbrutet()
+
+
+# ------------------------------------------------------------
+# STARTA ARBETARE
+# ------------------------------------------------------------
+
+def kor_arbetare(app, processer=1, en_gang=False):
+    """
+    Kör jobbarbetare tills processen får SIGTERM eller SIGINT (Ctrl+C).
+    Jobb som redan startat körs klart innan arbetarna avslutas.
+
+    Args:
+        processer (int): Antal arbetarprocesser. Med 1 körs arbetaren i den här processen.
+        en_gang (bool): Avsluta när kön är tom.
+    """
+    if processer <= 1:
+        arbetare = Arbetare(app)
+        _stoppa_vid_signal(lambda *_: arbetare.stopp.set())
+        arbetare.kor(en_gang)
+        return
+
+    # 'spawn': varje process startar från början och bygger en egen app (och egna
+    # databasanslutningar) - att ärva en öppen SQLite-anslutning via fork är inte säkert.
+    kontext = multiprocessing.get_context('spawn')
+    barn = [kontext.Process(target=_arbetarprocess, args=(en_gang,), name=f'jobbarbetare-{nummer}')
+            for nummer in range(1, processer + 1)]
+    for process in barn:
+        process.start()
+    _stoppa_vid_signal(lambda *_: [process.terminate() for process in barn if process.is_alive()])
+    for process in barn:
+        process.join()
+
+
+def _arbetarprocess(en_gang):
+    """Startpunkt för en arbetarprocess (måste ligga på modulnivå för att 'spawn' ska hitta den)."""
+    from flask_app import app
+    arbetare = Arbetare(app)
+    _stoppa_vid_signal(lambda *_: arbetare.stopp.set())
+    arbetare.kor(en_gang)
+
+
+def _stoppa_vid_signal(hanterare):
+    signal.signal(signal.SIGTERM, hanterare)
+    signal.signal(signal.SIGINT, hanterare)
+
+
+_trad_i_appen = None
+_las = threading.Lock()
+
+
+def starta_arbetare_i_appen(app):
+    """Startar EN arbetare som daemon-tråd i den här processen (första gången den anropas)."""
+    global _trad_i_appen
+    with _las:
+        if _trad_i_appen is not None:
+            return
+        arbetare = Arbetare(app, f'{socket.gethostname()}:{os.getpid()}:jobbko')
+        _trad_i_appen = threading.Thread(target=arbetare.kor, name='jobbko', daemon=True)
+        _trad_i_appen.start()
+
+
+def init_jobbko(app):
+    """
+    Registrerar jobbtyperna. Med JOBB_ARBETARE_I_APPEN startas en arbetartråd vid första requesten
+    (inte vid terminalkommandon).
+    """
+    import tjanster.jobbtyper  # noqa: F401 - registrerar jobbtyperna med @jobbtyp
+
+    if app.config.get('JOBB_ARBETARE_I_APPEN'):
+        @app.before_request
+        def starta_jobbarbetare():
+            if _trad_i_appen is None:
+                starta_arbetare_i_appen(app)
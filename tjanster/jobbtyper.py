@@ -0,0 +1,162 @@
+# tjanster/jobbtyper.py
+"""
+🧰 JOBBTYPER - De långsamma jobben som kan läggas i jobbkön (se tjanster/jobbko.py).
+
+Varje jobbtyp anropar en befintlig tjänst och översätter tjänstens framsteg till en andel
+(0.0 - 1.0) och ett meddelande. Det som returneras sparas som JSON i jobbets 'resultat'.
+
+Jobbtyper med underhall=True tar inga argument och kan startas direkt från /admin/jobb.
+"""
+import os
+import time
+
+from flask import current_app
+
+from tjanster.jobbko import jobbtyp
+
+# En fil utan aktivt jobb tas bort först när den är så här gammal (sekunder), så att en
+# fil som precis laddats upp inte hinner tas bort innan dess jobb lagts i kön
+JOBBFIL_MIN_ALDER = 3600
+
+
+def jobbfilkatalog():
+    """Katalogen där uppladdade filer väntar på sitt jobb (instance/jobbfiler)."""
+    katalog = os.path.join(current_app.instance_path, 'jobbfiler')
+    os.makedirs(katalog, exist_ok=True)
+    return katalog
+
+
+def rensa_jobbfiler():
+    """
+    Tar bort filer i jobbfilkatalogen som inget väntande eller körande jobb använder,
+    t.ex. om arbetaren dog mitt i en import (då hinner jobbet aldrig ta bort filen).
+
+    Returns:
+        int: Antal borttagna filer.
+    """
+    from dbrepositories.jobb_repository import jobb_repo
+    katalog = jobbfilkatalog()
+    anvanda = {os.path.abspath(argument['sokvag']) for argument in jobb_repo.hamta_aktiva_argument('importera-fil')
+               if 'sokvag' in argument}
+    gransen = time.time() - JOBBFIL_MIN_ALDER
+    antal = 0
+    for post in os.scandir(katalog):
+        if post.is_file() and os.path.abspath(post.path) not in anvanda and post.stat().st_mtime < gransen:
+            os.remove(post.path)
+            antal += 1
+    return antal
+
+
+@jobbtyp('importera-fil', 'Importera bostäder från en CSV- eller JSON-fil')
+def importera_fil_jobb(framsteg, sokvag, filnamn):
+    """
+    Importerar en uppladdad fil (se admin_import). Filen tas bort efteråt - även om importen
+    misslyckas eller avbryts, eftersom jobbet läggs i kön med max_forsok=1 (ett nytt försök
+    skulle skapa de redan sparade raderna igen) och ingen annan läser filen.
+    Dör arbetaren under importen blir filen kvar tills rensa_jobbfiler() tar den.
+    """
+    from tjanster.bulkimport import importera_fil
+    try:
+        storlek = os.path.getsize(sokvag) or 1
+        with open(sokvag, 'rb') as fil:
+            # Hur långt in i filen importen har läst ger andelen (filen stängs när den är färdigläst)
+            rapport = importera_fil(fil, filnamn, lambda rapport: framsteg(
+                1.0 if fil.closed else fil.tell() / storlek,
+                f"{rapport['rader']} rader lästa, {rapport['antal_fel']} fel"))
+    finally:
+        if os.path.exists(sokvag):
+            os.remove(sokvag)
+    framsteg(1.0, f"{rapport['skapade']} nya och {rapport['uppdaterade']} uppdaterade bostäder, "
+                  f"{rapport['antal_fel']} fel")
+    return rapport
+
+
+@jobbtyp('importera-hemnet', 'Importera bostäder från en fil med Hemnet-kort')
+def importera_hemnet_jobb(framsteg, sokvag, bildkatalog=None):
+    from tjanster.hemnet_import import importera_hemnet
+    resultat = importera_hemnet(sokvag, bildkatalog)
+    framsteg(1.0, f"{resultat['importerade']} bostäder importerade, {len(resultat['overhoppade'])} överhoppade, "
+                  f"{resultat['visningar']} visningar bokade")
+    return resultat
+
+
+@jobbtyp('importera-bilder', 'Läs in bilder och skapa miniatyrer')
+def importera_bilder_jobb(framsteg, katalog, arbetare=None):
+    """Bilderna ligger i en underkatalog per bostad-id (se filer_i_katalog)."""
+    from tjanster.bilder import filer_i_katalog, importera_bilder
+    rapport = importera_bilder(filer_i_katalog(katalog), arbetare,
+                               lambda klara, totalt: framsteg(klara / totalt, f'{klara} av {totalt} bilder skalade'))
+    framsteg(1.0, f"{rapport['nya']} nya bilder, {rapport['dubbletter']} dubbletter, {len(rapport['fel'])} fel")
+    return rapport
+
+
+@jobbtyp('exportera', 'Exportera alla tabeller till Parquet', underhall=True)
+def exportera_jobb(framsteg, format='parquet', inkrementell=False):
+    from tjanster.export import exportera
+    manifest = exportera(None, format, inkrementell,
+                         framsteg=lambda klara, totalt: framsteg(klara / totalt, f'Tabell {klara + 1} av {totalt}'))
+    framsteg(1.0, f"{manifest['typ'].capitalize()} export sparad i {manifest['katalog']}")
+    return manifest
+
+
+@jobbtyp('frys-sidor', 'Spara de publika sidorna som statiska filer', underhall=True)
+def frys_sidor_jobb(framsteg, allt=False):
+    from tjanster.frysning import frys_sidor
+    rapport = frys_sidor(allt=allt,
+                         framsteg=lambda klara, totalt: framsteg(klara / totalt, f'{klara} av {totalt} sidor'))
+    framsteg(1.0, f"{rapport['renderade']} sidor renderade, {rapport['oforandrade']} oförändrade, "
+                  f"{rapport['borttagna']} borttagna")
+    return rapport
+
+
+@jobbtyp('arkivera-bostader', 'Flytta sålda och borttagna bostäder till arkivet', underhall=True)
+def arkivera_bostader_jobb(framsteg):
+    from dbrepositories.bostad_repository import bostad_repo
+    totalt = bostad_repo.antal_inaktiva() or 1
+    antal = bostad_repo.arkivera_inaktiva(framsteg=lambda klara: framsteg(klara / totalt, f'{klara} bostäder arkiverade'))
+    framsteg(1.0, f'{antal} bostäder arkiverade')
+    return {'arkiverade': antal}
+
+
+@jobbtyp('hitta-dubbletter', 'Leta efter bostäder som finns två gånger', underhall=True)
+def hitta_dubbletter_jobb(framsteg):
+    """Rapporten (de MAX_PAR mest lika paren) visas på /admin/dubbletter."""
+    from dbrepositories.bostad_repository import bostad_repo
+    from tjanster.dubbletter import MAX_PAR, bygg_dubblettindex
+    totalt = len(bostad_repo.hamta_kolumnvarden('id')) or 1
+    index = bygg_dubblettindex(lambda klara: framsteg(0.9 * klara / totalt, f'{klara} av {totalt} bostäder indexerade'))
+    par = index.alla_par()
+    framsteg(1.0, f'{len(par)} möjliga dubbletter bland {len(index)} bostäder')
+    return {'bostader': len(index), 'antal_par': len(par), 'par': par[:MAX_PAR]}
+
+
+@jobbtyp('bygg-prisstatistik', 'Räkna om prisstatistiken', underhall=True)
+def bygg_prisstatistik_jobb(framsteg):
+    from tjanster.prisstatistik import bygg_om_prisstatistik
+    antal = bygg_om_prisstatistik()
+    framsteg(1.0, f'Prisstatistiken innehåller {antal} grupper')
+    return {'grupper': antal}
+
+
+@jobbtyp('rakna-om-sparade', 'Räkna om hur många som sparat varje bostad', underhall=True)
+def rakna_om_sparade_jobb(framsteg):
+    """Rättar Bostad.antal_sparade där räknaren inte stämmer med favoriterna."""
+    from dbrepositories.favorit_repository import favorit_repo
+    antal = favorit_repo.rakna_om()
+    framsteg(1.0, f'{antal} bostäder hade fel antal sparade')
+    return {'rattade': antal}
+
+
+@jobbtyp('bygg-geoindex', 'Bygg om postnummerindexet', underhall=True)
+def bygg_geoindex_jobb(framsteg):
+    from tjanster.geokodning import bygg_index
+    antal_postnummer, antal_orter = bygg_index()
+    framsteg(1.0, f'Indexet innehåller {antal_postnummer} postnummer och {antal_orter} orter')
+    return {'postnummer': antal_postnummer, 'orter': antal_orter}
+
+
+@jobbtyp('rensa-jobbfiler', 'Ta bort uppladdade filer som inget jobb använder', underhall=True)
+def rensa_jobbfiler_jobb(framsteg):
+    antal = rensa_jobbfiler()
+    framsteg(1.0, f'{antal} filer borttagna')
+    return {'borttagna': antal}
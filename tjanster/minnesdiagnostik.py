@@ -0,0 +1,146 @@
+# tjanster/minnesdiagnostik.py
+"""
+🧠 MINNESDIAGNOSTIK - Hur mycket minne använder varje request, och hur många ORM-objekt skapas?
+
+Sidor som läser ALLA rader (t.ex. hamta_alla()) kan få en worker att växa med hundratals
+megabyte. Den här modulen mäter tre saker per request och visar dem på /admin/diagnostik:
+
+1. LADDADE OBJEKT: SQLAlchemy skickar händelsen 'load' varje gång en rad blir ett
+   ORM-objekt. Vi räknar dem per modell (Bostad, Kommentar ...). Laddar en request fler
+   än MAX_LADDADE_OBJEKT av en modell skrivs en VARNING i loggen.
+2. IDENTITETSKARTAN: Sessionens identity map (ett objekt per rad som sessionen håller
+   koll på) - storleken mäts när requesten är klar.
+3. TOPPMINNE (valfritt, MINNESSPARNING = True): tracemalloc spårar alla Python-
+   allokeringar. Vid varje request nollställs toppen, så vi ser hur mycket minnet som
+   mest växte. tracemalloc gör Python märkbart långsammare och gäller HELA processen -
+   samtidiga requests syns i varandras siffror. Slå bara på det vid felsökning.
+
+Mätningarna sparas per worker i en ringbuffert (de senaste MINNES_MAX_ANTAL requesterna).
+"""
+import gc
+import time
+import tracemalloc
+from collections import Counter, deque
+from datetime import datetime
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+
+from database import db
+
+STANDARD_MAX_ANTAL = 100
+
+# Standardgräns för hur många objekt av en modell en request får ladda innan vi varnar
+STANDARD_MAX_LADDADE = {'Bostad': 1000, 'Kommentar': 1000}
+
+
+def _objekt_laddat(objekt, kontext):
+    """Lyssnare på SQLAlchemys 'load'-händelse: räknar objektet för den pågående requesten."""
+    if has_app_context():
+        laddade = g.get('laddade_objekt')
+        if laddade is None:
+            laddade = g.laddade_objekt = Counter()
+        laddade[type(objekt).__name__] += 1
+
+
+def processminne():
+    """Processens nuvarande och högsta RSS i MB (Linux: /proc, annars None)."""
+    minne = {'rss_mb': None, 'topp_rss_mb': None}
+    try:
+        with open('/proc/self/status') as fil:
+            for rad in fil:
+                if rad.startswith('VmRSS:'):
+                    minne['rss_mb'] = int(rad.split()[1]) / 1024
+                elif rad.startswith('VmHWM:'):
+                    minne['topp_rss_mb'] = int(rad.split()[1]) / 1024
+    except OSError:
+        pass
+    return minne
+
+
+def levande_orm_objekt():
+    """
+    Räknar alla ORM-objekt som finns i processen just nu, per modell.
+    Går igenom ALLA objekt som skräpsamlaren känner till - anropas bara från admin-sidan.
+    """
+    return Counter(type(objekt).__name__ for objekt in gc.get_objects() if isinstance(objekt, db.Model))
+
+
+def storsta_allokeringar(antal=15):
+    """De kodrader som har mest minne allokerat just nu (kräver MINNESSPARNING)."""
+    if not tracemalloc.is_tracing():
+        return []
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+    ]).statistics('lineno')[:antal]
+
+
+class Minnesdiagnostik:
+    """Mäter varje request och sparar resultaten i en ringbuffert (deque är trådsäker för append)."""
+
+    def __init__(self):
+        self.max_laddade = dict(STANDARD_MAX_LADDADE)
+        self.matningar = deque(maxlen=STANDARD_MAX_ANTAL)
+
+    def fore_request(self):
+        g.minne_start = time.perf_counter()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            g.minne_fore = tracemalloc.get_traced_memory()[0]
+
+    def markera_strommad(self, svar):
+        """after_request: kom ihåg om svaret strömmas (då körs teardown_request två gånger)."""
+        if svar.is_streamed:
+            g.minne_strommad = True
+        return svar
+
+    def efter_request(self, fel=None):
+        """
+        Körs vid teardown_request. Ett strömmat svar (stream_with_context) ger två teardowns:
+        en när vyfunktionen returnerat och en när sista biten renderats. Vi mäter vid den
+        SISTA, så att alla objekt som sidan laddade är räknade.
+        """
+        if 'minne_start' not in g or g.pop('minne_strommad', False):
+            return
+        laddade = g.pop('laddade_objekt', Counter())
+        matning = {
+            'tid': datetime.now(),
+            'metod': request.method,
+            'url': request.full_path.rstrip('?'),
+            'ms': (time.perf_counter() - g.pop('minne_start')) * 1000,
+            'laddade': dict(laddade),
+            'laddade_totalt': sum(laddade.values()),
+            'identitetskarta': len(db.session.identity_map),
+            'topp_kb': None,
+            'varningar': [],
+        }
+        if 'minne_fore' in g:
+            matning['topp_kb'] = (tracemalloc.get_traced_memory()[1] - g.pop('minne_fore')) / 1024
+
+        for modell, antal in laddade.items():
+            grans = self.max_laddade.get(modell)
+            if grans is not None and antal > grans:
+                matning['varningar'].append(f'{antal} {modell}-objekt (gräns {grans})')
+        if matning['varningar']:
+            current_app.logger.warning('%s %s laddade %s', matning['metod'], matning['url'],
+                                       ', '.join(matning['varningar']))
+        self.matningar.append(matning)
+
+
+# EN diagnostik per worker-process
+minnesdiagnostik = Minnesdiagnostik()
+
+
+def init_minnesdiagnostik(app):
+    """Läser in inställningarna, räknar laddade ORM-objekt och mäter varje request."""
+    minnesdiagnostik.max_laddade = dict(app.config.get('MAX_LADDADE_OBJEKT', STANDARD_MAX_LADDADE))
+    minnesdiagnostik.matningar = deque(minnesdiagnostik.matningar,
+                                       maxlen=app.config.get('MINNES_MAX_ANTAL', STANDARD_MAX_ANTAL))
+    if app.config.get('MINNESSPARNING') and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    if not event.contains(db.Model, 'load', _objekt_laddat):
+        event.listen(db.Model, 'load', _objekt_laddat, propagate=True)
+    app.before_request(minnesdiagnostik.fore_request)
+    app.after_request(minnesdiagnostik.markera_strommad)
+    app.teardown_request(minnesdiagnostik.efter_request)
@@ -0,0 +1,40 @@
+# tjanster/pris.py
+"""
+💰 PRIS - Tolkar bostädernas pris-text till ett riktigt tal.
+
+Bostad.pris sparas som TEXT ('1 950 000 kr', '1.950.000 kr', 'Pris saknas'), eftersom
+admin och Hemnet skriver priset på olika sätt. För statistik, sortering och export
+behöver vi priset som ett heltal i kronor - det ger pris_till_kronor().
+"""
+import re
+
+# Allt som inte är en siffra (mellanslag, punkter, 'kr' ...) tas bort
+ICKE_SIFFROR = re.compile(r'\D')
+
+
+def pris_till_kronor(pris):
+    """
+    '1 950 000 kr' -> 1950000, '850.000 kr' -> 850000, 'Pris saknas' -> None
+
+    Args:
+        pris (str | int | None): Priset som det är sparat på bostaden.
+
+    Returns:
+        int | None: Priset i hela kronor, eller None om det inte går att tolka.
+    """
+    if pris is None:
+        return None
+    if isinstance(pris, int):
+        return pris
+
+    # Öre efter decimalkomma ('1 950 000,00 kr') räknas inte med
+    heltalsdel = re.split(r',\d{1,2}\b', str(pris), maxsplit=1)[0]
+    siffror = ICKE_SIFFROR.sub('', heltalsdel)
+    return int(siffror) if siffror else None
+
+
+def kronor_till_text(kronor):
+    """
+    1950000 -> '1 950 000 kr' (samma format som startdatan och admin-formuläret).
+    """
+    return f'{kronor:,}'.replace(',', ' ') + ' kr'
@@ -0,0 +1,70 @@
+# tjanster/prishistorik.py
+"""
+📉 PRISHISTORIK - Sparar varje prisändring, så att det gamla priset inte försvinner.
+
+PROBLEMET: När en bostads pris ändras (i admin, med batch-ändringen eller vid en import)
+skrivs det gamla priset över. "Sänkt pris senaste veckan" och prisutvecklingen per
+stad går då inte att visa.
+
+LÖSNINGEN: BostadRepository noterar varje prisändring som en DELTA (nytt pris - förra
+priset) i tabellen 'prishistorik', i SAMMA transaktion som ändringen (se
+prishistorik_repository.logga). Sparas priset, sparas också historiken - annars ingetdera.
+
+Ett pris som inte går att tolka (t.ex. 'Pris saknas') har ingen delta. När bostaden får
+ett riktigt pris igen sparas en ÅTERSTÄLLNING med hela priset (ny=True), se prisforlopp().
+"""
+from datetime import datetime, timedelta
+
+from dbrepositories.bostad_repository import bostad_repo
+from dbrepositories.prishistorik_repository import prishistorik_repo
+from tjanster.pris import pris_till_kronor
+
+
+def prisforlopp(bostad_id, nuvarande_pris):
+    """
+    Bostadens pris efter varje ändring.
+
+    Räknas BAKLÄNGES från det nuvarande priset fram till den senaste raden med ny=True (en ny
+    bostad eller en återställning, som har hela priset). Äldre delar av historiken - före ett
+    pris som inte gick att tolka - räknas FRAMLÄNGES från sin egen återställning.
+    Bostäder som fanns innan tabellen saknar sin första rad; där priset inte går att veta blir det None.
+
+    Args:
+        bostad_id (int): Bostaden (aktuell eller arkiverad).
+        nuvarande_pris (str): Bostadens pris nu, t.ex. '1 950 000 kr'.
+
+    Returns:
+        list: Tupler (tid, pris_kr, andring_kr), äldst först. andring_kr är None för rader med ny=True.
+    """
+    rader = prishistorik_repo.hamta_for_bostad(bostad_id)
+    priser = [None] * len(rader)
+
+    # 1. Baklänges från nuvarande pris
+    pris = pris_till_kronor(nuvarande_pris)
+    kant = len(rader)
+    while pris is not None and kant:
+        kant -= 1
+        _, andring, ny = rader[kant]
+        priser[kant] = andring if ny else pris
+        pris = None if ny else pris - andring
+
+    # 2. Framlänges för det som är äldre, från varje återställning
+    pris = None
+    for i, (_, andring, ny) in enumerate(rader[:kant]):
+        pris = andring if ny else None if pris is None else pris + andring
+        priser[i] = pris
+
+    return [(tid, pris, None if ny else andring) for (tid, andring, ny), pris in zip(rader, priser)]
+
+
+def sankta_priser(dagar=7, antal=50):
+    """
+    Aktuella bostäder med sänkt pris de senaste 'dagar' dagarna, störst sänkning först.
+
+    Returns:
+        list: Tupler (Bostad, sankning_kr, senast). Arkiverade bostäder hoppas över.
+    """
+    sankningar = prishistorik_repo.sankta_priser(datetime.now() - timedelta(days=dagar), antal)
+    per_id = {bostad.id: bostad for bostad in bostad_repo.hamta_flera([rad[0] for rad in sankningar])}
+    return [(per_id[bostad_id], sankning, senast) for bostad_id, sankning, senast in sankningar
+            if bostad_id in per_id]
@@ -0,0 +1,188 @@
+# tjanster/prisstatistik.py
+"""
+📈 PRISSTATISTIK - Median, medel och kr/kvm per stad och antal rum.
+
+PROBLEMET: Att räkna statistiken från Bostad.query.all() vid varje sidvisning blir
+långsammare ju fler bostäder vi har.
+
+LÖSNINGEN: Nyckeltalen sparas färdigräknade i tabellen 'prisstatistik' och hålls
+uppdaterade på två sätt:
+
+1. PER STAD: markera_andrade_stader() är registrerad på BostadRepository och körs i
+   SAMMA transaktion som varje ändring. Den markerar de berörda städerna som smutsiga
+   (före och efter ändringen - en bostad kan ju byta stad) i tabellen
+   'prisstatistik_smutsiga'. De räknas om EN gång när requesten (eller terminalkommandot)
+   är klar - en bulkimport av 1000 bostäder i samma stad ger alltså en omräkning, inte 1000.
+   OBS! Det är ingen inkrementell uppdatering: hela staden räknas om (medianen går inte
+   att uppdatera ur de gamla aggregaten). Misslyckas omräkningen ligger markeringen kvar
+   och staden räknas om vid nästa omräkning, vid nästa start eller med bygg-prisstatistik.
+2. I BULK: bygg_om_prisstatistik() räknar om allt i ETT vektoriserat NumPy-pass.
+   Körs automatiskt första gången, och manuellt med 'flask --app flask_app bygg-prisstatistik'
+   om bostäder ändrats direkt i databasen.
+
+Båda vägarna använder samma funktion, berakna_aggregat(), så de ger alltid samma svar.
+"""
+import numpy as np
+from flask import current_app, g
+
+from database import db
+from dbrepositories.bostad_repository import bostad_repo
+from dbrepositories.prisstatistik_repository import prisstatistik_repo
+from models.prisstatistik import ALLA_RUM
+from tjanster.pris import pris_till_kronor
+
+
+def _median_per_grupp(grupp, varden, antal_grupper):
+    """
+    Median av 'varden' per grupp, utan Python-loop över grupperna.
+
+    Sorterar på (grupp, värde) så att varje grupps värden ligger i följd och i storleksordning;
+    medianen är då mittenelementet (eller medel av de två mittersta) i varje grupps avsnitt.
+    NaN-värden räknas inte. Grupper utan värden får NaN.
+    """
+    giltiga = ~np.isnan(varden)
+    grupp, varden = grupp[giltiga], varden[giltiga]
+    ordning = np.lexsort((varden, grupp))
+    sorterade = varden[ordning]
+
+    antal = np.bincount(grupp, minlength=antal_grupper)
+    start = np.concatenate(([0], np.cumsum(antal)[:-1]))
+    median = np.full(antal_grupper, np.nan)
+    har_varden = antal > 0
+    nedre = start[har_varden] + (antal[har_varden] - 1) // 2
+    ovre = start[har_varden] + antal[har_varden] // 2
+    median[har_varden] = (sorterade[nedre] + sorterade[ovre]) / 2
+    return median
+
+
+def _medel_per_grupp(grupp, varden, antal_grupper):
+    """Medelvärde av 'varden' per grupp (NaN räknas inte). Grupper utan värden får NaN."""
+    giltiga = ~np.isnan(varden)
+    summa = np.bincount(grupp[giltiga], weights=varden[giltiga], minlength=antal_grupper)
+    antal = np.bincount(grupp[giltiga], minlength=antal_grupper)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return summa / antal
+
+
+def _tal_eller_none(varde):
+    return None if np.isnan(varde) else round(float(varde), 1)
+
+
+def berakna_aggregat(bostadsvarden):
+    """
+    Räknar fram alla aggregat för en mängd bostäder.
+
+    Args:
+        bostadsvarden (list): Tupler (stad, rum, pris, yta), se PrisstatistikRepository.
+
+    Returns:
+        list: En dictionary per (stad, rum) plus en per stad med rum = ALLA_RUM.
+    """
+    if not bostadsvarden:
+        return []
+
+    stader, rum, priser, ytor = zip(*bostadsvarden)
+    # Priset är text - tolkningen är det enda som görs rad för rad
+    pris = np.array([pris_till_kronor(p) for p in priser], dtype=float)   # None blir NaN
+    yta = np.array(ytor, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        kr_per_kvm = np.where(yta > 0, pris / yta, np.nan)
+
+    # Varje bostad hör till TVÅ grupper: (stad, rum) och (stad, ALLA_RUM)
+    stadsnamn, stad_index = np.unique(np.array(stader, dtype=object), return_inverse=True)
+    rum = np.array(rum, dtype=np.int64)
+    bredd = int(rum.max()) + 1
+    gruppkod = np.concatenate((stad_index * bredd + rum, stad_index * bredd + ALLA_RUM))
+    pris = np.concatenate((pris, pris))
+    kr_per_kvm = np.concatenate((kr_per_kvm, kr_per_kvm))
+
+    koder, grupp = np.unique(gruppkod, return_inverse=True)
+    antal_grupper = len(koder)
+
+    antal = np.bincount(grupp, minlength=antal_grupper)
+    antal_med_pris = np.bincount(grupp, weights=~np.isnan(pris), minlength=antal_grupper)
+    medelpris = _medel_per_grupp(grupp, pris, antal_grupper)
+    medianpris = _median_per_grupp(grupp, pris, antal_grupper)
+    medel_kvm = _medel_per_grupp(grupp, kr_per_kvm, antal_grupper)
+    median_kvm = _median_per_grupp(grupp, kr_per_kvm, antal_grupper)
+
+    return [
+        {
+            'stad': stadsnamn[kod // bredd],
+            'rum': int(kod % bredd),
+            'antal': int(antal[i]),
+            'antal_med_pris': int(antal_med_pris[i]),
+            'medelpris': _tal_eller_none(medelpris[i]),
+            'medianpris': _tal_eller_none(medianpris[i]),
+            'medel_kr_per_kvm': _tal_eller_none(medel_kvm[i]),
+            'median_kr_per_kvm': _tal_eller_none(median_kvm[i]),
+        }
+        for i, kod in enumerate(koder)
+    ]
+
+
+def bygg_om_prisstatistik():
+    """
+    Räknar om statistiken för ALLA städer i ett enda pass.
+
+    Returns:
+        int: Antal aggregatrader som sparades.
+    """
+    prisstatistik_repo.borja_omrakning()
+    aggregat = berakna_aggregat(prisstatistik_repo.hamta_bostadsvarden())
+    prisstatistik_repo.ersatt(aggregat)
+    return len(aggregat)
+
+
+def rakna_om_stader(stader):
+    """Räknar om statistiken för några städer och tar bort deras smutsig-markering."""
+    prisstatistik_repo.borja_omrakning(stader)
+    aggregat = berakna_aggregat(prisstatistik_repo.hamta_bostadsvarden(stader))
+    prisstatistik_repo.ersatt(aggregat, stader)
+
+
+def markera_andrade_stader(operation, andringar):
+    """
+    Körs i BostadRepositorys transaktion: markerar de städer som påverkas av ändringarna.
+    """
+    stader = set()
+    for fore, efter in andringar:
+        if fore and efter and all(fore[falt] == efter[falt] for falt in ('stad', 'rum', 'pris', 'yta')):
+            continue   # T.ex. bara beskrivningen ändrades - statistiken påverkas inte
+        stader.update(bostad['stad'] for bostad in (fore, efter) if bostad is not None)
+    if not stader:
+        return
+    prisstatistik_repo.markera_smutsiga(stader)
+    if 'prisstatistik_stader' not in g:
+        g.prisstatistik_stader = set()
+    g.prisstatistik_stader.update(stader)
+
+
+def rakna_om_andrade_stader(fel=None):
+    """
+    Räknar om de städer som ändrats under app-contextet (körs när det avslutas),
+    plus de som ligger kvar som smutsiga sedan en tidigare omräkning misslyckades.
+    """
+    stader = g.pop('prisstatistik_stader', None)
+    if not stader:
+        return
+    try:
+        rakna_om_stader(stader | prisstatistik_repo.hamta_smutsiga())
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception('Kunde inte räkna om prisstatistiken för %s', stader)
+
+
+def init_prisstatistik(app):
+    """
+    Kopplar statistiken till BostadRepository, bygger den om den saknas och räknar om
+    städer som blev kvar som smutsiga (t.ex. om processen dog innan de räknades om).
+    """
+    if markera_andrade_stader not in bostad_repo.i_transaktion:
+        bostad_repo.registrera_i_transaktion(markera_andrade_stader)
+    app.teardown_appcontext(rakna_om_andrade_stader)
+    with app.app_context():
+        if prisstatistik_repo.ar_tom():
+            bygg_om_prisstatistik()
+        elif stader := prisstatistik_repo.hamta_smutsiga():
+            rakna_om_stader(stader)
@@ -0,0 +1,277 @@
+# tjanster/profilering.py
+"""
+🔥 PROFILERING - Visar var tiden går i långsamma requests, direkt i produktion.
+
+STATISTISK PROFILERING (sampling): Istället för att mäta varje funktionsanrop (som cProfile,
+som gör koden flera gånger långsammare) tittar en bakgrundstråd var PROFIL_INTERVALL_MS:e
+millisekund på vilken kod den profilerade requestens tråd kör just då (sys._current_frames).
+Varje "prov" är en anropsstack, t.ex.
+
+    lista_bostader;strom_i_delar;execute;...
+
+Stackar som förekommer i många prov är där tiden går. Proven sparas hopslagna
+("collapsed stacks": stack -> antal prov) och ritas som en flamgraf på /admin/profiler.
+
+VILKA REQUESTS PROFILERAS?
+- En slumpmässig andel (PROFIL_ANDEL, t.ex. 0.01 = 1 %). Standard: 0 = av.
+- Requests med headern 'X-Profilera: 1' från en inloggad admin.
+Är profileringen av kostar den bara en tidsmätning per request. Requests som tar längre
+tid än PROFIL_LANGSAM_MS listas alltid (utan profil) så att man ser VAD som är långsamt.
+
+ASYNC-ROUTES (t.ex. bostad_detalj): Flask kör coroutinen i en event-loop i en ANNAN tråd
+(asgiref), och frågorna körs i async-databasens pooltrådar. Requestens egen tråd väntar bara.
+Under en profilerad request kopplas därför de trådarna till profilen medan de arbetar åt den
+(koppla(), via en contextvar), och då tas proven på dem istället för på requestens tråd.
+
+RINGBUFFERTAR: De senaste PROFIL_MAX_ANTAL profilerna och långsamma requesterna sparas i
+minnet (collections.deque med maxlen) - äldre trillar ut automatiskt. Varje worker-process
+har sina egna buffertar.
+"""
+import contextvars
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import g, request
+from flask_login import current_user
+
+from dbrepositories.async_databas import async_databas
+
+STANDARD_INTERVALL_MS = 5
+STANDARD_MAX_ANTAL = 50
+STANDARD_LANGSAM_MS = 500
+
+# Max antal ramar per stack (djupare stackar kapas nerifrån)
+MAX_DJUP = 150
+
+# Rutor smalare än så här (andel av alla prov) ritas inte i flamgrafen
+MINSTA_BREDD = 0.002
+
+HEADER = 'X-Profilera'
+
+# Tråd-id:t för den profilerade request som koden körs åt (None = ingen). Följer med till
+# asgirefs event-loop och async-databasens pooltrådar.
+_profil = contextvars.ContextVar('profil', default=None)
+
+
+def _ramnamn(ram):
+    """'lista_bostader (bostader/bostader_routes.py:34)' - sista två delarna av sökvägen räcker."""
+    kod = ram.f_code
+    fil = '/'.join(kod.co_filename.replace(os.sep, '/').rsplit('/', 2)[-2:])
+    return f'{kod.co_name} ({fil}:{kod.co_firstlineno})'
+
+
+def _stack(ram):
+    """Anropsstacken som en sträng, yttersta anropet först, separerad med ';'."""
+    ramar = []
+    while ram is not None and len(ramar) < MAX_DJUP:
+        ramar.append(_ramnamn(ram).replace(';', ':'))
+        ram = ram.f_back
+    return ';'.join(reversed(ramar))
+
+
+class Provtagare:
+    """
+    EN bakgrundstråd som tar prov på alla trådar som profileras just nu.
+    Tråden sover (Event.wait) när ingen request profileras.
+    """
+
+    def __init__(self, intervall_ms=STANDARD_INTERVALL_MS):
+        self.intervall_ms = intervall_ms
+        self._las = threading.Lock()
+        self._aktiva = {}                  # trådens id -> Counter(stack -> antal prov)
+        self._kopplade = {}                # annan tråds id -> requesttrådens id (se koppla)
+        self._vakna = threading.Event()
+        self._trad = None
+
+    def starta(self, trad_id):
+        with self._las:
+            self._aktiva[trad_id] = Counter()
+            if self._trad is None:
+                self._trad = threading.Thread(target=self._kor, name='profilering', daemon=True)
+                self._trad.start()
+        self._vakna.set()
+
+    def stoppa(self, trad_id):
+        """Slutar ta prov på tråden. Returns: Counter med stackarna (tom om tråden inte profilerades)."""
+        with self._las:
+            return self._aktiva.pop(trad_id, Counter())
+
+    @contextmanager
+    def koppla(self):
+        """
+        Medan blocket körs tas proven för den profilerade requesten (om någon, se _profil)
+        på DEN HÄR tråden - t.ex. event-loopen som kör en async-route eller en databastråd.
+        """
+        trad_id = _profil.get()
+        if trad_id is None:
+            yield
+            return
+        egen = threading.get_ident()
+        with self._las:
+            self._kopplade[egen] = trad_id
+        try:
+            yield
+        finally:
+            with self._las:
+                self._kopplade.pop(egen, None)
+
+    def _kor(self):
+        egen = threading.get_ident()
+        while True:
+            with self._las:
+                aktiva = dict(self._aktiva)
+                # Requesttråd -> trådarna som arbetar åt den (annars requesttråden själv)
+                tradar = {}
+                for kopplad, trad_id in self._kopplade.items():
+                    tradar.setdefault(trad_id, []).append(kopplad)
+                if not aktiva:
+                    self._vakna.clear()
+            if not aktiva:
+                self._vakna.wait()
+                continue
+            ramar = sys._current_frames()
+            for trad_id, stackar in aktiva.items():
+                for provad in tradar.get(trad_id, [trad_id]):
+                    ram = ramar.get(provad)
+                    if ram is not None and provad != egen:
+                        stackar[_stack(ram)] += 1
+            del ramar   # Håll inte kvar referenser till andra trådars ramar
+            time.sleep(self.intervall_ms / 1000)
+
+
+class Profilerare:
+    """Bestämmer vilka requests som profileras och sparar resultaten i ringbuffertar."""
+
+    def __init__(self):
+        self.andel = 0.0
+        self.langsam_ms = STANDARD_LANGSAM_MS
+        self.provtagare = Provtagare()
+        self.profiler = deque(maxlen=STANDARD_MAX_ANTAL)     # De senaste profilerna
+        self.langsamma = deque(maxlen=STANDARD_MAX_ANTAL)    # De senaste långsamma requesterna
+        self._nasta_id = itertools.count(1)
+
+    def storlek(self, max_antal):
+        self.profiler = deque(self.profiler, maxlen=max_antal)
+        self.langsamma = deque(self.langsamma, maxlen=max_antal)
+
+    def hamta(self, profil_id):
+        return next((profil for profil in list(self.profiler) if profil['id'] == profil_id), None)
+
+    # ------------------------------------------------------------
+    # FLASK-KROKAR
+    # ------------------------------------------------------------
+
+    def fore_request(self):
+        g.profil_start = time.perf_counter()
+        orsak = None
+        if request.headers.get(HEADER) and current_user.is_authenticated and current_user.role == 'admin':
+            orsak = 'header'
+        elif self.andel and random.random() < self.andel:
+            orsak = 'slump'
+        # Sätts för varje request, så att en återanvänd tråd inte ärver förra requestens profil
+        _profil.set(threading.get_ident() if orsak else None)
+        if orsak:
+            g.profil_orsak = orsak
+            self.provtagare.starta(threading.get_ident())
+
+    def efter_request(self, svar):
+        """
+        Avslutar mätningen när svaret STÄNGS - för strömmade sidor är det när sista biten
+        skickats, inte när vyfunktionen returnerat.
+        """
+        if 'profil_start' not in g:
+            return svar
+        uppgifter = {
+            'metod': request.method, 'url': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint, 'status': svar.status_code,
+        }
+        start, orsak, trad_id = g.pop('profil_start'), g.pop('profil_orsak', None), threading.get_ident()
+        svar.call_on_close(lambda: self._avsluta(start, orsak, trad_id, uppgifter))
+        return svar
+
+    def _avsluta(self, start, orsak, trad_id, uppgifter):
+        ms = (time.perf_counter() - start) * 1000
+        profil_id = None
+        if orsak:
+            stackar = self.provtagare.stoppa(trad_id)
+            profil_id = next(self._nasta_id)
+            self.profiler.append({'id': profil_id, 'tid': datetime.now(), 'ms': ms, 'orsak': orsak,
+                                  'prover': sum(stackar.values()), 'stackar': dict(stackar), **uppgifter})
+        if ms >= self.langsam_ms:
+            self.langsamma.append({'tid': datetime.now(), 'ms': ms, 'profil_id': profil_id, **uppgifter})
+
+    def vid_fel(self, fel=None):
+        """Slutar ta prov om requesten kraschade innan något svar skapades."""
+        if fel is not None and g.pop('profil_orsak', None):
+            self.provtagare.stoppa(threading.get_ident())
+
+
+# EN profilerare per worker-process
+profilerare = Profilerare()
+
+
+def kollapsade_stackar(stackar):
+    """Text i formatet 'stack antal' per rad - kan läsas av flamegraph.pl och speedscope."""
+    return ''.join(f'{stack} {antal}\n' for stack, antal in sorted(stackar.items()))
+
+
+def flamgraf(stackar):
+    """
+    Räknar ut rutorna i en flamgraf (ovanifrån: yttersta anropet överst).
+
+    Returns:
+        tuple: (rutor, djup) där varje ruta är en dict med namn, antal, x och bredd
+               (andelar 0-1 av alla prov) samt djup (rad nummer).
+    """
+    # 1. Bygg ett träd: varje nod är en funktion, barnen är det den anropade
+    rot = {'antal': 0, 'barn': {}}
+    for stack, antal in stackar.items():
+        rot['antal'] += antal
+        nod = rot
+        for namn in stack.split(';'):
+            nod = nod['barn'].setdefault(namn, {'antal': 0, 'barn': {}})
+            nod['antal'] += antal
+
+    # 2. Lägg ut rutorna: barnen delar på förälderns bredd i proportion till sina prov
+    rutor, storsta_djup = [], 0
+    totalt = rot['antal'] or 1
+    att_besoka = [(rot, 0.0, -1)]
+    while att_besoka:
+        nod, x, djup = att_besoka.pop()
+        for namn, barn in sorted(nod['barn'].items()):
+            bredd = barn['antal'] / totalt
+            if bredd >= MINSTA_BREDD:
+                rutor.append({'namn': namn, 'antal': barn['antal'], 'x': x, 'bredd': bredd, 'djup': djup + 1})
+                storsta_djup = max(storsta_djup, djup + 1)
+                att_besoka.append((barn, x, djup + 1))
+            x += bredd
+    return rutor, storsta_djup + 1
+
+
+def init_profilering(app):
+    """Läser in inställningarna och kopplar profileraren till varje request."""
+    profilerare.andel = app.config.get('PROFIL_ANDEL', 0.0)
+    profilerare.langsam_ms = app.config.get('PROFIL_LANGSAM_MS', STANDARD_LANGSAM_MS)
+    profilerare.provtagare.intervall_ms = app.config.get('PROFIL_INTERVALL_MS', STANDARD_INTERVALL_MS)
+    profilerare.storlek(app.config.get('PROFIL_MAX_ANTAL', STANDARD_MAX_ANTAL))
+    # Async-routes och deras databasfrågor körs i andra trådar - koppla dem till profilen
+    async_databas.runt_fraga = profilerare.provtagare.koppla
+    standard_async_to_sync = app.async_to_sync
+
+    def async_to_sync(funktion):
+        async def i_kopplad_trad(*args, **kwargs):
+            with profilerare.provtagare.koppla():
+                return await funktion(*args, **kwargs)
+        return standard_async_to_sync(i_kopplad_trad)
+
+    app.async_to_sync = async_to_sync
+    app.before_request(profilerare.fore_request)
+    app.after_request(profilerare.efter_request)
+    app.teardown_request(profilerare.vid_fel)
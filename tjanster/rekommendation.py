@@ -0,0 +1,232 @@
+# tjanster/rekommendation.py
+"""
+🧭 REKOMMENDATION - "Liknande bostäder" med vektoriserad k-närmaste-granne-sökning.
+
+IDÉN: Varje bostad beskrivs av en rad tal (en "egenskapsvektor"):
+
+    [log(pris), yta, rum, lat, lon]  + vilken stad den ligger i
+
+Alla vektorer ligger i EN NumPy-matris (en rad per bostad). För att hitta bostäder som
+liknar bostad X räknas avståndet från X:s rad till ALLA rader i ett enda NumPy-uttryck,
+och de k minsta plockas ut med np.argpartition. Ingen SQL körs per detaljsida.
+
+NORMALISERING: Kolumnerna har helt olika skala (pris i miljoner, rum 1-10). Därför
+räknas varje kolumn om till "antal standardavvikelser från medel" (z-värde) innan
+avstånden räknas, och viktas med VIKTER. Saknas ett värde (t.ex. koordinater) används
+medelvärdet, så att det varken drar bostaden närmare eller längre bort.
+Bostäder i en ANNAN stad får ett straff-avstånd (VIKTER['stad']).
+
+UPPDATERING:
+- Inkrementellt: bostad_andrad() är lyssnare på BostadRepository och uppdaterar,
+  lägger till eller tar bort EN rad i matrisen.
+  Matrisen har plats för fler rader än den använder och dubblas när den blir full,
+  så att en import av tusentals bostäder inte kopierar hela matrisen för varje ny rad.
+- I bulk: bygg_om() läser alla bostäder med en fråga. Görs automatiskt vid första
+  anropet, och igen när matrisen är äldre än max_alder_sekunder (andra workers
+  kan ju ha ändrat bostäder som den här processen inte fått höra om).
+  Frågan körs UTAN låset. Ändringar som lyssnaren får under tiden sparas i en buffert och
+  spelas upp på den nya matrisen innan den byts in (som i tjanster/autokomplettering.py).
+"""
+import threading
+import time
+import warnings
+
+import numpy as np
+
+from dbrepositories.bostad_repository import bostad_repo
+from tjanster.pris import pris_till_kronor
+
+# Hur mycket varje egenskap betyder för avståndet (0 = ignoreras)
+VIKTER = {
+    'pris': 1.0,
+    'yta': 1.0,
+    'rum': 0.7,
+    'lat': 0.8,
+    'lon': 0.8,
+    'stad': 1.5,   # Extra avstånd om bostäderna ligger i olika städer
+}
+EGENSKAPER = ('pris', 'yta', 'rum', 'lat', 'lon')
+
+STANDARD_MAX_ALDER_SEKUNDER = 300
+
+# Antal liknande bostäder som visas på detaljsidan
+ANTAL_LIKNANDE = 3
+
+
+def _egenskaper(bostad):
+    """Bostadens egenskapsvektor (NaN där värde saknas). bostad är en dict eller tupel-rad."""
+    pris = pris_till_kronor(bostad['pris'])
+    return [
+        np.log(pris) if pris else np.nan,
+        bostad['yta'] if bostad['yta'] is not None else np.nan,
+        bostad['rum'] if bostad['rum'] is not None else np.nan,
+        bostad['lat'] if bostad['lat'] is not None else np.nan,
+        bostad['lon'] if bostad['lon'] is not None else np.nan,
+    ]
+
+
+class Rekommenderare:
+    """
+    Håller egenskapsmatrisen för alla bostäder och svarar på "vilka liknar bostad X?".
+    Trådsäker: alla ändringar och sökningar sker under ett lås.
+    """
+
+    def __init__(self, max_alder_sekunder=STANDARD_MAX_ALDER_SEKUNDER):
+        self.max_alder_sekunder = max_alder_sekunder
+        self._las = threading.Lock()
+        self._byggd = None              # time.monotonic() när matrisen byggdes, None = aldrig
+        # Bara de första self._antal raderna används - resten är plats för nya bostäder
+        self._antal = 0
+        self._idn = np.empty(0, dtype=np.int64)
+        self._rader = np.empty((0, len(EGENSKAPER)))
+        self._stad = np.empty(0, dtype=np.int64)
+        self._rad_for_id = {}           # bostad-id -> radnummer i matrisen
+        self._stadskoder = {}           # stadsnamn -> heltal
+        self._normaliserad = None       # Cache av den viktade z-matrisen (None = måste räknas om)
+        self._buffertar = []            # En lista med ändringar per bygge som pågår
+
+    # ------------------------------------------------------------
+    # BYGGA OCH UPPDATERA
+    # ------------------------------------------------------------
+
+    def bygg_om(self):
+        """Läser alla bostäder med EN fråga och bygger matrisen från grunden."""
+        buffert = []
+        with self._las:
+            self._buffertar.append(buffert)
+        try:
+            rader = bostad_repo.hamta_kolumnvarden('id', 'stad', 'pris', 'rum', 'yta', 'lat', 'lon')
+            stadskoder = {}
+            idn = np.array([rad.id for rad in rader], dtype=np.int64)
+            egenskaper = np.array([_egenskaper(rad._mapping) for rad in rader], dtype=float).reshape(-1, len(EGENSKAPER))
+            stad = np.array([stadskoder.setdefault(rad.stad, len(stadskoder)) for rad in rader], dtype=np.int64)
+            with self._las:
+                self._stadskoder, self._idn, self._rader, self._stad = stadskoder, idn, egenskaper, stad
+                self._antal = len(idn)
+                self._rad_for_id = {int(bostad_id): i for i, bostad_id in enumerate(idn)}
+                # Ändringarna sedan bygget började (en del kan redan finnas i läsningen - att
+                # spela upp dem igen ger samma rad). Låset hålls, så ingen ser matrisen innan dess.
+                for operation, fore, efter in buffert:
+                    self._andra(operation, fore, efter)
+                self._normaliserad = None
+                self._byggd = time.monotonic()
+        finally:
+            with self._las:
+                self._buffertar.remove(buffert)
+
+    def _stadskod(self, stad):
+        return self._stadskoder.setdefault(stad, len(self._stadskoder))
+
+    def bostad_andrad(self, operation, fore, efter):
+        """
+        Lyssnare på BostadRepository: uppdaterar EN rad i matrisen.
+        Om matrisen inte byggts än görs inget - den byggs ändå vid första sökningen.
+        """
+        with self._las:
+            for buffert in self._buffertar:
+                buffert.append((operation, fore, efter))
+            if self._byggd is None:
+                return
+            self._andra(operation, fore, efter)
+            self._normaliserad = None
+
+    def _andra(self, operation, fore, efter):
+        if operation in ('radera', 'arkivera'):
+            self._ta_bort(fore['id'])
+        else:
+            self._satt(efter)
+
+    def _satt(self, bostad):
+        """Lägger till eller skriver över bostadens rad."""
+        rad = self._rad_for_id.get(bostad['id'])
+        if rad is None:
+            rad = self._antal
+            if rad == len(self._idn):
+                self._vaxa()
+            self._antal += 1
+            self._rad_for_id[bostad['id']] = rad
+            self._idn[rad] = bostad['id']
+        self._rader[rad] = _egenskaper(bostad)
+        self._stad[rad] = self._stadskod(bostad['stad'])
+
+    def _vaxa(self):
+        """Dubblar platsen i matrisen (minst 64 rader), så att n nya rader kopieras O(log n) gånger."""
+        plats = max(64, 2 * len(self._idn))
+        self._idn = np.resize(self._idn, plats)
+        self._stad = np.resize(self._stad, plats)
+        rader = np.empty((plats, len(EGENSKAPER)))
+        rader[:self._antal] = self._rader[:self._antal]
+        self._rader = rader
+
+    def _ta_bort(self, bostad_id):
+        """Tar bort bostadens rad genom att flytta SISTA raden till dess plats (O(1) per kolumn)."""
+        rad = self._rad_for_id.pop(bostad_id, None)
+        if rad is None:
+            return
+        sista = self._antal - 1
+        if rad != sista:
+            self._idn[rad] = self._idn[sista]
+            self._rader[rad] = self._rader[sista]
+            self._stad[rad] = self._stad[sista]
+            self._rad_for_id[int(self._idn[rad])] = rad
+        self._antal = sista
+
+    # ------------------------------------------------------------
+    # SÖKA
+    # ------------------------------------------------------------
+
+    def _viktad_matris(self):
+        """Z-normaliserad och viktad matris, med saknade värden = 0 (dvs. medelvärdet)."""
+        if self._normaliserad is None:
+            rader = self._rader[:self._antal]
+            # En kolumn helt utan värden (t.ex. inga koordinater än) ger NaN - det hanteras nedan
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                medel = np.nanmean(rader, axis=0) if len(rader) else np.zeros(rader.shape[1])
+                spridning = np.nanstd(rader, axis=0) if len(rader) else np.ones(rader.shape[1])
+            spridning = np.where(np.isfinite(spridning) & (spridning > 0), spridning, 1.0)
+            z = np.nan_to_num((rader - np.nan_to_num(medel)) / spridning)
+            self._normaliserad = z * np.array([VIKTER[namn] for namn in EGENSKAPER])
+        return self._normaliserad
+
+    def liknande(self, bostad_id, k=4):
+        """
+        Returnerar id:n för de k bostäder som liknar bostad_id mest (närmast först).
+
+        Args:
+            bostad_id (int): Bostaden att jämföra med.
+            k (int): Hur många förslag som önskas.
+
+        Returns:
+            list: Bostad-id:n, eller en tom lista om bostaden är okänd.
+        """
+        if self._byggd is None or time.monotonic() - self._byggd > self.max_alder_sekunder:
+            self.bygg_om()
+
+        with self._las:
+            rad = self._rad_for_id.get(bostad_id)
+            if rad is None or self._antal < 2:
+                return []
+
+            matris = self._viktad_matris()
+            # Kvadrerat avstånd till ALLA bostäder på en gång (ingen Python-loop)
+            avstand = np.einsum('ij,ij->i', matris - matris[rad], matris - matris[rad])
+            avstand += (self._stad[:self._antal] != self._stad[rad]) * VIKTER['stad'] ** 2
+            avstand[rad] = np.inf   # Bostaden själv ska inte föreslås
+
+            k = min(k, len(avstand) - 1)
+            # argpartition hittar de k minsta i linjär tid; bara de k sorteras sedan
+            narmaste = np.argpartition(avstand, k - 1)[:k]
+            narmaste = narmaste[np.argsort(avstand[narmaste])]
+            return [int(bostad_id) for bostad_id in self._idn[narmaste]]
+
+
+# EN gemensam rekommenderare för hela appen
+rekommenderare = Rekommenderare()
+
+
+def init_rekommendation(app):
+    """Kopplar rekommenderaren till BostadRepository och läser inställningar från config."""
+    rekommenderare.max_alder_sekunder = app.config.get('REKOMMENDATION_MAX_ALDER', STANDARD_MAX_ALDER_SEKUNDER)
+    if rekommenderare.bostad_andrad not in bostad_repo.lyssnare:
+        bostad_repo.registrera_lyssnare(rekommenderare.bostad_andrad)
@@ -0,0 +1,63 @@
+# tjanster/sidcache.py
+"""
+📄 SIDCACHE - Sparar färdigrenderade svar (HTML/JSON) i den gemensamma cache-backenden.
+
+Används som en decorator på routes vars svar är SAMMA för alla besökare:
+
+    @kontor_bp.route('/api/data')
+    @cachad_sida('kontor', ttl_sekunder=300)
+    def api_kontor_data():
+        ...
+
+Fungerar även på async-routes (async def).
+
+VARNING: Använd den INTE på sidor som visar något personligt (inloggad användare,
+flash-meddelanden, formulär med CSRF-token) - då skulle alla få samma svar.
+
+Svaren ogiltigförklaras INTE när datan ändras - de lever tills ttl_sekunder gått ut.
+Använd den alltså bara för data som sällan ändras och får vara så gammal (kontoren
+ändras bara i startdatan eller direkt i databasen).
+"""
+from functools import wraps
+
+from flask import current_app, request, make_response
+
+from dbrepositories.cache_backend import SAKNAS, hamta_backend
+
+# Headers som sparas tillsammans med svaret
+SPARADE_HEADERS = ('Content-Type',)
+
+
+def cachad_sida(namn, ttl_sekunder=60):
+    """
+    Decorator som cachar GET-svar med statuskod 200, nycklat på URL inklusive query-sträng.
+
+    Args:
+        namn (str): Namnrymd i cache-backenden, t.ex. 'kontor'.
+        ttl_sekunder (int): Hur länge ett svar får återanvändas.
+    """
+    namnrymd = f'sida:{namn}'
+
+    def decorator(vy):
+        @wraps(vy)
+        def omslag(*args, **kwargs):
+            # ensure_sync: en async-route körs klart i en event-loop, en vanlig anropas som den är
+            kor_vy = current_app.ensure_sync(vy)
+            if request.method != 'GET':
+                return kor_vy(*args, **kwargs)
+
+            backend = hamta_backend()
+            nyckel = request.full_path
+            sparat, version = backend.hamta(namnrymd, nyckel)
+            if sparat is not SAKNAS:
+                kropp, headers = sparat
+                return make_response(kropp, 200, headers)
+
+            svar = make_response(kor_vy(*args, **kwargs))
+            if svar.status_code == 200 and not svar.is_streamed:
+                headers = {header: svar.headers[header] for header in SPARADE_HEADERS if header in svar.headers}
+                backend.spara(namnrymd, nyckel, (svar.get_data(), headers), ttl_sekunder, version)
+            return svar
+        return omslag
+    return decorator
+
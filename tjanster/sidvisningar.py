@@ -0,0 +1,155 @@
+# tjanster/sidvisningar.py
+"""
+👁️ SIDVISNINGAR - Räknar visningar av bostäder och nyheter utan en databasskrivning per visning.
+
+PROBLEMET: Att skriva en rad (eller göra en UPDATE) vid VARJE sidvisning skulle ge lika
+många skrivningar som läsningar. SQLite låser hela databasen vid skrivning, så
+besökarna skulle börja vänta på varandra.
+
+LÖSNINGEN:
+1. Varje worker-process räknar visningarna i MINNET (en dictionary bakom ett lås).
+2. En bakgrundstråd skriver tillskotten (deltan) var FLUSH_SEKUNDER:e sekund med EN
+   UPSERT-sats (SidvisningRepository.spara_deltan). 1000 visningar av 50 bostäder blir
+   alltså en sats med 50 rader, inte 1000 skrivningar.
+3. När processen avslutas skrivs det som finns kvar (atexit).
+
+POPULÄRT JUST NU: Varje visning ger en poäng som växer exponentiellt med tiden
+(framåtriktat avklingande, se models/sidvisning.py). Att sortera på summan av poängen
+ger samma ordning som om alla gamla visningar hade halverats var HALVERINGSTID:e sekund.
+
+Bakgrundstråden startas först vid första visningen - terminalkommandon startar ingen tråd.
+Sidor som frysts till statiska filer (tjanster/frysning.py) räknas inte.
+"""
+import atexit
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app, has_request_context, request
+
+from dbrepositories.sidvisning_repository import sidvisning_repo
+from tjanster.frysning import FRYSNING_NYCKEL
+
+STANDARD_FLUSH_SEKUNDER = 5
+STANDARD_HALVERINGSTID = 6 * 3600     # En visning väger hälften så mycket efter 6 timmar
+
+# En ny epok börjar efter så här många halveringstider (2^200 ryms gott i en float)
+EPOK_HALVERINGAR = 200
+EPOK_SKALA = 2.0 ** -EPOK_HALVERINGAR
+
+
+class Visningsraknare:
+    """
+    Räknar visningar i minnet och skriver dem till databasen i klump. Trådsäker.
+    EN instans per worker-process (se 'visningsraknare' nedan).
+    """
+
+    def __init__(self, flush_sekunder=STANDARD_FLUSH_SEKUNDER, halveringstid=STANDARD_HALVERINGSTID):
+        self.flush_sekunder = flush_sekunder
+        self.halveringstid = halveringstid
+        self._las = threading.Lock()
+        self._deltan = {}     # (typ, entitet_id) -> [antal, poang, senast]
+        self._epok = None     # Epoken som poängen i _deltan är räknade i
+        self._app = None
+        self._trad = None
+
+    def epok_och_vikt(self, tid=None):
+        """
+        Returns:
+            tuple: (epok, vikt) - epoken just nu och poängen som en visning ger just nu.
+        """
+        halveringar = (time.time() if tid is None else tid) / self.halveringstid
+        epok = int(halveringar // EPOK_HALVERINGAR)
+        return epok, 2.0 ** (halveringar - epok * EPOK_HALVERINGAR)
+
+    def registrera(self, typ, *entitet_idn):
+        """Räknar EN visning för varje id. Körs i requesten - rör aldrig databasen."""
+        if has_request_context() and request.environ.get(FRYSNING_NYCKEL):
+            return   # Sidan renderas till en statisk fil - ingen besökare har sett den
+        epok, vikt = self.epok_och_vikt()
+        nu = datetime.now()
+        with self._las:
+            if self._epok != epok:
+                # Ny epok sedan förra visningen: räkna om det som redan buffrats
+                for delta in self._deltan.values():
+                    delta[1] *= EPOK_SKALA
+                self._epok = epok
+            for entitet_id in entitet_idn:
+                delta = self._deltan.setdefault((typ, entitet_id), [0, 0.0, nu])
+                delta[0] += 1
+                delta[1] += vikt
+                delta[2] = nu
+        if self._trad is None:
+            self._starta_trad()
+
+    def spara(self):
+        """
+        Skriver alla buffrade deltan till databasen med EN sats. Kräver ett app-context.
+        Misslyckas skrivningen läggs deltan tillbaka, så inga visningar försvinner.
+        """
+        with self._las:
+            deltan, epok = self._deltan, self._epok
+            self._deltan = {}
+        if not deltan:
+            return 0
+
+        rader = [{'typ': typ, 'entitet_id': entitet_id, 'antal': antal, 'poang': poang, 'senast': senast}
+                 for (typ, entitet_id), (antal, poang, senast) in deltan.items()]
+        try:
+            sidvisning_repo.spara_deltan(rader, epok, EPOK_SKALA)
+        except Exception:
+            current_app.logger.exception('Kunde inte spara %d visningsräknare', len(rader))
+            self._lagg_tillbaka(deltan, epok)
+            return 0
+        return len(rader)
+
+    def _lagg_tillbaka(self, deltan, epok):
+        with self._las:
+            if self._epok != epok:
+                return   # Epoken har bytts under tiden - så gamla poäng är försumbara
+            for nyckel, (antal, poang, senast) in deltan.items():
+                delta = self._deltan.setdefault(nyckel, [0, 0.0, senast])
+                delta[0] += antal
+                delta[1] += poang
+
+    def populara(self, modell, typ, antal=5):
+        """
+        De mest visade objekten just nu (enligt databasen - upp till flush_sekunder gammalt).
+
+        Returns:
+            list: Tupler (objekt, antal visningar totalt), populärast först.
+        """
+        epok, _ = self.epok_och_vikt()
+        return sidvisning_repo.hamta_populara(modell, typ, epok, EPOK_SKALA, antal)
+
+    # ------------------------------------------------------------
+    # BAKGRUNDSTRÅDEN
+    # ------------------------------------------------------------
+
+    def _starta_trad(self):
+        with self._las:
+            if self._trad is not None:
+                return
+            self._app = current_app._get_current_object()
+            self._trad = threading.Thread(target=self._kor, name='sidvisningar', daemon=True)
+            self._trad.start()
+        atexit.register(self._spara_med_app)
+
+    def _kor(self):
+        while True:
+            time.sleep(self.flush_sekunder)
+            self._spara_med_app()
+
+    def _spara_med_app(self):
+        with self._app.app_context():
+            self.spara()
+
+
+# EN räknare per worker-process
+visningsraknare = Visningsraknare()
+
+
+def init_sidvisningar(app):
+    """Läser in inställningarna för räknaren."""
+    visningsraknare.flush_sekunder = app.config.get('VISNING_FLUSH_SEKUNDER', STANDARD_FLUSH_SEKUNDER)
+    visningsraknare.halveringstid = app.config.get('POPULAR_HALVERINGSTID', STANDARD_HALVERINGSTID)
@@ -0,0 +1,39 @@
+# tjanster/strommning.py
+"""
+🌊 STRÖMNING - Skickar långa listsidor till webbläsaren MEDAN de renderas.
+
+render_template() bygger hela HTML-sidan i minnet innan första byten skickas. Med
+10 000 bostäder får besökaren vänta på hela sidan, och servern håller både alla
+Bostad-objekt och hela HTML-strängen i minnet samtidigt.
+
+strommad_mall() renderar istället mallen BIT FÖR BIT (Jinjas template.stream()) och
+skickar bitarna direkt. Tillsammans med en generator från repositoryt (en kort fråga per del) blir
+både tiden till första byten och minnesanvändningen densamma oavsett listans längd.
+
+Bitarna buffras ihop (BUFFERT_ANTAL delar per skrivning), annars skulle varje liten
+mall-del bli en egen skrivning till nätverket.
+"""
+from flask import Response, current_app, get_flashed_messages, stream_with_context
+
+# Antal mall-delar som slås ihop till en skrivning
+BUFFERT_ANTAL = 50
+
+
+def strommad_mall(mall, **kontext):
+    """
+    Som render_template(), men returnerar ett strömmat svar.
+
+    Args:
+        mall (str): Mallens namn, t.ex. 'bostader_lista.html'.
+        **kontext: Variablerna till mallen. Listor får gärna vara generatorer - de
+                   konsumeras först när mallen når dem.
+    """
+    app = current_app._get_current_object()
+    # Flash-meddelandena tas ur sessionen NU: sessionen sparas när svaret börjar skickas,
+    # innan mallen hunnit läsa dem (de sparas i requesten och visas ändå av mallen)
+    get_flashed_messages()
+    app.update_template_context(kontext)   # current_user, url_for ... som i render_template
+    strom = app.jinja_env.get_or_select_template(mall).stream(kontext)
+    strom.enable_buffering(BUFFERT_ANTAL)
+    # stream_with_context: request och databassession lever tills sista biten skickats
+    return Response(stream_with_context(strom), mimetype='text/html')
@@ -0,0 +1,62 @@
+# tjanster/validering.py
+"""
+✅ VALIDERING - Affärsreglerna för en bostad, på ETT ställe.
+
+Används av både admin-formuläret (en bostad åt gången) och bulkimporten (tusentals rader),
+så att en bostad som godkänns i formuläret också godkänns i en importfil - och tvärtom.
+"""
+from models.bostad import STATUSAR
+
+# Fält som MÅSTE finnas i en rad
+OBLIGATORISKA_FALT = ('adress', 'stad', 'pris', 'rum', 'yta')
+
+
+def validera_rad(rad):
+    """
+    Validerar, konverterar datatyper och rensar EN bostad (formulär, CSV-rad eller JSON-objekt).
+
+    Args:
+        rad (Mapping): Fältnamn -> värde. Värdena får vara text (formulär/CSV) eller tal (JSON).
+
+    Returns:
+        tuple: (data, None) om raden är giltig, annars (None, felmeddelande).
+               data innehåller 'id' om raden angav ett (= uppdatera befintlig bostad).
+    """
+    saknas = [falt for falt in OBLIGATORISKA_FALT if rad.get(falt) in (None, '')]
+    if saknas:
+        return None, 'Saknar ' + ', '.join(saknas)
+
+    try:
+        # Hämta, rensa (strip) och konvertera till korrekta typer
+        data = {
+            'adress': str(rad['adress']).strip(),
+            'stad': str(rad['stad']).strip(),
+            'pris': str(rad['pris']).strip(),
+            # Försök konvertera till heltal: detta utlöser ValueError om det misslyckas
+            'rum': int(rad['rum']),
+            'yta': int(rad['yta']),
+            'beskrivning': str(rad.get('beskrivning') or '').strip()
+        }
+    except (TypeError, ValueError):
+        return None, 'Rum och yta måste vara heltal'
+
+    # Affärsvalidering (t.ex. säkerställa att värden är rimliga)
+    if not data['adress'] or not data['stad']:
+        return None, 'Adress och stad får inte vara tomma'
+    if data['rum'] < 1 or data['yta'] < 1:
+        return None, 'Rum och yta måste vara minst 1'
+
+    # Valfri status, t.ex. 'sald' (saknas den blir en ny bostad 'aktiv' och en befintlig behåller sin)
+    if rad.get('status') not in (None, ''):
+        data['status'] = str(rad['status']).strip()
+        if data['status'] not in STATUSAR:
+            return None, 'Status måste vara en av ' + ', '.join(STATUSAR)
+
+    # Valfritt id = uppdatera en befintlig bostad istället för att skapa en ny
+    if rad.get('id') not in (None, ''):
+        try:
+            data['id'] = int(rad['id'])
+        except (TypeError, ValueError):
+            return None, 'Id måste vara ett heltal'
+
+    return data, None
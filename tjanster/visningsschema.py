@@ -0,0 +1,346 @@
+# tjanster/visningsschema.py
+"""
+🗓️ VISNINGSSCHEMA - Vem är ledig när? Krockar, lediga tider och kalenderfiler för visningar.
+
+PROBLEMET: "Vilka mäklare på kontoret är lediga på lördag 12-13?" och "visa veckans lediga
+tider för alla mäklare" skulle bli en SQL-fråga per mäklare och dag - och fler ju fler
+visningar som bokas.
+
+LÖSNINGEN: Ett INTERVALLINDEX per mäklare i minnet: mäklarens visningar som (start, slut, id),
+sorterade på start. En visning får vara högst MAX_LANGD_MINUTER lång, så de visningar som
+överlappar [fran, till) är exakt de som BÖRJAR i [fran - MAX_LANGD, till) och SLUTAR efter
+fran. Det intervallet hittas med två binärsökningar (bisect): O(log n + träffar) per mäklare,
+oavsett hur många visningar som bokats totalt.
+
+Indexet är en snabb KOPIA för läsning. Den slutgiltiga krockkontrollen görs av
+visning_repo.boka() i databasen, så två workers kan inte dubbelboka samma mäklare.
+
+UPPDATERING (som tjanster/rekommendation.py):
+- Inkrementellt: lyssnare på visning_repo, bostad_repo och maklare_repo.
+- I bulk: bygg_om() läser alla visningar som inte är slut (en fråga) och alla mäklare,
+  vid första anropet och sedan när schemat är äldre än max_alder_sekunder. Frågorna körs
+  UTAN låset; ändringar som lyssnarna får under tiden sparas i en buffert och spelas upp
+  innan det nya schemat används (som i tjanster/autokomplettering.py). Annars kunde en
+  visning som bokades under läsningen saknas, och mäklaren se ledig ut, tills nästa bygge.
+
+KALENDER: kalender_ics() gör en iCalendar-fil (.ics, RFC 5545) som t.ex. Outlook och
+Google Kalender kan prenumerera på (se /maklare/<id>/visningar.ics och /kontor/<id>/visningar.ics).
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta, timezone
+
+from dbrepositories.bostad_repository import bostad_repo
+from dbrepositories.dto import MaklareDTO
+from dbrepositories.maklare_repository import maklare_repo
+from dbrepositories.visning_repository import visning_repo
+from models.visning import MAX_LANGD_MINUTER
+
+MAX_LANGD = timedelta(minutes=MAX_LANGD_MINUTER)
+STANDARD_MAX_ALDER_SEKUNDER = 300
+STANDARD_LANGD_MINUTER = 30            # En visning utan angiven sluttid (t.ex. från Hemnet)
+ARBETSTID = (9, 19)                    # Lediga tider räknas bara mellan 09 och 19
+MINSTA_LUCKA_MINUTER = 30              # Kortare luckor än så räknas inte som lediga
+
+
+class Intervallindex:
+    """
+    EN mäklares visningar som (start, slut, visning_id), sorterade på start.
+    Inte trådsäkert - Visningsschema har låset.
+    """
+
+    def __init__(self):
+        self._poster = []
+
+    def __len__(self):
+        return len(self._poster)
+
+    def lagg_till(self, start, slut, visning_id):
+        insort(self._poster, (start, slut, visning_id))
+
+    def ta_bort(self, start, slut, visning_id):
+        post = (start, slut, visning_id)
+        i = bisect_left(self._poster, post)
+        if i < len(self._poster) and self._poster[i] == post:
+            del self._poster[i]
+
+    def overlappar(self, fran, till):
+        """Returns: list: (start, slut, visning_id) för visningarna som överlappar [fran, till)."""
+        forsta = bisect_left(self._poster, (fran - MAX_LANGD,))
+        sista = bisect_left(self._poster, (till,))
+        return [post for post in self._poster[forsta:sista] if post[1] > fran]
+
+    def luckor(self, fran, till, minsta):
+        """
+        De lediga luckorna i [fran, till) som är minst 'minsta' långa.
+
+        Returns:
+            list: (start, slut)-par i tidsordning.
+        """
+        luckor = []
+        ledig_fran = fran
+        for start, slut, _ in self.overlappar(fran, till):
+            if start - ledig_fran >= minsta:
+                luckor.append((ledig_fran, start))
+            ledig_fran = max(ledig_fran, slut)
+        if till - ledig_fran >= minsta:
+            luckor.append((ledig_fran, till))
+        return luckor
+
+
+def arbetsdagar(fran, till, arbetstid=ARBETSTID):
+    """Arbetstiden varje dag i [fran, till), som (start, slut)-par (alla veckodagar - visningar hålls även på helger)."""
+    dag = datetime.combine(fran.date(), datetime.min.time())
+    while dag < till:
+        start = max(fran, dag + timedelta(hours=arbetstid[0]))
+        slut = min(till, dag + timedelta(hours=arbetstid[1]))
+        if start < slut:
+            yield start, slut
+        dag += timedelta(days=1)
+
+
+class Visningsschema:
+    """
+    Ett Intervallindex per mäklare, och vilka mäklare som jobbar på vilket kontor.
+    Trådsäkert: alla ändringar och sökningar sker under ett lås.
+    """
+
+    def __init__(self, max_alder_sekunder=STANDARD_MAX_ALDER_SEKUNDER):
+        self.max_alder_sekunder = max_alder_sekunder
+        self._las = threading.Lock()
+        self._byggd = None              # time.monotonic() när schemat byggdes, None = aldrig
+        self._index = {}                # maklare_id -> Intervallindex
+        self._visningar = {}            # visning_id -> (bostad_id, maklare_id, start, slut)
+        self._per_bostad = {}           # bostad_id -> {visning_id, ...}
+        self._maklare = {}              # maklare_id -> MaklareDTO
+        self._buffertar = []            # En lista med ändringar per bygge som pågår
+
+    # ------------------------------------------------------------
+    # BYGGA OCH UPPDATERA
+    # ------------------------------------------------------------
+
+    def bygg_om(self):
+        """Läser alla visningar som inte är slut och alla mäklare (två frågor) och bygger om schemat."""
+        buffert = []
+        with self._las:
+            self._buffertar.append(buffert)
+        try:
+            rader = visning_repo.hamta_kolumnvarden(datetime.now())
+            maklare = maklare_repo.hamta_alla(som_dto=True)
+            with self._las:
+                self._index, self._visningar, self._per_bostad = {}, {}, {}
+                self._maklare = {rad.id: rad for rad in maklare}
+                for visning_id, bostad_id, maklare_id, start, slut in sorted(rader, key=lambda rad: rad.start):
+                    self._satt(visning_id, bostad_id, maklare_id, start, slut)
+                # Ändringarna sedan bygget började (en del kan redan finnas i läsningen - att
+                # spela upp dem igen ger samma schema)
+                for andra, operation, fore, efter in buffert:
+                    andra(operation, fore, efter)
+                self._byggd = time.monotonic()
+        finally:
+            with self._las:
+                self._buffertar.remove(buffert)
+
+    def _sakerstall_aktuellt(self):
+        if self._byggd is None or time.monotonic() - self._byggd > self.max_alder_sekunder:
+            self.bygg_om()
+
+    def _satt(self, visning_id, bostad_id, maklare_id, start, slut):
+        """Lägger till en visning (anropas med låset taget). Listan i indexet hålls sorterad."""
+        self._visningar[visning_id] = (bostad_id, maklare_id, start, slut)
+        self._index.setdefault(maklare_id, Intervallindex()).lagg_till(start, slut, visning_id)
+        self._per_bostad.setdefault(bostad_id, set()).add(visning_id)
+
+    def _ta_bort(self, visning_id):
+        visning = self._visningar.pop(visning_id, None)
+        if visning is None:
+            return
+        bostad_id, maklare_id, start, slut = visning
+        self._index[maklare_id].ta_bort(start, slut, visning_id)
+        self._per_bostad[bostad_id].discard(visning_id)
+        if not self._per_bostad[bostad_id]:
+            del self._per_bostad[bostad_id]
+
+    def _lyssna(self, andra, operation, fore, efter):
+        """Tillämpar en ändring på schemat och sparar den åt pågående byggen."""
+        with self._las:
+            for buffert in self._buffertar:
+                buffert.append((andra, operation, fore, efter))
+            if self._byggd is not None:
+                andra(operation, fore, efter)
+
+    def visning_andrad(self, operation, fore, efter):
+        """Lyssnare på VisningRepository."""
+        self._lyssna(self._andra_visning, operation, fore, efter)
+
+    def _andra_visning(self, operation, fore, efter):
+        # En flyttad visning tas bort från sin gamla plats först
+        self._ta_bort((efter or fore)['id'])
+        if operation != 'radera':
+            self._satt(efter['id'], efter['bostad_id'], efter['maklare_id'], efter['start'], efter['slut'])
+
+    def bostad_andrad(self, operation, fore, efter):
+        """
+        Lyssnare på BostadRepository: en raderad eller arkiverad (såld/borttagen) bostad
+        ska inte ha några visningar kvar. Ett aktuellt schema vet vilka bostäder som har
+        visningar, så arkiveringen av tusentals bostäder blir inte en fråga per bostad.
+        Är schemat inte byggt (eller för gammalt) frågar vi databasen istället för att
+        bygga om det mitt i en radering.
+        """
+        if operation not in ('radera', 'arkivera'):
+            return
+        with self._las:
+            aktuellt = self._byggd is not None and time.monotonic() - self._byggd <= self.max_alder_sekunder
+            har_visningar = fore['id'] in self._per_bostad
+        if har_visningar or not aktuellt:
+            visning_repo.radera_for(bostad_id=fore['id'])
+
+    def maklare_andrad(self, operation, fore, efter):
+        """Lyssnare på MaklareRepository: namn och kontor, och en raderad mäklares visningar."""
+        if operation == 'radera':
+            visning_repo.radera_for(maklare_id=fore['id'])
+        self._lyssna(self._andra_maklare, operation, fore, efter)
+
+    def _andra_maklare(self, operation, fore, efter):
+        if operation == 'radera':
+            self._maklare.pop(fore['id'], None)
+        else:
+            self._maklare[efter['id']] = MaklareDTO(**efter)
+
+    # ------------------------------------------------------------
+    # SÖKA
+    # ------------------------------------------------------------
+
+    def maklare(self, kontor_id=None):
+        """Returns: list: MaklareDTO:er (alla, eller de på kontoret), sorterade på namn."""
+        self._sakerstall_aktuellt()
+        with self._las:
+            valda = [maklare for maklare in self._maklare.values() if kontor_id is None or maklare.kontor_id == kontor_id]
+        return sorted(valda, key=lambda maklare: maklare.namn)
+
+    def konflikter(self, maklare_id, start, slut):
+        """
+        Returns:
+            list: Id:n för mäklarens visningar som överlappar [start, slut).
+        """
+        self._sakerstall_aktuellt()
+        with self._las:
+            index = self._index.get(maklare_id)
+            return [visning_id for _, _, visning_id in index.overlappar(start, slut)] if index else []
+
+    def lediga_maklare(self, start, slut, kontor_id=None):
+        """Returns: list: MaklareDTO:er (alla, eller på kontoret) som inte har någon visning i [start, slut)."""
+        return [maklare for maklare in self.maklare(kontor_id) if not self.konflikter(maklare.id, start, slut)]
+
+    def lediga_tider(self, maklare_id, fran, till, minsta_minuter=MINSTA_LUCKA_MINUTER, arbetstid=ARBETSTID):
+        """
+        Mäklarens lediga luckor under arbetstid i [fran, till).
+
+        Returns:
+            list: (start, slut)-par i tidsordning, var och en minst 'minsta_minuter' lång.
+        """
+        self._sakerstall_aktuellt()
+        minsta = timedelta(minutes=minsta_minuter)
+        with self._las:
+            index = self._index.get(maklare_id) or Intervallindex()
+            return [lucka for dag_fran, dag_till in arbetsdagar(fran, till, arbetstid)
+                    for lucka in index.luckor(dag_fran, dag_till, minsta)]
+
+    def ledighet(self, fran, till, kontor_id=None, minsta_minuter=MINSTA_LUCKA_MINUTER):
+        """
+        Lediga tider för alla mäklare (eller alla på ett kontor), t.ex. för en hel vecka.
+
+        Returns:
+            list: (MaklareDTO, [(start, slut), ...]) per mäklare, sorterat på namn.
+        """
+        return [(maklare, self.lediga_tider(maklare.id, fran, till, minsta_minuter))
+                for maklare in self.maklare(kontor_id)]
+
+    def antal_for_bostad(self, bostad_id):
+        """Hur många kommande visningar bostaden har (utan SQL)."""
+        self._sakerstall_aktuellt()
+        with self._las:
+            return len(self._per_bostad.get(bostad_id, ()))
+
+    def statistik(self):
+        with self._las:
+            return {'visningar': len(self._visningar), 'maklare': len(self._maklare),
+                    'byggd_for_sekunder': None if self._byggd is None else round(time.monotonic() - self._byggd)}
+
+
+# ============================================================
+# KALENDER (iCalendar, RFC 5545)
+# ============================================================
+
+def _ics_text(text):
+    """Skyddar tecken som har en betydelse i iCalendar."""
+    return (text or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _ics_rad(rad):
+    """Rader längre än 75 byte viks: fortsättningen börjar med ett mellanslag."""
+    bitar, bit = [], b''
+    for tecken in rad:
+        kodat = tecken.encode('utf-8')
+        if len(bit) + len(kodat) > (75 if not bitar else 74):
+            bitar.append(bit.decode('utf-8'))
+            bit = b''
+        bit += kodat
+    bitar.append(bit.decode('utf-8'))
+    return '\r\n '.join(bitar)
+
+
+def kalender_ics(namn, visningar, bostader, doman='blgeestates.se'):
+    """
+    En kalenderfil med visningarna.
+
+    Args:
+        namn (str): Kalenderns namn, t.ex. 'Visningar - Anna Ståhl'.
+        visningar (list): Visning-objekt.
+        bostader (dict): bostad_id -> bostad (adress och stad blir rubrik och plats).
+
+    Returns:
+        str: iCalendar-text. Tiderna är lokal tid utan tidszon ("floating"), som i databasen.
+    """
+    stampel = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')   # DTSTAMP ska vara i UTC
+    rader = ['BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//Blge Estates//Visningar//SV',
+             'CALSCALE:GREGORIAN', f'X-WR-CALNAME:{_ics_text(namn)}']
+    for visning in visningar:
+        bostad = bostader.get(visning.bostad_id)
+        adress = f'{bostad.adress}, {bostad.stad}' if bostad else f'Bostad {visning.bostad_id}'
+        rader += ['BEGIN:VEVENT',
+                  f'UID:visning-{visning.id}@{doman}',
+                  f'DTSTAMP:{stampel}',
+                  f'DTSTART:{visning.start:%Y%m%dT%H%M%S}',
+                  f'DTEND:{visning.slut:%Y%m%dT%H%M%S}',
+                  f'SUMMARY:{_ics_text("Visning: " + adress)}',
+                  f'LOCATION:{_ics_text(adress)}']
+        if visning.info:
+            rader.append(f'DESCRIPTION:{_ics_text(visning.info)}')
+        rader.append('END:VEVENT')
+    rader.append('END:VCALENDAR')
+    return '\r\n'.join(_ics_rad(rad) for rad in rader) + '\r\n'
+
+
+def kalender_for_maklare(maklare_idn, namn, dagar_bakat=30, dagar_framat=180):
+    """Kalenderfilen för en eller flera mäklares visningar (t.ex. ett kontors), en månad bakåt och ett halvår framåt."""
+    nu = datetime.now()
+    visningar = visning_repo.hamta_for_maklare(maklare_idn, nu - timedelta(days=dagar_bakat),
+                                               nu + timedelta(days=dagar_framat))
+    bostader = bostad_repo.hamta_flera(sorted({visning.bostad_id for visning in visningar}), som_dto=True)
+    return kalender_ics(namn, visningar, {bostad.id: bostad for bostad in bostader})
+
+
+# ETT gemensamt visningsschema för hela appen
+visningsschema = Visningsschema()
+
+
+def init_visningsschema(app):
+    """Kopplar visningsschemat till repositoryna och läser inställningar från config."""
+    visningsschema.max_alder_sekunder = app.config.get('VISNINGSSCHEMA_MAX_ALDER', STANDARD_MAX_ALDER_SEKUNDER)
+    for repo, lyssnare in ((visning_repo, visningsschema.visning_andrad),
+                           (bostad_repo, visningsschema.bostad_andrad),
+                           (maklare_repo, visningsschema.maklare_andrad)):
+        if lyssnare not in repo.lyssnare:
+            repo.registrera_lyssnare(lyssnare)